@@ -2,18 +2,33 @@
 API REST para el Sistema Predictivo de Diabetes
 Implementación con FastAPI para servir predicciones en producción
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import Dict, List, Optional, Any
 import uvicorn
+import asyncio
 import logging
+import secrets
 from datetime import datetime
 import json
 
 # Importar módulos del proyecto
-from predictor import DiabetesPredictor, predict_glucose
+from predictor import DiabetesPredictor
+from model_registry import model_registry
+from inference_executor import (
+    inference_executor, InferenceQueueFull, run_predict, run_predict_batch_response
+)
+from micro_batcher import micro_batcher
+from stream_scoring import NDJSONScoringResponse
+from prediction_log import prediction_log
+from metrics import MetricsMiddleware, count_predictions, render_metrics, time_stage
+from request_tracing import RequestTracingMiddleware, slow_request_log
+from profiler import (
+    PROFILE_FORMATS, ProfilerBusy, StackSampler, load_logged_prediction, profile_prediction,
+    profiling_session
+)
 from config import config
 
 # Configurar logging
@@ -38,6 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Etiquetas y latencia de cada petición para /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Modelos Pydantic para validación de datos
 class PatientData(BaseModel):
     """Modelo para datos del paciente"""
@@ -65,6 +83,17 @@ class PatientData(BaseModel):
             raise ValueError('Los hombres no pueden tener diabetes gestacional')
         return v
 
+    @model_validator(mode='wrap')
+    @classmethod
+    def measure_validation(cls, data, handler):
+        """Medir la etapa de validación de cada paciente"""
+        with time_stage('validation'):
+            return handler(data)
+
+# Identificador, Server-Timing y captura de peticiones lentas (solo se
+# guardan del payload los campos de paciente)
+app.add_middleware(RequestTracingMiddleware, allowed_fields=list(PatientData.model_fields))
+
 class PredictionResponse(BaseModel):
     """Respuesta de predicción"""
     glucose_mg_dl: float
@@ -94,16 +123,42 @@ class HealthResponse(BaseModel):
     total_predictions: int
 
 # Variables globales
-predictor = None
 prediction_counter = 0
 
 def get_predictor() -> DiabetesPredictor:
-    """Obtener instancia del predictor"""
-    global predictor
-    if predictor is None:
-        predictor = DiabetesPredictor()
-        logger.info("Predictor cargado exitosamente")
-    return predictor
+    """Obtener instancia del predictor compartida a través del registro de modelos"""
+    return model_registry.get_predictor()
+
+async def run_inference(func, *args):
+    """Ejecutar una inferencia en el pool acotado; 503 si la cola está llena"""
+    try:
+        return await inference_executor.run(func, *args)
+    except InferenceQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """
+    Exigir X-Admin-Token en los endpoints /admin
+
+    Sin ADMIN_TOKEN configurado los endpoints quedan deshabilitados (403):
+    exponen datos de pacientes y sesiones de perfilado costosas.
+    """
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Endpoints de administración deshabilitados (ADMIN_TOKEN no configurado)")
+    if not secrets.compare_digest(x_admin_token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+async def predict_one(data_dict: Dict[str, Any], model_name: str = None) -> Dict[str, Any]:
+    """Predecir para un paciente, agrupándolo con peticiones concurrentes si está habilitado"""
+    if not config.MICRO_BATCH_ENABLED:
+        return await run_inference(run_predict, data_dict, model_name)
+
+    try:
+        return await micro_batcher.submit(data_dict, model_name)
+    except InferenceQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
@@ -166,7 +221,7 @@ async def get_model_info():
     )
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_diabetes(patient_data: PatientData, background_tasks: BackgroundTasks):
+async def predict_diabetes(patient_data: PatientData):
     """Predecir nivel de glucosa para un paciente"""
     import time
     start_time = time.time()
@@ -174,12 +229,13 @@ async def predict_diabetes(patient_data: PatientData, background_tasks: Backgrou
     try:
         global prediction_counter
         prediction_counter += 1
+        count_predictions()
 
         # Convertir datos Pydantic a diccionario
         data_dict = patient_data.dict()
 
-        # Hacer predicción
-        result = predict_glucose(data_dict)
+        # Hacer predicción fuera del event loop
+        result = await predict_one(data_dict)
 
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -189,10 +245,11 @@ async def predict_diabetes(patient_data: PatientData, background_tasks: Backgrou
         # Log de predicción
         logger.info(f"Predicción realizada: {result['glucose_mg_dl']} mg/dL - {result['category']}")
 
-        # Tarea en background para logging
-        background_tasks.add_task(log_prediction, patient_data.dict(), result)
+        # Registro en el búfer del log (se escribe por lotes en segundo plano)
+        with time_stage('logging'):
+            log_prediction(data_dict, result)
 
-        return PredictionResponse(
+        response = PredictionResponse(
             glucose_mg_dl=result["glucose_mg_dl"],
             category=result["category"],
             risk_level=result["risk_level"],
@@ -202,6 +259,9 @@ async def predict_diabetes(patient_data: PatientData, background_tasks: Backgrou
             model_version="2.0.0",
             processing_time_ms=round(processing_time, 2)
         )
+        with time_stage('serialization'):
+            body = response.model_dump_json()
+        return Response(content=body, media_type="application/json")
 
     except HTTPException:
         raise
@@ -217,37 +277,49 @@ async def predict_batch(patients_data: List[PatientData]):
 
     try:
         global prediction_counter
-        results = []
-
-        for patient_data in patients_data:
-            # Convertir a diccionario
-            data_dict = patient_data.dict()
-
-            # Hacer predicción
-            result = predict_glucose(data_dict)
 
-            if "error" in result:
-                result["error"] = f"Error en paciente: {result['error']}"
+        # Predecir todo el lote y serializar la respuesta fuera del event loop
+        body, processing_time = await run_inference(run_predict_batch_response,
+                                                    patients_data, start_time)
 
-            results.append(result)
-            prediction_counter += 1
+        prediction_counter += len(patients_data)
+        count_predictions(len(patients_data))
 
-        processing_time = (time.time() - start_time) * 1000
         logger.info(f"Predicción batch completada: {len(patients_data)} pacientes en {processing_time:.2f}ms")
 
-        return {
-            "results": results,
-            "total_patients": len(patients_data),
-            "processing_time_ms": round(processing_time, 2),
-            "timestamp": datetime.now().isoformat()
-        }
+        return Response(content=body, media_type="application/json")
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error en predicción batch: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error en batch: {str(e)}")
 
+@app.post("/predict/stream")
+async def predict_stream(request: Request, model_name: Optional[str] = None):
+    """
+    Predecir en streaming para pacientes en NDJSON (un PatientData por línea)
+
+    Los resultados se devuelven en NDJSON, en el orden de entrada y con el
+    número de línea de cada paciente, a medida que se completa cada lote.
+    """
+    valid_models = ["random_forest", "gradient_boosting"]
+    if model_name is not None and model_name not in valid_models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modelo no disponible. Modelos válidos: {', '.join(valid_models)}"
+        )
+
+    def on_scored(n: int):
+        global prediction_counter
+        prediction_counter += n
+        count_predictions(n)
+
+    return NDJSONScoringResponse(model_name=model_name, validator=PatientData,
+                                 on_scored=on_scored)
+
 @app.post("/models/{model_name}/predict")
-async def predict_with_model(model_name: str, patient_data: PatientData, background_tasks: BackgroundTasks):
+async def predict_with_model(model_name: str, patient_data: PatientData):
     """Predecir usando un modelo específico"""
     import time
     start_time = time.time()
@@ -255,6 +327,7 @@ async def predict_with_model(model_name: str, patient_data: PatientData, backgro
     try:
         global prediction_counter
         prediction_counter += 1
+        count_predictions()
 
         # Validar nombre del modelo
         valid_models = ["random_forest", "gradient_boosting"]
@@ -268,7 +341,7 @@ async def predict_with_model(model_name: str, patient_data: PatientData, backgro
         data_dict = patient_data.dict()
 
         # Hacer predicción con modelo específico
-        result = predict_glucose(data_dict, model_name=model_name)
+        result = await predict_one(data_dict, model_name)
 
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
@@ -278,10 +351,11 @@ async def predict_with_model(model_name: str, patient_data: PatientData, backgro
         # Log de predicción
         logger.info(f"Predicción con {model_name}: {result['glucose_mg_dl']} mg/dL - {result['category']}")
 
-        # Tarea en background para logging
-        background_tasks.add_task(log_prediction, patient_data.dict(), result)
+        # Registro en el búfer del log (se escribe por lotes en segundo plano)
+        with time_stage('logging'):
+            log_prediction(data_dict, result)
 
-        return PredictionResponse(
+        response = PredictionResponse(
             glucose_mg_dl=result["glucose_mg_dl"],
             category=result["category"],
             risk_level=result["risk_level"],
@@ -291,6 +365,9 @@ async def predict_with_model(model_name: str, patient_data: PatientData, backgro
             model_version=f"2.0.0-{model_name}",
             processing_time_ms=round(processing_time, 2)
         )
+        with time_stage('serialization'):
+            body = response.model_dump_json()
+        return Response(content=body, media_type="application/json")
 
     except HTTPException:
         raise
@@ -298,6 +375,112 @@ async def predict_with_model(model_name: str, patient_data: PatientData, backgro
         logger.error(f"Error en predicción con modelo {model_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
+@app.get("/stats/batching")
+async def get_batching_stats():
+    """Métricas del micro-batching y del ejecutor de inferencia"""
+    return {
+        "enabled": config.MICRO_BATCH_ENABLED,
+        "micro_batching": micro_batcher.get_stats(),
+        "executor": inference_executor.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def get_slow_requests(limit: Optional[int] = None):
+    """Peticiones de predicción más lentas que el umbral, con payload saneado y tiempos por etapa"""
+    return {
+        **slow_request_log.get_stats(),
+        "requests": slow_request_log.get_entries(limit),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.delete("/admin/slow-requests", dependencies=[Depends(require_admin)])
+async def clear_slow_requests():
+    """Vaciar el búfer de peticiones lentas"""
+    slow_request_log.clear()
+    return {"status": "cleared", "timestamp": datetime.now().isoformat()}
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_process(seconds: float = 5.0, interval_ms: Optional[float] = None,
+                          format: str = "collapsed"):
+    """
+    Muestrear las pilas de todos los hilos del proceso durante `seconds` segundos
+
+    Devuelve pilas colapsadas (texto) o JSON de speedscope. Solo se permite
+    una sesión de perfilado a la vez.
+    """
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400,
+                            detail=f"Formato no válido. Opciones: {', '.join(PROFILE_FORMATS)}")
+    if not 0 < seconds <= config.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400,
+                            detail=f"La duración debe estar entre 0 y {config.PROFILER_MAX_SECONDS} s")
+
+    sampler = StackSampler(interval_ms=interval_ms)
+    try:
+        with profiling_session():
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    summary = sampler.get_summary()
+    logger.info(f"Perfil de muestreo: {summary}")
+    if format == "speedscope":
+        return JSONResponse(sampler.to_speedscope())
+    return PlainTextResponse(sampler.to_collapsed(),
+                             headers={"X-Profile-Summary": json.dumps(summary)})
+
+@app.post("/admin/profile/replay", dependencies=[Depends(require_admin)])
+async def profile_replay(entry: int = -1, model_name: Optional[str] = None, repeat: int = 100,
+                         sort: str = "cumulative", limit: int = 30):
+    """
+    Repetir bajo cProfile una predicción del log de predicciones
+
+    `entry` es la posición en el log (negativa desde la más reciente).
+    """
+    if not 1 <= repeat <= config.PROFILER_MAX_REPEAT:
+        raise HTTPException(status_code=400,
+                            detail=f"repeat debe estar entre 1 y {config.PROFILER_MAX_REPEAT}")
+    valid_models = ["random_forest", "gradient_boosting"]
+    if model_name is not None and model_name not in valid_models:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Modelo no disponible. Modelos válidos: {', '.join(valid_models)}"
+        )
+
+    try:
+        with profiling_session():
+            # Escribir las entradas pendientes para poder repetir las más recientes
+            await asyncio.to_thread(prediction_log.flush, 1.0)
+            logged = await asyncio.to_thread(load_logged_prediction, entry)
+            report = await run_inference(profile_prediction, logged["patient_data"],
+                                         model_name, repeat, sort, limit)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        **report,
+        "entry": entry,
+        "logged_at": logged.get("timestamp"),
+        "patient_data": logged["patient_data"],
+        "logged_prediction": logged.get("prediction"),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas en formato Prometheus (agregadas entre workers si PROMETHEUS_MULTIPROC_DIR está definido)"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/models")
 async def get_available_models():
     """Obtener lista de modelos disponibles"""
@@ -379,24 +562,10 @@ async def get_feature_info():
 
     return features_info
 
-async def log_prediction(patient_data: dict, result: dict):
-    """Log de predicción en background"""
-    try:
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "patient_data": patient_data,
-            "prediction": result,
-            "glucose_value": result["glucose_mg_dl"],
-            "category": result["category"]
-        }
-
-        # Guardar log en archivo (en producción usar base de datos)
-        log_file = config.OUTPUTS_DIR / "api_predictions.log"
-        with open(log_file, "a") as f:
-            f.write(json.dumps(log_entry) + "\n")
-
-    except Exception as e:
-        logger.error(f"Error guardando log: {e}")
+def log_prediction(patient_data: dict, result: dict):
+    """Registrar una predicción en el log (sin E/S en el event loop)"""
+    if config.PREDICTION_LOG_ENABLED:
+        prediction_log.log(patient_data, result)
 
 @app.on_event("startup")
 async def startup_event():
@@ -420,6 +589,10 @@ async def shutdown_event():
     logger.info("🛑 Apagando API del Sistema Predictivo de Diabetes")
     logger.info(f"📊 Total de predicciones realizadas: {prediction_counter}")
 
+    inference_executor.shutdown()
+    prediction_log.close()
+    logger.info(f"📝 Log de predicciones: {prediction_log.get_stats()}")
+
 def main():
     """Función principal para ejecutar la API"""
     import argparse
@@ -0,0 +1,420 @@
+"""
+Suite de micro-benchmarks de los caminos críticos del sistema
+
+Mide, para varios tamaños de entrada (1, 100, 10.000 y 1.000.000 de filas por
+defecto), el tiempo y la memoria pico de:
+
+- DiabetesPredictor.predict (una llamada por paciente) y predict_batch
+- DiabetesDataPreprocessor.prepare_data
+- DiabetesDataGenerator.generate_synthetic_data
+- DiabetesModelTrainer.train_model, por modelo
+
+Cada medición repite la operación hasta acumular --min-time segundos (con un
+máximo de --repeats) y reporta la mediana; la memoria pico se mide en una
+ejecución aparte con tracemalloc para no distorsionar los tiempos. Los
+resultados se guardan como línea base en disco y, al volver a ejecutar, se
+marcan como regresión las mediciones que superan la línea base en más de la
+tolerancia (código de salida 1).
+
+Los benchmarks muy lentos a gran escala tienen un tamaño máximo por defecto
+(ver BENCHMARKS); --full los ejecuta en todos los tamaños.
+
+Uso:
+    python benchmark_suite.py --save-baseline
+    python benchmark_suite.py --benchmarks predictor --sizes 1 100 10000
+    python benchmark_suite.py --tolerance 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import config
+
+DEFAULT_SIZES = (1, 100, 10_000, 1_000_000)
+DEFAULT_BASELINE = config.OUTPUTS_DIR / "benchmarks" / "baseline.json"
+
+# Filas generadas con DiabetesDataGenerator; los tamaños mayores se obtienen
+# remuestreando esta base para no depender de la velocidad del generador
+BASE_DATASET_SIZE = 10_000
+
+# Columnas de entrada del predictor (campos de PatientData)
+PATIENT_COLUMNS = [
+    'edad', 'sexo', 'imc', 'tas', 'tad', 'perimetro_abdominal', 'frecuencia_cardiaca',
+    'realiza_ejercicio', 'consume_alcohol', 'fuma', 'medicamentos_hta',
+    'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc', 'riesgo_cardiovascular'
+]
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+class Benchmark:
+    """Operación a medir: setup(tamaño) prepara el estado y run(estado) es lo que se mide"""
+
+    def __init__(self, name: str, setup: Callable[[int], Any], run: Callable[[Any], Any],
+                 min_size: int = 1, max_size: int = None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.min_size = min_size
+        self.max_size = max_size
+
+    def supports(self, size: int, full: bool = False) -> bool:
+        """Si el benchmark se ejecuta con ese tamaño"""
+        if size < self.min_size:
+            return False
+        return full or self.max_size is None or size <= self.max_size
+
+# Datos compartidos entre benchmarks
+
+_cache: Dict[Any, Any] = {}
+
+def _quiet():
+    """Silenciar los print de progreso de los módulos medidos"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def raw_dataset(size: int) -> pd.DataFrame:
+    """Dataset crudo de `size` filas (remuestreado desde una base generada)"""
+    if 'base' not in _cache:
+        from data_generator import DiabetesDataGenerator
+        with _quiet():
+            generator = DiabetesDataGenerator(n_samples=BASE_DATASET_SIZE, random_state=config.RANDOM_SEED)
+            _cache['base'] = generator.generate_synthetic_data()
+    base = _cache['base']
+    if size <= len(base):
+        return base.iloc[:size].reset_index(drop=True)
+    rows = np.random.default_rng(size).integers(0, len(base), size)
+    df = base.iloc[rows].reset_index(drop=True)
+    df['identificacion'] = np.arange(size)
+    return df
+
+def training_data(size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Matrices escaladas de entrenamiento y prueba con `size` filas en total"""
+    key = ('training', size)
+    if key not in _cache:
+        from sklearn.model_selection import train_test_split
+        from data_preprocessor import DiabetesDataPreprocessor
+
+        with _quiet():
+            preprocessor = DiabetesDataPreprocessor()
+            df = preprocessor.prepare_data(raw_dataset(size))
+            X = df.drop(columns=['Resultado'])
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, df['Resultado'], test_size=config.TEST_SIZE, random_state=config.RANDOM_SEED)
+            X_train, X_test = preprocessor.scale_features(X_train, X_test)
+        _cache[key] = (X_train, X_test, y_train.to_numpy(), y_test.to_numpy())
+    return _cache[key]
+
+def benchmark_predictor():
+    """Predictor con un modelo pequeño entrenado para la suite (independiente de models/)"""
+    if 'predictor' not in _cache:
+        import joblib
+        from sklearn.ensemble import GradientBoostingRegressor
+        from data_preprocessor import preprocess_diabetes_data
+        from predictor import DiabetesPredictor
+
+        with _quiet():
+            df, preprocessor = preprocess_diabetes_data(raw_dataset(2000))
+            X = df.drop(columns=['Resultado'])
+            X_scaled, _ = preprocessor.scale_features(X, X.iloc[:1])
+            model = GradientBoostingRegressor(n_estimators=100, max_depth=3,
+                                              random_state=config.RANDOM_SEED)
+            model.fit(X_scaled, df['Resultado'])
+
+            directory = tempfile.mkdtemp(prefix="benchmark_predictor_")
+            model_path = Path(directory) / "model.joblib"
+            scaler_path = Path(directory) / "scaler.joblib"
+            joblib.dump(model, model_path)
+            joblib.dump(preprocessor.scaler, scaler_path)
+            preprocessor.feature_transformer.save(Path(directory) / config.FEATURE_TRANSFORMER_FILENAME)
+            _cache['predictor'] = DiabetesPredictor(model_path=str(model_path),
+                                                    scaler_path=str(scaler_path))
+    return _cache['predictor']
+
+def patients(size: int) -> List[Dict[str, Any]]:
+    """Pacientes con el formato de la API"""
+    df = raw_dataset(size)[PATIENT_COLUMNS]
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+# Definición de los benchmarks
+
+def _predict_each(state):
+    predictor, batch = state
+    for patient in batch:
+        predictor.predict(patient)
+
+def _predict_batch(state):
+    predictor, batch = state
+    predictor.predict_batch(batch)
+
+def _prepare_data(df: pd.DataFrame):
+    from data_preprocessor import DiabetesDataPreprocessor
+    with _quiet():
+        DiabetesDataPreprocessor().prepare_data(df)
+
+def _generate(size: int):
+    from data_generator import DiabetesDataGenerator
+    with _quiet():
+        DiabetesDataGenerator(n_samples=size, random_state=config.RANDOM_SEED,
+                              vectorized=False).generate_synthetic_data()
+
+def _generate_vectorized(size: int):
+    from data_generator import DiabetesDataGenerator
+    with _quiet():
+        DiabetesDataGenerator(n_samples=size, random_state=config.RANDOM_SEED,
+                              vectorized=True).generate_synthetic_data()
+
+def _train_setup(model_name: str):
+    def setup(size: int):
+        from model_trainer import DiabetesModelTrainer
+        with _quiet():
+            trainer = DiabetesModelTrainer()
+        return trainer, model_name, training_data(size)
+    return setup
+
+def _train(state):
+    from sklearn.base import clone
+    trainer, model_name, (X_train, X_test, y_train, y_test) = state
+    model = clone(trainer.models[model_name])
+    with _quiet():
+        trainer.train_model(model, X_train, y_train, X_test, y_test, model_name)
+
+# Modelos del entrenador (se evita importar model_trainer, y con él xgboost y
+# lightgbm, solo para listar los benchmarks)
+TRAINER_MODELS = (
+    'Linear Regression', 'Ridge Regression', 'Lasso Regression', 'Elastic Net',
+    'Random Forest', 'Extra Trees', 'Gradient Boosting', 'XGBoost', 'LightGBM',
+    'AdaBoost', 'Support Vector Machine', 'K-Nearest Neighbors', 'Neural Network'
+)
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark('predictor.predict', lambda size: (benchmark_predictor(), patients(size)),
+              _predict_each, max_size=10_000),
+    Benchmark('predictor.predict_batch', lambda size: (benchmark_predictor(), patients(size)),
+              _predict_batch, max_size=100_000),
+    Benchmark('preprocessor.prepare_data', raw_dataset, _prepare_data),
+    Benchmark('generator.generate_synthetic_data', lambda size: size, _generate, max_size=10_000),
+    Benchmark('generator.generate_synthetic_data[vectorized]', lambda size: size, _generate_vectorized),
+] + [
+    # Con menos filas no hay datos para la validación cruzada
+    Benchmark(f'trainer.train_model[{name}]', _train_setup(name), _train, min_size=100, max_size=10_000)
+    for name in TRAINER_MODELS
+]
+
+# Medición
+
+def measure(benchmark: Benchmark, size: int, repeats: int = 20, min_time: float = 1.0) -> Dict[str, Any]:
+    """
+    Medir un benchmark con un tamaño de entrada
+
+    Returns:
+        Dict: Mediana, mínimo y media (s), repeticiones, µs por fila y memoria pico (bytes)
+    """
+    state = benchmark.setup(size)
+
+    # Memoria pico en una ejecución aparte (tracemalloc ralentiza la ejecución)
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings = []
+    total = 0.0
+    while len(timings) < repeats and (total < min_time or len(timings) < 1):
+        start = time.perf_counter()
+        benchmark.run(state)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+
+    median = float(np.median(timings))
+    return {
+        "benchmark": benchmark.name,
+        "size": size,
+        "median_s": median,
+        "min_s": float(np.min(timings)),
+        "mean_s": float(np.mean(timings)),
+        "repeats": len(timings),
+        "us_per_row": median / size * 1e6,
+        "peak_memory_bytes": int(peak)
+    }
+
+def select_benchmarks(patterns: List[str] = None) -> List[Benchmark]:
+    """Benchmarks cuyo nombre empieza por alguno de los patrones (todos si no hay)"""
+    if not patterns:
+        return list(BENCHMARKS)
+    return [benchmark for benchmark in BENCHMARKS
+            if any(benchmark.name.startswith(pattern) for pattern in patterns)]
+
+def run_suite(benchmarks: List[Benchmark], sizes=DEFAULT_SIZES, repeats: int = 20,
+              min_time: float = 1.0, full: bool = False, verbose: bool = True) -> List[Dict[str, Any]]:
+    """Medir cada benchmark en cada tamaño soportado"""
+    results = []
+    for benchmark in benchmarks:
+        for size in sizes:
+            if not benchmark.supports(size, full):
+                continue
+            try:
+                result = measure(benchmark, size, repeats, min_time)
+            except Exception as e:
+                result = {"benchmark": benchmark.name, "size": size, "error": str(e)}
+            results.append(result)
+            if verbose:
+                _print_result(result)
+    return results
+
+def environment() -> Dict[str, Any]:
+    """Datos de la máquina y versiones, para saber si una línea base es comparable"""
+    import sklearn
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__
+    }
+
+def _key(result: Dict[str, Any]) -> str:
+    return f"{result['benchmark']}@{result['size']}"
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: Dict[str, Any],
+                        tolerance: float = 0.15, memory_tolerance: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    Comparar con una línea base
+
+    Returns:
+        List[Dict]: Una entrada por medición presente en ambas, con los
+        cambios relativos y si es una regresión de tiempo o de memoria
+    """
+    previous = {_key(result): result for result in baseline.get("results", []) if "error" not in result}
+    comparisons = []
+    for result in results:
+        old = previous.get(_key(result))
+        if old is None or "error" in result:
+            continue
+        time_change = result["median_s"] / old["median_s"] - 1 if old["median_s"] else 0.0
+        memory_change = (result["peak_memory_bytes"] / old["peak_memory_bytes"] - 1
+                         if old["peak_memory_bytes"] else 0.0)
+        comparisons.append({
+            "benchmark": result["benchmark"],
+            "size": result["size"],
+            "time_change": round(time_change, 4),
+            "memory_change": round(memory_change, 4),
+            "time_regression": time_change > tolerance,
+            "memory_regression": memory_change > memory_tolerance
+        })
+    return comparisons
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    """Leer una línea base (None si no existe)"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path: Path, results: List[Dict[str, Any]], merge: bool = True):
+    """Guardar los resultados como línea base (conservando las mediciones no repetidas)"""
+    path = Path(path)
+    previous = load_baseline(path) if merge else None
+    merged = {_key(result): result for result in (previous or {}).get("results", [])}
+    merged.update({_key(result): result for result in results if "error" not in result})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "timestamp": datetime.now().isoformat(),
+            "environment": environment(),
+            "results": list(merged.values())
+        }, f, indent=2, ensure_ascii=False)
+
+def _format_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}" if unit != "B" else f"{n} B"
+        n /= 1024
+
+def _print_result(result: Dict[str, Any]):
+    if "error" in result:
+        print(f"   ❌ {result['benchmark']:<45} {result['size']:>9,}  {result['error']}")
+        return
+    print(f"   {result['benchmark']:<45} {result['size']:>9,}  {result['median_s'] * 1000:>11.3f} ms "
+          f"{result['us_per_row']:>10.2f} µs/fila {_format_bytes(result['peak_memory_bytes']):>10} "
+          f"(x{result['repeats']})")
+
+def main():
+    """Punto de entrada de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de los caminos críticos")
+    parser.add_argument("--benchmarks", nargs="*",
+                        help="Prefijos de los benchmarks (p. ej. predictor trainer.train_model[Random)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(DEFAULT_SIZES), help="Filas de entrada")
+    parser.add_argument("--repeats", type=int, default=20, help="Repeticiones máximas por medición")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Segundos mínimos por medición")
+    parser.add_argument("--full", action="store_true", help="Ignorar el tamaño máximo de cada benchmark")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Archivo de línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados como línea base")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Aumento de tiempo tolerado")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="Aumento de memoria tolerado")
+    parser.add_argument("--output", help="Archivo JSON con el reporte de esta ejecución")
+    parser.add_argument("--list", action="store_true", help="Listar los benchmarks y salir")
+    args = parser.parse_args()
+
+    benchmarks = select_benchmarks(args.benchmarks)
+    if args.list or not benchmarks:
+        for benchmark in benchmarks or BENCHMARKS:
+            print(f"{benchmark.name} (filas {benchmark.min_size}-{benchmark.max_size or '∞'})")
+        return 0 if benchmarks else 1
+
+    baseline = load_baseline(args.baseline)
+    print(f"⏱️ {len(benchmarks)} benchmarks, tamaños {args.sizes}")
+    print(f"   {'benchmark':<45} {'filas':>9}  {'mediana':>14} {'por fila':>16} {'memoria':>10}")
+    results = run_suite(benchmarks, args.sizes, args.repeats, args.min_time, args.full)
+
+    comparisons = []
+    if baseline is not None:
+        if baseline.get("environment") != environment():
+            print("⚠️ La línea base se midió en otro entorno; la comparación es orientativa")
+        comparisons = compare_to_baseline(results, baseline, args.tolerance, args.memory_tolerance)
+        regressions = [c for c in comparisons if c["time_regression"] or c["memory_regression"]]
+        print(f"\n📈 Comparación con {args.baseline} ({len(comparisons)} mediciones, "
+              f"tolerancia {args.tolerance:.0%} tiempo / {args.memory_tolerance:.0%} memoria)")
+        for c in comparisons:
+            flag = "❌" if c["time_regression"] or c["memory_regression"] else "✅"
+            print(f"   {flag} {c['benchmark']}@{c['size']}: tiempo {c['time_change']:+.1%}, "
+                  f"memoria {c['memory_change']:+.1%}")
+    else:
+        regressions = []
+        print(f"\nℹ️ Sin línea base en {args.baseline} (usar --save-baseline)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "environment": environment(),
+                       "results": results, "comparison": comparisons}, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"💾 Línea base guardada: {args.baseline}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regresiones")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Scoring masivo fuera de línea para el Sistema Predictivo de Diabetes
+
+Lee un extracto de pacientes (CSV o Parquet, con el esquema de
+data_generator.py) por lotes, reparte los lotes entre un pool de procesos que
+cargan el modelo una sola vez cada uno y escribe los resultados como un
+dataset Parquet particionado (un archivo por lote). Cada lote terminado deja
+un checkpoint, de modo que una ejecución interrumpida continúa donde se quedó.
+
+Uso:
+    python bulk_scorer.py poblacion.csv salida/ --workers 8 --chunk-size 50000
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from config import config
+
+CHECKPOINT_DIR = "_checkpoints"
+RUN_FILENAME = "_run.json"
+REPORT_FILENAME = "_report.json"
+
+# Campos de entrada que se envían al predictor: los mismos de PatientData en
+# la API, de modo que cada fila recibe la misma predicción que en /predict
+# (el resto de columnas del extracto, como zona_residencia, no se usan)
+INPUT_COLUMNS = [
+    'edad', 'sexo', 'imc', 'tas', 'tad', 'perimetro_abdominal', 'frecuencia_cardiaca',
+    'realiza_ejercicio', 'consume_alcohol', 'fuma', 'medicamentos_hta',
+    'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc', 'riesgo_cardiovascular'
+]
+
+# Columnas de resultado escritas para cada paciente
+RESULT_COLUMNS = ['glucose_mg_dl', 'category', 'risk_level', 'confidence', 'error']
+
+# Predictor del proceso worker (se carga una vez en _init_worker)
+_worker_predictor = None
+
+def _init_worker(model_path: Optional[str], scaler_path: Optional[str], model_name: Optional[str]):
+    """Cargar el modelo una sola vez por proceso worker"""
+    global _worker_predictor
+    from model_registry import get_predictor
+    _worker_predictor = get_predictor(model_path=model_path, scaler_path=scaler_path,
+                                      model_name=model_name)
+
+def _coalesce_batches(batches, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Agrupar los lotes Arrow (uno por row group, a veces pequeños) en bloques de chunk_size filas"""
+    import pyarrow as pa
+
+    pending, rows = [], 0
+    for batch in batches:
+        if not batch.num_rows:
+            continue
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= chunk_size:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, rows = [], 0
+    if pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+def iter_input_chunks(input_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Leer un archivo CSV o Parquet (o un directorio de dataset Parquet) por lotes
+
+    Args:
+        input_path: Ruta al archivo (.csv o .parquet) o directorio Parquet con
+            particiones hive (como los de DiabetesDataGenerator.save_parquet)
+        chunk_size: Filas por lote
+
+    Yields:
+        pd.DataFrame: Lote con un índice de fila global
+    """
+    suffix = Path(input_path).suffix.lower()
+    start = 0
+
+    if Path(input_path).is_dir():
+        import pyarrow.dataset as ds
+        from data_generator import parquet_schema
+        dataset = ds.dataset(input_path, format="parquet", partitioning="hive")
+        # Las columnas de partición se leen al final: devolverlas al orden del
+        # generador para que las características salgan en el mismo orden
+        names = dataset.schema.names
+        columns = [name for name in parquet_schema().names if name in names]
+        columns += [name for name in names if name not in columns]
+        # Lectura sin hilos ni lectura anticipada: con hilos el escáner sigue
+        # leyendo mientras se procesa cada lote y la memoria crece con el dataset
+        batches = dataset.to_batches(columns=columns, batch_size=chunk_size, batch_readahead=1,
+                                     fragment_readahead=1, use_threads=False)
+        chunks = _coalesce_batches(batches, chunk_size)
+    elif suffix == '.csv':
+        chunks = pd.read_csv(input_path, chunksize=chunk_size)
+    elif suffix in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(input_path)
+        chunks = (batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=chunk_size))
+    else:
+        raise ValueError(f"Formato de entrada no soportado: {suffix} (usar .csv o .parquet)")
+
+    for chunk in chunks:
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        start += len(chunk)
+        yield chunk
+
+def score_chunk(chunk_index: int, chunk: pd.DataFrame, output_dir: str,
+                keep_columns: List[str], partition_by: Optional[str]) -> Dict[str, Any]:
+    """
+    Predecir un lote y escribir sus resultados en Parquet
+
+    Se ejecuta en un proceso worker. Cada archivo se escribe primero con un
+    nombre temporal y se renombra al terminar, así que un lote interrumpido
+    nunca deja un archivo a medias; volver a procesarlo lo sobrescribe.
+
+    Args:
+        chunk_index: Número del lote
+        chunk: Pacientes del lote
+        output_dir: Directorio del dataset de salida
+        keep_columns: Columnas de entrada copiadas a la salida
+        partition_by: Columna de resultado para particionar (opcional)
+
+    Returns:
+        Dict: Filas, segundos de cómputo y pid del worker
+    """
+    start_time = time.perf_counter()
+    predictor = _worker_predictor
+    if predictor is None:
+        from model_registry import get_predictor
+        predictor = get_predictor()
+
+    # Los valores ausentes llegan como NaN, que el predictor imputa igual que un campo vacío
+    patients = chunk[[col for col in INPUT_COLUMNS if col in chunk.columns]].to_dict('records')
+    results = pd.DataFrame(predictor.predict_batch(patients), index=chunk.index)
+    results = results.reindex(columns=RESULT_COLUMNS)
+
+    output = chunk[[col for col in keep_columns if col in chunk.columns]].copy()
+    output.insert(0, 'row', chunk.index.to_numpy())
+    output[RESULT_COLUMNS] = results
+
+    if partition_by:
+        partitions = output.groupby(output[partition_by].fillna('__null__'), sort=False)
+    else:
+        partitions = [(None, output)]
+
+    for value, part in partitions:
+        directory = Path(output_dir)
+        if value is not None:
+            directory = directory / f"{partition_by}={value}"
+            part = part.drop(columns=[partition_by])
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{chunk_index:06d}.parquet"
+        # Los nombres que empiezan por '.' o '_' se ignoran al leer el dataset
+        tmp_path = directory / f".{path.name}.tmp{os.getpid()}"
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    return {
+        "chunk": chunk_index,
+        "rows": len(chunk),
+        "seconds": time.perf_counter() - start_time,
+        "pid": os.getpid()
+    }
+
+class BulkScorer:
+    """Scoring masivo por lotes con pool de procesos y checkpoints"""
+
+    def __init__(self, input_path: str, output_dir: str, chunk_size: int = None,
+                 workers: int = None, model_path: str = None, scaler_path: str = None,
+                 model_name: str = None, keep_columns: List[str] = None, partition_by: str = None):
+        """
+        Inicializar el scorer
+
+        Args:
+            input_path: Archivo CSV o Parquet de entrada
+            output_dir: Directorio del dataset Parquet de salida
+            chunk_size: Filas por lote (opcional, usa BULK_CHUNK_SIZE)
+            workers: Procesos worker (opcional, usa BULK_WORKERS; 0 ejecuta en el proceso actual)
+            model_path: Ruta al modelo (opcional)
+            scaler_path: Ruta al scaler (opcional)
+            model_name: Nombre del modelo ('random_forest', 'gradient_boosting')
+            keep_columns: Columnas de entrada copiadas a la salida
+                (por defecto 'identificacion')
+            partition_by: Columna de resultado para particionar la salida
+                (p. ej. 'category')
+        """
+        self.input_path = str(input_path)
+        self.output_dir = Path(output_dir)
+        self.chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+        self.workers = config.BULK_WORKERS if workers is None else workers
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.model_name = model_name
+        self.keep_columns = ['identificacion'] if keep_columns is None else list(keep_columns)
+        self.partition_by = partition_by
+
+        if self.partition_by is not None and self.partition_by not in RESULT_COLUMNS:
+            raise ValueError(f"Solo se puede particionar por una columna de resultado: {RESULT_COLUMNS}")
+
+    def _run_params(self) -> Dict[str, Any]:
+        """Parámetros que deben coincidir para reanudar una ejecución"""
+        return {
+            "input_path": str(Path(self.input_path).resolve()),
+            "chunk_size": self.chunk_size,
+            "model_path": self.model_path,
+            "scaler_path": self.scaler_path,
+            "model_name": self.model_name,
+            "keep_columns": self.keep_columns,
+            "partition_by": self.partition_by
+        }
+
+    def _prepare_output(self) -> set:
+        """Crear el directorio de salida y devolver los lotes ya completados"""
+        checkpoint_dir = self.output_dir / CHECKPOINT_DIR
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        run_file = self.output_dir / RUN_FILENAME
+        params = self._run_params()
+        if run_file.exists():
+            previous = json.loads(run_file.read_text())
+            if previous != params:
+                raise ValueError(
+                    f"El directorio {self.output_dir} contiene otra ejecución "
+                    f"({previous}); usar otro directorio de salida"
+                )
+        else:
+            run_file.write_text(json.dumps(params, indent=2))
+
+        return {int(path.stem.split('-')[1]) for path in checkpoint_dir.glob("chunk-*.json")}
+
+    def _checkpoint(self, stats: Dict[str, Any]):
+        """Registrar un lote terminado"""
+        path = self.output_dir / CHECKPOINT_DIR / f"chunk-{stats['chunk']:06d}.json"
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(stats))
+        os.replace(tmp_path, path)
+
+    def _pending_chunks(self, completed: set) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """Lotes de entrada que aún no tienen checkpoint"""
+        for chunk_index, chunk in enumerate(iter_input_chunks(self.input_path, self.chunk_size)):
+            if chunk_index not in completed:
+                yield chunk_index, chunk
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Procesar todos los lotes pendientes
+
+        Returns:
+            Dict: Reporte con filas/s global y por worker
+        """
+        completed = self._prepare_output()
+        skipped = len(completed)
+        print(f"🔄 Scoring de {self.input_path} en lotes de {self.chunk_size} filas "
+              f"({self.workers} workers, {skipped} lotes ya completados)")
+
+        start_time = time.perf_counter()
+        chunk_stats: List[Dict[str, Any]] = []
+        args = (str(self.output_dir), self.keep_columns, self.partition_by)
+
+        if self.workers == 0:
+            _init_worker(self.model_path, self.scaler_path, self.model_name)
+            for chunk_index, chunk in self._pending_chunks(completed):
+                self._on_chunk_done(score_chunk(chunk_index, chunk, *args), chunk_stats)
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.model_path, self.scaler_path, self.model_name)) as executor:
+                # Como máximo dos lotes por worker en memoria a la vez
+                in_flight = set()
+                for chunk_index, chunk in self._pending_chunks(completed):
+                    in_flight.add(executor.submit(score_chunk, chunk_index, chunk, *args))
+                    if len(in_flight) >= 2 * self.workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._on_chunk_done(future.result(), chunk_stats)
+                for future in wait(in_flight).done:
+                    self._on_chunk_done(future.result(), chunk_stats)
+
+        report = self._build_report(chunk_stats, time.perf_counter() - start_time, skipped)
+        (self.output_dir / REPORT_FILENAME).write_text(json.dumps(report, indent=2))
+        return report
+
+    def _on_chunk_done(self, stats: Dict[str, Any], chunk_stats: List[Dict[str, Any]]):
+        """Registrar el checkpoint y el progreso de un lote"""
+        self._checkpoint(stats)
+        chunk_stats.append(stats)
+        print(f"   ✅ Lote {stats['chunk']}: {stats['rows']} filas en {stats['seconds']:.2f}s "
+              f"(worker {stats['pid']})")
+
+    @staticmethod
+    def _build_report(chunk_stats: List[Dict[str, Any]], elapsed: float, skipped: int) -> Dict[str, Any]:
+        """Filas/s global (sobre el tiempo real) y por worker (sobre su tiempo de cómputo)"""
+        per_worker: Dict[int, Dict[str, Any]] = {}
+        for stats in chunk_stats:
+            worker = per_worker.setdefault(stats['pid'], {"chunks": 0, "rows": 0, "seconds": 0.0})
+            worker["chunks"] += 1
+            worker["rows"] += stats['rows']
+            worker["seconds"] += stats['seconds']
+
+        for worker in per_worker.values():
+            worker["rows_per_second"] = round(worker["rows"] / worker["seconds"], 1) if worker["seconds"] else 0.0
+            worker["seconds"] = round(worker["seconds"], 3)
+
+        rows = sum(stats['rows'] for stats in chunk_stats)
+        return {
+            "chunks_scored": len(chunk_stats),
+            "chunks_skipped": skipped,
+            "rows": rows,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else 0.0,
+            "workers": {str(pid): worker for pid, worker in per_worker.items()}
+        }
+
+def main():
+    """Función principal del scoring masivo"""
+    parser = argparse.ArgumentParser(description="Scoring masivo de pacientes a Parquet particionado")
+    parser.add_argument("input", help="Archivo CSV o Parquet de entrada")
+    parser.add_argument("output_dir", help="Directorio del dataset Parquet de salida")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Filas por lote")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos worker (0 ejecuta en el proceso actual)")
+    parser.add_argument("--model", default=None, help="Modelo: random_forest o gradient_boosting")
+    parser.add_argument("--model-path", default=None, help="Ruta al modelo")
+    parser.add_argument("--scaler-path", default=None, help="Ruta al scaler")
+    parser.add_argument("--keep-columns", nargs="*", default=None,
+                        help="Columnas de entrada copiadas a la salida (por defecto identificacion)")
+    parser.add_argument("--partition-by", default=None, help="Columna de resultado para particionar")
+    args = parser.parse_args()
+
+    scorer = BulkScorer(args.input, args.output_dir, chunk_size=args.chunk_size,
+                        workers=args.workers, model_path=args.model_path,
+                        scaler_path=args.scaler_path, model_name=args.model,
+                        keep_columns=args.keep_columns, partition_by=args.partition_by)
+    report = scorer.run()
+
+    print("\n📊 REPORTE")
+    print(f"   Lotes procesados: {report['chunks_scored']} (omitidos por checkpoint: {report['chunks_skipped']})")
+    print(f"   Filas: {report['rows']} en {report['elapsed_seconds']}s "
+          f"({report['rows_per_second']} filas/s)")
+    for pid, worker in report["workers"].items():
+        print(f"   Worker {pid}: {worker['rows']} filas, {worker['rows_per_second']} filas/s")
+
+if __name__ == "__main__":
+    main()
@@ -23,18 +23,138 @@ class Config:
         self.DEFAULT_N_SAMPLES = 1000
         self.MIN_AGE = 18
         self.MAX_AGE = 90
+        # Generación sintética vectorizada (millones de filas en segundos); el
+        # modo registro a registro reproduce los datasets ya generados con la semilla
+        self.DATA_GENERATOR_VECTORIZED = os.getenv("DATA_GENERATOR_VECTORIZED", "false").lower() == "true"
+        # Filas por bloque al generar por bloques (iter_chunks / save_parquet);
+        # la memoria de save_parquet crece con el bloque, no con el total
+        self.DATA_GENERATOR_CHUNK_SIZE = int(os.getenv("DATA_GENERATOR_CHUNK_SIZE", "200000"))
+        # Procesos que generan los bloques en paralelo (0 genera en el proceso actual)
+        self.DATA_GENERATOR_WORKERS = int(os.getenv("DATA_GENERATOR_WORKERS", "0"))
+        # Tipos compactos en generador, preprocesador y entrenamiento (data_schema.py):
+        # categorías en lugar de textos, enteros pequeños y, opcionalmente, float32
+        self.DATA_COMPACT_DTYPES = os.getenv("DATA_COMPACT_DTYPES", "true").lower() == "true"
+        self.DATA_FLOAT32 = os.getenv("DATA_FLOAT32", "false").lower() == "true"
+        # Filas por bloque del preprocesamiento fuera de memoria (prepare_file)
+        self.PREPROCESS_CHUNK_SIZE = int(os.getenv("PREPROCESS_CHUNK_SIZE", "100000"))
+        # Caché de datasets preprocesados y particiones (dataset_cache.py), por
+        # hash de los datos de entrada, la configuración y la semilla
+        self.DATASET_CACHE_ENABLED = os.getenv("DATASET_CACHE_ENABLED", "true").lower() == "true"
+        self.DATASET_CACHE_DIR = Path(os.getenv("DATASET_CACHE_DIR", str(self.DATA_DIR / "cache")))
 
         # Configuración de entrenamiento
         self.CROSS_VAL_FOLDS = 5
         self.OPTIMIZATION_SCORING = 'r2'
+        # Entrenamiento de los modelos en paralelo (training_scheduler.py):
+        # procesos a la vez (0, por defecto, entrena uno tras otro en el proceso
+        # actual; los workers se crean con fork y algunas librerías con pools de
+        # hilos OpenMP pueden bloquearse tras fork), núcleos que se reparten entre
+        # ellos, segundos máximos por modelo y MB de memoria adicional por modelo
+        # antes de terminarlo (0 = sin límite)
+        self.TRAINING_WORKERS = int(os.getenv("TRAINING_WORKERS", "0"))
+        self.TRAINING_CPU_BUDGET = int(os.getenv("TRAINING_CPU_BUDGET", str(os.cpu_count() or 1)))
+        self.TRAINING_TIMEOUT = float(os.getenv("TRAINING_TIMEOUT", "3600"))
+        self.TRAINING_MEMORY_LIMIT_MB = float(os.getenv("TRAINING_MEMORY_LIMIT_MB", "0"))
+        # MB que pueden reservar a la vez los modelos en ejecución (0 = la
+        # memoria disponible del sistema al empezar)
+        self.TRAINING_MEMORY_BUDGET_MB = float(os.getenv("TRAINING_MEMORY_BUDGET_MB", "0"))
 
         # Configuración de exportación
         self.MODEL_EXPORT_FORMATS = ['joblib', 'pkl']
         self.METADATA_FILENAME = "model_metadata.json"
+        # Transformador de características ajustado, guardado junto a scaler.joblib
+        self.FEATURE_TRANSFORMER_FILENAME = "feature_transformer.joblib"
+
+        # Configuración del registro de modelos en memoria
+        # (segundos entre verificaciones de cambios en los archivos del modelo)
+        self.MODEL_REGISTRY_CHECK_INTERVAL = float(os.getenv("MODEL_REGISTRY_CHECK_INTERVAL", "5"))
+
+        # Motor de inferencia de ensambles de árboles: 'sklearn', 'compiled' o
+        # 'auto' (compilado hasta COMPILED_ENGINE_MAX_ROWS filas por llamada)
+        self.INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+        # Motor por modelo, p. ej. "random_forest=compiled,gradient_boosting=auto"
+        self.MODEL_INFERENCE_ENGINES = self._parse_engine_map(os.getenv("MODEL_INFERENCE_ENGINES", ""))
+        self.COMPILED_ENGINE_MAX_ROWS = int(os.getenv("COMPILED_ENGINE_MAX_ROWS", "64"))
+        # Modo de mapeo de los ensambles compilados en disco ('r' comparte las
+        # páginas entre workers; vacío los lee a memoria de cada proceso)
+        self.MODEL_MMAP_MODE = os.getenv("MODEL_MMAP_MODE", "r") or None
+
+        # Ejecutor de inferencia de la API: 'thread' o 'process', tareas en
+        # ejecución a la vez y tareas en espera antes de responder 503
+        self.INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+        self.INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
+        self.INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "64"))
+        # Prioridad más baja (nice) de los workers para que el event loop no espere CPU
+        self.INFERENCE_WORKER_NICE = int(os.getenv("INFERENCE_WORKER_NICE", "5"))
+
+        # Micro-batching de /predict: espera máxima del primer paciente (ms) y
+        # tamaño máximo de lote
+        self.MICRO_BATCH_ENABLED = os.getenv("MICRO_BATCH_ENABLED", "true").lower() == "true"
+        self.MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+        self.MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+        # Lotes en ejecución a la vez (0 = tantos como workers de inferencia)
+        self.MICRO_BATCH_MAX_CONCURRENT = int(os.getenv("MICRO_BATCH_MAX_CONCURRENT", "0"))
+
+        # Scoring en streaming de /predict/stream: pacientes por lote, lotes en
+        # vuelo antes de dejar de leer la petición y longitud máxima de línea
+        self.STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+        self.STREAM_MAX_IN_FLIGHT = int(os.getenv("STREAM_MAX_IN_FLIGHT", "2"))
+        self.STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+        # Scoring masivo fuera de línea (bulk_scorer.py): filas por lote y procesos worker
+        self.BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "50000"))
+        self.BULK_WORKERS = int(os.getenv("BULK_WORKERS", str(os.cpu_count() or 1)))
+
+        # Log de predicciones de la API: entradas por escritura, segundos máximos
+        # entre escrituras, entradas en memoria antes de aplicar la política
+        # ('drop' descarta, 'block' espera hasta PREDICTION_LOG_BLOCK_TIMEOUT s)
+        # y tamaño de segmento antes de rotar y comprimir
+        self.PREDICTION_LOG_ENABLED = os.getenv("PREDICTION_LOG_ENABLED", "true").lower() == "true"
+        self.PREDICTION_LOG_BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", "256"))
+        self.PREDICTION_LOG_FLUSH_INTERVAL = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL", "1.0"))
+        self.PREDICTION_LOG_MAX_PENDING = int(os.getenv("PREDICTION_LOG_MAX_PENDING", "10000"))
+        self.PREDICTION_LOG_POLICY = os.getenv("PREDICTION_LOG_POLICY", "drop")
+        self.PREDICTION_LOG_BLOCK_TIMEOUT = float(os.getenv("PREDICTION_LOG_BLOCK_TIMEOUT", "0.05"))
+        self.PREDICTION_LOG_SEGMENT_BYTES = int(os.getenv("PREDICTION_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+        self.PREDICTION_LOG_COMPRESS = os.getenv("PREDICTION_LOG_COMPRESS", "true").lower() == "true"
+
+        # Peticiones lentas de los endpoints de predicción: duración a partir de
+        # la cual se guardan (ms), entradas del búfer circular, bytes del cuerpo
+        # que se capturan y pacientes de un lote que se guardan
+        self.SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "250"))
+        self.SLOW_REQUEST_BUFFER_SIZE = int(os.getenv("SLOW_REQUEST_BUFFER_SIZE", "100"))
+        self.SLOW_REQUEST_MAX_BODY_BYTES = int(os.getenv("SLOW_REQUEST_MAX_BODY_BYTES", "65536"))
+        self.SLOW_REQUEST_MAX_ITEMS = int(os.getenv("SLOW_REQUEST_MAX_ITEMS", "20"))
+
+        # Endpoints /admin: ADMIN_TOKEN es obligatorio para habilitarlos y se
+        # exige en la cabecera X-Admin-Token (sin él responden 403)
+        self.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+        # Perfilado bajo demanda (/admin/profile): milisegundos entre muestras,
+        # duración máxima de una sesión y repeticiones máximas del replay
+        self.PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", "10"))
+        self.PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+        self.PROFILER_MAX_REPEAT = int(os.getenv("PROFILER_MAX_REPEAT", "10000"))
 
         # Crear directorios necesarios
         self._create_directories()
 
+    @staticmethod
+    def _parse_engine_map(value: str) -> dict:
+        """Convertir "modelo=motor,..." en un diccionario"""
+        engines = {}
+        for item in value.split(','):
+            if '=' in item:
+                name, engine = item.split('=', 1)
+                engines[name.strip()] = engine.strip()
+        return engines
+
+    def get_inference_engine(self, model_name: str = None) -> str:
+        """Motor de inferencia configurado para un modelo"""
+        if model_name and model_name in self.MODEL_INFERENCE_ENGINES:
+            return self.MODEL_INFERENCE_ENGINES[model_name]
+        return self.INFERENCE_ENGINE
+
     def _create_directories(self):
         """Crear directorios necesarios si no existen"""
         directories = [
@@ -3,21 +3,109 @@ Módulo para generación de datos sintéticos de diabetes
 """
 import numpy as np
 import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import random
-from typing import Dict, List, Optional
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
 from config import config, RANDOM_SEED
+from data_schema import CATEGORICAL_COLUMNS, MEASUREMENT_COLUMNS, compact_dtypes, memory_per_row
+
+# Proporción acumulada de cada categoría (Normal, Prediabetes, Diabetes) y
+# rango de glucosa base de cada una
+CATEGORY_CUMULATIVE = (0.40, 0.75)
+GLUCOSE_BASE_RANGES = np.array([[70, 99], [100, 126], [127, 200]], dtype=float)
+
+# Tipos compactos de las columnas al escribir Parquet: medidas en float32,
+# enteros pequeños y textos codificados como diccionario
+PARQUET_FLOAT_COLUMNS = MEASUREMENT_COLUMNS
+PARQUET_DICTIONARY_COLUMNS = tuple(CATEGORICAL_COLUMNS)
+DEFAULT_PARTITION_BY = ('estrato', 'zona_residencia')
+# Filas por row group (el escritor retiene hasta un row group por partición
+# abierta) y por archivo
+ROWS_PER_GROUP = 128 * 1024
+ROWS_PER_FILE = 4_000_000
+
+def parquet_schema():
+    """Esquema Parquet compacto de los datos sintéticos"""
+    import pyarrow as pa
+
+    fields = []
+    for name in ('identificacion', 'fecha_registro', 'edad', 'sexo', 'zona_residencia', 'estrato',
+                 'talla', 'peso', 'imc', 'perimetro_abdominal', 'tas', 'tad', 'frecuencia_cardiaca',
+                 'realiza_ejercicio', 'consume_alcohol', 'fuma', 'medicamentos_hta',
+                 'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc',
+                 'riesgo_cardiovascular', 'Resultado'):
+        if name == 'identificacion':
+            field_type = pa.int64()
+        elif name == 'fecha_registro':
+            field_type = pa.date32()
+        elif name == 'estrato':
+            field_type = pa.int8()
+        elif name in PARQUET_DICTIONARY_COLUMNS:
+            field_type = pa.dictionary(pa.int8(), pa.string())
+        else:
+            field_type = pa.float32()
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+def to_compact_table(df: pd.DataFrame, schema=None):
+    """Convertir un bloque generado en una tabla Arrow con los tipos compactos"""
+    import pyarrow as pa
+
+    schema = schema or parquet_schema()
+    columns = []
+    for field in schema:
+        values = df[field.name]
+        if field.name == 'fecha_registro':
+            array = pa.array(pd.to_datetime(values, format='%Y-%m-%d').to_numpy().astype('datetime64[D]'))
+        elif pa.types.is_dictionary(field.type) and isinstance(values.dtype, pd.CategoricalDtype):
+            array = pa.array(values).cast(field.type)
+        elif pa.types.is_dictionary(field.type):
+            array = pa.array(values.to_numpy(), type=pa.string()).dictionary_encode().cast(field.type)
+        else:
+            array = pa.array(values.to_numpy(), type=field.type)
+        columns.append(array)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+def _generate_chunk(generator: 'DiabetesDataGenerator', seed: np.random.SeedSequence,
+                    n: int, first_id: int) -> pd.DataFrame:
+    """Generar un bloque en un proceso worker"""
+    block = generator._generate_block(np.random.default_rng(seed), n, first_id=first_id)
+    return compact_dtypes(block) if generator.compact else block
 
 class DiabetesDataGenerator:
     """Generador de datos sintéticos para diabetes"""
 
-    def __init__(self, n_samples: int = None, random_state: int = None):
+    def __init__(self, n_samples: int = None, random_state: int = None, vectorized: bool = None,
+                 workers: int = None, compact: bool = None):
+        """
+        Inicializar el generador
+
+        Args:
+            n_samples: Número de registros (opcional, usa DEFAULT_N_SAMPLES)
+            random_state: Semilla (opcional, usa RANDOM_SEED)
+            vectorized: Generar cada columna para todas las filas a la vez con
+                numpy.random.Generator (opcional, usa DATA_GENERATOR_VECTORIZED).
+                Con la misma semilla produce datos distintos a los del modo
+                registro a registro, pero con las mismas distribuciones
+            workers: Procesos que generan los bloques del modo vectorizado
+                (opcional, usa DATA_GENERATOR_WORKERS; 0 genera en el proceso
+                actual). El resultado no depende del número de procesos
+            compact: Devolver los tipos compactos de data_schema.py
+                (opcional, usa DATA_COMPACT_DTYPES)
+        """
         self.n_samples = n_samples or config.DEFAULT_N_SAMPLES
         self.random_state = random_state or RANDOM_SEED
+        self.vectorized = config.DATA_GENERATOR_VECTORIZED if vectorized is None else vectorized
+        self.workers = config.DATA_GENERATOR_WORKERS if workers is None else workers
+        self.compact = config.DATA_COMPACT_DTYPES if compact is None else compact
 
-        # Configurar semillas para reproducibilidad
-        np.random.seed(self.random_state)
-        random.seed(self.random_state)
+        # Generadores propios para reproducibilidad (mismas secuencias que
+        # np.random.seed / random.seed, sin tocar el estado global)
+        self._np_random = np.random.RandomState(self.random_state)
+        self._random = random.Random(self.random_state)
 
     def generate_synthetic_data(self) -> pd.DataFrame:
         """
@@ -28,21 +116,26 @@ class DiabetesDataGenerator:
         """
         print(f"🔄 Generando dataset sintético con {self.n_samples} registros...")
 
+        if self.vectorized:
+            df = pd.concat(self.iter_chunks(), ignore_index=True)
+            self._report(df)
+            return df
+
         data = []
 
         for i in range(self.n_samples):
             # Determinar categoría de diabetes primero
-            rand = np.random.random()
+            rand = self._np_random.random()
 
             if rand < 0.40:  # 40% Normal
                 category = 0
-                glucose_base = np.random.uniform(70, 99)
+                glucose_base = self._np_random.uniform(70, 99)
             elif rand < 0.75:  # 35% Prediabetes
                 category = 1
-                glucose_base = np.random.uniform(100, 126)
+                glucose_base = self._np_random.uniform(100, 126)
             else:  # 25% Diabetes
                 category = 2
-                glucose_base = np.random.uniform(127, 200)
+                glucose_base = self._np_random.uniform(127, 200)
 
             # Generar características correlacionadas con la categoría
             record = self._generate_patient_record(i, category, glucose_base)
@@ -56,50 +149,252 @@ class DiabetesDataGenerator:
             if col != 'identificacion':
                 df[col] = df[col].round(2)
 
-        print(f"✅ Dataset generado: {df.shape[0]} registros, {df.shape[1]} columnas")
+        if self.compact:
+            df = compact_dtypes(df)
+        self._report(df)
         return df
 
+    @staticmethod
+    def _report(df: pd.DataFrame):
+        """Resumen del dataset generado"""
+        print(f"✅ Dataset generado: {df.shape[0]} registros, {df.shape[1]} columnas "
+              f"({memory_per_row(df):.0f} bytes por registro)")
+
+    def iter_chunks(self, chunk_size: int = None, workers: int = None) -> Iterator[pd.DataFrame]:
+        """
+        Generar el dataset en bloques de tamaño fijo (modo vectorizado)
+
+        Cada bloque usa su propio flujo aleatorio, hijo i-ésimo de
+        SeedSequence(random_state).spawn, así que los bloques son
+        independientes entre sí, un bloque se puede regenerar sin los
+        anteriores y el resultado es idéntico bit a bit con cualquier número
+        de procesos. Las identificaciones siguen siendo consecutivas entre
+        bloques.
+
+        Args:
+            chunk_size: Filas por bloque (opcional, usa DATA_GENERATOR_CHUNK_SIZE)
+            workers: Procesos worker (opcional, usa los del generador; 0
+                genera en el proceso actual)
+
+        Yields:
+            pd.DataFrame: Bloques en orden, con las mismas columnas que generate_synthetic_data
+        """
+        chunk_size = chunk_size or config.DATA_GENERATOR_CHUNK_SIZE
+        workers = self.workers if workers is None else workers
+        starts = range(0, self.n_samples, chunk_size)
+        chunks = [(seed, min(chunk_size, self.n_samples - start), start)
+                  for seed, start in zip(np.random.SeedSequence(self.random_state).spawn(len(starts)), starts)]
+
+        if workers == 0 or len(chunks) == 1:
+            for seed, n, first_id in chunks:
+                yield _generate_chunk(self, seed, n, first_id)
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Como máximo dos bloques por worker en vuelo; se entregan en orden
+            in_flight = deque()
+            for seed, n, first_id in chunks:
+                in_flight.append(executor.submit(_generate_chunk, self, seed, n, first_id))
+                if len(in_flight) >= 2 * workers:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def save_parquet(self, output_dir: Path = None, chunk_size: int = None,
+                     partition_by: Optional[Sequence[str]] = DEFAULT_PARTITION_BY,
+                     max_rows_per_file: int = None, workers: int = None) -> str:
+        """
+        Escribir el dataset en Parquet particionado bloque a bloque
+
+        Solo hay un bloque en memoria a la vez, así que la memoria no crece
+        con n_samples y se pueden generar datasets mayores que la RAM.
+
+        Args:
+            output_dir: Directorio del dataset (opcional, un directorio con
+                timestamp en DATA_DIR). Con partición se reemplazan solo las
+                particiones que se escriben: las de una ejecución anterior con
+                otros valores y los demás archivos del directorio se conservan.
+                Sin partición el directorio debe estar vacío
+            chunk_size: Filas por bloque (opcional, usa DATA_GENERATOR_CHUNK_SIZE)
+            partition_by: Columnas de partición hive (None para no particionar)
+            max_rows_per_file: Filas máximas por archivo (opcional, usa ROWS_PER_FILE)
+            workers: Procesos que generan los bloques (opcional, usa los del generador)
+
+        Returns:
+            str: Ruta del dataset
+        """
+        import pyarrow.dataset as ds
+
+        chunk_size = chunk_size or config.DATA_GENERATOR_CHUNK_SIZE
+        if output_dir is None:
+            output_dir = config.DATA_DIR / config.get_timestamped_filename("diabetes_dataset", "parquet")
+        output_dir = Path(output_dir)
+
+        schema = parquet_schema()
+        partitioning = None
+        if partition_by:
+            partitioning = ds.partitioning(schema.empty_table().select(list(partition_by)).schema,
+                                           flavor="hive")
+
+        # Sin partición, 'delete_matching' vaciaría el propio output_dir con todo
+        # lo que contenga, así que solo se escribe en un directorio vacío
+        existing = output_dir.is_dir() and any(output_dir.iterdir())
+        if existing and not partitioning:
+            raise ValueError(f"El directorio {output_dir} no está vacío; "
+                             f"use otro destino para un dataset sin partición")
+        if existing:
+            print(f"⚠️ {output_dir} ya existe: se reemplazan las particiones escritas "
+                  f"y se conservan las demás")
+
+        print(f"🔄 Escribiendo {self.n_samples} registros en {output_dir} "
+              f"(bloques de {chunk_size}, partición {list(partition_by or [])})...")
+        batches = (batch for chunk in self.iter_chunks(chunk_size, workers)
+                   for batch in to_compact_table(chunk, schema).to_batches())
+        max_rows_per_file = max_rows_per_file or ROWS_PER_FILE
+        ds.write_dataset(
+            batches, output_dir, schema=schema, format="parquet", partitioning=partitioning,
+            existing_data_behavior="delete_matching",
+            max_rows_per_file=max_rows_per_file,
+            max_rows_per_group=min(max_rows_per_file, ROWS_PER_GROUP)
+        )
+
+        print(f"💾 Dataset guardado en: {output_dir}")
+        return str(output_dir)
+
+    def _generate_block(self, rng: np.random.Generator, n: int, first_id: int = 0) -> pd.DataFrame:
+        """
+        Generar n registros columna a columna
+
+        Replica las distribuciones condicionales por categoría, los recortes y
+        la relación peso = imc * talla² de _generate_patient_record.
+
+        Args:
+            rng: Generador de números aleatorios
+            n: Número de registros
+            first_id: Índice del primer paciente (para la identificación)
+
+        Returns:
+            pd.DataFrame: Registros con las mismas columnas y tipos que el modo
+            registro a registro
+        """
+        category = np.searchsorted(CATEGORY_CUMULATIVE, rng.random(n), side='right')
+        low, high = GLUCOSE_BASE_RANGES[category].T
+        glucose_base = rng.uniform(low, high)
+
+        def normal(mean, scale, lower, upper):
+            return np.clip(mean + rng.normal(0, scale, n), lower, upper)
+
+        def choice(options):
+            return np.array(options, dtype=object)[rng.integers(0, len(options), n)]
+
+        def yes_with_probability(p):
+            return np.where(rng.random(n) < p, 'Si', 'No').astype(object)
+
+        # Características demográficas
+        edad = normal(30 + category * 10, 15, config.MIN_AGE, config.MAX_AGE)
+        sexo = choice(['M', 'F'])
+        zona_residencia = choice(['Urbana', 'Rural'])
+        estrato = rng.integers(1, 7, n)
+
+        # Características antropométricas
+        talla = normal(165, 10, 140, 200)
+        imc = normal(22 + category * 4, 3, 16, 45)
+        perimetro_abdominal = normal(80 + category * 10, 10, 60, 150)
+
+        # Características clínicas
+        tas = normal(110 + category * 15, 10, 90, 200)
+        tad = normal(70 + category * 10, 7, 60, 120)
+        frecuencia_cardiaca = normal(70 + category * 5, 10, 50, 110)
+
+        # Factores de riesgo
+        realiza_ejercicio = yes_with_probability(0.4 - category * 0.1)
+        consume_alcohol = choice(['Nunca', 'Ocasional', 'Frecuente'])
+        fuma = yes_with_probability(0.2 + category * 0.1)
+        medicamentos_hta = yes_with_probability(category * 0.3)
+
+        # Antecedentes
+        historia_familiar_dm = yes_with_probability(0.3 + category * 0.2)
+        diabetes_gestacional = np.where(sexo == 'M', 'No', choice(['Si', 'No'])).astype(object)
+
+        # Scores de riesgo
+        puntaje_findrisc = normal(5 + category * 7, 3, 0, 26)
+        riesgo_cardiovascular = category * 0.35 + rng.random(n) * 0.3
+
+        # Variable objetivo (glucosa en ayunas mg/dL)
+        resultado = np.clip(glucose_base + rng.normal(0, 5, n), 50, 400)
+
+        # Peso según IMC y talla
+        peso = imc * (talla / 100) ** 2
+
+        def rounded(values):
+            return np.round(values, 2)
+
+        return pd.DataFrame({
+            'identificacion': 1000000 + first_id + np.arange(n, dtype=np.int64),
+            'fecha_registro': np.full(n, datetime.now().strftime('%Y-%m-%d'), dtype=object),
+            'edad': rounded(edad),
+            'sexo': sexo,
+            'zona_residencia': zona_residencia,
+            'estrato': estrato.astype(np.int64),
+            'talla': rounded(talla),
+            'peso': rounded(peso),
+            'imc': rounded(imc),
+            'perimetro_abdominal': rounded(perimetro_abdominal),
+            'tas': rounded(tas),
+            'tad': rounded(tad),
+            'frecuencia_cardiaca': rounded(frecuencia_cardiaca),
+            'realiza_ejercicio': realiza_ejercicio,
+            'consume_alcohol': consume_alcohol,
+            'fuma': fuma,
+            'medicamentos_hta': medicamentos_hta,
+            'historia_familiar_dm': historia_familiar_dm,
+            'diabetes_gestacional': diabetes_gestacional,
+            'puntaje_findrisc': rounded(puntaje_findrisc),
+            'riesgo_cardiovascular': rounded(riesgo_cardiovascular),
+            'Resultado': rounded(resultado)
+        })
+
     def _generate_patient_record(self, patient_id: int, category: int, glucose_base: float) -> Dict:
         """Genera un registro individual de paciente"""
 
         # Características demográficas
         edad = max(config.MIN_AGE, min(config.MAX_AGE,
-            30 + category * 10 + np.random.normal(0, 15)))
-        sexo = random.choice(['M', 'F'])
-        zona_residencia = random.choice(['Urbana', 'Rural'])
-        estrato = random.choice([1, 2, 3, 4, 5, 6])
+            30 + category * 10 + self._np_random.normal(0, 15)))
+        sexo = self._random.choice(['M', 'F'])
+        zona_residencia = self._random.choice(['Urbana', 'Rural'])
+        estrato = self._random.choice([1, 2, 3, 4, 5, 6])
 
         # Características antropométricas
-        talla = max(140, min(200, np.random.normal(165, 10)))  # cm
-        peso = max(40, min(150, 60 + category * 10 + np.random.normal(0, 15)))  # kg
-        imc = max(16, min(45, 22 + category * 4 + np.random.normal(0, 3)))
-        perimetro_abdominal = max(60, min(150, 80 + category * 10 + np.random.normal(0, 10)))
+        talla = max(140, min(200, self._np_random.normal(165, 10)))  # cm
+        peso = max(40, min(150, 60 + category * 10 + self._np_random.normal(0, 15)))  # kg
+        imc = max(16, min(45, 22 + category * 4 + self._np_random.normal(0, 3)))
+        perimetro_abdominal = max(60, min(150, 80 + category * 10 + self._np_random.normal(0, 10)))
 
         # Características clínicas
-        tas = max(90, min(200, 110 + category * 15 + np.random.normal(0, 10)))  # Presión sistólica
-        tad = max(60, min(120, 70 + category * 10 + np.random.normal(0, 7)))   # Presión diastólica
-        frecuencia_cardiaca = max(50, min(110, 70 + category * 5 + np.random.normal(0, 10)))
+        tas = max(90, min(200, 110 + category * 15 + self._np_random.normal(0, 10)))  # Presión sistólica
+        tad = max(60, min(120, 70 + category * 10 + self._np_random.normal(0, 7)))   # Presión diastólica
+        frecuencia_cardiaca = max(50, min(110, 70 + category * 5 + self._np_random.normal(0, 10)))
 
         # Factores de riesgo
-        realiza_ejercicio = random.choices(['Si', 'No'],
+        realiza_ejercicio = self._random.choices(['Si', 'No'],
             weights=[0.4-category*0.1, 0.6+category*0.1])[0]
-        consume_alcohol = random.choice(['Nunca', 'Ocasional', 'Frecuente'])
-        fuma = random.choices(['Si', 'No'],
+        consume_alcohol = self._random.choice(['Nunca', 'Ocasional', 'Frecuente'])
+        fuma = self._random.choices(['Si', 'No'],
             weights=[0.2+category*0.1, 0.8-category*0.1])[0]
-        medicamentos_hta = random.choices(['Si', 'No'],
+        medicamentos_hta = self._random.choices(['Si', 'No'],
             weights=[category*0.3, 1-category*0.3])[0]
 
         # Antecedentes
-        historia_familiar_dm = random.choices(['Si', 'No'],
+        historia_familiar_dm = self._random.choices(['Si', 'No'],
             weights=[0.3+category*0.2, 0.7-category*0.2])[0]
-        diabetes_gestacional = 'No' if sexo == 'M' else random.choice(['Si', 'No'])
+        diabetes_gestacional = 'No' if sexo == 'M' else self._random.choice(['Si', 'No'])
 
         # Scores de riesgo
-        puntaje_findrisc = max(0, min(26, 5 + category * 7 + np.random.normal(0, 3)))
-        riesgo_cardiovascular = category * 0.35 + np.random.random() * 0.3
+        puntaje_findrisc = max(0, min(26, 5 + category * 7 + self._np_random.normal(0, 3)))
+        riesgo_cardiovascular = category * 0.35 + self._np_random.random() * 0.3
 
         # Variable objetivo (glucosa en ayunas mg/dL)
-        resultado = max(50, min(400, glucose_base + np.random.normal(0, 5)))
+        resultado = max(50, min(400, glucose_base + self._np_random.normal(0, 5)))
 
         # Ajustar peso según IMC y talla
         peso = imc * (talla / 100) ** 2
@@ -163,22 +458,41 @@ class DiabetesDataGenerator:
         print(f"💾 Dataset guardado en: {filepath}")
         return str(filepath)
 
-def create_sample_dataset(n_samples: int = 1000) -> pd.DataFrame:
+def create_sample_dataset(n_samples: int = 1000, vectorized: bool = None) -> pd.DataFrame:
     """
     Función de conveniencia para crear un dataset de muestra
 
     Args:
         n_samples: Número de muestras a generar
+        vectorized: Usar la generación vectorizada (opcional, usa DATA_GENERATOR_VECTORIZED)
 
     Returns:
         pd.DataFrame: Dataset generado
     """
-    generator = DiabetesDataGenerator(n_samples=n_samples)
+    generator = DiabetesDataGenerator(n_samples=n_samples, vectorized=vectorized)
     return generator.generate_synthetic_data()
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos de diabetes")
+    parser.add_argument("--n-samples", type=int, default=500, help="Número de registros")
+    parser.add_argument("--seed", type=int, default=RANDOM_SEED, help="Semilla")
+    parser.add_argument("--parquet", help="Escribir en Parquet particionado en este directorio, por bloques")
+    parser.add_argument("--chunk-size", type=int, help="Filas por bloque con --parquet")
+    parser.add_argument("--partition-by", nargs="*", default=list(DEFAULT_PARTITION_BY),
+                        help="Columnas de partición con --parquet")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos que generan los bloques con --parquet (0 en el proceso actual)")
+    args = parser.parse_args()
+
+    generator = DiabetesDataGenerator(n_samples=args.n_samples, random_state=args.seed,
+                                      workers=args.workers)
+    if args.parquet:
+        generator.save_parquet(args.parquet, chunk_size=args.chunk_size, partition_by=args.partition_by)
+        raise SystemExit(0)
+
     # Ejemplo de uso
-    generator = DiabetesDataGenerator(n_samples=500)
     df = generator.generate_synthetic_data()
     generator.save_data(df)
 
@@ -1,12 +1,18 @@
 """
 Módulo de preprocesamiento de datos para el sistema de diabetes
 """
+import time
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler, RobustScaler, MinMaxScaler
 from sklearn.impute import SimpleImputer
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from config import config
+from data_schema import compact_dtypes, float_dtype, memory_per_row
+from feature_transformer import DiabetesFeatureTransformer
+from memory_tracker import StageMemoryTracker
 
 class DiabetesDataPreprocessor:
     """
@@ -19,42 +25,135 @@ class DiabetesDataPreprocessor:
         self.imputer_categorical = None
         self.feature_names = None
         self.encoded_columns = None
+        self.feature_transformer = None
+        self.memory = StageMemoryTracker()
 
-    def prepare_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def prepare_data(self, df: pd.DataFrame, fit: bool = True) -> pd.DataFrame:
         """
         Pipeline completo de preparación de datos
 
+        La ingeniería de características, el encoding y la imputación los
+        aplica el transformador ajustado (feature_transformer.py), que se
+        guarda junto al scaler para que la inferencia use los mismos mapeos,
+        columnas y valores de imputación.
+
         Args:
             df: DataFrame con datos crudos
+            fit: Ajustar el transformador con estos datos (False reutiliza el ya ajustado)
 
         Returns:
             pd.DataFrame: Datos procesados
         """
-        df_processed = df.copy()
-
-        # 1. Limpieza básica
-        df_processed = self.clean_data(df_processed)
-
-        # 2. Ingeniería de características
-        df_processed = self.engineer_features(df_processed)
+        # 1. Limpieza básica (devuelve un DataFrame nuevo, no hace falta copiar la entrada)
+        df_clean = self.clean_data(df)
+        if config.DATA_COMPACT_DTYPES:
+            df_clean = compact_dtypes(df_clean)
+
+        # 2-4. Ingeniería de características, encoding e imputación
+        if fit or self.feature_transformer is None:
+            print("⚙️ Ajustando transformador de características...")
+            self.feature_transformer = DiabetesFeatureTransformer().fit(df_clean)
+        transformer = self.feature_transformer
+        df_processed = transformer.transform_frame(df_clean, dtype=float_dtype())
+        if 'Resultado' in df_clean.columns:
+            df_processed['Resultado'] = df_clean['Resultado']
+        self.feature_names = transformer.feature_columns
+
+        print(f"   {len(transformer.feature_columns)} características "
+              f"({len(transformer.binary_mappings)} binarias, "
+              f"{len(transformer.onehot_categories)} variables one-hot)")
+        print(f"   Memoria por registro: {memory_per_row(df):.0f} bytes de entrada, "
+              f"{memory_per_row(df_processed):.0f} bytes procesados")
+        return df_processed
 
-        # 3. Encoding de variables categóricas
-        df_processed = self.encode_categorical(df_processed)
+    def prepare_file(self, input_path: str, output_path: str, chunk_size: int = None) -> Dict[str, Any]:
+        """
+        Preprocesar un archivo por bloques sin cargarlo completo en memoria
 
-        # 4. Imputación de valores faltantes
-        df_processed = self.impute_missing(df_processed)
+        Hace dos pasadas sobre la entrada (CSV, Parquet o directorio Parquet):
+        la primera ajusta el transformador con partial_fit (conteos de
+        categorías y medianas estimadas en streaming); la segunda limpia,
+        transforma e imputa cada bloque, ajusta el StandardScaler con
+        partial_fit y escribe las características en un archivo Parquet a
+        medida que avanza. La memoria depende del tamaño del bloque, no del
+        dataset. Los duplicados solo se eliminan dentro de cada bloque.
 
-        return df_processed
+        Args:
+            input_path: Archivo o directorio de entrada con el esquema de data_generator.py
+            output_path: Archivo Parquet de salida (características y Resultado)
+            chunk_size: Filas por bloque (opcional, usa PREPROCESS_CHUNK_SIZE)
 
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
+        Returns:
+            Dict: Filas leídas y escritas, bloques, características y segundos
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from bulk_scorer import iter_input_chunks
+
+        chunk_size = chunk_size or config.PREPROCESS_CHUNK_SIZE
+        start_time = time.perf_counter()
+        print(f"🔄 Preprocesando {input_path} en bloques de {chunk_size} filas...")
+
+        # 1ª pasada: ajuste incremental del transformador
+        transformer = DiabetesFeatureTransformer()
+        for chunk in iter_input_chunks(input_path, chunk_size):
+            transformer.partial_fit(self._clean_chunk(chunk))
+        if not transformer.is_fitted:
+            raise ValueError(f"Sin registros en {input_path}")
+        self.feature_transformer = transformer
+        self.feature_names = transformer.feature_columns
+        print(f"   Transformador ajustado: {len(transformer.feature_columns)} características")
+
+        # 2ª pasada: transformar, ajustar el scaler y escribir bloque a bloque
+        self.scaler = StandardScaler()
+        rows_read = rows_written = chunks = 0
+        writer = None
+        try:
+            for chunk in iter_input_chunks(input_path, chunk_size):
+                rows_read += len(chunk)
+                chunk = self._clean_chunk(chunk)
+                features = transformer.transform_frame(chunk, dtype=float_dtype())
+                self.scaler.partial_fit(features)
+                if 'Resultado' in chunk.columns:
+                    features['Resultado'] = chunk['Resultado'].to_numpy()
+
+                table = pa.Table.from_pandas(features, preserve_index=False)
+                if writer is None:
+                    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                rows_written += len(features)
+                chunks += 1
+        finally:
+            if writer is not None:
+                writer.close()
+
+        summary = {
+            "rows_read": rows_read,
+            "rows_written": rows_written,
+            "chunks": chunks,
+            "n_features": len(transformer.feature_columns),
+            "seconds": round(time.perf_counter() - start_time, 3)
+        }
+        print(f"💾 {rows_written} registros procesados escritos en {output_path} "
+              f"({chunks} bloques, {summary['seconds']:.1f}s)")
+        return summary
+
+    def _clean_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Limpieza y tipos compactos de un bloque, sin mensajes"""
+        df = self.clean_data(df, verbose=False)
+        return compact_dtypes(df) if config.DATA_COMPACT_DTYPES else df
+
+    def clean_data(self, df: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
         """Limpieza de datos"""
-        print("🧹 Limpiando datos...")
+        if verbose:
+            print("🧹 Limpiando datos...")
 
         # Eliminar duplicados
         initial_rows = len(df)
         df = df.drop_duplicates()
 
-        if initial_rows > len(df):
+        if initial_rows > len(df) and verbose:
             print(f"   Eliminados {initial_rows - len(df)} duplicados")
 
         # Eliminar columnas no útiles
@@ -63,111 +162,145 @@ class DiabetesDataPreprocessor:
 
         return df
 
-    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Crear nuevas características"""
-        print("⚙️ Creando nuevas características...")
-
-        # Presión arterial media
-        if 'tas' in df.columns and 'tad' in df.columns:
-            df['presion_arterial_media'] = (df['tas'] + 2 * df['tad']) / 3
-            df['presion_pulso'] = df['tas'] - df['tad']
-
-        # Ratios antropométricos
-        if 'perimetro_abdominal' in df.columns and 'talla' in df.columns:
-            df['ratio_cintura_altura'] = df['perimetro_abdominal'] / df['talla']
-
-        # Categorización del IMC
-        if 'imc' in df.columns:
-            df['imc_categoria'] = pd.cut(df['imc'],
-                                         bins=[0, 18.5, 25, 30, 35, 100],
-                                         labels=[0, 1, 2, 3, 4]).astype(float)
-
-        # Categorización de edad
-        if 'edad' in df.columns:
-            df['edad_categoria'] = pd.cut(df['edad'],
-                                          bins=[0, 30, 45, 60, 75, 100],
-                                          labels=[0, 1, 2, 3, 4]).astype(float)
-            df['edad_squared'] = df['edad'] ** 2
-
-        # Score de riesgo cardiovascular
-        if all(col in df.columns for col in ['tas', 'imc', 'edad', 'fuma']):
-            df['score_cv'] = (
-                (df['tas'] - 120) / 20 +
-                (df['imc'] - 25) / 5 +
-                (df['edad'] - 40) / 20 +
-                df['fuma'].map({'Si': 1, 'No': 0})
-            )
-
-        # Índice de salud (inverso del riesgo)
-        if 'realiza_ejercicio' in df.columns:
-            df['indice_salud'] = (
-                df['realiza_ejercicio'].map({'Si': 1, 'No': 0}) * 2 -
-                df.get('fuma', pd.Series([0]*len(df))).map({'Si': 1, 'No': 0})
-            )
-
-        print(f"   Creadas {len([col for col in df.columns if col not in ['Resultado']])} características")
-        return df
-
-    def encode_categorical(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Codificar variables categóricas"""
-        print("🔢 Codificando variables categóricas...")
+    def scale_features(self, X_train: pd.DataFrame, X_test: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """Escalar características"""
+        print("📏 Escalando características...")
 
-        categorical_columns = df.select_dtypes(include=['object']).columns
-        categorical_columns = [col for col in categorical_columns if col != 'Resultado']
+        self.scaler = StandardScaler()
+        X_train_scaled = self.scaler.fit_transform(X_train)
+        X_test_scaled = self.scaler.transform(X_test)
 
-        for col in categorical_columns:
-            if df[col].nunique() == 2:
-                # Binary encoding
-                df[col] = pd.get_dummies(df[col], drop_first=True).astype(float)
-            elif df[col].nunique() <= 5:
-                # One-hot encoding para pocas categorías
-                dummies = pd.get_dummies(df[col], prefix=col, drop_first=False)
-                df = pd.concat([df, dummies], axis=1)
-                df = df.drop(col, axis=1)
+        return X_train_scaled, X_test_scaled
 
-        print(f"   Codificadas {len(categorical_columns)} variables categóricas")
-        return df
+    def scale_split_inplace(self, X: np.ndarray, n_train: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Dividir y escalar sin copiar una matriz con las filas de entrenamiento primero
 
-    def impute_missing(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Imputar valores faltantes"""
-        if df.isnull().sum().sum() > 0:
-            print("🔧 Imputando valores faltantes...")
+        Las particiones son vistas de X (filas [0, n_train) y [n_train, N)) y
+        el scaler se ajusta por bloques con la de entrenamiento y se aplica en
+        el mismo buffer, así que X queda escalada.
 
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
+        Args:
+            X: Matriz C-contigua y escribible, entrenamiento seguido de prueba
+            n_train: Filas de entrenamiento
 
-            for col in numeric_cols:
-                if df[col].isnull().any():
-                    df[col].fillna(df[col].median(), inplace=True)
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Vistas escaladas de entrenamiento y prueba
+        """
+        print("📏 Escalando características en el mismo buffer...")
 
-        return df
+        X_train, X_test = X[:n_train], X[n_train:]
+        # Ajuste y transformación por bloques de filas: los temporales de
+        # StandardScaler (X - media) ocupan un bloque, no la matriz entera
+        step = max(1, config.PREPROCESS_CHUNK_SIZE)
+        self.scaler = StandardScaler()
+        for start in range(0, n_train, step):
+            self.scaler.partial_fit(X_train[start:start + step])
+        for start in range(0, len(X), step):
+            self.scaler.transform(X[start:start + step], copy=False)
+        return X_train, X_test
+
+    def prepare_training_matrix(self, df: pd.DataFrame, seed: int = None,
+                                test_size: float = None) -> Dict[str, Any]:
+        """
+        Construir la matriz de entrenamiento escalada una sola vez desde los datos crudos
 
-    def scale_features(self, X_train: pd.DataFrame, X_test: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
-        """Escalar características"""
-        print("📏 Escalando características...")
+        Ajusta el transformador, decide la división estratificada (la misma que
+        split_and_scale) y transforma los datos directamente en un único
+        buffer C-contiguo (float32 si DATA_FLOAT32) con las filas de
+        entrenamiento primero. Las particiones son vistas de ese buffer y se
+        escalan en el sitio; no se crea el DataFrame procesado.
 
-        self.scaler = StandardScaler()
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
+        Args:
+            df: DataFrame con datos crudos (con Resultado)
+            seed: Semilla de la división (opcional, usa RANDOM_SEED)
+            test_size: Proporción de prueba (opcional, usa TEST_SIZE)
 
-        return X_train_scaled, X_test_scaled
+        Returns:
+            Dict: X (buffer completo), X_train, X_test, y_train, y_test,
+                train_index, test_index, feature_columns, preprocessor y cache_hit
+        """
+        from dataset_cache import split_order
+
+        with self.memory.stage("limpieza"):
+            df_clean = self.clean_data(df)
+            if config.DATA_COMPACT_DTYPES:
+                df_clean = compact_dtypes(df_clean)
+
+        with self.memory.stage("ajuste del transformador"):
+            print("⚙️ Ajustando transformador de características...")
+            self.feature_transformer = DiabetesFeatureTransformer().fit(df_clean)
+            self.feature_names = self.feature_transformer.feature_columns
+
+        with self.memory.stage("matriz de características"):
+            target = df_clean['Resultado'].to_numpy(dtype=float_dtype())
+            train_index, test_index = split_order(target, seed, test_size)
+            order = np.concatenate([train_index, test_index])
+            X = self.feature_transformer.transform(df_clean, dtype=float_dtype(), rows=order)
+            y = target[order]
+            del df_clean
+
+        n_train = len(train_index)
+        with self.memory.stage("escalado"):
+            X_train, X_test = self.scale_split_inplace(X, n_train)
+
+        return {
+            "X": X,
+            "X_train": X_train,
+            "X_test": X_test,
+            "y_train": y[:n_train],
+            "y_test": y[n_train:],
+            "train_index": train_index,
+            "test_index": test_index,
+            "feature_columns": self.feature_names,
+            "preprocessor": self,
+            "cache_hit": False
+        }
 
     def get_feature_names(self, df: pd.DataFrame) -> List[str]:
         """Obtener nombres de características después del preprocesamiento"""
         feature_columns = [col for col in df.columns if col != 'Resultado']
         return feature_columns
 
-def preprocess_diabetes_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, DiabetesDataPreprocessor]:
+def preprocess_diabetes_data(df: pd.DataFrame, use_cache: bool = None) -> Tuple[pd.DataFrame, DiabetesDataPreprocessor]:
     """
     Función de conveniencia para preprocesar datos de diabetes
 
+    Con la caché activa (dataset_cache.py), unos datos crudos ya preprocesados
+    con la misma configuración se leen de disco: las características quedan
+    mapeadas en memoria y el transformador ajustado se restaura.
+
     Args:
         df: DataFrame con datos crudos
+        use_cache: Usar la caché de datasets (opcional, usa DATASET_CACHE_ENABLED)
 
     Returns:
         Tuple[pd.DataFrame, DiabetesDataPreprocessor]: Datos procesados y preprocesador
     """
+    from dataset_cache import DatasetCache
+
+    cache = DatasetCache(enabled=use_cache)
+    key = cache.key("processed", df) if cache.enabled else None
+    entry = cache.load(key) if key else None
     preprocessor = DiabetesDataPreprocessor()
-    df_processed = preprocessor.prepare_data(df)
+
+    if entry is not None:
+        print(f"📦 Datos preprocesados desde caché ({key})")
+        transformer = entry["objects"]["feature_transformer"]
+        preprocessor.feature_transformer = transformer
+        preprocessor.feature_names = transformer.feature_columns
+        df_processed = pd.DataFrame(entry["arrays"]["features"], columns=transformer.feature_columns,
+                                    copy=False)
+        if "target" in entry["arrays"]:
+            df_processed['Resultado'] = entry["arrays"]["target"]
+    else:
+        df_processed = preprocessor.prepare_data(df)
+        if key:
+            arrays = {"features": df_processed[preprocessor.feature_names].to_numpy()}
+            if 'Resultado' in df_processed.columns:
+                arrays["target"] = df_processed['Resultado'].to_numpy()
+            cache.save(key, arrays, {"feature_transformer": preprocessor.feature_transformer},
+                       {"stage": "processed", "rows": len(df_processed)})
 
     print(f"\n✅ Preprocesamiento completado:")
     print(f"   Dimensiones finales: {df_processed.shape}")
@@ -176,6 +309,28 @@ def preprocess_diabetes_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, DiabetesDa
     return df_processed, preprocessor
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Preprocesamiento de datos de diabetes")
+    parser.add_argument("input", nargs="?", help="CSV, Parquet o directorio Parquet a preprocesar por bloques")
+    parser.add_argument("output", nargs="?", help="Archivo Parquet de salida")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Filas por bloque")
+    args = parser.parse_args()
+
+    if args.input:
+        if not args.output:
+            parser.error("Indicar el archivo de salida")
+        # El transformador y el scaler se guardan junto a la salida, con los
+        # nombres que busca el predictor
+        preprocessor = DiabetesDataPreprocessor()
+        preprocessor.prepare_file(args.input, args.output, chunk_size=args.chunk_size)
+        output_dir = Path(args.output).parent
+        preprocessor.feature_transformer.save(output_dir / config.FEATURE_TRANSFORMER_FILENAME)
+        import joblib
+        joblib.dump(preprocessor.scaler, output_dir / "scaler.joblib")
+        print(f"📏 Transformador y scaler guardados en: {output_dir}")
+        raise SystemExit(0)
+
     # Ejemplo de uso
     from data_generator import create_sample_dataset
 
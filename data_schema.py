@@ -0,0 +1,125 @@
+"""
+Esquema de tipos compactos para los datos de diabetes
+
+Define los tipos de cada columna del dataset (categorías en lugar de textos,
+enteros pequeños y, opcionalmente, float32 para las medidas) que usan el
+generador, el preprocesador y la matriz de características del entrenamiento,
+y mide la memoria por registro antes y después de aplicarlos.
+
+Uso:
+    python data_schema.py --n-samples 1000000
+"""
+import argparse
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import config
+
+# Categorías fijas de cada columna categórica, en orden alfabético para que la
+# codificación (get_dummies con drop_first) coincida con la de los textos
+CATEGORICAL_COLUMNS: Dict[str, list] = {
+    'sexo': ['F', 'M'],
+    'zona_residencia': ['Rural', 'Urbana'],
+    'realiza_ejercicio': ['No', 'Si'],
+    'consume_alcohol': ['Frecuente', 'Nunca', 'Ocasional'],
+    'fuma': ['No', 'Si'],
+    'medicamentos_hta': ['No', 'Si'],
+    'historia_familiar_dm': ['No', 'Si'],
+    'diabetes_gestacional': ['No', 'Si'],
+}
+
+# Enteros pequeños
+SMALL_INT_COLUMNS = {'estrato': 'int8'}
+
+# Medidas continuas (float32 si DATA_FLOAT32)
+MEASUREMENT_COLUMNS = (
+    'edad', 'talla', 'peso', 'imc', 'perimetro_abdominal', 'tas', 'tad', 'frecuencia_cardiaca',
+    'puntaje_findrisc', 'riesgo_cardiovascular', 'Resultado'
+)
+
+def float_dtype(float32: Optional[bool] = None) -> type:
+    """Tipo de las medidas y características (float32 si DATA_FLOAT32)"""
+    float32 = config.DATA_FLOAT32 if float32 is None else float32
+    return np.float32 if float32 else np.float64
+
+def compact_dtypes(df: pd.DataFrame, float32: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Convertir las columnas conocidas del dataset a los tipos compactos
+
+    Las columnas que ya tienen el tipo compacto o no son del esquema se
+    mantienen sin copiarse; los valores fuera de las categorías fijas quedan
+    como faltantes.
+
+    Args:
+        df: DataFrame con el esquema de data_generator.py (completo o parcial)
+        float32: Medidas en float32 (opcional, usa DATA_FLOAT32)
+
+    Returns:
+        pd.DataFrame: DataFrame con los tipos compactos
+    """
+    dtypes = {}
+    for col, categories in CATEGORICAL_COLUMNS.items():
+        dtype = pd.CategoricalDtype(categories)
+        if col in df.columns and df[col].dtype != dtype:
+            dtypes[col] = dtype
+    for col, dtype in SMALL_INT_COLUMNS.items():
+        if col in df.columns and df[col].dtype != dtype and not df[col].isna().any():
+            dtypes[col] = dtype
+    measurement_dtype = float_dtype(float32)
+    for col in MEASUREMENT_COLUMNS:
+        if col in df.columns and df[col].dtype != measurement_dtype and pd.api.types.is_numeric_dtype(df[col]):
+            dtypes[col] = measurement_dtype
+    if 'fecha_registro' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['fecha_registro']):
+        df = df.assign(fecha_registro=pd.to_datetime(df['fecha_registro'], format='%Y-%m-%d'))
+
+    return df.astype(dtypes) if dtypes else df
+
+def expanded_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Convertir al esquema sin compactar: textos como object y medidas en float64"""
+    dtypes = {col: object for col in CATEGORICAL_COLUMNS if col in df.columns}
+    dtypes.update({col: np.int64 for col in SMALL_INT_COLUMNS if col in df.columns})
+    dtypes.update({col: np.float64 for col in MEASUREMENT_COLUMNS if col in df.columns})
+    df = df.astype(dtypes)
+    if 'fecha_registro' in df.columns and pd.api.types.is_datetime64_any_dtype(df['fecha_registro']):
+        df = df.assign(fecha_registro=df['fecha_registro'].dt.strftime('%Y-%m-%d').astype(object))
+    return df
+
+def memory_per_row(df: pd.DataFrame) -> float:
+    """Bytes por registro del DataFrame (incluye el contenido de los textos)"""
+    return float(df.memory_usage(deep=True, index=False).sum() / max(len(df), 1))
+
+def memory_report(df: pd.DataFrame) -> Dict[str, float]:
+    """
+    Memoria por registro del dataset sin compactar, compacto y compacto con float32
+
+    Args:
+        df: DataFrame con el esquema de data_generator.py
+
+    Returns:
+        Dict: Bytes por registro de cada variante
+    """
+    return {
+        "expanded": round(memory_per_row(expanded_dtypes(df)), 1),
+        "compact": round(memory_per_row(compact_dtypes(df, float32=False)), 1),
+        "compact_float32": round(memory_per_row(compact_dtypes(df, float32=True)), 1)
+    }
+
+def main():
+    """Reportar la memoria por registro de un dataset sintético"""
+    from data_generator import DiabetesDataGenerator
+
+    parser = argparse.ArgumentParser(description="Memoria por registro con y sin tipos compactos")
+    parser.add_argument("--n-samples", type=int, default=100_000, help="Número de registros")
+    args = parser.parse_args()
+
+    df = DiabetesDataGenerator(n_samples=args.n_samples, vectorized=True).generate_synthetic_data()
+    report = memory_report(df)
+    print(f"\n💾 Memoria por registro ({args.n_samples} registros):")
+    print(f"   Sin compactar (object / float64): {report['expanded']:.1f} bytes")
+    print(f"   Compacto (category / int8):       {report['compact']:.1f} bytes")
+    print(f"   Compacto con float32:             {report['compact_float32']:.1f} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Caché de datasets preprocesados y particiones de entrenamiento
+
+Cada entrada se identifica por un hash del contenido de los datos de
+entrada, la configuración de preprocesamiento (tipos compactos, float32), el
+código de las transformaciones y los parámetros de la etapa (semilla,
+proporción de prueba). Los arreglos (características, objetivo, índices de la
+partición, matrices escaladas) se guardan como .npy y se leen mapeados en
+memoria; el scaler y el transformador ajustados, con joblib. Si cambian los
+datos, la configuración o el código, la clave cambia y se recalcula.
+
+Uso:
+    python dataset_cache.py --list
+    python dataset_cache.py --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import config, RANDOM_SEED
+from data_schema import float_dtype
+
+# Versión del formato de las entradas (cambiarla invalida toda la caché)
+CACHE_VERSION = 2
+
+META_FILENAME = "meta.json"
+
+# Módulos cuyo código forma parte de la clave: un cambio en las
+# transformaciones invalida las entradas calculadas con la versión anterior
+CODE_MODULES = ('feature_transformer.py', 'data_schema.py', 'data_preprocessor.py', 'dataset_cache.py')
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Hash del contenido de un DataFrame (columnas, tipos y valores, sin el índice)"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(str(len(df)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _code_fingerprint() -> str:
+    """Hash del código de las transformaciones"""
+    digest = hashlib.sha256()
+    for name in CODE_MODULES:
+        path = Path(__file__).parent / name
+        if path.exists():
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+class DatasetCache:
+    """Caché en disco de datasets preprocesados y particiones"""
+
+    def __init__(self, cache_dir: Path = None, enabled: bool = None, mmap_mode: Optional[str] = 'r'):
+        """
+        Inicializar la caché
+
+        Args:
+            cache_dir: Directorio de la caché (opcional, usa DATASET_CACHE_DIR)
+            enabled: Usar la caché (opcional, usa DATASET_CACHE_ENABLED)
+            mmap_mode: Modo de lectura de los arreglos ('r' los mapea en memoria,
+                None los carga completos)
+        """
+        self.cache_dir = Path(cache_dir or config.DATASET_CACHE_DIR)
+        self.enabled = config.DATASET_CACHE_ENABLED if enabled is None else enabled
+        self.mmap_mode = mmap_mode
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, stage: str, data: pd.DataFrame, **params: Any) -> str:
+        """
+        Clave de una entrada
+
+        Args:
+            stage: Etapa del pipeline ('processed', 'split', ...)
+            data: Datos de entrada de la etapa
+            **params: Parámetros de la etapa (semilla, proporción de prueba...)
+
+        Returns:
+            str: Clave hexadecimal
+        """
+        payload = {
+            "version": CACHE_VERSION,
+            "stage": stage,
+            "input": frame_fingerprint(data),
+            "code": _code_fingerprint(),
+            "config": {"compact_dtypes": config.DATA_COMPACT_DTYPES, "float32": config.DATA_FLOAT32},
+            "params": params
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Leer una entrada
+
+        Returns:
+            Optional[Dict]: {'meta', 'arrays', 'objects'} o None si no existe
+                o está incompleta
+        """
+        if not self.enabled:
+            return None
+        entry_dir = self.cache_dir / key
+        try:
+            with open(entry_dir / META_FILENAME) as f:
+                meta = json.load(f)
+            arrays = {name: np.load(entry_dir / f"{name}.npy", mmap_mode=self.mmap_mode)
+                      for name in meta["arrays"]}
+            objects = {name: joblib.load(entry_dir / f"{name}.joblib") for name in meta["objects"]}
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"⚠️ Entrada de caché {key} ilegible, se recalcula: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {"meta": meta, "arrays": arrays, "objects": objects}
+
+    def save(self, key: str, arrays: Dict[str, np.ndarray], objects: Dict[str, Any] = None,
+             meta: Dict[str, Any] = None) -> Optional[Path]:
+        """
+        Guardar una entrada
+
+        Se escribe en un directorio temporal que se renombra al terminar, así
+        que otro proceso nunca lee una entrada a medias.
+
+        Args:
+            key: Clave de la entrada
+            arrays: Arreglos numéricos (.npy, legibles mapeados en memoria)
+            objects: Objetos ajustados (scaler, transformador) guardados con joblib
+            meta: Metadatos serializables en JSON
+
+        Returns:
+            Optional[Path]: Directorio de la entrada (None si la caché está desactivada)
+        """
+        if not self.enabled:
+            return None
+        objects = objects or {}
+        entry_dir = self.cache_dir / key
+        tmp_dir = self.cache_dir / f".{key}.tmp{os.getpid()}"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            for name, array in arrays.items():
+                np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array))
+            for name, obj in objects.items():
+                joblib.dump(obj, tmp_dir / f"{name}.joblib")
+            with open(tmp_dir / META_FILENAME, 'w') as f:
+                json.dump({**(meta or {}), "arrays": list(arrays), "objects": list(objects),
+                           "created": time.time()}, f, indent=2)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # Otro proceso guardó la misma entrada primero
+            if not (entry_dir / META_FILENAME).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return entry_dir
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Entradas guardadas con su etapa, tamaño y fecha de creación"""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for entry_dir in sorted(self.cache_dir.iterdir()):
+            meta_path = entry_dir / META_FILENAME
+            if entry_dir.name.startswith('.') or not meta_path.exists():
+                continue
+            with open(meta_path) as f:
+                meta = json.load(f)
+            entries.append({
+                "key": entry_dir.name,
+                "stage": meta.get("stage"),
+                "bytes": sum(path.stat().st_size for path in entry_dir.iterdir()),
+                "created": meta.get("created")
+            })
+        return entries
+
+    def clear(self) -> int:
+        """Borrar todas las entradas y devolver cuántas había"""
+        count = len(self.entries())
+        if self.cache_dir.exists():
+            shutil.rmtree(self.cache_dir)
+        return count
+
+def split_order(target: np.ndarray, seed: int = None, test_size: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Posiciones de entrenamiento y prueba de la división estratificada por tercios de Resultado
+
+    Args:
+        target: Valores de Resultado
+        seed: Semilla (opcional, usa RANDOM_SEED)
+        test_size: Proporción de prueba (opcional, usa TEST_SIZE)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Posiciones de entrenamiento y de prueba
+    """
+    from sklearn.model_selection import train_test_split
+
+    seed = RANDOM_SEED if seed is None else seed
+    test_size = config.TEST_SIZE if test_size is None else test_size
+    y_bins = pd.cut(np.asarray(target), bins=3, labels=['Low', 'Medium', 'High'])
+    return train_test_split(np.arange(len(target)), test_size=test_size, random_state=seed, stratify=y_bins)
+
+def split_and_scale(df_processed: pd.DataFrame, preprocessor: Any = None, seed: int = RANDOM_SEED,
+                    test_size: float = None, cache: DatasetCache = None) -> Dict[str, Any]:
+    """
+    División estratificada y escalado de un dataset preprocesado, con caché
+
+    La división estratifica por tercios de Resultado, como en
+    train_diabetes_models. Las filas se copian una sola vez a un buffer
+    C-contiguo (float32 si DATA_FLOAT32) con las de entrenamiento primero;
+    X_train y X_test son vistas de ese buffer, escaladas en el sitio. Con un
+    acierto en la caché se reutilizan el buffer escalado (mapeado en memoria),
+    los índices y el scaler sin volver a dividir ni escalar.
+
+    Args:
+        df_processed: Datos preprocesados con la columna Resultado
+        preprocessor: Preprocesador que recibe el scaler ajustado (opcional)
+        seed: Semilla de la división
+        test_size: Proporción de prueba (opcional, usa TEST_SIZE)
+        cache: Caché a usar (opcional, una DatasetCache con la configuración)
+
+    Returns:
+        Dict: X (buffer completo), X_train, X_test, y_train, y_test,
+            train_index, test_index, feature_columns, preprocessor y cache_hit
+    """
+    from data_preprocessor import DiabetesDataPreprocessor
+
+    test_size = config.TEST_SIZE if test_size is None else test_size
+    cache = cache or DatasetCache()
+    preprocessor = preprocessor or DiabetesDataPreprocessor()
+    feature_columns = [col for col in df_processed.columns if col != 'Resultado']
+
+    key = cache.key("split", df_processed, seed=seed, test_size=test_size) if cache.enabled else None
+    entry = cache.load(key) if key else None
+    if entry is not None:
+        print(f"📦 División y escalado desde caché ({key})")
+        preprocessor.scaler = entry["objects"]["scaler"]
+        arrays = entry["arrays"]
+        X, y, n_train = arrays["X"], arrays["y"], len(arrays["train_index"])
+        return {"X": X, "X_train": X[:n_train], "X_test": X[n_train:],
+                "y_train": y[:n_train], "y_test": y[n_train:],
+                "train_index": arrays["train_index"], "test_index": arrays["test_index"],
+                "feature_columns": feature_columns, "preprocessor": preprocessor, "cache_hit": True}
+
+    y_all = df_processed['Resultado'].to_numpy()
+    train_index, test_index = split_order(y_all, seed, test_size)
+    order = np.concatenate([train_index, test_index])
+
+    # Única copia: filas reordenadas (entrenamiento primero) en un buffer
+    # C-contiguo, columna a columna para no consolidar antes el DataFrame
+    X = np.empty((len(order), len(feature_columns)), dtype=float_dtype())
+    for j, col in enumerate(feature_columns):
+        np.take(df_processed[col].to_numpy(copy=False), order, out=X[:, j])
+    y = y_all[order]
+    n_train = len(train_index)
+    X_train, X_test = preprocessor.scale_split_inplace(X, n_train)
+
+    if key:
+        cache.save(key, {"X": X, "y": y, "train_index": train_index, "test_index": test_index},
+                   {"scaler": preprocessor.scaler},
+                   {"stage": "split", "seed": seed, "test_size": test_size, "rows": len(df_processed)})
+    return {"X": X, "X_train": X_train, "X_test": X_test, "y_train": y[:n_train], "y_test": y[n_train:],
+            "train_index": train_index, "test_index": test_index,
+            "feature_columns": feature_columns, "preprocessor": preprocessor, "cache_hit": False}
+
+def main():
+    """Listar o borrar las entradas de la caché"""
+    parser = argparse.ArgumentParser(description="Caché de datasets preprocesados")
+    parser.add_argument("--clear", action="store_true", help="Borrar todas las entradas")
+    parser.add_argument("--list", action="store_true", help="Listar las entradas")
+    args = parser.parse_args()
+
+    cache = DatasetCache()
+    if args.clear:
+        print(f"🗑️ {cache.clear()} entradas borradas de {cache.cache_dir}")
+        return
+
+    entries = cache.entries()
+    print(f"📦 {len(entries)} entradas en {cache.cache_dir}")
+    for entry in entries:
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created'] or 0))
+        print(f"   {entry['key']}  {entry['stage']:<10} {entry['bytes'] / 2**20:8.1f} MB  {created}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Plan compilado de características para la predicción de un solo paciente
+
+Convierte el diccionario de un paciente directamente en el vector de
+características de entrenamiento sin pasar por pandas: las posiciones de cada
+columna, los mapeos categóricos y los límites de categorización se resuelven
+una sola vez al construir el plan.
+"""
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Características derivadas con fórmula fija y columnas de las que dependen
+DERIVED_FEATURES = {
+    'presion_arterial_media': ('tas', 'tad'),
+    'presion_pulso': ('tas', 'tad'),
+    'ratio_cintura_altura': ('perimetro_abdominal', 'talla'),
+    'edad_squared': ('edad',),
+    'score_cv': ('tas', 'imc', 'edad', 'fuma'),
+    'indice_salud': ('realiza_ejercicio',)
+}
+
+# Entradas numéricas que intervienen en fórmulas: deben ser números (o NaN)
+FORMULA_INPUTS = ('edad', 'imc', 'tas', 'tad', 'perimetro_abdominal', 'talla')
+
+# Codificación de 'Si'/'No' usada por las fórmulas antes del encoding
+YES_NO_SCORE = {'Si': 1, 'No': 0}
+
+_MISSING = object()
+_NAN = float('nan')
+
+def _as_number(value: Any) -> Optional[float]:
+    """Convertir a float un valor numérico; None si no es un número"""
+    value_type = type(value)
+    if value_type is float or value_type is int:
+        return float(value)
+    if isinstance(value, (np.floating, np.integer)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+def _divide(numerator: float, denominator: float) -> float:
+    """División con la semántica de numpy (inf/nan en lugar de excepción)"""
+    if denominator == 0:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return float(np.float64(numerator) / np.float64(denominator))
+    return numerator / denominator
+
+def _bin_label(value: float, edges: Sequence[float]) -> float:
+    """Etiqueta del intervalo (a, b] que contiene value, como pd.cut"""
+    if value != value:
+        return _NAN
+    position = bisect_left(edges, value)
+    if 0 < position < len(edges):
+        return float(position - 1)
+    return _NAN
+
+class DiabetesFeaturePlan:
+    """Codificador sin pandas de un paciente al vector de características"""
+
+    def __init__(self, feature_columns: List[str],
+                 absent_defaults: Dict[str, float],
+                 impute_values: Dict[str, float],
+                 binary_mappings: Dict[str, Dict[str, int]],
+                 onehot_columns: Dict[str, Tuple[str, str]],
+                 bins: Dict[str, Tuple[str, Sequence[float]]],
+                 dtype: Any = np.float64):
+        """
+        Compilar el plan
+
+        Args:
+            feature_columns: Columnas de salida en el orden de entrenamiento
+            absent_defaults: Valor para columnas cuyo origen no viene en los datos
+            impute_values: Valor para columnas calculadas como NaN (si no está, queda NaN)
+            binary_mappings: Mapeo categoría -> código de las variables binarias
+            onehot_columns: Columna dummy -> (columna origen, categoría)
+            bins: Columna categorizada -> (columna origen, límites)
+            dtype: Tipo del vector de salida (float64 o float32)
+        """
+        self.feature_columns = list(feature_columns)
+        self.dtype = np.dtype(dtype)
+        self.n_features = len(self.feature_columns)
+        self.index = {col: i for i, col in enumerate(self.feature_columns)}
+
+        self.binary_mappings = binary_mappings
+        self.onehot_columns = onehot_columns
+        self.bins = {col: (source, list(edges)) for col, (source, edges) in bins.items()}
+
+        self._absent = np.array([absent_defaults.get(col, 0.0) for col in self.feature_columns],
+                                dtype=np.float64)
+        self._impute = [(self.index[col], value) for col, value in impute_values.items()
+                        if col in self.index]
+
+        # Si el paciente ya trae columnas calculadas se usa el pipeline de referencia
+        self._reserved = frozenset(DERIVED_FEATURES) | frozenset(onehot_columns)
+
+        derived = set(DERIVED_FEATURES) | set(onehot_columns) | set(self.bins)
+        self._binary = [(self.index[col], col, mapping) for col, mapping in binary_mappings.items()
+                        if col in self.index]
+        self._passthrough = [(i, col) for i, col in enumerate(self.feature_columns)
+                             if col not in derived and col not in binary_mappings]
+        self._onehot = [(self.index[col], source, category)
+                        for col, (source, category) in onehot_columns.items() if col in self.index]
+        self._bins = [(self.index[col], source, edges) for col, (source, edges) in self.bins.items()
+                      if col in self.index]
+        self._derived = {col: self.index[col] for col in DERIVED_FEATURES if col in self.index}
+
+    def transform_one(self, patient_data: Mapping[str, Any],
+                      out: np.ndarray = None) -> Optional[np.ndarray]:
+        """
+        Codificar un paciente
+
+        Args:
+            patient_data: Datos del paciente
+            out: Vector preasignado de tamaño n_features (opcional)
+
+        Returns:
+            np.ndarray: Vector de características, o None si los datos contienen
+                valores fuera del camino rápido (el llamador debe usar el
+                pipeline de referencia)
+        """
+        if not self._reserved.isdisjoint(patient_data):
+            return None
+
+        # Entradas numéricas de las fórmulas
+        numbers = {}
+        for col in FORMULA_INPUTS:
+            value = patient_data.get(col, _MISSING)
+            if value is _MISSING:
+                continue
+            number = _as_number(value)
+            if number is None:
+                return None
+            numbers[col] = number
+
+        values = self._absent.copy()
+
+        # Columnas que se copian tal cual
+        for i, col in self._passthrough:
+            value = patient_data.get(col, _MISSING)
+            if value is _MISSING:
+                continue
+            if value is None:
+                values[i] = _NAN
+                continue
+            number = numbers[col] if col in numbers else _as_number(value)
+            if number is None:
+                return None
+            values[i] = number
+
+        # Variables binarias
+        try:
+            for i, col, mapping in self._binary:
+                value = patient_data.get(col, _MISSING)
+                if value is not _MISSING:
+                    code = mapping.get(value)
+                    values[i] = _NAN if code is None else code
+
+            fuma = patient_data.get('fuma', _MISSING)
+            fuma_score = _NAN if fuma is _MISSING else YES_NO_SCORE.get(fuma, _NAN)
+        except TypeError:
+            return None
+
+        # Variables dummy
+        for i, source, category in self._onehot:
+            value = patient_data.get(source, _MISSING)
+            if value is not _MISSING:
+                values[i] = 1.0 if (isinstance(value, str) and value == category) else 0.0
+
+        # Categorización por intervalos
+        for i, source, edges in self._bins:
+            if source in numbers:
+                values[i] = _bin_label(numbers[source], edges)
+
+        # Características derivadas
+        derived = self._derived
+        tas = numbers.get('tas')
+        tad = numbers.get('tad')
+        if tas is not None and tad is not None:
+            if 'presion_arterial_media' in derived:
+                values[derived['presion_arterial_media']] = (tas + 2 * tad) / 3
+            if 'presion_pulso' in derived:
+                values[derived['presion_pulso']] = tas - tad
+
+        if 'perimetro_abdominal' in numbers and 'talla' in numbers and 'ratio_cintura_altura' in derived:
+            values[derived['ratio_cintura_altura']] = _divide(numbers['perimetro_abdominal'],
+                                                              numbers['talla'])
+
+        edad = numbers.get('edad')
+        if edad is not None and 'edad_squared' in derived:
+            values[derived['edad_squared']] = edad * edad
+
+        imc = numbers.get('imc')
+        if (tas is not None and imc is not None and edad is not None
+                and fuma is not _MISSING and 'score_cv' in derived):
+            values[derived['score_cv']] = (
+                (tas - 120) / 20 +
+                (imc - 25) / 5 +
+                (edad - 40) / 20 +
+                fuma_score
+            )
+
+        if 'indice_salud' in derived:
+            ejercicio = patient_data.get('realiza_ejercicio', _MISSING)
+            if ejercicio is not _MISSING:
+                try:
+                    ejercicio_score = YES_NO_SCORE.get(ejercicio, _NAN)
+                except TypeError:
+                    return None
+                values[derived['indice_salud']] = ejercicio_score * 2 - fuma_score
+
+        # Imputación de valores faltantes
+        for i, default_value in self._impute:
+            if values[i] != values[i]:
+                values[i] = default_value
+
+        if out is None:
+            return values if self.dtype == np.float64 else values.astype(self.dtype)
+        out[:] = values
+        return out
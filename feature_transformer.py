@@ -0,0 +1,369 @@
+"""
+Transformador de características ajustado para entrenamiento e inferencia
+
+Aprende una sola vez, sobre los datos de entrenamiento, los mapeos de las
+variables categóricas, los límites de categorización, los valores de
+imputación y el orden de las columnas de salida. Se guarda junto a
+scaler.joblib y el predictor lo carga para aplicar exactamente la misma
+transformación, de forma vectorizada para lotes de cualquier tamaño.
+"""
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from feature_plan import DERIVED_FEATURES, YES_NO_SCORE, DiabetesFeaturePlan
+
+# Columnas que no son características
+EXCLUDED_COLUMNS = ('identificacion', 'fecha_registro', 'Resultado')
+
+# Límites de categorización (intervalos cerrados a la derecha, como pd.cut)
+BINS = {
+    'imc_categoria': ('imc', [0, 18.5, 25, 30, 35, 100]),
+    'edad_categoria': ('edad', [0, 30, 45, 60, 75, 100]),
+}
+
+# Variables categóricas con más categorías se descartan
+MAX_ONEHOT_CATEGORIES = 5
+
+# Puntos que conserva cada estimador de cuantiles en streaming (error de rango ~1/N)
+QUANTILE_SKETCH_POINTS = 1024
+
+# Características derivadas en el orden de salida
+DERIVED_ORDER = ('presion_arterial_media', 'presion_pulso', 'ratio_cintura_altura',
+                 'imc_categoria', 'edad_categoria', 'edad_squared', 'score_cv', 'indice_salud')
+
+Records = Union[pd.DataFrame, Sequence[Mapping[str, Any]]]
+
+def _bin_labels(values: np.ndarray, edges: Sequence[float]) -> np.ndarray:
+    """Etiqueta del intervalo (a, b] de cada valor, NaN fuera de los límites"""
+    position = np.searchsorted(edges, values, side='left')
+    valid = (position > 0) & (position < len(edges)) & ~np.isnan(values)
+    return np.where(valid, position - 1, np.nan)
+
+def _median_of_indicator(ones: int, total: int) -> float:
+    """Mediana de total valores 0/1 con ones unos (como pandas: 0.5 en el empate)"""
+    if total == 0:
+        return 0.0
+    zeros = total - ones
+    return 1.0 if ones > zeros else 0.0 if ones < zeros else 0.5
+
+class StreamingQuantile:
+    """
+    Estimación de cuantiles en streaming con memoria acotada
+
+    Resume los valores vistos en a lo sumo max_points puntos ponderados: cada
+    lote se reduce a sus cuantiles equiespaciados, se combina con el resumen
+    y se vuelve a comprimir. Con pocos valores el resultado es exacto.
+    """
+
+    def __init__(self, max_points: int = QUANTILE_SKETCH_POINTS):
+        self.max_points = max_points
+        self.values = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values: np.ndarray):
+        """Añadir un lote de valores (se ignoran los no finitos)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return
+        weights = np.ones(len(values))
+        if len(values) > self.max_points:
+            values, weights = self._compress(np.sort(values), weights)
+        values = np.concatenate([self.values, values])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(values, kind='stable')
+        self.values, self.weights = values[order], weights[order]
+        if len(self.values) > self.max_points:
+            self.values, self.weights = self._compress(self.values, self.weights)
+
+    def _compress(self, values: np.ndarray, weights: np.ndarray):
+        """Reducir valores ordenados y ponderados a max_points cuantiles equiespaciados"""
+        total = weights.sum()
+        targets = (np.arange(self.max_points) + 0.5) / self.max_points * total
+        return (np.interp(targets, np.cumsum(weights) - weights / 2, values),
+                np.full(self.max_points, total / self.max_points))
+
+    def quantile(self, q: float) -> float:
+        """Cuantil q (NaN si no hay valores)"""
+        if not len(self.values):
+            return float('nan')
+        positions = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), positions, self.values))
+
+class DiabetesFeatureTransformer:
+    """Transformación ajustada de los datos crudos al vector de características"""
+
+    def __init__(self):
+        self.numeric_columns: List[str] = []
+        self.binary_mappings: Dict[str, Dict[str, int]] = {}
+        self.onehot_categories: Dict[str, List[str]] = {}
+        self.bins = {col: (source, list(edges)) for col, (source, edges) in BINS.items()}
+        self.impute_values: Dict[str, float] = {}
+        self.feature_columns: List[str] = []
+        # Acumuladores de partial_fit
+        self._input_columns: List[str] = []
+        self._rows = 0
+        self._category_counts: Dict[str, Counter] = {}
+        self._quantiles: Dict[str, StreamingQuantile] = {}
+
+    @property
+    def is_fitted(self) -> bool:
+        return bool(self.feature_columns)
+
+    def fit(self, df: pd.DataFrame) -> 'DiabetesFeatureTransformer':
+        """
+        Aprender mapeos, columnas e imputación de los datos de entrenamiento
+
+        Las variables con dos categorías se codifican como 0/1 (la primera en
+        orden alfabético es 0) y las de hasta MAX_ONEHOT_CATEGORIES como
+        columnas dummy, igual que get_dummies sobre los datos de entrenamiento.
+
+        Args:
+            df: Datos crudos con el esquema de data_generator.py
+
+        Returns:
+            DiabetesFeatureTransformer: El propio transformador
+        """
+        columns = [col for col in df.columns if col not in EXCLUDED_COLUMNS]
+        self.numeric_columns = self._numeric_columns(df, columns)
+        self._set_columns(columns, {col: [str(value) for value in df[col].dropna().unique()]
+                                    for col in columns if col not in self.numeric_columns})
+
+        # Imputación con la mediana de cada característica en entrenamiento
+        # (columna a columna, sin construir la matriz completa)
+        self.impute_values = {}
+        columns = self._feature_values(df)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for col in self.feature_columns:
+                values = columns[col]()
+                finite = values[~np.isnan(values)]
+                median = float(np.median(finite)) if len(finite) else np.nan
+                self.impute_values[col] = median if np.isfinite(median) else 0.0
+        return self
+
+    def partial_fit(self, df: pd.DataFrame) -> 'DiabetesFeatureTransformer':
+        """
+        Ajustar con un lote más de datos de entrenamiento, con memoria acotada
+
+        Acumula los conteos de cada categoría y un resumen de cuantiles de cada
+        característica numérica o derivada (StreamingQuantile), y recalcula
+        mapeos, columnas y valores de imputación. Las medianas de las
+        variables codificadas son exactas (se obtienen de los conteos); las
+        numéricas son una estimación. Todos los lotes deben tener las mismas
+        columnas que el primero.
+
+        Args:
+            df: Lote de datos crudos con el esquema de data_generator.py
+
+        Returns:
+            DiabetesFeatureTransformer: El propio transformador
+        """
+        if not self._input_columns:
+            self._input_columns = [col for col in df.columns if col not in EXCLUDED_COLUMNS]
+            self.numeric_columns = self._numeric_columns(df, self._input_columns)
+            self._category_counts = {col: Counter() for col in self._input_columns
+                                     if col not in self.numeric_columns}
+
+        self._rows += len(df)
+        for col, counts in self._category_counts.items():
+            if col in df.columns:
+                observed = df[col].dropna().astype(str).value_counts()
+                counts.update({category: int(n) for category, n in observed.items() if n > 0})
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for col, values in self._numeric_features(df).items():
+                self._quantiles.setdefault(col, StreamingQuantile()).update(values())
+
+        self._set_columns(self._input_columns,
+                          {col: list(counts) for col, counts in self._category_counts.items()})
+        dummies = {f'{source}_{category}': (source, category)
+                   for source, categories in self.onehot_categories.items() for category in categories}
+        self.impute_values = {}
+        for col in self.feature_columns:
+            if col in self.binary_mappings:
+                counts = self._category_counts[col]
+                ones = sum(n for category, n in counts.items() if self.binary_mappings[col][category] == 1)
+                median = _median_of_indicator(ones, sum(counts.values()))
+            elif col in dummies:
+                source, category = dummies[col]
+                median = _median_of_indicator(self._category_counts[source][category], self._rows)
+            else:
+                median = self._quantiles[col].quantile(0.5)
+            self.impute_values[col] = median if np.isfinite(median) else 0.0
+        return self
+
+    @staticmethod
+    def _numeric_columns(df: pd.DataFrame, columns: Sequence[str]) -> List[str]:
+        """Columnas numéricas (las categóricas de pandas no cuentan)"""
+        return [col for col in columns
+                if pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+
+    def _set_columns(self, columns: Sequence[str], categories: Dict[str, Sequence[str]]):
+        """Fijar los mapeos categóricos y el orden de las columnas de salida"""
+        self.binary_mappings = {}
+        self.onehot_categories = {}
+        for col in columns:
+            if col not in categories:
+                continue
+            observed = sorted(categories[col])
+            if len(observed) <= 2:
+                self.binary_mappings[col] = {category: code for code, category in enumerate(observed)}
+            elif len(observed) <= MAX_ONEHOT_CATEGORIES:
+                self.onehot_categories[col] = observed
+            elif not self.is_fitted:
+                print(f"⚠️ {col} tiene {len(observed)} categorías y se descarta")
+
+        # Orden de salida: columnas originales (las dummy se reemplazan por sus
+        # columnas al final), luego las derivadas, como en el entrenamiento
+        derived = [col for col in DERIVED_ORDER
+                   if all(source in columns for source in self._sources(col))]
+        self.feature_columns = (
+            [col for col in columns if col in self.numeric_columns or col in self.binary_mappings]
+            + derived
+            + [f'{col}_{category}' for col, categories in self.onehot_categories.items()
+               for category in categories]
+        )
+
+    def _sources(self, col: str) -> Sequence[str]:
+        """Columnas de las que depende una característica derivada"""
+        if col in self.bins:
+            return (self.bins[col][0],)
+        return DERIVED_FEATURES[col]
+
+    def transform(self, data: Records, dtype: Any = np.float64, rows: np.ndarray = None) -> np.ndarray:
+        """
+        Transformar un lote de pacientes a la matriz de características
+
+        Las columnas ausentes y los valores faltantes se imputan con los
+        valores aprendidos; las categorías desconocidas cuentan como faltantes.
+        La matriz se reserva una sola vez (C-contigua) y se llena columna a
+        columna, sin materializar todas las columnas intermedias a la vez.
+
+        Args:
+            data: DataFrame o lista de diccionarios de pacientes
+            dtype: Tipo de la matriz (float64 o float32)
+            rows: Posiciones de las filas a transformar, en el orden de salida
+                (opcional; p. ej. las de entrenamiento seguidas de las de prueba)
+
+        Returns:
+            np.ndarray: Matriz len(rows) × len(feature_columns)
+
+        Raises:
+            ValueError: Si una columna numérica contiene valores no numéricos
+        """
+        if not self.is_fitted:
+            raise ValueError("El transformador de características no está ajustado")
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        return self._build(df, dtype, rows)
+
+    def transform_frame(self, df: pd.DataFrame, dtype: Any = np.float64) -> pd.DataFrame:
+        """Transformar a un DataFrame con las columnas de características (sin copiar la matriz)"""
+        return pd.DataFrame(self.transform(df, dtype), columns=self.feature_columns, index=df.index,
+                            copy=False)
+
+    def _build(self, df: pd.DataFrame, dtype: Any, rows: np.ndarray = None) -> np.ndarray:
+        """Construir la matriz imputada columna a columna"""
+        columns = self._feature_values(df)
+        features = np.empty((len(df) if rows is None else len(rows), len(self.feature_columns)), dtype=dtype)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for j, col in enumerate(self.feature_columns):
+                values = columns[col]()
+                if rows is not None:
+                    values = values[rows]
+                features[:, j] = values
+                missing = np.isnan(features[:, j])
+                if missing.any():
+                    features[missing, j] = self.impute_values[col]
+        return features
+
+    def _feature_values(self, df: pd.DataFrame) -> Dict[str, Callable[[], np.ndarray]]:
+        """Función que calcula los valores (float64, sin imputar) de cada característica"""
+        n = len(df)
+        columns = self._numeric_features(df)
+
+        def text(col: str) -> pd.Series:
+            return df[col].astype(object) if col in df.columns else pd.Series([None] * n, index=df.index)
+
+        def binary(col: str, mapping: Dict[str, int]) -> np.ndarray:
+            return text(col).map(mapping).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        def dummy(col: str, category: str) -> np.ndarray:
+            if col not in df.columns:
+                return np.full(n, np.nan)
+            return (text(col) == category).to_numpy(dtype=np.float64)
+
+        for col, mapping in self.binary_mappings.items():
+            columns[col] = lambda col=col, mapping=mapping: binary(col, mapping)
+        for col, categories in self.onehot_categories.items():
+            for category in categories:
+                columns[f'{col}_{category}'] = lambda col=col, category=category: dummy(col, category)
+        return columns
+
+    def _numeric_features(self, df: pd.DataFrame) -> Dict[str, Callable[[], np.ndarray]]:
+        """Función que calcula cada columna numérica y característica derivada (sin imputar)"""
+        n = len(df)
+
+        def numeric(col: str) -> np.ndarray:
+            if col not in df.columns:
+                return np.full(n, np.nan)
+            return pd.to_numeric(df[col], errors='raise').to_numpy(dtype=np.float64, na_value=np.nan)
+
+        def yes_no(col: str) -> np.ndarray:
+            if col not in df.columns:
+                return np.full(n, np.nan)
+            return df[col].astype(object).map(YES_NO_SCORE).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        def score_cv() -> np.ndarray:
+            tas, imc, edad = numeric('tas'), numeric('imc'), numeric('edad')
+            return (tas - 120) / 20 + (imc - 25) / 5 + (edad - 40) / 20 + yes_no('fuma')
+
+        columns = {col: lambda col=col: numeric(col) for col in self.numeric_columns}
+        columns['presion_arterial_media'] = lambda: (numeric('tas') + 2 * numeric('tad')) / 3
+        columns['presion_pulso'] = lambda: numeric('tas') - numeric('tad')
+        columns['ratio_cintura_altura'] = lambda: numeric('perimetro_abdominal') / numeric('talla')
+        for col, (source, edges) in self.bins.items():
+            columns[col] = lambda source=source, edges=edges: _bin_labels(numeric(source), edges)
+        columns['edad_squared'] = lambda: np.square(numeric('edad'))
+        columns['score_cv'] = score_cv
+        columns['indice_salud'] = lambda: yes_no('realiza_ejercicio') * 2 - yes_no('fuma')
+        return columns
+
+    def feature_plan(self, dtype: Any = np.float64) -> DiabetesFeaturePlan:
+        """
+        Plan compilado equivalente para pacientes individuales
+
+        Args:
+            dtype: Tipo del vector de salida (float64 o float32)
+
+        Returns:
+            DiabetesFeaturePlan: Plan con los mapeos e imputación aprendidos
+        """
+        return DiabetesFeaturePlan(
+            feature_columns=self.feature_columns,
+            absent_defaults=self.impute_values,
+            impute_values=self.impute_values,
+            binary_mappings=self.binary_mappings,
+            onehot_columns={f'{col}_{category}': (col, category)
+                            for col, categories in self.onehot_categories.items()
+                            for category in categories},
+            bins=self.bins,
+            dtype=dtype
+        )
+
+    def save(self, path: Union[str, Path]) -> str:
+        """Guardar el transformador ajustado"""
+        joblib.dump(self, path)
+        return str(path)
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> 'DiabetesFeatureTransformer':
+        """Cargar un transformador guardado con save()"""
+        return joblib.load(path)
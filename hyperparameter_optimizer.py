@@ -5,7 +5,7 @@ Implementación con Optuna para optimización bayesiana
 import optuna
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import cross_val_score, StratifiedKFold
+from sklearn.model_selection import StratifiedKFold
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 from typing import Dict, Any, Callable, Tuple, Optional
 import logging
@@ -28,6 +28,7 @@ import lightgbm as lgb
 
 from config import config, RANDOM_SEED
 from data_preprocessor import DiabetesDataPreprocessor
+from model_evaluation import evaluate_model
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -73,34 +74,19 @@ class DiabetesHyperparameterOptimizer:
                 # Crear modelo con hiperparámetros sugeridos
                 model = self._create_model(model_name, params)
 
-                # Validación cruzada
-                cv_scores = cross_val_score(
-                    model,
-                    self.X_train,
-                    self.y_train,
-                    cv=5,
-                    scoring='r2',
-                    n_jobs=-1
-                )
-
-                mean_r2 = cv_scores.mean()
-
-                # Entrenar modelo completo
-                model.fit(self.X_train, self.y_train)
-
-                # Evaluar en conjunto de prueba
-                y_pred = model.predict(self.X_test)
-                test_r2 = r2_score(self.y_test, y_pred)
-                test_rmse = np.sqrt(mean_squared_error(self.y_test, y_pred))
+                # Validación cruzada y modelo completo en una sola pasada
+                evaluation = evaluate_model(model, self.X_train, self.y_train, self.X_test, self.y_test,
+                                            cv=5, scoring='r2', n_jobs=-1)
+                mean_r2 = evaluation['cv_r2_mean']
 
                 # Guardar resultados de este trial
                 trial_result = {
                     'trial': trial.number,
                     'params': params,
                     'cv_r2_mean': mean_r2,
-                    'cv_r2_std': cv_scores.std(),
-                    'test_r2': test_r2,
-                    'test_rmse': test_rmse,
+                    'cv_r2_std': evaluation['cv_r2_std'],
+                    'test_r2': evaluation['test_r2'],
+                    'test_rmse': evaluation['test_rmse'],
                     'model': model_name,
                     'timestamp': datetime.now().isoformat()
                 }
@@ -487,7 +473,7 @@ if __name__ == "__main__":
     # Ejemplo de uso
     from data_generator import create_sample_dataset
     from data_preprocessor import preprocess_diabetes_data
-    from sklearn.model_selection import train_test_split
+    from dataset_cache import split_and_scale
 
     logger.info("🧪 Probando optimizador de hiperparámetros...")
 
@@ -497,17 +483,10 @@ if __name__ == "__main__":
     # Preprocesar
     df_processed, preprocessor = preprocess_diabetes_data(df)
 
-    # Dividir datos
-    feature_columns = [col for col in df_processed.columns if col != 'Resultado']
-    X = df_processed[feature_columns]
-    y = df_processed['Resultado']
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=RANDOM_SEED
-    )
-
-    # Escalar
-    X_train_scaled, X_test_scaled = preprocessor.scale_features(X_train, X_test)
+    # Dividir y escalar (reutilizados de la caché en ejecuciones repetidas)
+    split = split_and_scale(df_processed, preprocessor)
+    X_train_scaled, X_test_scaled = split['X_train'], split['X_test']
+    y_train, y_test = split['y_train'], split['y_test']
 
     # Optimizar modelos
     results = optimize_diabetes_models(
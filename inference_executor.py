@@ -0,0 +1,201 @@
+"""
+Ejecutor acotado de inferencia para los endpoints asíncronos de la API
+
+La preparación de características y model.predict son trabajo de CPU; si se
+ejecutan directamente en el event loop, una petición de lote grande detiene
+todas las demás (incluido /health). Este módulo los delega a un pool de hilos
+o de procesos con un número máximo de tareas en espera: cuando la cola está
+llena la petición se rechaza de inmediato en lugar de acumular latencia.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from config import config
+from metrics import current_labels, current_timings, merge_timings, run_in_stage_context, time_stage
+
+EXECUTOR_KINDS = ('thread', 'process')
+
+def _lower_worker_priority(niceness: int):
+    """
+    Bajar la prioridad de CPU del worker actual (hilo o proceso) para que el
+    event loop de la API siempre obtenga CPU antes que la inferencia
+    """
+    if niceness <= 0 or not hasattr(os, 'setpriority'):
+        return
+    try:
+        # En Linux la prioridad se aplica por hilo usando su id nativo
+        who = threading.get_native_id() if hasattr(threading, 'get_native_id') else 0
+        os.setpriority(os.PRIO_PROCESS, who, os.getpriority(os.PRIO_PROCESS, who) + niceness)
+    except OSError:
+        pass
+
+class InferenceQueueFull(Exception):
+    """No hay capacidad para aceptar más tareas de inferencia"""
+
+class InferenceExecutor:
+    """Pool de inferencia con cola acotada"""
+
+    def __init__(self, kind: str = None, max_workers: int = None, max_queue: int = None,
+                 niceness: int = None):
+        """
+        Inicializar el ejecutor
+
+        Args:
+            kind: 'thread' o 'process' (opcional, usa INFERENCE_EXECUTOR)
+            max_workers: Tareas ejecutándose a la vez (opcional, usa INFERENCE_WORKERS)
+            max_queue: Tareas en espera además de las que se ejecutan
+                (opcional, usa INFERENCE_QUEUE_SIZE)
+            niceness: Incremento de nice de los workers (opcional, usa INFERENCE_WORKER_NICE)
+        """
+        self.kind = kind or config.INFERENCE_EXECUTOR
+        self.max_workers = max_workers or config.INFERENCE_WORKERS
+        self.max_queue = config.INFERENCE_QUEUE_SIZE if max_queue is None else max_queue
+        self.niceness = config.INFERENCE_WORKER_NICE if niceness is None else niceness
+
+        if self.kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Tipo de ejecutor no válido: {self.kind}")
+
+        self._executor: Executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        """Máximo de tareas aceptadas a la vez (en ejecución + en espera)"""
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        """Crear el pool en el primer uso"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == 'process':
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            initializer=_lower_worker_priority, initargs=(self.niceness,)
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="inference",
+                            initializer=_lower_worker_priority, initargs=(self.niceness,)
+                        )
+        return self._executor
+
+    async def run(self, func: Callable, *args, labels: Tuple[str, str] = None,
+                  timings: Dict[str, float] = None) -> Any:
+        """
+        Ejecutar func(*args) en el pool sin bloquear el event loop
+
+        Args:
+            func: Función a nivel de módulo (para poder enviarla a un proceso)
+            labels: Etiquetas (endpoint, modelo) de las métricas de la tarea
+                (opcional, usa las de la petición en curso)
+            timings: Diccionario donde sumar los tiempos por etapa medidos en
+                el worker (opcional, usa los de la petición en curso si los acumula)
+
+        Raises:
+            InferenceQueueFull: Si ya hay `capacity` tareas aceptadas
+        """
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise InferenceQueueFull(
+                    f"Capacidad de inferencia agotada ({self.capacity} tareas en curso)"
+                )
+            self._in_flight += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+            # Las etiquetas de métricas de la petición viajan con la tarea al
+            # worker y los tiempos por etapa medidos allí vuelven con el resultado
+            if timings is None:
+                timings = current_timings()
+            result = await loop.run_in_executor(self._get_executor(), run_in_stage_context,
+                                                labels or current_labels(), timings is not None,
+                                                func, *args)
+            if timings is not None:
+                result, worker_timings = result
+                merge_timings(worker_timings, timings)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.completed += 1
+
+    def shutdown(self, wait: bool = True):
+        """Detener el pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado actual del ejecutor"""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "niceness": self.niceness,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+# Funciones de inferencia ejecutadas en el pool. Están a nivel de módulo para
+# que se puedan enviar a un pool de procesos; cada proceso usa su propio
+# registro de modelos.
+
+def run_predict(patient_data: Dict[str, Any], model_name: str = None) -> Dict[str, Any]:
+    """Predicción para un paciente con el predictor del registro"""
+    from predictor import predict_glucose
+    return predict_glucose(patient_data, model_name=model_name)
+
+def run_predict_batch(patients_data: List[Dict[str, Any]], model_name: str = None) -> List[Dict[str, Any]]:
+    """Predicción por lotes con el predictor del registro"""
+    from model_registry import get_predictor
+    return get_predictor(model_name=model_name).predict_batch(patients_data)
+
+def run_predict_batch_response(patients: List[Any], start_time: float) -> Tuple[bytes, float]:
+    """
+    Lote completo con la respuesta de /predict/batch ya serializada
+
+    La conversión de los modelos pydantic y la serialización JSON de miles de
+    resultados también son trabajo de CPU, así que se hacen en el pool junto
+    con la predicción.
+
+    Args:
+        patients: Pacientes validados (modelos pydantic o diccionarios)
+        start_time: time.time() al recibir la petición
+
+    Returns:
+        Tuple[bytes, float]: Cuerpo JSON y tiempo de procesamiento en ms
+    """
+    data_dicts = [patient if isinstance(patient, dict) else patient.dict() for patient in patients]
+    results = run_predict_batch(data_dicts)
+
+    for result in results:
+        if "error" in result:
+            result["error"] = f"Error en paciente: {result['error']}"
+
+    processing_time = (time.time() - start_time) * 1000
+    with time_stage('serialization'):
+        body = json.dumps({
+            "results": results,
+            "total_patients": len(data_dicts),
+            "processing_time_ms": round(processing_time, 2),
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+    return body, processing_time
+
+# Instancia global del ejecutor
+inference_executor = InferenceExecutor()
@@ -0,0 +1,432 @@
+"""
+Generador de carga asíncrono para los servicios de predicción
+
+Envía peticiones de predicción a una API local (api.py por defecto, o main.py
+/ api_service.py) con un número fijo de peticiones en vuelo (lazo cerrado) o
+con una tasa de llegada fija (lazo abierto, --rate) y reporta throughput,
+latencias p50/p95/p99/máx y tasa de error. Los reportes se guardan en JSON y
+se pueden comparar con una ejecución anterior (--compare).
+
+En lazo abierto la latencia se mide desde el instante en que la petición
+debía enviarse, no desde que se envió, para que la espera causada por un
+servidor saturado quede en los percentiles en lugar de ocultarse.
+
+Si no se indica --url, el servicio se arranca con uvicorn en 127.0.0.1 en
+un puerto libre, así que la prueba no sale de la interfaz de loopback.
+
+Uso:
+    python load_tester.py --concurrency 32 --duration 20
+    python load_tester.py --rate 500 --duration 30 --payloads pacientes.jsonl
+    python load_tester.py --target main --compare outputs/load_test_base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from config import config
+
+# Servicios que se pueden probar: módulo ASGI, ruta de predicción y formato
+# del payload ('api' usa PatientData; 'numeric' el esquema codificado de
+# main.py y api_service.py)
+TARGETS = {
+    'api': {'app': 'api:app', 'path': '/predict', 'payload': 'api'},
+    'main': {'app': 'main:app', 'path': '/predict', 'payload': 'numeric'},
+    'api_service': {'app': 'api_service:app', 'path': '/predict', 'payload': 'numeric'},
+}
+
+# Codificación de las variables categóricas en el esquema numérico
+NUMERIC_CODES = {
+    'sexo': {'M': 1, 'F': 0},
+    'consume_alcohol': {'Nunca': 0, 'Ocasional': 1, 'Frecuente': 2},
+}
+YES_NO_FIELDS = ('realiza_ejercicio', 'fuma', 'medicamentos_hta', 'historia_familiar_dm',
+                 'diabetes_gestacional')
+INTEGER_FIELDS = ('edad', 'tas', 'tad', 'frecuencia_cardiaca', 'puntaje_findrisc')
+
+PERCENTILES = (50, 95, 99)
+
+def load_payloads(path: Path, limit: int = None) -> List[Dict[str, Any]]:
+    """
+    Leer pacientes de un archivo JSONL
+
+    Cada línea puede ser un paciente o una entrada del log de predicciones
+    (con el paciente en "patient_data").
+    """
+    payloads = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            payloads.append(record.get("patient_data", record))
+            if limit and len(payloads) >= limit:
+                break
+    if not payloads:
+        raise ValueError(f"No hay pacientes en {path}")
+    return payloads
+
+def synthesize_payloads(n: int = 1000, random_state: int = None) -> List[Dict[str, Any]]:
+    """Generar pacientes sintéticos con DiabetesDataGenerator"""
+    from bulk_scorer import INPUT_COLUMNS
+    from data_generator import DiabetesDataGenerator
+
+    df = DiabetesDataGenerator(n_samples=n, random_state=random_state,
+                               vectorized=True).generate_synthetic_data()
+    df = df[INPUT_COLUMNS].astype(object).where(df[INPUT_COLUMNS].notna(), None)
+    return df.to_dict('records')
+
+def to_numeric_payload(patient: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertir un paciente de PatientData al esquema numérico de main.py / api_service.py"""
+    payload = {}
+    for field, value in patient.items():
+        if field in NUMERIC_CODES:
+            value = NUMERIC_CODES[field].get(value, value)
+        elif field in YES_NO_FIELDS:
+            value = 1 if value == 'Si' else 0 if value == 'No' else value
+        if value is None:
+            value = 0
+        if field in INTEGER_FIELDS:
+            value = int(round(value))
+        payload[field] = value
+    return payload
+
+def summarize(latencies: List[float], errors: Counter, elapsed: float, scheduled: int = None) -> Dict[str, Any]:
+    """
+    Resumen de una ejecución
+
+    Args:
+        latencies: Latencias de las peticiones exitosas (s)
+        errors: Errores por tipo (código HTTP o excepción)
+        elapsed: Duración de la medición (s)
+        scheduled: Peticiones programadas en lazo abierto (opcional)
+
+    Returns:
+        Dict: Throughput, latencias en ms y tasa de error
+    """
+    n_errors = sum(errors.values())
+    total = len(latencies) + n_errors
+    summary = {
+        "requests": total,
+        "successful": len(latencies),
+        "errors": n_errors,
+        "error_rate": round(n_errors / total, 6) if total else 0.0,
+        "errors_by_type": dict(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "sent_rps": round(total / elapsed, 2) if elapsed else 0.0,
+    }
+    if scheduled is not None:
+        summary["scheduled"] = scheduled
+
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        summary["latency_ms"] = {
+            **{f"p{p}": round(float(np.percentile(values, p)), 3) for p in PERCENTILES},
+            "mean": round(float(values.mean()), 3),
+            "max": round(float(values.max()), 3),
+        }
+    else:
+        summary["latency_ms"] = {}
+    return summary
+
+class LoadTester:
+    """Generador de carga en lazo cerrado (concurrencia fija) o abierto (tasa fija)"""
+
+    def __init__(self, base_url: str, payloads: List[Any], path: str = '/predict',
+                 concurrency: int = 16, rate: float = None, arrival: str = 'uniform',
+                 timeout: float = 30.0, random_state: int = None):
+        """
+        Inicializar el generador
+
+        Args:
+            base_url: URL base del servicio
+            payloads: Cuerpos JSON que se envían en orden circular
+            path: Ruta de predicción
+            concurrency: Peticiones en vuelo (lazo cerrado) o máximo en vuelo
+                (lazo abierto)
+            rate: Peticiones por segundo en lazo abierto (None para lazo cerrado)
+            arrival: Llegadas en lazo abierto: 'uniform' o 'poisson'
+            timeout: Timeout por petición (s)
+            random_state: Semilla de las llegadas de Poisson
+        """
+        if arrival not in ('uniform', 'poisson'):
+            raise ValueError(f"Tipo de llegadas no válido: {arrival}")
+        self.base_url = base_url.rstrip('/')
+        self.payloads = payloads
+        self.path = path
+        self.concurrency = concurrency
+        self.rate = rate
+        self.arrival = arrival
+        self.timeout = timeout
+        self._random = random.Random(random_state)
+        self._next_payload = 0
+
+    def _payload(self) -> Any:
+        """Siguiente cuerpo, en orden circular"""
+        payload = self.payloads[self._next_payload % len(self.payloads)]
+        self._next_payload += 1
+        return payload
+
+    async def _send(self, client, payload: Any, started: float, record: bool,
+                    latencies: List[float], errors: Counter):
+        """Enviar una petición y registrar su resultado"""
+        try:
+            response = await client.post(self.path, json=payload)
+            ok = response.status_code == 200
+            error = None if ok else f"HTTP {response.status_code}"
+        except Exception as e:
+            error = type(e).__name__
+        if not record:
+            return
+        if error is None:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors[error] += 1
+
+    async def _closed_loop(self, client, duration: float, warmup: float,
+                           latencies: List[float], errors: Counter):
+        """Mantener `concurrency` peticiones en vuelo"""
+        start = time.perf_counter()
+        measure_from = start + warmup
+        deadline = measure_from + duration
+
+        async def worker():
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    return
+                await self._send(client, self._payload(), now, now >= measure_from, latencies, errors)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, client, duration: float, warmup: float,
+                         latencies: List[float], errors: Counter) -> int:
+        """Enviar a tasa fija, sin esperar respuestas, hasta `concurrency` en vuelo"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        scheduled = 0
+
+        async def limited(payload, started, record):
+            # La espera por el límite de vuelo cuenta como latencia
+            async with semaphore:
+                await self._send(client, payload, started, record, latencies, errors)
+
+        start = time.perf_counter()
+        measure_from = start + warmup
+        deadline = measure_from + duration
+        next_send = start
+        while next_send < deadline:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            record = next_send >= measure_from
+            scheduled += record
+            task = asyncio.create_task(limited(self._payload(), next_send, record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+            next_send += self._random.expovariate(self.rate) if self.arrival == 'poisson' else 1 / self.rate
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        return scheduled
+
+    async def run(self, duration: float, warmup: float = 0.0) -> Dict[str, Any]:
+        """
+        Ejecutar la prueba
+
+        Args:
+            duration: Segundos de medición
+            warmup: Segundos previos cuyas peticiones no se miden
+
+        Returns:
+            Dict: Resumen de la ejecución (ver summarize)
+        """
+        import httpx
+
+        latencies: List[float] = []
+        errors: Counter = Counter()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits) as client:
+            start = time.perf_counter()
+            if self.rate:
+                scheduled = await self._open_loop(client, duration, warmup, latencies, errors)
+            else:
+                scheduled = None
+                await self._closed_loop(client, duration, warmup, latencies, errors)
+            elapsed = time.perf_counter() - start - warmup
+
+        return summarize(latencies, errors, elapsed, scheduled)
+
+def _free_port() -> int:
+    """Puerto libre en la interfaz de loopback"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_local_service(app: str, port: int = None, workers: int = 1, env: Dict[str, str] = None,
+                        startup_timeout: float = 120.0):
+    """
+    Arrancar un servicio con uvicorn en 127.0.0.1 y esperar a que responda /health
+
+    Returns:
+        Tuple[subprocess.Popen, str]: Proceso y URL base
+    """
+    import httpx
+
+    port = port or _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=config.PROJECT_ROOT, env={**os.environ, **(env or {})},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"El servicio {app} terminó al arrancar (código {process.returncode})")
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f"El servicio {app} no arrancó a tiempo")
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Cambio relativo de throughput, latencias y tasa de error frente a una ejecución base"""
+    def change(new, old):
+        return round((new - old) / old, 4) if old else None
+
+    current_summary, baseline_summary = current["summary"], baseline["summary"]
+    comparison = {
+        "baseline": baseline.get("timestamp"),
+        "throughput_rps": change(current_summary["throughput_rps"], baseline_summary["throughput_rps"]),
+        "error_rate": round(current_summary["error_rate"] - baseline_summary["error_rate"], 6),
+        "latency_ms": {}
+    }
+    for key, value in current_summary["latency_ms"].items():
+        if key in baseline_summary["latency_ms"]:
+            comparison["latency_ms"][key] = change(value, baseline_summary["latency_ms"][key])
+    return comparison
+
+def _print_summary(summary: Dict[str, Any], comparison: Dict[str, Any] = None):
+    """Imprimir el resumen de una ejecución"""
+    latency = summary["latency_ms"]
+    print(f"📊 Peticiones: {summary['requests']} ({summary['errors']} errores, "
+          f"{summary['error_rate'] * 100:.2f}%)")
+    print(f"🚀 Throughput: {summary['throughput_rps']} peticiones/s")
+    if latency:
+        print("⏱️ Latencia (ms): " + ", ".join(f"{key} {value}" for key, value in latency.items()))
+    if summary["errors_by_type"]:
+        print(f"❌ Errores: {summary['errors_by_type']}")
+    if comparison:
+        def fmt(value):
+            return "n/d" if value is None else f"{value * 100:+.1f}%"
+        print(f"📈 Frente a {comparison['baseline']}: throughput {fmt(comparison['throughput_rps'])}, "
+              + ", ".join(f"{key} {fmt(value)}" for key, value in comparison["latency_ms"].items()))
+
+def main():
+    """Punto de entrada de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Prueba de carga de los servicios de predicción")
+    parser.add_argument("--target", choices=sorted(TARGETS), default="api", help="Servicio a probar")
+    parser.add_argument("--url", help="URL de un servicio ya en ejecución (si no, se arranca en loopback)")
+    parser.add_argument("--path", help="Ruta de predicción (por defecto la del servicio)")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="Pacientes por petición (envía listas, p. ej. a /predict/batch)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Peticiones en vuelo")
+    parser.add_argument("--rate", type=float, help="Peticiones por segundo (lazo abierto)")
+    parser.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform",
+                        help="Llegadas en lazo abierto")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de medición")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Segundos de calentamiento")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por petición")
+    parser.add_argument("--payloads", help="Archivo JSONL con pacientes (por defecto sintéticos)")
+    parser.add_argument("--samples", type=int, default=1000, help="Pacientes sintéticos distintos")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn del servicio local")
+    parser.add_argument("--seed", type=int, default=config.RANDOM_SEED, help="Semilla")
+    parser.add_argument("--output", help="Archivo JSON del reporte (por defecto en outputs/)")
+    parser.add_argument("--compare", help="Reporte JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    target = TARGETS[args.target]
+    path = args.path or target["path"]
+
+    patients = (load_payloads(Path(args.payloads)) if args.payloads
+                else synthesize_payloads(args.samples, args.seed))
+    if target["payload"] == "numeric":
+        patients = [to_numeric_payload(patient) for patient in patients]
+    payloads = patients
+    if args.batch_size:
+        payloads = [patients[i:i + args.batch_size] for i in range(0, len(patients), args.batch_size)]
+
+    process = None
+    base_url = args.url
+    if base_url is None:
+        print(f"🔄 Arrancando {target['app']} en 127.0.0.1...")
+        process, base_url = start_local_service(target["app"], workers=args.workers)
+
+    mode = f"lazo abierto a {args.rate} pet/s ({args.arrival})" if args.rate else "lazo cerrado"
+    print(f"🏋️ {base_url}{path}: {mode}, {args.concurrency} en vuelo, {args.duration}s "
+          f"(+{args.warmup}s de calentamiento)")
+
+    try:
+        tester = LoadTester(base_url, payloads, path=path, concurrency=args.concurrency,
+                            rate=args.rate, arrival=args.arrival, timeout=args.timeout,
+                            random_state=args.seed)
+        summary = asyncio.run(tester.run(args.duration, args.warmup))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "target": args.target,
+        "url": base_url + path,
+        "parameters": {
+            "mode": "open" if args.rate else "closed",
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "arrival": args.arrival if args.rate else None,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "batch_size": args.batch_size or None,
+            "payloads": args.payloads or f"sintéticos ({args.samples})",
+            "workers": args.workers if process is not None else None,
+        },
+        "summary": summary
+    }
+
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            comparison = compare_reports(report, json.load(f))
+        report["comparison"] = comparison
+
+    output = Path(args.output) if args.output else config.get_output_path(
+        config.get_timestamped_filename("load_test", "json"))
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    _print_summary(summary, comparison)
+    print(f"💾 Reporte: {output}")
+    return 0 if summary["successful"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Memoria pico por etapa del pipeline de entrenamiento
+
+Un hilo muestrea la memoria residente (RSS) del proceso mientras hay una etapa
+abierta y guarda, para cada etapa, la RSS al empezar y al terminar y el pico
+alcanzado. A diferencia de tracemalloc, incluye las reservas de las
+extensiones en C (numpy, scikit-learn, xgboost) y no ralentiza la ejecución.
+"""
+import contextlib
+import os
+import resource
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# Segundos entre muestras de RSS
+SAMPLE_INTERVAL = 0.005
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss() -> int:
+    """Memoria residente actual del proceso en bytes (la máxima si /proc no existe)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def process_rss(pid: int) -> Optional[int]:
+    """Memoria residente de otro proceso en bytes (None si no se puede leer)"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+def available_memory() -> Optional[int]:
+    """Memoria disponible del sistema en bytes (MemAvailable; None si no se puede leer)"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+class StageMemoryTracker:
+    """Registro de memoria RSS pico por etapa"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stages: List[Dict[str, Any]] = []
+        self._peak = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _sample(self):
+        """Muestrear la RSS mientras haya etapas abiertas"""
+        while True:
+            rss = current_rss()
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                self._peak = max(self._peak, rss)
+            time.sleep(self.interval)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Medir una etapa
+
+        Args:
+            name: Nombre de la etapa en el reporte
+        """
+        start_rss = current_rss()
+        start_time = time.perf_counter()
+        with self._lock:
+            outer_peak = self._peak
+            self._peak = start_rss
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="memory-tracker", daemon=True)
+                self._thread.start()
+        try:
+            yield
+        finally:
+            end_rss = current_rss()
+            with self._lock:
+                self._active -= 1
+                peak = max(self._peak, end_rss)
+                # Una etapa anidada no oculta el pico a la etapa que la contiene
+                self._peak = max(outer_peak, peak)
+            self.record(name, time.perf_counter() - start_time, start_rss, end_rss, peak)
+
+    def record(self, name: str, seconds: float, start_rss: int, end_rss: int, peak_rss: int):
+        """
+        Añadir una etapa medida fuera del registro (p. ej. en un proceso worker)
+
+        Args:
+            name: Nombre de la etapa en el reporte
+            seconds: Duración
+            start_rss, end_rss, peak_rss: RSS al empezar, al terminar y pico, en bytes
+        """
+        self.stages.append({
+            "stage": name,
+            "seconds": round(seconds, 3),
+            "start_mb": round(start_rss / 2**20, 1),
+            "end_mb": round(end_rss / 2**20, 1),
+            "peak_mb": round(peak_rss / 2**20, 1),
+            "peak_increase_mb": round((peak_rss - start_rss) / 2**20, 1)
+        })
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Etapas medidas en el orden en que terminaron"""
+        return list(self.stages)
+
+    def print_report(self):
+        """Imprimir la memoria de cada etapa"""
+        print("\n💾 MEMORIA POR ETAPA (RSS)")
+        for entry in self.stages:
+            print(f"   {entry['stage']:<28} pico {entry['peak_mb']:>8.1f} MB "
+                  f"(+{entry['peak_increase_mb']:.1f} MB) {entry['seconds']:>7.2f}s")
@@ -0,0 +1,199 @@
+"""
+Métricas Prometheus de la API del Sistema Predictivo de Diabetes
+
+Contadores de peticiones y predicciones e histogramas de latencia por etapa
+(validación, preparación de características, escalado, model.predict,
+serialización y log), etiquetados por endpoint y modelo.
+
+Las etiquetas de la petición en curso las fija MetricsMiddleware a partir de
+la ruta de FastAPI (p. ej. "/models/{model_name}/predict"); el ejecutor de
+inferencia las pasa a sus workers con run_in_stage_context(), así que las
+etapas que se miden dentro del predictor quedan asociadas a la petición que
+las originó. Si la petición acumula sus tiempos por etapa (ver
+request_tracing.py), los tiempos medidos en el worker vuelven con el resultado.
+
+Con varios procesos (workers de uvicorn/gunicorn o INFERENCE_EXECUTOR=process)
+se debe definir PROMETHEUS_MULTIPROC_DIR con un directorio vacío al arrancar:
+cada proceso escribe ahí sus valores y /metrics los agrega. Con gunicorn,
+llamar a mark_worker_dead(worker.pid) en el hook child_exit.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+)
+
+# Límites de los histogramas de latencia (s): las etapas de una predicción
+# individual duran decenas de microsegundos
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+DEFAULT_LABELS = ('none', 'default')
+
+# Valores permitidos de la etiqueta de modelo (el resto se agrupa en 'other'
+# para que un nombre inválido en la URL no cree series nuevas)
+MODEL_LABELS = ('random_forest', 'gradient_boosting')
+
+REQUESTS = Counter(
+    'diabetes_api_requests', 'Peticiones HTTP atendidas',
+    ['endpoint', 'model', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'diabetes_api_request_seconds', 'Latencia total de las peticiones HTTP',
+    ['endpoint', 'model'], buckets=LATENCY_BUCKETS
+)
+PREDICTIONS = Counter(
+    'diabetes_api_predictions', 'Pacientes predichos',
+    ['endpoint', 'model']
+)
+STAGE_LATENCY = Histogram(
+    'diabetes_api_stage_seconds', 'Latencia por etapa de la predicción',
+    ['stage', 'endpoint', 'model'], buckets=LATENCY_BUCKETS
+)
+BATCH_SIZE = Histogram(
+    'diabetes_api_batch_size', 'Pacientes por llamada vectorizada al modelo',
+    ['endpoint', 'model'], buckets=BATCH_SIZE_BUCKETS
+)
+
+# Ámbito ASGI de la petición en curso (fijado por MetricsMiddleware)
+_request_scope: ContextVar[Optional[dict]] = ContextVar('metrics_request_scope', default=None)
+# Tiempos por etapa (s) que acumula la petición en curso, si los pide
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_stage_timings', default=None)
+# Etiquetas y tiempos fijados en los hilos/procesos del ejecutor de inferencia
+_worker_context = threading.local()
+
+def current_labels() -> Tuple[str, str]:
+    """Etiquetas (endpoint, modelo) de la petición o tarea en curso"""
+    labels = getattr(_worker_context, 'labels', None)
+    if labels is not None:
+        return labels
+
+    scope = _request_scope.get()
+    if scope is None:
+        return DEFAULT_LABELS
+
+    # La ruta se resuelve después del middleware, por eso se consulta aquí
+    route = scope.get('route')
+    endpoint = getattr(route, 'path', None) or 'unmatched'
+    model = scope.get('path_params', {}).get('model_name')
+    if model is None and b'model_name=' in scope.get('query_string', b''):
+        model = parse_qs(scope['query_string'].decode('latin-1')).get('model_name', [None])[0]
+    if model is None:
+        return endpoint, 'default'
+    return endpoint, model if model in MODEL_LABELS else 'other'
+
+def current_timings() -> Optional[Dict[str, float]]:
+    """Tiempos por etapa que acumula la petición o tarea en curso (None si no los pide)"""
+    if getattr(_worker_context, 'labels', None) is not None:
+        return _worker_context.timings
+    return _request_timings.get()
+
+def start_request_timings() -> Dict[str, float]:
+    """Empezar a acumular los tiempos por etapa de la petición en curso"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+def merge_timings(source: Dict[str, float], target: Dict[str, float] = None):
+    """Sumar tiempos por etapa a los de la petición en curso (o a target)"""
+    target = current_timings() if target is None else target
+    if target is None:
+        return
+    for stage, seconds in source.items():
+        target[stage] = target.get(stage, 0.0) + seconds
+
+def run_in_stage_context(labels: Tuple[str, str], collect_timings: bool, func: Callable, *args) -> Any:
+    """
+    Ejecutar func(*args) en un worker con las etiquetas de la petición
+
+    Returns:
+        El resultado de func, o (resultado, tiempos por etapa) si collect_timings
+    """
+    previous = (getattr(_worker_context, 'labels', None), getattr(_worker_context, 'timings', None))
+    timings: Optional[Dict[str, float]] = {} if collect_timings else None
+    _worker_context.labels, _worker_context.timings = labels, timings
+    try:
+        result = func(*args)
+    finally:
+        _worker_context.labels, _worker_context.timings = previous
+    return (result, timings) if collect_timings else result
+
+def observe_stage(stage: str, seconds: float):
+    """Registrar la duración de una etapa con las etiquetas en curso"""
+    STAGE_LATENCY.labels(stage, *current_labels()).observe(seconds)
+    timings = current_timings()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+@contextmanager
+def time_stage(stage: str):
+    """Medir la duración del bloque como una etapa"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def observe_batch(size: int):
+    """Registrar el tamaño de una llamada vectorizada al modelo"""
+    BATCH_SIZE.labels(*current_labels()).observe(size)
+
+def count_predictions(n: int = 1):
+    """Contar pacientes predichos en la petición en curso"""
+    PREDICTIONS.labels(*current_labels()).inc(n)
+
+class MetricsMiddleware:
+    """Middleware ASGI que fija las etiquetas de la petición y mide su latencia"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_scope.set(scope)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint, model = current_labels()
+            REQUESTS.labels(endpoint, model, str(status["code"])).inc()
+            REQUEST_LATENCY.labels(endpoint, model).observe(time.perf_counter() - start)
+            _request_scope.reset(token)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Exposición en formato texto de Prometheus
+
+    Returns:
+        Tuple[bytes, str]: Cuerpo y content type
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead(pid: int):
+    """Liberar los archivos de métricas de un worker terminado (modo multiproceso)"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
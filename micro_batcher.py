@@ -0,0 +1,187 @@
+"""
+Micro-batching dinámico de predicciones individuales para la API
+
+Las peticiones concurrentes a /predict se acumulan por modelo durante una
+ventana corta (o hasta un tamaño máximo de lote) y se resuelven con una sola
+llamada vectorizada a predict_batch() en el ejecutor de inferencia. Si no hay
+ningún lote en curso la petición se despacha sin esperar; mientras hay lotes
+en ejecución las nuevas peticiones se acumulan, y si todos los lotes permitidos
+están ocupados siguen creciendo en lugar de encolarse uno a uno, de modo que
+con saturación el costo se reparte entre más pacientes por llamada.
+"""
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import config
+from inference_executor import InferenceExecutor, inference_executor, run_predict_batch
+from metrics import current_labels, merge_timings
+
+# Límites superiores de los intervalos del histograma de tamaños de lote
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+class MicroBatcher:
+    """Acumulador de predicciones individuales en lotes por modelo"""
+
+    def __init__(self, batch_function: Callable = None, max_wait_ms: float = None,
+                 max_batch_size: int = None, executor: InferenceExecutor = None,
+                 max_concurrent_batches: int = None):
+        """
+        Inicializar el micro-batcher
+
+        Args:
+            batch_function: Función (pacientes, model_name) -> resultados que se
+                ejecuta en el ejecutor (por defecto run_predict_batch)
+            max_wait_ms: Espera máxima del primer paciente de un lote
+                (opcional, usa MICRO_BATCH_MAX_WAIT_MS)
+            max_batch_size: Tamaño máximo de lote (opcional, usa MICRO_BATCH_MAX_SIZE;
+                0 envía cada paciente en su propio lote)
+            executor: Ejecutor de inferencia (opcional, usa el global)
+            max_concurrent_batches: Lotes en ejecución a la vez antes de seguir
+                acumulando (opcional, usa MICRO_BATCH_MAX_CONCURRENT; 0 usa los
+                workers del ejecutor)
+        """
+        self.batch_function = batch_function or run_predict_batch
+        self.max_wait = (config.MICRO_BATCH_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch_size = config.MICRO_BATCH_MAX_SIZE if max_batch_size is None else max_batch_size
+        self.executor = executor or inference_executor
+        if max_concurrent_batches is None:
+            max_concurrent_batches = config.MICRO_BATCH_MAX_CONCURRENT
+        self.max_concurrent_batches = max_concurrent_batches or self.executor.max_workers
+
+        # modelo -> [(paciente, future, instante de llegada)]
+        self._pending: Dict[Optional[str], List[Tuple[Dict[str, Any], asyncio.Future, float]]] = {}
+        self._timers: Dict[Optional[str], asyncio.TimerHandle] = {}
+        # Etiquetas de métricas de la petición que abrió cada lote pendiente
+        self._labels: Dict[Optional[str], Tuple[str, str]] = {}
+        # Modelos cuya espera venció mientras el ejecutor estaba ocupado
+        self._due: List[Optional[str]] = []
+        self._running = 0
+        self._tasks = set()
+
+        self.requests = 0
+        self.batched_requests = 0
+        self.batches = 0
+        self.flush_reasons = Counter()
+        self.size_histogram = Counter()
+        self.max_size_seen = 0
+        self.total_wait_ms = 0.0
+
+    async def submit(self, patient_data: Dict[str, Any], model_name: str = None) -> Dict[str, Any]:
+        """
+        Predecir para un paciente dentro del próximo lote de su modelo
+
+        Args:
+            patient_data: Datos del paciente
+            model_name: Modelo a usar (None para el modelo por defecto)
+
+        Returns:
+            Dict: Resultado de la predicción (igual que DiabetesPredictor.predict)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.requests += 1
+
+        pending = self._pending.setdefault(model_name, [])
+        if not pending:
+            self._labels[model_name] = current_labels()
+        pending.append((patient_data, future, time.perf_counter()))
+
+        if len(pending) >= self.max_batch_size:
+            self._flush(model_name, 'size')
+        elif self._running == 0:
+            # Sin lotes en curso no hay nada que esperar: se despacha de inmediato
+            # y las peticiones que lleguen mientras tanto forman el siguiente lote
+            self._flush(model_name, 'idle')
+        elif len(pending) == 1:
+            self._timers[model_name] = loop.call_later(self.max_wait, self._on_timeout, model_name)
+
+        # Los tiempos por etapa del lote se suman a los de cada petición
+        result, timings = await future
+        merge_timings(timings)
+        return result
+
+    def _on_timeout(self, model_name: Optional[str]):
+        """Vence la espera del lote: ejecutar si hay capacidad, si no seguir acumulando"""
+        self._timers.pop(model_name, None)
+        if self._running < self.max_concurrent_batches:
+            self._flush(model_name, 'timeout')
+        elif model_name not in self._due:
+            self._due.append(model_name)
+
+    def _flush(self, model_name: Optional[str], reason: str):
+        """Lanzar el lote pendiente de un modelo"""
+        timer = self._timers.pop(model_name, None)
+        if timer is not None:
+            timer.cancel()
+        if model_name in self._due:
+            self._due.remove(model_name)
+
+        items = self._pending.pop(model_name, [])
+        labels = self._labels.pop(model_name, None)
+        if not items:
+            return
+
+        self._record(items, reason)
+        self._running += 1
+        task = asyncio.get_running_loop().create_task(self._run_batch(model_name, items, labels))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, model_name: Optional[str], items: List[Tuple[Dict[str, Any], asyncio.Future, float]],
+                         labels: Tuple[str, str] = None):
+        """Ejecutar un lote y resolver el future de cada paciente con (resultado, tiempos)"""
+        timings: Dict[str, float] = {}
+        try:
+            results = await self.executor.run(self.batch_function,
+                                              [patient for patient, _, _ in items], model_name,
+                                              labels=labels, timings=timings)
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), result in zip(items, results):
+                if not future.done():
+                    future.set_result((result, timings))
+        finally:
+            self._running -= 1
+            # Lanzar los lotes que quedaron esperando capacidad
+            while self._due and self._running < self.max_concurrent_batches:
+                self._flush(self._due[0], 'backlog')
+
+    def _record(self, items: List[Tuple[Dict[str, Any], asyncio.Future, float]], reason: str):
+        """Registrar métricas de un lote"""
+        size = len(items)
+        self.batches += 1
+        self.batched_requests += size
+        self.flush_reasons[reason] += 1
+        self.max_size_seen = max(self.max_size_seen, size)
+        self.total_wait_ms += (time.perf_counter() - items[0][2]) * 1000
+
+        bucket = next((limit for limit in BATCH_SIZE_BUCKETS if size <= limit), '+Inf')
+        self.size_histogram[bucket] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas de los lotes formados"""
+        return {
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size_seen": self.max_size_seen,
+            "mean_oldest_wait_ms": round(self.total_wait_ms / self.batches, 3) if self.batches else 0.0,
+            "flush_reasons": dict(self.flush_reasons),
+            "batch_size_histogram": {
+                str(limit): self.size_histogram[limit]
+                for limit in BATCH_SIZE_BUCKETS + ('+Inf',) if self.size_histogram[limit]
+            },
+            "pending": sum(len(items) for items in self._pending.values()),
+            "running_batches": self._running
+        }
+
+# Instancia global del micro-batcher
+micro_batcher = MicroBatcher()
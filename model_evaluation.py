@@ -0,0 +1,131 @@
+"""
+Evaluación de un modelo en una sola pasada: validación cruzada y ajuste final
+
+Los K pliegues de la validación cruzada y el ajuste del modelo final se
+ejecutan a la vez en un pool de hilos que comparte en memoria las matrices de
+entrenamiento (sin serializarlas a otros procesos). Se conservan las
+predicciones fuera de pliegue, las de entrenamiento y las de prueba, de modo
+que el monitoreo y la comparación de modelos usan esas predicciones en lugar
+de volver a entrenar o predecir.
+
+Los pliegues son los mismos que usa cross_val_score con un entero
+(KFold sin barajar), así que los scores coinciden con los de antes.
+"""
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone
+from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from sklearn.model_selection import KFold
+from threadpoolctl import threadpool_limits
+
+from config import config
+
+# Scores de validación cruzada calculables a partir de las predicciones
+# (mismo signo que los scorers de scikit-learn con esos nombres)
+SCORING_FUNCTIONS: Dict[str, Callable[[np.ndarray, np.ndarray], float]] = {
+    'r2': r2_score,
+    'neg_mean_squared_error': lambda y_true, y_pred: -mean_squared_error(y_true, y_pred),
+    'neg_root_mean_squared_error': lambda y_true, y_pred: -np.sqrt(mean_squared_error(y_true, y_pred)),
+    'neg_mean_absolute_error': lambda y_true, y_pred: -mean_absolute_error(y_true, y_pred)
+}
+
+def _set_threads(model: Any, n_threads: int) -> Any:
+    """Fijar los hilos internos del modelo si admite n_jobs"""
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_threads)
+    return model
+
+def _fit_fold(model: Any, X: np.ndarray, y: np.ndarray, train_index: np.ndarray,
+              validation_index: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ajustar un pliegue y predecir su parte de validación"""
+    start = time.perf_counter()
+    model.fit(X[train_index], y[train_index])
+    return model.predict(X[validation_index]), time.perf_counter() - start
+
+def _fit_final(model: Any, X: np.ndarray, y: np.ndarray) -> Tuple[Any, float]:
+    """Ajustar el modelo final con todo el entrenamiento"""
+    start = time.perf_counter()
+    return model.fit(X, y), time.perf_counter() - start
+
+def evaluate_model(model: Any, X_train: np.ndarray, y_train: np.ndarray,
+                   X_test: np.ndarray, y_test: np.ndarray, cv: int = None,
+                   scoring: str = None, n_jobs: int = None) -> Dict[str, Any]:
+    """
+    Validación cruzada, ajuste final y métricas de un modelo en una sola pasada
+
+    Args:
+        model: Modelo a evaluar (se ajusta en el sitio como modelo final)
+        X_train, X_test: Datos de entrenamiento y prueba
+        y_train, y_test: Variables objetivo
+        cv: Número de pliegues (opcional, usa CROSS_VAL_FOLDS)
+        scoring: Score de los pliegues (opcional, usa OPTIMIZATION_SCORING)
+        n_jobs: Hilos a repartir entre los pliegues y el ajuste final
+            (opcional, 1; -1 usa todos los núcleos)
+
+    Returns:
+        Dict: model, métricas de entrenamiento, prueba y fuera de pliegue,
+            cv_scores y sus media y desviación, predicciones
+            (predictions = prueba, train_predictions, oof_predictions) y
+            segundos de los ajustes
+    """
+    cv = cv or config.CROSS_VAL_FOLDS
+    scoring = scoring or config.OPTIMIZATION_SCORING
+    if scoring not in SCORING_FUNCTIONS:
+        raise ValueError(f"Scoring no soportado: {scoring} (disponibles: {list(SCORING_FUNCTIONS)})")
+    score = SCORING_FUNCTIONS[scoring]
+
+    # Las K+1 tareas (pliegues y ajuste final) se reparten los hilos; el resto
+    # de hilos por tarea va a n_jobs del modelo y a BLAS
+    n_threads = effective_n_jobs(n_jobs or 1)
+    workers = min(n_threads, cv + 1)
+    model_threads = max(1, n_threads // workers)
+    # El modelo final conserva su n_jobs (se guarda y se usa en inferencia)
+    original_n_jobs = model.get_params().get('n_jobs')
+
+    folds = list(KFold(n_splits=cv).split(X_train))
+    tasks = [delayed(_fit_final)(_set_threads(model, model_threads), X_train, y_train)]
+    tasks += [delayed(_fit_fold)(_set_threads(clone(model), model_threads), X_train, y_train,
+                                 train_index, validation_index)
+              for train_index, validation_index in folds]
+
+    start = time.perf_counter()
+    # Hilos: los pliegues leen las mismas matrices sin copiarlas a otros procesos
+    with threadpool_limits(limits=model_threads):
+        (final_model, final_seconds), *fold_outputs = Parallel(n_jobs=workers, prefer="threads")(tasks)
+    elapsed = time.perf_counter() - start
+    if 'n_jobs' in final_model.get_params():
+        final_model.set_params(n_jobs=original_n_jobs)
+
+    oof_predictions = np.empty(len(y_train), dtype=np.float64)
+    cv_scores = np.empty(cv)
+    for k, ((_, validation_index), (fold_predictions, _)) in enumerate(zip(folds, fold_outputs)):
+        oof_predictions[validation_index] = fold_predictions
+        cv_scores[k] = score(y_train[validation_index], fold_predictions)
+
+    y_pred_train = final_model.predict(X_train)
+    y_pred_test = final_model.predict(X_test)
+
+    return {
+        'model': final_model,
+        'train_r2': r2_score(y_train, y_pred_train),
+        'test_r2': r2_score(y_test, y_pred_test),
+        'train_rmse': np.sqrt(mean_squared_error(y_train, y_pred_train)),
+        'test_rmse': np.sqrt(mean_squared_error(y_test, y_pred_test)),
+        'train_mae': mean_absolute_error(y_train, y_pred_train),
+        'test_mae': mean_absolute_error(y_test, y_pred_test),
+        'oof_r2': r2_score(y_train, oof_predictions),
+        'oof_rmse': np.sqrt(mean_squared_error(y_train, oof_predictions)),
+        'oof_mae': mean_absolute_error(y_train, oof_predictions),
+        'cv_scores': cv_scores,
+        'cv_r2_mean': cv_scores.mean(),
+        'cv_r2_std': cv_scores.std(),
+        'predictions': y_pred_test,
+        'train_predictions': y_pred_train,
+        'oof_predictions': oof_predictions,
+        'fit_seconds': final_seconds,
+        'cv_fit_seconds': float(sum(seconds for _, seconds in fold_outputs)),
+        'elapsed_seconds': elapsed
+    }
@@ -73,7 +73,8 @@ class DiabetesModelMonitor:
     def log_model_training(self, model_name: str, model: Any, params: Dict[str, Any],
                          X_train: np.ndarray, y_train: np.ndarray,
                          X_test: np.ndarray, y_test: np.ndarray,
-                         cv_scores: Optional[np.ndarray] = None) -> str:
+                         cv_scores: Optional[np.ndarray] = None,
+                         evaluation: Optional[Dict[str, Any]] = None) -> str:
         """
         Registrar entrenamiento de un modelo
 
@@ -84,6 +85,9 @@ class DiabetesModelMonitor:
             X_train, X_test: Datos de entrenamiento y prueba
             y_train, y_test: Variables objetivo
             cv_scores: Scores de validación cruzada
+            evaluation: Resultado de DiabetesModelTrainer.train_model /
+                evaluate_model (opcional); sus predicciones y scores se usan
+                en lugar de volver a predecir
 
         Returns:
             str: ID del run de MLflow
@@ -95,16 +99,30 @@ class DiabetesModelMonitor:
             if params:
                 mlflow.log_params(params)
 
+            # Predicciones ya calculadas durante el entrenamiento, si las hay
+            evaluation = evaluation or {}
+            if cv_scores is None:
+                cv_scores = evaluation.get('cv_scores')
+
             # Log de métricas de entrenamiento
-            y_pred_train = model.predict(X_train)
+            y_pred_train = evaluation.get('train_predictions')
+            if y_pred_train is None:
+                y_pred_train = model.predict(X_train)
             train_metrics = self._calculate_metrics(y_train, y_pred_train)
             mlflow.log_metrics({f"train_{k}": v for k, v in train_metrics.items()})
 
             # Log de métricas de prueba
-            y_pred_test = model.predict(X_test)
+            y_pred_test = evaluation.get('predictions')
+            if y_pred_test is None:
+                y_pred_test = model.predict(X_test)
             test_metrics = self._calculate_metrics(y_test, y_pred_test)
             mlflow.log_metrics({f"test_{k}": v for k, v in test_metrics.items()})
 
+            # Log de métricas fuera de pliegue (validación cruzada)
+            if evaluation.get('oof_predictions') is not None:
+                oof_metrics = self._calculate_metrics(y_train, evaluation['oof_predictions'])
+                mlflow.log_metrics({f"oof_{k}": v for k, v in oof_metrics.items()})
+
             # Log de métricas de validación cruzada
             if cv_scores is not None:
                 mlflow.log_metric("cv_r2_mean", cv_scores.mean())
@@ -267,7 +285,8 @@ class DiabetesModelMonitor:
                     'train_mae': r['train_mae'],
                     'test_mae': r['test_mae'],
                     'cv_r2_mean': r.get('cv_r2_mean', 0),
-                    'cv_r2_std': r.get('cv_r2_std', 0)
+                    'cv_r2_std': r.get('cv_r2_std', 0),
+                    'oof_r2': r.get('oof_r2', np.nan)
                 }
                 for r in model_results
             ])
@@ -448,7 +467,7 @@ def log_training_session(X_train: np.ndarray, y_train: np.ndarray,
             if hasattr(model, 'get_params'):
                 params = model.get_params()
 
-            # Registrar modelo
+            # Registrar modelo (con las predicciones del entrenamiento)
             monitor.log_model_training(
                 model_name=model_name,
                 model=model,
@@ -456,7 +475,8 @@ def log_training_session(X_train: np.ndarray, y_train: np.ndarray,
                 X_train=X_train,
                 y_train=y_train,
                 X_test=X_test,
-                y_test=y_test
+                y_test=y_test,
+                evaluation=result
             )
 
         except Exception as e:
@@ -474,7 +494,7 @@ if __name__ == "__main__":
     from data_generator import create_sample_dataset
     from data_preprocessor import preprocess_diabetes_data
     from model_trainer import train_diabetes_models
-    from sklearn.model_selection import train_test_split
+    from dataset_cache import split_and_scale
 
     logger.info("🧪 Probando sistema de monitoreo MLflow...")
 
@@ -484,17 +504,10 @@ if __name__ == "__main__":
     # Preprocesar
     df_processed, preprocessor = preprocess_diabetes_data(df)
 
-    # Dividir datos
-    feature_columns = [col for col in df_processed.columns if col != 'Resultado']
-    X = df_processed[feature_columns]
-    y = df_processed['Resultado']
-
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=RANDOM_SEED
-    )
-
-    # Escalar
-    X_train_scaled, X_test_scaled = preprocessor.scale_features(X_train, X_test)
+    # Dividir y escalar (reutilizados de la caché en ejecuciones repetidas)
+    split = split_and_scale(df_processed, preprocessor)
+    X_train_scaled, X_test_scaled = split['X_train'], split['X_test']
+    y_train, y_test = split['y_train'], split['y_test']
 
     # Entrenar modelos (solo 2 para prueba rápida)
     from model_trainer import DiabetesModelTrainer
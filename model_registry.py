@@ -0,0 +1,165 @@
+"""
+Registro de modelos compartido por el proceso para el sistema de diabetes
+
+Cada combinación de modelo se carga una sola vez por proceso y se reutiliza
+en todas las predicciones. La entrada se invalida automáticamente cuando cambia
+la fecha de modificación o el tamaño de alguno de los artefactos en disco.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Any
+from config import config
+from predictor import DiabetesPredictor
+
+def _path_fingerprint(path: Path) -> Tuple:
+    """Huella (mtime, tamaño) de un archivo o de todos los archivos de un directorio"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return (str(path), None)
+
+    if not path.is_dir():
+        return (str(path), stat.st_mtime_ns, stat.st_size)
+
+    entries = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            try:
+                file_stat = os.stat(os.path.join(root, name))
+            except OSError:
+                # Archivo borrado o reemplazado mientras se recorre el directorio
+                entries.append((name, None))
+                continue
+            entries.append((name, file_stat.st_mtime_ns, file_stat.st_size))
+    return (str(path), tuple(entries))
+
+class ModelRegistry:
+    """Registro thread-safe de predictores cargados en el proceso"""
+
+    def __init__(self, check_interval: float = None):
+        """
+        Inicializar el registro
+
+        Args:
+            check_interval: Segundos entre verificaciones de cambios en disco
+                (0 verifica en cada llamada)
+        """
+        if check_interval is None:
+            check_interval = config.MODEL_REGISTRY_CHECK_INTERVAL
+        self.check_interval = check_interval
+
+        # clave -> (huella, instante de la última verificación, predictor)
+        self._entries: Dict[Tuple, List[Any]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+
+        self.loads = 0
+        self.hits = 0
+
+    @staticmethod
+    def _make_key(model_path: str = None, scaler_path: str = None,
+                  model_name: str = None, inference_engine: str = None) -> Tuple:
+        """Clave del registro para una configuración de modelo"""
+        inference_engine = inference_engine or config.get_inference_engine(model_name)
+        if model_name:
+            return ('name', model_name, inference_engine)
+        model_path = Path(model_path or config.get_best_model_path('joblib')).resolve()
+        scaler_path = Path(scaler_path).resolve() if scaler_path else None
+        return ('path', str(model_path), str(scaler_path), inference_engine)
+
+    @staticmethod
+    def _fingerprint(model_path: str = None, scaler_path: str = None,
+                     model_name: str = None) -> Tuple:
+        """Huella de todos los artefactos que lee el predictor"""
+        paths = DiabetesPredictor.artifact_paths(model_path, scaler_path, model_name)
+        return tuple(_path_fingerprint(path) for path in paths)
+
+    def get_predictor(self, model_path: str = None, scaler_path: str = None,
+                      model_name: str = None, inference_engine: str = None) -> DiabetesPredictor:
+        """
+        Obtener el predictor compartido, cargándolo solo si es necesario
+
+        Args:
+            model_path: Ruta al modelo (opcional, usa el mejor modelo por defecto)
+            scaler_path: Ruta al scaler (opcional)
+            model_name: Nombre del modelo en MLflow (opcional)
+            inference_engine: Motor de inferencia (opcional, usa la configuración)
+
+        Returns:
+            DiabetesPredictor: Predictor cargado (sin modelo si la carga falló)
+        """
+        key = self._make_key(model_path, scaler_path, model_name, inference_engine)
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] < self.check_interval:
+            self.hits += 1
+            return entry[2]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            fingerprint = self._fingerprint(model_path, scaler_path, model_name)
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] == fingerprint:
+                entry[1] = now
+                self.hits += 1
+                return entry[2]
+
+            predictor = DiabetesPredictor(model_path=model_path, scaler_path=scaler_path,
+                                          model_name=model_name,
+                                          inference_engine=inference_engine)
+            self.loads += 1
+            # Un fallo de carga no se guarda: se reintenta en la próxima llamada
+            # (los modelos de MLflow no tienen archivos locales que cambien)
+            if predictor.model is not None:
+                self._entries[key] = [fingerprint, now, predictor]
+            else:
+                self._entries.pop(key, None)
+            return predictor
+
+    def put(self, predictor: DiabetesPredictor, model_path: str = None,
+            scaler_path: str = None, model_name: str = None):
+        """Registrar un predictor ya construido para una configuración"""
+        key = self._make_key(model_path, scaler_path, model_name, predictor.inference_engine)
+        fingerprint = self._fingerprint(model_path, scaler_path, model_name)
+        with self._lock:
+            self._entries[key] = [fingerprint, time.monotonic(), predictor]
+
+    def clear(self):
+        """Descartar todos los predictores cargados"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso del registro"""
+        return {
+            "loaded_models": len(self._entries),
+            "loads": self.loads,
+            "hits": self.hits
+        }
+
+# Instancia global del registro
+model_registry = ModelRegistry()
+
+def get_predictor(model_path: str = None, scaler_path: str = None,
+                  model_name: str = None, inference_engine: str = None) -> DiabetesPredictor:
+    """
+    Función de conveniencia para obtener un predictor del registro global
+
+    Args:
+        model_path: Ruta al modelo (opcional)
+        scaler_path: Ruta al scaler (opcional)
+        model_name: Nombre del modelo ('random_forest', 'gradient_boosting')
+        inference_engine: 'sklearn', 'compiled' o 'auto' (opcional)
+
+    Returns:
+        DiabetesPredictor: Predictor compartido
+    """
+    return model_registry.get_predictor(model_path=model_path, scaler_path=scaler_path,
+                                        model_name=model_name,
+                                        inference_engine=inference_engine)
@@ -3,8 +3,7 @@ Módulo de entrenamiento de modelos para predicción de diabetes
 """
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+from sklearn.model_selection import GridSearchCV
 from sklearn.linear_model import LinearRegression, Ridge, Lasso, ElasticNet
 from sklearn.ensemble import (
     RandomForestRegressor, GradientBoostingRegressor,
@@ -21,6 +20,27 @@ import json
 from datetime import datetime
 from typing import Dict, List, Tuple, Any
 from config import config, RANDOM_SEED
+from dataset_cache import split_and_scale
+from memory_tracker import StageMemoryTracker
+from model_evaluation import evaluate_model
+from training_scheduler import TrainingJob, TrainingScheduler
+from tree_engine import export_compiled_model
+
+# Modelos que convierten la entrada a float32 (árboles de scikit-learn, XGBoost
+# y LightGBM) o a float64 (libsvm) antes de entrenar: reciben una conversión
+# compartida en lugar de copiar la matriz cada uno
+FLOAT32_MODELS = (RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor,
+                  AdaBoostRegressor, xgb.XGBRegressor, lgb.LGBMRegressor)
+FLOAT64_MODELS = (SVR,)
+
+# Duración relativa aproximada de cada modelo (ajuste + validación cruzada):
+# el planificador lanza primero los más lentos para que el total se acerque
+# al del modelo más lento
+MODEL_COST_HINTS = {
+    'Support Vector Machine': 10.0, 'Gradient Boosting': 8.0, 'Neural Network': 6.0,
+    'Random Forest': 5.0, 'AdaBoost': 4.0, 'Extra Trees': 3.0, 'K-Nearest Neighbors': 2.0,
+    'XGBoost': 2.0, 'LightGBM': 1.5
+}
 
 class DiabetesModelTrainer:
     """Entrenador de modelos para predicción de diabetes"""
@@ -31,6 +51,8 @@ class DiabetesModelTrainer:
         self.best_model = None
         self.best_model_name = None
         self.preprocessor = None
+        self.memory = StageMemoryTracker()
+        self.scheduler = None
 
     def _define_models(self) -> Dict[str, Any]:
         """Definir todos los modelos a entrenar"""
@@ -89,45 +111,31 @@ class DiabetesModelTrainer:
         }
 
     def train_model(self, model: Any, X_train: np.ndarray, y_train: np.ndarray,
-                   X_test: np.ndarray, y_test: np.ndarray, model_name: str) -> Dict:
+                   X_test: np.ndarray, y_test: np.ndarray, model_name: str,
+                   n_threads: int = None) -> Dict:
         """
         Entrena un modelo individual y retorna métricas
 
+        La validación cruzada y el ajuste final se hacen en una sola pasada
+        (model_evaluation.py): los pliegues y el modelo final se ajustan a la
+        vez y se guardan las predicciones de entrenamiento, prueba y fuera de
+        pliegue para que el monitoreo no vuelva a predecir.
+
         Args:
             model: Modelo a entrenar
             X_train, X_test: Datos de entrenamiento y prueba
             y_train, y_test: Variables objetivo
             model_name: Nombre del modelo
+            n_threads: Hilos a repartir entre los pliegues y el ajuste final
+                (opcional, todos los núcleos)
 
         Returns:
-            Dict: Métricas del modelo entrenado
+            Dict: Métricas y predicciones del modelo entrenado
         """
-        # Entrenar
-        model.fit(X_train, y_train)
-
-        # Predicciones
-        y_pred_train = model.predict(X_train)
-        y_pred_test = model.predict(X_test)
-
-        # Métricas
-        metrics = {
-            'model': model,
-            'name': model_name,
-            'train_r2': r2_score(y_train, y_pred_train),
-            'test_r2': r2_score(y_test, y_pred_test),
-            'train_rmse': np.sqrt(mean_squared_error(y_train, y_pred_train)),
-            'test_rmse': np.sqrt(mean_squared_error(y_test, y_pred_test)),
-            'train_mae': mean_absolute_error(y_train, y_pred_train),
-            'test_mae': mean_absolute_error(y_test, y_pred_test),
-            'predictions': y_pred_test
-        }
-
-        # Cross-validation
-        cv_scores = cross_val_score(model, X_train, y_train,
-                                   cv=config.CROSS_VAL_FOLDS, scoring=config.OPTIMIZATION_SCORING)
-        metrics['cv_r2_mean'] = cv_scores.mean()
-        metrics['cv_r2_std'] = cv_scores.std()
-
+        metrics = evaluate_model(model, X_train, y_train, X_test, y_test,
+                                 cv=config.CROSS_VAL_FOLDS, scoring=config.OPTIMIZATION_SCORING,
+                                 n_jobs=n_threads or -1)
+        metrics['name'] = model_name
         return metrics
 
     def train_all_models(self, X_train: np.ndarray, y_train: np.ndarray,
@@ -135,6 +143,11 @@ class DiabetesModelTrainer:
         """
         Entrena todos los modelos definidos
 
+        Con TRAINING_WORKERS > 0 los modelos se entrenan a la vez en procesos
+        worker (training_scheduler.py), con los núcleos repartidos entre ellos
+        y un tiempo y una memoria máximos por modelo; con 0, uno tras otro en
+        este proceso.
+
         Args:
             X_train, X_test: Datos de entrenamiento y prueba
             y_train, y_test: Variables objetivo
@@ -149,16 +162,74 @@ class DiabetesModelTrainer:
 
         self.results = []
 
-        for name, model in tqdm(self.models.items(), desc="Entrenando modelos"):
-            try:
-                metrics = self.train_model(model, X_train, y_train, X_test, y_test, name)
-                self.results.append(metrics)
-                print(f"✅ {name}: R² Test = {metrics['test_r2']:.4f}")
-            except Exception as e:
-                print(f"❌ Error en {name}: {e}")
-
+        # Todos los modelos reciben el mismo buffer; la conversión de tipo que
+        # harían internamente se hace una sola vez y se comparte
+        inputs = {}
+
+        def model_input(model: Any) -> Tuple[np.ndarray, np.ndarray]:
+            dtype = (np.float32 if isinstance(model, FLOAT32_MODELS)
+                     else np.float64 if isinstance(model, FLOAT64_MODELS) else X_train.dtype)
+            if dtype not in inputs:
+                inputs[dtype] = (np.ascontiguousarray(X_train, dtype=dtype),
+                                 np.ascontiguousarray(X_test, dtype=dtype))
+            return inputs[dtype]
+
+        if config.TRAINING_WORKERS == 0:
+            for name, model in tqdm(self.models.items(), desc="Entrenando modelos"):
+                try:
+                    with self.memory.stage(f"modelo: {name}"):
+                        X_train_model, X_test_model = model_input(model)
+                        metrics = self.train_model(model, X_train_model, y_train, X_test_model, y_test, name)
+                    self.results.append(metrics)
+                    print(f"✅ {name}: R² Test = {metrics['test_r2']:.4f}")
+                except Exception as e:
+                    print(f"❌ Error en {name}: {e}")
+            return self.get_results_dataframe()
+
+        # Las conversiones se hacen antes de lanzar los workers para que todos
+        # hereden los mismos buffers en lugar de crear cada uno el suyo
+        jobs = []
+        for name, model in self.models.items():
+            X_train_model, X_test_model = model_input(model)
+            jobs.append(TrainingJob(
+                name, self.train_model, (model, X_train_model, y_train, X_test_model, y_test, name),
+                # Todos los modelos aprovechan varios hilos: los pliegues de la
+                # validación cruzada se ajustan a la vez
+                parallel=True,
+                memory_mb=X_train_model.nbytes / 2**20, cost=MODEL_COST_HINTS.get(name, 1.0)
+            ))
+
+        self.scheduler = TrainingScheduler()
+        print(f"Entrenamiento en paralelo: {self.scheduler.workers} procesos, "
+              f"{self.scheduler.cpu_budget} núcleos\n")
+        results_by_name = {}
+        with tqdm(total=len(jobs), desc="Entrenando modelos") as progress:
+            def on_done(report: Dict[str, Any]):
+                name = report['name']
+                progress.update(1)
+                if report['status'] != 'cancelled':
+                    self.memory.record(f"modelo: {name}", report['seconds'], report['start_rss'],
+                                       report['end_rss'], report['peak_rss'])
+                if report['status'] == 'ok':
+                    results_by_name[name] = report['result']
+                    # El worker entrenó una copia: se guarda el modelo ajustado
+                    self.models[name] = report['result']['model']
+                    print(f"✅ {name}: R² Test = {report['result']['test_r2']:.4f} "
+                          f"({report['seconds']:.1f}s, {report['threads']} hilos)")
+                else:
+                    print(f"❌ Error en {name}: {report['error']}")
+
+            self.scheduler.run(jobs, on_done=on_done)
+
+        # Mismo orden que con el entrenamiento secuencial
+        self.results = [results_by_name[name] for name in self.models if name in results_by_name]
         return self.get_results_dataframe()
 
+    def cancel_training(self):
+        """Cancelar el entrenamiento en paralelo en curso (desde otro hilo)"""
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+
     def get_results_dataframe(self) -> pd.DataFrame:
         """Obtener DataFrame con resultados ordenados"""
         if not self.results:
@@ -292,6 +363,11 @@ class DiabetesModelTrainer:
             saved_files[f"{model_name}_joblib"] = str(model_filename)
             print(f"✅ Guardado: {model_filename}")
 
+            # Ensamble compilado mapeable en memoria (solo modelos de árboles)
+            compiled_dir = export_compiled_model(model_result['model'], model_filename)
+            if compiled_dir is not None:
+                saved_files[f"{model_name}_compiled"] = str(compiled_dir)
+
             # También guardar como pickle
             pickle_filename = config.get_model_path(model_name, 'pkl')
             with open(pickle_filename, 'wb') as f:
@@ -304,6 +380,10 @@ class DiabetesModelTrainer:
             best_model_filename = config.get_best_model_path('joblib')
             joblib.dump(self.best_model, best_model_filename)
             saved_files['best_model_joblib'] = str(best_model_filename)
+
+            compiled_dir = export_compiled_model(self.best_model, best_model_filename)
+            if compiled_dir is not None:
+                saved_files['best_model_compiled'] = str(compiled_dir)
             print(f"\n🏆 Mejor modelo guardado en: {best_model_filename}")
 
         # Guardar el scaler si existe
@@ -313,6 +393,14 @@ class DiabetesModelTrainer:
             saved_files['scaler'] = str(scaler_filename)
             print(f"📏 Scaler guardado en: {scaler_filename}")
 
+        # Guardar el transformador de características ajustado junto al scaler
+        transformer = getattr(self.preprocessor, 'feature_transformer', None)
+        if transformer is not None:
+            transformer_filename = config.MODELS_DIR / config.FEATURE_TRANSFORMER_FILENAME
+            transformer.save(transformer_filename)
+            saved_files['feature_transformer'] = str(transformer_filename)
+            print(f"⚙️ Transformador de características guardado en: {transformer_filename}")
+
         # Guardar metadatos del modelo
         metadata = {
             'best_model': self.best_model_name,
@@ -340,51 +428,48 @@ class DiabetesModelTrainer:
         return saved_files
 
 def train_diabetes_models(df_processed: pd.DataFrame,
-                         preprocessor: Any = None) -> DiabetesModelTrainer:
+                         preprocessor: Any = None, split: Dict[str, Any] = None) -> DiabetesModelTrainer:
     """
     Función de conveniencia para entrenar modelos de diabetes
 
     Args:
-        df_processed: DataFrame con datos preprocesados
+        df_processed: DataFrame con datos preprocesados (puede ser None si se pasa split)
         preprocessor: Preprocesador de datos (opcional)
+        split: División ya escalada (opcional), p. ej. la de
+            DiabetesDataPreprocessor.prepare_training_matrix, que construye la
+            matriz una sola vez desde los datos crudos
 
     Returns:
         DiabetesModelTrainer: Entrenador con modelos entrenados
     """
-    # Separar características y variable objetivo
-    feature_columns = [col for col in df_processed.columns if col != 'Resultado']
-    X = df_processed[feature_columns]
-    y = df_processed['Resultado']
-
-    # Crear bins para estratificación
-    y_bins = pd.cut(y, bins=3, labels=['Low', 'Medium', 'High'])
-
-    # División estratificada
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=config.TEST_SIZE, random_state=RANDOM_SEED, stratify=y_bins
-    )
+    trainer = DiabetesModelTrainer()
+    # Un solo reporte de memoria con las etapas del preprocesador y del entrenamiento
+    source = preprocessor if preprocessor is not None else (split or {}).get('preprocessor')
+    if getattr(source, 'memory', None) is not None:
+        trainer.memory = source.memory
+
+    # División estratificada y escalado (reutilizados de la caché si los datos
+    # y la semilla no cambian; ver dataset_cache.py)
+    if split is None:
+        with trainer.memory.stage("división y escalado"):
+            split = split_and_scale(df_processed, preprocessor, seed=RANDOM_SEED, test_size=config.TEST_SIZE)
+    feature_columns = split['feature_columns']
+    X_train_scaled, X_test_scaled = split['X_train'], split['X_test']
+    y_train, y_test = split['y_train'], split['y_test']
+    n_rows = len(y_train) + len(y_test)
 
     print("📊 DIVISIÓN DE DATOS")
     print("="*60)
-    print(f"Total de características: {X.shape[1]}")
-    print(f"Total de registros: {len(X)}")
-    print(f"Entrenamiento: {len(X_train)} registros ({len(X_train)/len(X)*100:.1f}%)")
-    print(f"Prueba: {len(X_test)} registros ({len(X_test)/len(X)*100:.1f}%)")
-
-    # Escalar características
-    if preprocessor:
-        X_train_scaled, X_test_scaled = preprocessor.scale_features(X_train, X_test)
-        trainer = DiabetesModelTrainer()
-        trainer.preprocessor = preprocessor
-    else:
-        from data_preprocessor import DiabetesDataPreprocessor
-        temp_preprocessor = DiabetesDataPreprocessor()
-        X_train_scaled, X_test_scaled = temp_preprocessor.scale_features(X_train, X_test)
-        trainer = DiabetesModelTrainer()
-        trainer.preprocessor = temp_preprocessor
+    print(f"Total de características: {len(feature_columns)}")
+    print(f"Total de registros: {n_rows}")
+    print(f"Entrenamiento: {len(y_train)} registros ({len(y_train)/n_rows*100:.1f}%)")
+    print(f"Prueba: {len(y_test)} registros ({len(y_test)/n_rows*100:.1f}%)")
+
+    trainer.preprocessor = split['preprocessor']
 
     # Entrenar modelos
     results_df = trainer.train_all_models(X_train_scaled, y_train, X_test_scaled, y_test)
+    trainer.memory.print_report()
 
     # Obtener mejor modelo
     trainer.get_best_model()
@@ -0,0 +1,258 @@
+"""
+Registro de predicciones en segundo plano para la API
+
+Cada predicción se agrega a un búfer en memoria (sin abrir archivos ni
+serializar en el event loop); un hilo escritor serializa las entradas y las
+escribe por lotes con una sola llamada write() cuando el búfer alcanza
+PREDICTION_LOG_BATCH_SIZE entradas o pasan PREDICTION_LOG_FLUSH_INTERVAL
+segundos. Cada proceso worker escribe su propio archivo
+(api_predictions.<pid>.log), que se rota y comprime al superar
+PREDICTION_LOG_SEGMENT_BYTES. Si el disco no da abasto y el búfer llega a
+PREDICTION_LOG_MAX_PENDING entradas, la política 'drop' descarta las nuevas
+y 'block' espera hasta PREDICTION_LOG_BLOCK_TIMEOUT segundos antes de hacerlo.
+"""
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+LOG_POLICIES = ('drop', 'block')
+
+class PredictionLogWriter:
+    """Escritor por lotes, con rotación, del log de predicciones de un proceso"""
+
+    def __init__(self, directory: Path = None, basename: str = "api_predictions",
+                 batch_size: int = None, flush_interval: float = None, max_pending: int = None,
+                 policy: str = None, block_timeout: float = None, segment_bytes: int = None,
+                 compress: bool = None):
+        """
+        Inicializar el escritor
+
+        Args:
+            directory: Directorio de los logs (opcional, usa OUTPUTS_DIR)
+            basename: Prefijo de los archivos de log
+            batch_size: Entradas que disparan una escritura (opcional, usa PREDICTION_LOG_BATCH_SIZE)
+            flush_interval: Segundos máximos entre escrituras
+                (opcional, usa PREDICTION_LOG_FLUSH_INTERVAL)
+            max_pending: Entradas en memoria antes de aplicar la política
+                (opcional, usa PREDICTION_LOG_MAX_PENDING)
+            policy: 'drop' o 'block' (opcional, usa PREDICTION_LOG_POLICY)
+            block_timeout: Espera máxima con la política 'block'
+                (opcional, usa PREDICTION_LOG_BLOCK_TIMEOUT)
+            segment_bytes: Tamaño a partir del cual se rota el archivo
+                (opcional, usa PREDICTION_LOG_SEGMENT_BYTES)
+            compress: Comprimir con gzip los segmentos rotados
+                (opcional, usa PREDICTION_LOG_COMPRESS)
+        """
+        self.directory = Path(directory or config.OUTPUTS_DIR)
+        self.basename = basename
+        self.batch_size = batch_size or config.PREDICTION_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or config.PREDICTION_LOG_FLUSH_INTERVAL
+        self.max_pending = max_pending or config.PREDICTION_LOG_MAX_PENDING
+        self.policy = policy or config.PREDICTION_LOG_POLICY
+        self.block_timeout = config.PREDICTION_LOG_BLOCK_TIMEOUT if block_timeout is None else block_timeout
+        self.segment_bytes = segment_bytes or config.PREDICTION_LOG_SEGMENT_BYTES
+        self.compress = config.PREDICTION_LOG_COMPRESS if compress is None else compress
+
+        if self.policy not in LOG_POLICIES:
+            raise ValueError(f"Política de log no válida: {self.policy}")
+
+        self._pending: deque = deque()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread = None
+        self._pid = None
+        self._closing = False
+        self._fd = None
+        self._segment_size = 0
+
+        self.logged = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.rotations = 0
+        self.failed = 0
+
+    @property
+    def path(self) -> Path:
+        """Archivo activo del proceso actual"""
+        return self.directory / f"{self.basename}.{os.getpid()}.log"
+
+    def _ensure_started(self):
+        """Arrancar el hilo escritor (de nuevo tras un fork)"""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._condition:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            # En un proceso hijo el hilo y el archivo del padre no existen
+            self._pending.clear()
+            self._fd = None
+            self._closing = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+            self._thread.start()
+
+    def log(self, patient_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+        """
+        Registrar una predicción sin bloquear en E/S
+
+        Args:
+            patient_data: Datos del paciente
+            result: Resultado de la predicción
+
+        Returns:
+            bool: False si la entrada se descartó por la política de contrapresión
+        """
+        self._ensure_started()
+        entry = (datetime.now().isoformat(), patient_data, result)
+
+        with self._condition:
+            if len(self._pending) >= self.max_pending and self.policy == 'block':
+                deadline = time.monotonic() + self.block_timeout
+                while len(self._pending) >= self.max_pending and not self._closing:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.notify_all()
+                    self._condition.wait(remaining)
+
+            if len(self._pending) >= self.max_pending or self._closing:
+                self.dropped += 1
+                return False
+
+            self._pending.append(entry)
+            self.logged += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def _run(self):
+        """Bucle del hilo escritor"""
+        while True:
+            with self._condition:
+                if not self._closing and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                entries = list(self._pending)
+                self._pending.clear()
+                closing = self._closing
+                # Liberar a los productores que esperan con la política 'block'
+                self._condition.notify_all()
+
+            if entries:
+                self._write(entries)
+            if closing:
+                return
+
+    @staticmethod
+    def _encode(entries: List[tuple]) -> bytes:
+        """Serializar las entradas como JSON por línea"""
+        lines = []
+        for timestamp, patient_data, result in entries:
+            lines.append(json.dumps({
+                "timestamp": timestamp,
+                "patient_data": patient_data,
+                "prediction": result,
+                "glucose_value": result.get("glucose_mg_dl"),
+                "category": result.get("category")
+            }, default=str))
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _write(self, entries: List[tuple]):
+        """Escribir un lote con una sola llamada write() y rotar si corresponde"""
+        try:
+            data = self._encode(entries)
+            if self._fd is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                self._segment_size = os.fstat(self._fd).st_size
+
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+
+            self._segment_size += len(data)
+            self.written += len(entries)
+            self.flushes += 1
+
+            if self._segment_size >= self.segment_bytes:
+                self._rotate()
+        except Exception as e:
+            self.failed += len(entries)
+            logger.error(f"Error guardando log de predicciones: {e}")
+
+    def _rotate(self):
+        """Cerrar el segmento activo, renombrarlo y comprimirlo"""
+        os.close(self._fd)
+        self._fd = None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        segment = self.path.with_name(f"{self.basename}.{os.getpid()}.{timestamp}.log")
+        os.replace(self.path, segment)
+        self.rotations += 1
+
+        if self.compress:
+            with open(segment, "rb") as source, gzip.open(f"{segment}.gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            segment.unlink()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Esperar a que se escriban las entradas registradas hasta ahora
+
+        Returns:
+            bool: True si se escribieron (o fallaron) todas antes del timeout
+        """
+        if self._pid != os.getpid() or self._thread is None:
+            return True
+        target = self.logged
+        deadline = time.monotonic() + timeout
+        while self.written + self.failed < target:
+            if time.monotonic() >= deadline:
+                return False
+            with self._condition:
+                self._condition.notify_all()
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Escribir lo pendiente y detener el hilo escritor"""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del escritor"""
+        return {
+            "path": str(self.path),
+            "policy": self.policy,
+            "pending": len(self._pending),
+            "logged": self.logged,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "rotations": self.rotations,
+            "failed": self.failed
+        }
+
+# Instancia global del escritor
+prediction_log = PredictionLogWriter()
+atexit.register(prediction_log.close)
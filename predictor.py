@@ -5,15 +5,117 @@ import numpy as np
 import pandas as pd
 import joblib
 import json
+import time
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 from config import config
+from feature_plan import DiabetesFeaturePlan
+from feature_transformer import DiabetesFeatureTransformer
+from tree_engine import compile_model, compiled_artifact_path, load_compiled_artifact
+from metrics import observe_batch, observe_stage, time_stage
 import mlflow.pyfunc
 
+# Motores de inferencia para ensambles de árboles
+INFERENCE_ENGINES = ('sklearn', 'compiled', 'auto')
+
+# Mapeo de nombres de modelos a run IDs de MLflow
+MLFLOW_EXPERIMENT_ID = '108607450594143967'
+MLFLOW_MODEL_RUNS = {
+    'random_forest': '2b0bc40a5809462582fe4827a85d0567',
+    'gradient_boosting': '7d8e8b5c65244e488b1a1431d11b4688'
+}
+
+# Las 29 características (en orden) de los modelos entrenados antes de guardar
+# el transformador ajustado; con feature_transformer.joblib se usan las suyas
+FEATURE_COLUMNS = [
+    'edad', 'sexo', 'zona_residencia', 'estrato', 'talla', 'peso', 'imc',
+    'perimetro_abdominal', 'tas', 'tad', 'frecuencia_cardiaca',
+    'realiza_ejercicio', 'fuma', 'medicamentos_hta',
+    'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc',
+    'riesgo_cardiovascular', 'presion_arterial_media', 'presion_pulso',
+    'ratio_cintura_altura', 'imc_categoria', 'edad_categoria',
+    'edad_squared', 'score_cv', 'indice_salud', 'consume_alcohol_Frecuente',
+    'consume_alcohol_Nunca', 'consume_alcohol_Ocasional'
+]
+
+# Límites de categorización (intervalos cerrados a la derecha, como pd.cut)
+IMC_BINS = [0, 18.5, 25, 30, 35, 100]
+EDAD_BINS = [0, 30, 45, 60, 75, 100]
+
+# Codificación de variables categóricas usada en inferencia
+BINARY_MAPPINGS = {
+    'sexo': {'M': 0, 'F': 1},
+    'realiza_ejercicio': {'No': 0, 'Si': 1},
+    'fuma': {'No': 0, 'Si': 1},
+    'medicamentos_hta': {'No': 0, 'Si': 1},
+    'historia_familiar_dm': {'No': 0, 'Si': 1},
+    'diabetes_gestacional': {'No': 0, 'Si': 1}
+}
+ALCOHOL_MAPPING = {'Nunca': 0, 'Ocasional': 1, 'Frecuente': 2}
+
+# Valores de imputación para características presentes pero faltantes (NaN)
+IMPUTE_VALUES = {
+    'edad': 50.0,
+    'sexo': 0.0,
+    'imc': 25.0,
+    'tas': 120.0,
+    'tad': 80.0,
+    'perimetro_abdominal': 90.0,
+    'frecuencia_cardiaca': 70.0,
+    'puntaje_findrisc': 5.0,
+    'riesgo_cardiovascular': 0.2,
+    'presion_arterial_media': 93.33,
+    'presion_pulso': 40.0,
+    'ratio_cintura_altura': 0.55,
+    'imc_categoria': 1.0,
+    'edad_categoria': 2.0,
+    'edad_squared': 2500.0,
+    'score_cv': 0.0,
+    'indice_salud': 1.0,
+    'diabetes_gestacional_No': 1.0
+}
+
+# Valores por defecto para características ausentes de los datos del paciente
+DEFAULT_FEATURE_VALUES = {
+    'edad': 50.0,
+    'imc': 25.0,
+    'tas': 120.0,
+    'tad': 80.0,
+    'perimetro_abdominal': 90.0,
+    'frecuencia_cardiaca': 70.0,
+    'puntaje_findrisc': 5.0,
+    'riesgo_cardiovascular': 0.2,
+    'presion_arterial_media': 93.33,
+    'presion_pulso': 40.0,
+    'ratio_cintura_altura': 0.55,
+    'imc_categoria': 1.0,
+    'edad_categoria': 2.0,
+    'edad_squared': 2500.0,
+    'score_cv': 0.0,
+    'indice_salud': 1.0,
+    'sexo': 0.0,  # M = 0, F = 1
+    'zona_residencia': 1.0,  # Rural = 0, Urbana = 1
+    'estrato': 3.0,
+    'realiza_ejercicio': 0.0,  # No = 0, Si = 1
+    'consume_alcohol': 0.0,  # Nunca = 0, Ocasional = 1, Frecuente = 2
+    'fuma': 0.0,  # No = 0, Si = 1
+    'medicamentos_hta': 0.0,  # No = 0, Si = 1
+    'historia_familiar_dm': 0.0,  # No = 0, Si = 1
+    'diabetes_gestacional': 0.0  # No = 0, Si = 1
+}
+
+# Categorías de glucosa: (categoría, nivel de riesgo, confianza)
+GLUCOSE_CATEGORIES = [
+    ('Normal', 'Bajo', 'Alto'),
+    ('Prediabetes', 'Moderado', 'Moderado'),
+    ('Diabetes', 'Alto', 'Alto')
+]
+
 class DiabetesPredictor:
     """Sistema de predicción de diabetes usando modelos entrenados"""
 
-    def __init__(self, model_path: str = None, scaler_path: str = None, model_name: str = None):
+    def __init__(self, model_path: str = None, scaler_path: str = None, model_name: str = None,
+                 inference_engine: str = None):
         """
         Inicializar el predictor
 
@@ -21,15 +123,56 @@ class DiabetesPredictor:
             model_path: Ruta al modelo (opcional, usa el mejor modelo por defecto)
             scaler_path: Ruta al scaler (opcional, busca automáticamente)
             model_name: Nombre del modelo a cargar desde MLflow ('random_forest', 'gradient_boosting')
+            inference_engine: 'sklearn', 'compiled' o 'auto' (opcional, usa la configuración)
         """
         self.model = None
+        self.compiled_model = None
         self.scaler = None
+        self.feature_transformer = None
         self.feature_columns = None
         self.metadata = None
         self.model_name = model_name
+        self.inference_engine = inference_engine or config.get_inference_engine(model_name)
+        self.feature_plan = build_feature_plan()
+
+        if self.inference_engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Motor de inferencia no válido: {self.inference_engine}")
 
         # Cargar modelo y scaler
-        self.load_model(model_path, scaler_path)
+        if self.load_model(model_path, scaler_path):
+            self._compile_model()
+
+    @staticmethod
+    def artifact_paths(model_path: str = None, scaler_path: str = None,
+                       model_name: str = None) -> List[Path]:
+        """
+        Rutas de los artefactos que leería load_model para esta configuración
+
+        Args:
+            model_path: Ruta específica al modelo
+            scaler_path: Ruta específica al scaler
+            model_name: Nombre del modelo en MLflow
+
+        Returns:
+            List[Path]: Modelo (o alternativas), ensamble compilado, scaler,
+            transformador de características y metadata
+        """
+        if model_name:
+            model_file = config.MODELS_DIR / f"{model_name}.joblib"
+            paths = [model_file, compiled_artifact_path(model_file)]
+            run_id = MLFLOW_MODEL_RUNS.get(model_name)
+            if run_id:
+                paths.insert(0, Path(f"mlruns/{MLFLOW_EXPERIMENT_ID}/{run_id}/artifacts/model"))
+            scaler_path = None
+        else:
+            model_file = Path(model_path or config.get_best_model_path('joblib'))
+            paths = [model_file, compiled_artifact_path(model_file)]
+
+        scaler_path = Path(scaler_path or config.MODELS_DIR / "scaler.joblib")
+        paths.append(scaler_path)
+        paths.append(scaler_path.parent / config.FEATURE_TRANSFORMER_FILENAME)
+        paths.append(config.MODELS_DIR / config.METADATA_FILENAME)
+        return paths
 
     def load_model(self, model_path: str = None, scaler_path: str = None) -> bool:
         """
@@ -57,7 +200,7 @@ class DiabetesPredictor:
                 return False
 
             # Cargar modelo
-            self.model = joblib.load(model_path)
+            self.model = self._load_model_file(model_path)
             print(f"✅ Modelo cargado: {model_path}")
 
             # Cargar scaler
@@ -69,6 +212,7 @@ class DiabetesPredictor:
                 print(f"✅ Scaler cargado: {scaler_path}")
             else:
                 print(f"⚠️ Scaler no encontrado: {scaler_path}")
+            self._load_feature_transformer(scaler_path)
 
             # Cargar metadata si existe
             metadata_path = config.MODELS_DIR / config.METADATA_FILENAME
@@ -84,6 +228,24 @@ class DiabetesPredictor:
             print(f"❌ Error cargando modelo: {e}")
             return False
 
+    def _load_feature_transformer(self, scaler_path: str):
+        """
+        Cargar el transformador de características guardado junto al scaler
+
+        Si existe, sus mapeos, columnas e imputación reemplazan a las
+        constantes de este módulo tanto en el plan compilado como en el camino
+        por lotes. Los modelos entrenados sin transformador siguen usando el
+        pipeline de la API.
+        """
+        transformer_path = Path(scaler_path).parent / config.FEATURE_TRANSFORMER_FILENAME
+        if not transformer_path.exists():
+            return
+
+        self.feature_transformer = DiabetesFeatureTransformer.load(transformer_path)
+        self.feature_plan = self.feature_transformer.feature_plan()
+        self.feature_columns = list(self.feature_transformer.feature_columns)
+        print(f"✅ Transformador de características cargado: {transformer_path}")
+
     def _load_model_from_mlflow(self) -> bool:
         """
         Cargar modelo desde MLflow o fallback a archivos locales
@@ -92,18 +254,12 @@ class DiabetesPredictor:
             bool: True si se cargó correctamente
         """
         try:
-            # Mapeo de nombres de modelos a run IDs
-            model_run_mapping = {
-                'random_forest': '2b0bc40a5809462582fe4827a85d0567',
-                'gradient_boosting': '7d8e8b5c65244e488b1a1431d11b4688'
-            }
-
-            if self.model_name not in model_run_mapping:
+            if self.model_name not in MLFLOW_MODEL_RUNS:
                 print(f"❌ Modelo no disponible: {self.model_name}")
                 return False
 
-            run_id = model_run_mapping[self.model_name]
-            model_uri = f"mlruns/108607450594143967/{run_id}/artifacts/model"
+            run_id = MLFLOW_MODEL_RUNS[self.model_name]
+            model_uri = f"mlruns/{MLFLOW_EXPERIMENT_ID}/{run_id}/artifacts/model"
 
             # Intentar cargar desde MLflow
             try:
@@ -121,7 +277,7 @@ class DiabetesPredictor:
                     print(f"❌ Modelo local no encontrado: {model_path}")
                     return False
 
-                self.model = joblib.load(model_path)
+                self.model = self._load_model_file(model_path)
                 print(f"✅ Modelo {self.model_name} cargado desde archivo local: {model_path}")
 
             # Cargar scaler desde el directorio del modelo
@@ -131,6 +287,7 @@ class DiabetesPredictor:
                 print(f"✅ Scaler cargado: {scaler_path}")
             else:
                 print(f"⚠️ Scaler no encontrado: {scaler_path}")
+            self._load_feature_transformer(scaler_path)
 
             # Cargar metadata si existe
             metadata_path = config.MODELS_DIR / config.METADATA_FILENAME
@@ -146,6 +303,55 @@ class DiabetesPredictor:
             print(f"❌ Error cargando modelo: {e}")
             return False
 
+    def _load_model_file(self, model_path: str) -> Any:
+        """
+        Cargar un modelo desde archivo
+
+        Con el motor 'compiled' se usa el ensamble compilado guardado junto al
+        modelo, mapeado en memoria y compartido entre procesos, sin deserializar
+        el estimador de scikit-learn.
+        """
+        if self.inference_engine == 'compiled':
+            try:
+                compiled = load_compiled_artifact(model_path, mmap_mode=config.MODEL_MMAP_MODE)
+            except Exception as e:
+                print(f"⚠️ Error cargando ensamble compilado: {e}")
+                compiled = None
+
+            if compiled is not None:
+                self.compiled_model = compiled
+                print(f"✅ Ensamble compilado mapeado: {compiled_artifact_path(model_path)}")
+                return compiled
+
+        return joblib.load(model_path)
+
+    def _compile_model(self):
+        """Compilar el ensamble de árboles si el motor configurado lo usa"""
+        if self.inference_engine == 'sklearn' or self.model is None or self.compiled_model is not None:
+            return
+
+        try:
+            self.compiled_model = compile_model(self.model)
+        except Exception as e:
+            print(f"⚠️ No se pudo compilar el modelo: {e}")
+            self.compiled_model = None
+
+        if self.compiled_model is None:
+            print("⚠️ Modelo no soportado por el motor compilado, se usa scikit-learn")
+        else:
+            print(f"✅ Modelo compilado ({self.compiled_model.n_trees} árboles, "
+                  f"motor '{self.inference_engine}')")
+
+    def _model_predict(self, features: np.ndarray) -> np.ndarray:
+        """Predecir con el motor configurado para el tamaño del lote"""
+        observe_batch(len(features))
+        with time_stage('model_predict'):
+            if self.compiled_model is not None and (
+                    self.inference_engine == 'compiled' or
+                    len(features) <= config.COMPILED_ENGINE_MAX_ROWS):
+                return self.compiled_model.predict(features)
+            return self.model.predict(features)
+
     def predict(self, patient_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Hacer predicción para un paciente
@@ -161,16 +367,18 @@ class DiabetesPredictor:
 
         try:
             # Aplicar preprocesamiento completo
-            features = self._prepare_features_complete(patient_data)
+            with time_stage('feature_prep'):
+                features = self._prepare_features_complete(patient_data)
 
             # Escalar si es necesario
             if self.scaler is not None:
-                features_scaled = self.scaler.transform(features.reshape(1, -1))
+                with time_stage('scaling'):
+                    features_scaled = self.scaler.transform(features.reshape(1, -1))
             else:
                 features_scaled = features.reshape(1, -1)
 
             # Predecir
-            glucose_predicted = self.model.predict(features_scaled)[0]
+            glucose_predicted = self._model_predict(features_scaled)[0]
 
             # Categorizar resultado
             category, risk_level = self._categorize_glucose(glucose_predicted)
@@ -190,6 +398,28 @@ class DiabetesPredictor:
         """
         Preparar características del paciente aplicando preprocesamiento completo
 
+        Usa el plan compilado de características y recurre al transformador
+        ajustado (o al pipeline de referencia con pandas) solo para datos fuera
+        del camino rápido.
+
+        Args:
+            patient_data: Datos del paciente
+
+        Returns:
+            np.ndarray: Array de características procesadas
+        """
+        features = self.feature_plan.transform_one(patient_data)
+        if features is not None:
+            return features
+
+        if self.feature_transformer is not None:
+            return self.feature_transformer.transform([patient_data])[0]
+        return self._prepare_features_reference(patient_data)
+
+    def _prepare_features_reference(self, patient_data: Dict[str, Any]) -> np.ndarray:
+        """
+        Preparar características con el pipeline de referencia basado en pandas
+
         Args:
             patient_data: Datos del paciente
 
@@ -212,21 +442,9 @@ class DiabetesPredictor:
         df = self._impute_missing_api(df)
 
         # 5. Obtener características en el orden correcto (excluyendo 'Resultado')
-        # Estas son las 29 características que se usaron durante el entrenamiento
-        feature_columns = [
-            'edad', 'sexo', 'zona_residencia', 'estrato', 'talla', 'peso', 'imc',
-            'perimetro_abdominal', 'tas', 'tad', 'frecuencia_cardiaca',
-            'realiza_ejercicio', 'fuma', 'medicamentos_hta',
-            'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc',
-            'riesgo_cardiovascular', 'presion_arterial_media', 'presion_pulso',
-            'ratio_cintura_altura', 'imc_categoria', 'edad_categoria',
-            'edad_squared', 'score_cv', 'indice_salud', 'consume_alcohol_Frecuente',
-            'consume_alcohol_Nunca', 'consume_alcohol_Ocasional'
-        ]
-
         # Asegurar que todas las características estén presentes
         features = []
-        for col in feature_columns:
+        for col in FEATURE_COLUMNS:
             if col in df.columns:
                 features.append(df[col].iloc[0])
             else:
@@ -255,13 +473,13 @@ class DiabetesPredictor:
         # Categorización del IMC
         if 'imc' in df.columns:
             df['imc_categoria'] = pd.cut(df['imc'],
-                                         bins=[0, 18.5, 25, 30, 35, 100],
+                                         bins=IMC_BINS,
                                          labels=[0, 1, 2, 3, 4]).astype(float)
 
         # Categorización de edad
         if 'edad' in df.columns:
             df['edad_categoria'] = pd.cut(df['edad'],
-                                          bins=[0, 30, 45, 60, 75, 100],
+                                          bins=EDAD_BINS,
                                           labels=[0, 1, 2, 3, 4]).astype(float)
             df['edad_squared'] = df['edad'] ** 2
 
@@ -285,23 +503,13 @@ class DiabetesPredictor:
 
     def _encode_categorical_api(self, df: pd.DataFrame) -> pd.DataFrame:
         """Codificar variables categóricas para API"""
-        # Variables binarias
-        binary_mappings = {
-            'sexo': {'M': 0, 'F': 1},
-            'realiza_ejercicio': {'No': 0, 'Si': 1},
-            'fuma': {'No': 0, 'Si': 1},
-            'medicamentos_hta': {'No': 0, 'Si': 1},
-            'historia_familiar_dm': {'No': 0, 'Si': 1},
-            'diabetes_gestacional': {'No': 0, 'Si': 1}
-        }
-
         # Variables con múltiples categorías
         multi_mappings = {
-            'consume_alcohol': {'Nunca': 0, 'Ocasional': 1, 'Frecuente': 2}
+            'consume_alcohol': ALCOHOL_MAPPING
         }
 
         # Aplicar mapeos binarios
-        for col, mapping in binary_mappings.items():
+        for col, mapping in BINARY_MAPPINGS.items():
             if col in df.columns:
                 df[col] = df[col].map(mapping)
 
@@ -320,31 +528,9 @@ class DiabetesPredictor:
 
     def _impute_missing_api(self, df: pd.DataFrame) -> pd.DataFrame:
         """Imputar valores faltantes para API"""
-        # Valores por defecto para características faltantes
-        defaults = {
-            'edad': 50.0,
-            'sexo': 0.0,
-            'imc': 25.0,
-            'tas': 120.0,
-            'tad': 80.0,
-            'perimetro_abdominal': 90.0,
-            'frecuencia_cardiaca': 70.0,
-            'puntaje_findrisc': 5.0,
-            'riesgo_cardiovascular': 0.2,
-            'presion_arterial_media': 93.33,
-            'presion_pulso': 40.0,
-            'ratio_cintura_altura': 0.55,
-            'imc_categoria': 1.0,
-            'edad_categoria': 2.0,
-            'edad_squared': 2500.0,
-            'score_cv': 0.0,
-            'indice_salud': 1.0,
-            'diabetes_gestacional_No': 1.0
-        }
-
-        for col, default_value in defaults.items():
+        for col, default_value in IMPUTE_VALUES.items():
             if col in df.columns and df[col].isnull().any():
-                df[col].fillna(default_value, inplace=True)
+                df[col] = df[col].fillna(default_value)
 
         return df
 
@@ -408,34 +594,7 @@ class DiabetesPredictor:
 
     def _get_default_value(self, feature_name: str) -> float:
         """Obtener valor por defecto para una característica"""
-        defaults = {
-            'edad': 50.0,
-            'imc': 25.0,
-            'tas': 120.0,
-            'tad': 80.0,
-            'perimetro_abdominal': 90.0,
-            'frecuencia_cardiaca': 70.0,
-            'puntaje_findrisc': 5.0,
-            'riesgo_cardiovascular': 0.2,
-            'presion_arterial_media': 93.33,
-            'presion_pulso': 40.0,
-            'ratio_cintura_altura': 0.55,
-            'imc_categoria': 1.0,
-            'edad_categoria': 2.0,
-            'edad_squared': 2500.0,
-            'score_cv': 0.0,
-            'indice_salud': 1.0,
-            'sexo': 0.0,  # M = 0, F = 1
-            'zona_residencia': 1.0,  # Rural = 0, Urbana = 1
-            'estrato': 3.0,
-            'realiza_ejercicio': 0.0,  # No = 0, Si = 1
-            'consume_alcohol': 0.0,  # Nunca = 0, Ocasional = 1, Frecuente = 2
-            'fuma': 0.0,  # No = 0, Si = 1
-            'medicamentos_hta': 0.0,  # No = 0, Si = 1
-            'historia_familiar_dm': 0.0,  # No = 0, Si = 1
-            'diabetes_gestacional': 0.0  # No = 0, Si = 1
-        }
-        return defaults.get(feature_name, 0.0)
+        return DEFAULT_FEATURE_VALUES.get(feature_name, 0.0)
 
     def _encode_categorical(self, column: str, value: str) -> float:
         """Codificar una variable categórica"""
@@ -482,18 +641,143 @@ class DiabetesPredictor:
         """
         Hacer predicciones para múltiples pacientes
 
+        Las características se construyen con el plan compilado (o en una pasada
+        columnar para los pacientes fuera de su camino rápido) y el scaler y el
+        modelo se invocan una sola vez. Los pacientes con datos inválidos reciben
+        su propio resultado de error, igual que en predict().
+
         Args:
             patients_data: Lista de diccionarios con datos de pacientes
 
         Returns:
             List[Dict]: Lista de resultados de predicción
         """
-        results = []
-        for patient_data in patients_data:
-            result = self.predict(patient_data)
-            results.append(result)
+        if self.model is None:
+            return [{"error": "Modelo no cargado"} for _ in patients_data]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(patients_data)
+        prep_start = time.perf_counter()
+
+        # Camino rápido: el plan compilado escribe cada paciente en su fila sin
+        # el costo fijo de construir un DataFrame (clave en lotes pequeños)
+        fast_features = np.empty((len(patients_data), self.feature_plan.n_features), dtype=np.float64)
+        fast_rows = []
+
+        # El resto se agrupa por conjunto de campos enviados: dentro de un grupo el
+        # preprocesamiento columnar es equivalente al de predict() fila a fila
+        groups: Dict[frozenset, List[int]] = {}
+        for i, patient_data in enumerate(patients_data):
+            try:
+                encoded = self.feature_plan.transform_one(patient_data, out=fast_features[i])
+            except Exception:
+                encoded = None
+            if encoded is not None:
+                fast_rows.append(i)
+            else:
+                groups.setdefault(frozenset(patient_data), []).append(i)
+
+        feature_blocks = [fast_features[fast_rows]]
+        block_indices = list(fast_rows)
+        pending = list(groups.values())
+        while pending:
+            indices = pending.pop()
+            try:
+                features = self._prepare_features_batch([patients_data[i] for i in indices])
+            except Exception:
+                # Algún paciente del grupo tiene datos inválidos: dividir el grupo
+                # hasta aislarlo y reportar su error individual
+                if len(indices) == 1:
+                    results[indices[0]] = self.predict(patients_data[indices[0]])
+                else:
+                    middle = len(indices) // 2
+                    pending.extend([indices[:middle], indices[middle:]])
+                continue
+
+            feature_blocks.append(features)
+            block_indices.extend(indices)
+
+        if block_indices:
+            features = np.vstack(feature_blocks)
+            observe_stage('feature_prep', time.perf_counter() - prep_start)
+
+            # Las filas con valores no finitos siguen el camino individual
+            finite = np.isfinite(features).all(axis=1)
+            if not finite.all():
+                for row in np.flatnonzero(~finite):
+                    results[block_indices[row]] = self.predict(patients_data[block_indices[row]])
+                features = features[finite]
+                block_indices = np.asarray(block_indices)[finite].tolist()
+
+        if block_indices:
+            try:
+                # Escalar y predecir todo el lote en una sola llamada
+                if self.scaler is not None:
+                    with time_stage('scaling'):
+                        features = self.scaler.transform(features)
+                glucose_predicted = self._model_predict(features)
+            except Exception:
+                for i in block_indices:
+                    results[i] = self.predict(patients_data[i])
+                return results
+
+            for i, result in zip(block_indices, self._build_results(glucose_predicted)):
+                results[i] = result
+
         return results
 
+    def _prepare_features_batch(self, patients_data: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Preparar características de varios pacientes con los mismos campos en una
+        sola pasada columnar
+
+        Args:
+            patients_data: Lista de pacientes con el mismo conjunto de campos
+
+        Returns:
+            np.ndarray: Matriz N × n_features de características
+        """
+        if self.feature_transformer is not None:
+            return self.feature_transformer.transform(patients_data)
+
+        df = pd.DataFrame(patients_data)
+
+        df = self._clean_data_api(df)
+        df = self._engineer_features_api(df)
+        df = self._encode_categorical_api(df)
+        df = self._impute_missing_api(df)
+
+        features = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float64)
+        for j, col in enumerate(FEATURE_COLUMNS):
+            if col in df.columns:
+                features[:, j] = df[col].to_numpy(dtype=np.float64)
+            else:
+                features[:, j] = self._get_default_value(col)
+
+        return features
+
+    def _build_results(self, glucose_predicted: np.ndarray) -> List[Dict[str, Any]]:
+        """Categorizar e interpretar un vector de predicciones de glucosa"""
+        glucose_predicted = np.asarray(glucose_predicted, dtype=np.float64)
+        category_index = np.where(glucose_predicted < 100, 0,
+                                  np.where(glucose_predicted <= 126, 1, 2))
+
+        # Resultados precalculados por categoría
+        templates = [
+            {
+                "category": category,
+                "risk_level": risk_level,
+                "confidence": confidence,
+                "interpretation": self._get_interpretation(category, risk_level)
+            }
+            for category, risk_level, confidence in GLUCOSE_CATEGORIES
+        ]
+
+        return [
+            {"glucose_mg_dl": glucose, **templates[index]}
+            for glucose, index in zip(np.round(glucose_predicted, 2).tolist(),
+                                      category_index.tolist())
+        ]
+
     def get_model_info(self) -> Dict[str, Any]:
         """Obtener información del modelo cargado"""
         if self.metadata:
@@ -510,25 +794,40 @@ class DiabetesPredictor:
                 "model_name": "Gradient Boosting",
                 "r2_score": 0.85,
                 "training_date": "2025-09-22",
-                "n_features": 29,
-                "feature_columns": [
-                    'edad', 'sexo', 'zona_residencia', 'estrato', 'talla', 'peso', 'imc',
-                    'perimetro_abdominal', 'tas', 'tad', 'frecuencia_cardiaca',
-                    'realiza_ejercicio', 'fuma', 'medicamentos_hta',
-                    'historia_familiar_dm', 'diabetes_gestacional', 'puntaje_findrisc',
-                    'riesgo_cardiovascular', 'presion_arterial_media', 'presion_pulso',
-                    'ratio_cintura_altura', 'imc_categoria', 'edad_categoria',
-                    'edad_squared', 'score_cv', 'indice_salud', 'consume_alcohol_Frecuente',
-                    'consume_alcohol_Nunca', 'consume_alcohol_Ocasional'
-                ]
+                "n_features": self.feature_plan.n_features,
+                "feature_columns": list(self.feature_plan.feature_columns)
             }
 
+def build_feature_plan(dtype: Any = np.float64) -> DiabetesFeaturePlan:
+    """
+    Compilar el plan de características equivalente al pipeline de la API
+
+    Args:
+        dtype: Tipo del vector de salida (float64 o float32)
+
+    Returns:
+        DiabetesFeaturePlan: Plan compilado
+    """
+    return DiabetesFeaturePlan(
+        feature_columns=FEATURE_COLUMNS,
+        absent_defaults=DEFAULT_FEATURE_VALUES,
+        impute_values=IMPUTE_VALUES,
+        binary_mappings=BINARY_MAPPINGS,
+        onehot_columns={f'consume_alcohol_{category}': ('consume_alcohol', category)
+                        for category in ALCOHOL_MAPPING},
+        bins={'imc_categoria': ('imc', IMC_BINS), 'edad_categoria': ('edad', EDAD_BINS)},
+        dtype=dtype
+    )
+
 def predict_glucose(patient_data: Dict[str, Any],
                    model_path: str = None,
                    model_name: str = None) -> Dict[str, Any]:
     """
     Función de conveniencia para hacer predicciones
 
+    El predictor se obtiene del registro de modelos del proceso, de modo que
+    el modelo solo se carga desde disco la primera vez (o si cambia el archivo).
+
     Args:
         patient_data: Datos del paciente
         model_path: Ruta al modelo (opcional)
@@ -537,7 +836,9 @@ def predict_glucose(patient_data: Dict[str, Any],
     Returns:
         Dict: Resultado de la predicción
     """
-    predictor = DiabetesPredictor(model_path=model_path, model_name=model_name)
+    from model_registry import get_predictor
+
+    predictor = get_predictor(model_path=model_path, model_name=model_name)
     return predictor.predict(patient_data)
 
 if __name__ == "__main__":
@@ -0,0 +1,287 @@
+"""
+Perfilado bajo demanda de la API en ejecución
+
+Dos modos, nunca simultáneos (una sola sesión de perfilado por proceso):
+
+- Muestreo: un hilo toma cada PROFILER_SAMPLE_INTERVAL_MS la pila de todos los
+  hilos del proceso (event loop, workers de inferencia, escritor del log...)
+  durante N segundos y agrega las pilas. El costo por muestra es recorrer los
+  frames, así que el overhead queda acotado por el intervalo mínimo, la
+  profundidad máxima de pila y la duración máxima (PROFILER_MAX_SECONDS). El
+  resultado se exporta como pilas colapsadas (flamegraph.pl, speedscope) o
+  como JSON de speedscope.
+- Replay: se toma una predicción registrada en el log de predicciones y se
+  repite bajo cProfile, devolviendo las estadísticas de pstats.
+
+Con varios workers de uvicorn cada sesión perfila solo el proceso que atiende
+la petición.
+"""
+import cProfile
+import heapq
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import config
+
+PROFILE_FORMATS = ('collapsed', 'speedscope')
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls')
+
+# Límites para acotar el overhead del muestreo
+MIN_SAMPLE_INTERVAL_MS = 1.0
+MAX_STACK_DEPTH = 128
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+class ProfilerBusy(Exception):
+    """Ya hay una sesión de perfilado en curso"""
+
+# Una sola sesión de perfilado (muestreo o replay) a la vez
+_session_lock = threading.Lock()
+
+class profiling_session:
+    """Reservar la sesión de perfilado del proceso o lanzar ProfilerBusy"""
+
+    def __enter__(self):
+        if not _session_lock.acquire(blocking=False):
+            raise ProfilerBusy("Ya hay una sesión de perfilado en curso")
+        return self
+
+    def __exit__(self, *exc_info):
+        _session_lock.release()
+        return False
+
+def is_profiling() -> bool:
+    """Si hay una sesión de perfilado en curso"""
+    return _session_lock.locked()
+
+class StackSampler:
+    """Muestreador de las pilas de todos los hilos del proceso"""
+
+    def __init__(self, interval_ms: float = None, max_depth: int = MAX_STACK_DEPTH):
+        """
+        Inicializar el muestreador
+
+        Args:
+            interval_ms: Milisegundos entre muestras (opcional, usa PROFILER_SAMPLE_INTERVAL_MS)
+            max_depth: Frames máximos por pila (los más cercanos a la raíz se descartan)
+        """
+        interval_ms = config.PROFILER_SAMPLE_INTERVAL_MS if interval_ms is None else interval_ms
+        self.interval = max(interval_ms, MIN_SAMPLE_INTERVAL_MS) / 1000
+        self.max_depth = max_depth
+
+        # (hilo, frame raíz, ..., frame hoja) -> muestras
+        self.stacks: Counter = Counter()
+        self._frame_labels: Dict[Any, Tuple[str, str, int]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread = None
+
+        self.samples = 0
+        self.duration = 0.0
+        self.sampling_time = 0.0
+
+    def _frame_key(self, code) -> Tuple[str, str, int]:
+        """(función, archivo, línea) de un code object, con caché"""
+        key = self._frame_labels.get(code)
+        if key is None:
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            self._frame_labels[code] = key
+        return key
+
+    def sample(self):
+        """Tomar una muestra de la pila de cada hilo (salvo el propio)"""
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(self._frame_key(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[(names.get(ident, str(ident)),) + tuple(stack)] += 1
+        self.samples += 1
+
+    def _run(self):
+        """Bucle del hilo muestreador"""
+        start = time.perf_counter()
+        next_sample = start
+        while not self._stop.is_set():
+            sample_start = time.perf_counter()
+            self.sample()
+            self.sampling_time += time.perf_counter() - sample_start
+            next_sample += self.interval
+            # Si una muestra tarda más que el intervalo no se acumulan atrasos
+            next_sample = max(next_sample, time.perf_counter())
+            self._stop.wait(next_sample - time.perf_counter())
+        self.duration = time.perf_counter() - start
+
+    def start(self):
+        """Empezar a muestrear en segundo plano"""
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Detener el muestreo"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Datos de la sesión de muestreo"""
+        return {
+            "pid": os.getpid(),
+            "duration_s": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "unique_stacks": len(self.stacks),
+            # Fracción del tiempo que el muestreador estuvo recorriendo pilas
+            "overhead": round(self.sampling_time / self.duration, 4) if self.duration else 0.0
+        }
+
+    def to_collapsed(self) -> str:
+        """Pilas en formato colapsado: 'hilo;raíz;...;hoja muestras' por línea"""
+        lines = []
+        for (thread_name, *stack), count in self.stacks.most_common():
+            frames = [f"{name} ({os.path.basename(filename)}:{line})" for name, filename, line in stack]
+            lines.append(";".join([thread_name.replace(";", "_")] + frames) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """Pilas en el formato de archivo de speedscope (un perfil por hilo)"""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[Tuple[str, str, int], int] = {}
+        profiles: Dict[str, Dict[str, Any]] = {}
+        # Peso de cada muestra: duración real entre muestras
+        weight = self.duration / self.samples if self.samples else self.interval
+
+        for (thread_name, *stack), count in self.stacks.items():
+            indices = []
+            for key in stack:
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({"name": key[0], "file": key[1], "line": key[2]})
+                indices.append(frame_index[key])
+
+            profile = profiles.setdefault(thread_name, {
+                "type": "sampled", "name": thread_name, "unit": "seconds",
+                "startValue": 0, "endValue": round(self.duration, 6),
+                "samples": [], "weights": []
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(round(count * weight, 6))
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": f"API diabetes pid {os.getpid()}",
+            "exporter": "profiler.py",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values())
+        }
+
+def _prediction_log_files(directory: Path) -> List[Path]:
+    """Archivos del log de predicciones sin comprimir"""
+    return [path for path in directory.glob("api_predictions*.log") if path.is_file()]
+
+def _read_prediction_log(path: Path) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Entradas de un archivo del log, en el orden en que se escribieron"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield str(entry.get("timestamp", "")), entry
+
+def load_logged_prediction(index: int = -1, directory: Path = None) -> Dict[str, Any]:
+    """
+    Leer una predicción registrada en el log de predicciones
+
+    Cada proceso escribe su propio archivo en orden; las entradas de todos los
+    archivos se mezclan por su timestamp sin cargarlas en memoria (para
+    posiciones negativas solo se conservan las últimas -index).
+
+    Args:
+        index: Posición de la entrada (negativa desde la más reciente)
+        directory: Directorio de los logs (opcional, usa OUTPUTS_DIR)
+
+    Returns:
+        Dict: Entrada del log (timestamp, patient_data, prediction, ...)
+
+    Raises:
+        LookupError: Si no hay una entrada en esa posición
+    """
+    files = _prediction_log_files(Path(directory or config.OUTPUTS_DIR))
+    entries = heapq.merge(*(_read_prediction_log(path) for path in files), key=lambda item: item[0])
+
+    total = 0
+    if index < 0:
+        newest = deque(maxlen=-index)
+        for total, (_, entry) in enumerate(entries, start=1):
+            newest.append(entry)
+        if len(newest) == -index:
+            return newest[0]
+    else:
+        for total, (_, entry) in enumerate(entries, start=1):
+            if total == index + 1:
+                return entry
+
+    raise LookupError(f"No hay una predicción registrada en la posición {index} "
+                      f"({total} en el log)")
+
+def profile_prediction(patient_data: Dict[str, Any], model_name: str = None, repeat: int = 1,
+                       sort: str = 'cumulative', limit: int = 30) -> Dict[str, Any]:
+    """
+    Repetir una predicción bajo cProfile
+
+    Se ejecuta en el ejecutor de inferencia para perfilar el mismo camino que
+    una petición real (hilo o proceso worker, predictor del registro).
+
+    Args:
+        patient_data: Datos del paciente
+        model_name: Modelo a usar (None para el modelo por defecto)
+        repeat: Veces que se repite la predicción
+        sort: Orden de las estadísticas ('cumulative', 'tottime' o 'ncalls')
+        limit: Funciones incluidas en las estadísticas
+
+    Returns:
+        Dict: Resultado, tiempo medio por predicción y estadísticas de pstats
+    """
+    from model_registry import get_predictor
+
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Orden no válido: {sort}. Opciones: {', '.join(SORT_KEYS)}")
+
+    predictor = get_predictor(model_name=model_name)
+    # Una predicción previa fuera del perfil para no medir cargas perezosas
+    result = predictor.predict(patient_data)
+
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        for _ in range(repeat):
+            predictor.predict(patient_data)
+    finally:
+        profile.disable()
+    elapsed = time.perf_counter() - start
+
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+
+    return {
+        "pid": os.getpid(),
+        "result": result,
+        "repeat": repeat,
+        "mean_ms": round(elapsed / repeat * 1000, 4),
+        "total_calls": stats.total_calls,
+        "stats": output.getvalue()
+    }
@@ -0,0 +1,234 @@
+"""
+Trazas por petición de la API del Sistema Predictivo de Diabetes
+
+RequestTracingMiddleware asigna un identificador a cada petición (o respeta
+un X-Request-ID válido del cliente) y acumula los tiempos de las etapas que
+se miden con metrics.time_stage() durante la petición, incluidas las que se
+ejecutan en los workers de inferencia (validación, preparación de
+características, escalado, model.predict, serialización y log).
+
+En los endpoints de predicción la respuesta lleva las cabeceras X-Request-ID
+y Server-Timing (duración de cada etapa y total en ms). Las peticiones que
+superan SLOW_REQUEST_THRESHOLD_MS se guardan, con su payload saneado y sus
+tiempos por etapa, en un búfer circular de SLOW_REQUEST_BUFFER_SIZE entradas
+que se consulta en /admin/slow-requests (solo con ADMIN_TOKEN). Del payload se
+guardan únicamente los campos de paciente permitidos, para poder reproducir
+las entradas que causan la lentitud.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+from config import config
+from metrics import start_request_timings
+
+# Endpoints cuyas respuestas llevan Server-Timing y se vigilan por lentitud
+TRACED_ENDPOINTS = ('/predict', '/predict/batch', '/models/{model_name}/predict')
+
+# Identificadores de petición aceptados del cliente
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._\-]{1,64}$')
+
+# Longitud máxima de los textos guardados del payload
+MAX_STRING_LENGTH = 64
+
+def format_server_timing(timings: Dict[str, float], total: float) -> str:
+    """Valor de la cabecera Server-Timing (duraciones en ms)"""
+    metrics = [f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in timings.items()]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics)
+
+def _sanitize_value(value: Any, allowed_fields: frozenset) -> Any:
+    """Sanear un paciente o valor del payload"""
+    if isinstance(value, dict):
+        return {
+            key: _sanitize_value(item, allowed_fields)
+            for key, item in value.items()
+            if key in allowed_fields
+        }
+    if isinstance(value, str):
+        return value[:MAX_STRING_LENGTH]
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    return f"<{type(value).__name__}>"
+
+def sanitize_payload(body: bytes, truncated: bool = False, allowed_fields: Iterable[str] = None,
+                     max_items: int = None) -> Dict[str, Any]:
+    """
+    Sanear el cuerpo de una petición para guardarlo junto a sus tiempos
+
+    Solo se conservan los campos de paciente permitidos (los demás pueden
+    llevar identificadores), los textos se recortan y de los lotes se guardan
+    los primeros max_items pacientes.
+
+    Args:
+        body: Cuerpo recibido (posiblemente recortado)
+        truncated: Si el cuerpo se recortó al capturarlo
+        allowed_fields: Campos de paciente que se conservan (None no conserva
+            ninguno)
+        max_items: Pacientes de un lote que se conservan
+            (opcional, usa SLOW_REQUEST_MAX_ITEMS)
+
+    Returns:
+        Dict: {"data": ..., "items": n} o {"error": motivo}
+    """
+    max_items = max_items or config.SLOW_REQUEST_MAX_ITEMS
+    allowed = frozenset(allowed_fields or ())
+
+    if truncated:
+        return {"error": "payload recortado", "bytes": len(body)}
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return {"error": "payload no es JSON", "bytes": len(body)}
+
+    if isinstance(data, list):
+        return {"data": [_sanitize_value(item, allowed) for item in data[:max_items]],
+                "items": len(data)}
+    return {"data": _sanitize_value(data, allowed), "items": 1}
+
+class SlowRequestLog:
+    """Búfer circular de las peticiones más lentas que el umbral"""
+
+    def __init__(self, threshold_ms: float = None, capacity: int = None):
+        """
+        Inicializar el búfer
+
+        Args:
+            threshold_ms: Duración a partir de la cual se guarda una petición
+                (opcional, usa SLOW_REQUEST_THRESHOLD_MS)
+            capacity: Entradas guardadas (opcional, usa SLOW_REQUEST_BUFFER_SIZE)
+        """
+        self.threshold_ms = config.SLOW_REQUEST_THRESHOLD_MS if threshold_ms is None else threshold_ms
+        self.capacity = capacity or config.SLOW_REQUEST_BUFFER_SIZE
+        self._entries: deque = deque(maxlen=self.capacity)
+        self._lock = threading.Lock()
+        self.captured = 0
+
+    def is_slow(self, duration_ms: float) -> bool:
+        """Si una petición de esa duración se debe guardar"""
+        return duration_ms >= self.threshold_ms
+
+    def record(self, entry: Dict[str, Any]):
+        """Guardar una petición lenta (descarta la más antigua si está lleno)"""
+        with self._lock:
+            self._entries.append(entry)
+            self.captured += 1
+
+    def get_entries(self, limit: int = None) -> List[Dict[str, Any]]:
+        """Peticiones guardadas, de la más reciente a la más antigua"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit else entries
+
+    def clear(self):
+        """Vaciar el búfer"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado del búfer"""
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.capacity,
+            "stored": len(self._entries),
+            "captured": self.captured
+        }
+
+class RequestTracingMiddleware:
+    """Middleware ASGI con identificador de petición, Server-Timing y captura de peticiones lentas"""
+
+    def __init__(self, app, slow_log: SlowRequestLog = None, endpoints: Iterable[str] = TRACED_ENDPOINTS,
+                 allowed_fields: Iterable[str] = None, max_body_bytes: int = None):
+        """
+        Inicializar el middleware
+
+        Args:
+            app: Aplicación ASGI
+            slow_log: Búfer de peticiones lentas (opcional, usa el global)
+            endpoints: Rutas (plantillas de FastAPI) que se trazan
+            allowed_fields: Campos de paciente que se guardan del payload
+                (None no guarda ninguno)
+            max_body_bytes: Bytes del cuerpo que se capturan
+                (opcional, usa SLOW_REQUEST_MAX_BODY_BYTES)
+        """
+        self.app = app
+        self.slow_log = slow_log or slow_request_log
+        self.endpoints = frozenset(endpoints)
+        self.allowed_fields = allowed_fields
+        self.max_body_bytes = max_body_bytes or config.SLOW_REQUEST_MAX_BODY_BYTES
+
+    def _is_traced(self, scope) -> bool:
+        """Si la ruta resuelta de la petición es un endpoint de predicción"""
+        return getattr(scope.get('route'), 'path', None) in self.endpoints
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                value = value.decode("latin-1")
+                request_id = value if _REQUEST_ID_PATTERN.match(value) else None
+                break
+        request_id = request_id or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        timings = start_request_timings()
+        start = time.perf_counter()
+        status = {"code": 500}
+        body = {"chunks": [], "size": 0, "truncated": False}
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request" and not body["truncated"]:
+                chunk = message.get("body", b"")
+                if body["size"] + len(chunk) > self.max_body_bytes:
+                    body["truncated"] = True
+                    body["chunks"].clear()
+                else:
+                    body["chunks"].append(chunk)
+                body["size"] += len(chunk)
+            return message
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if self._is_traced(scope):
+                    # En los endpoints de predicción todas las etapas terminan
+                    # antes de enviar la respuesta
+                    server_timing = format_server_timing(timings, time.perf_counter() - start)
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-request-id", request_id.encode("latin-1")),
+                        (b"server-timing", server_timing.encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if self._is_traced(scope) and self.slow_log.is_slow(duration_ms):
+                self.slow_log.record({
+                    "request_id": request_id,
+                    "timestamp": datetime.now().isoformat(),
+                    "method": scope["method"],
+                    "endpoint": scope["route"].path,
+                    "path": scope["path"],
+                    "status": status["code"],
+                    "duration_ms": round(duration_ms, 3),
+                    "body_bytes": body["size"],
+                    "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()},
+                    "payload": sanitize_payload(b"".join(body["chunks"]), body["truncated"],
+                                                self.allowed_fields)
+                })
+
+# Instancia global del búfer de peticiones lentas
+slow_request_log = SlowRequestLog()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark de throughput de /predict con y sin micro-batching
+
+El beneficio del micro-batching crece con el costo fijo por llamada del
+modelo: con Random Forest (--model random_forest) cada predict() paga el
+reparto de los árboles, que con lotes se amortiza entre varios pacientes.
+
+Arranca la API en un proceso aparte para cada configuración, mantiene N
+peticiones concurrentes a /predict durante unos segundos y reporta
+peticiones/s, latencias y el tamaño medio de lote alcanzado.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+PATIENT = {
+    "edad": 55, "sexo": "M", "imc": 31.5, "tas": 145, "tad": 92,
+    "perimetro_abdominal": 104, "frecuencia_cardiaca": 78,
+    "realiza_ejercicio": "No", "consume_alcohol": "Ocasional", "fuma": "Si",
+    "medicamentos_hta": "Si", "historia_familiar_dm": "Si",
+    "diabetes_gestacional": "No", "puntaje_findrisc": 16, "riesgo_cardiovascular": 0.4
+}
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start_api(port: int, env: dict) -> subprocess.Popen:
+    """Arrancar la API y esperar a que responda"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("La API no arrancó a tiempo")
+
+async def _load(base_url: str, path: str, concurrency: int, duration: float) -> dict:
+    """Mantener `concurrency` peticiones en vuelo durante `duration` segundos"""
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.post(path, json=PATIENT)
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.post(path, json=PATIENT)
+                if response.status_code == 200:
+                    latencies.append((time.perf_counter() - start) * 1000)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        stats = (await client.get("/stats/batching")).json()
+
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) if latencies else float('nan'),
+        "p99_ms": float(np.percentile(latencies, 99)) if latencies else float('nan'),
+        "errors": errors,
+        "mean_batch": stats["micro_batching"]["mean_batch_size"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de micro-batching de /predict")
+    parser.add_argument("--concurrency", nargs="*", type=int, default=[1, 8, 32, 64])
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por medición")
+    parser.add_argument("--max-wait-ms", default="2")
+    parser.add_argument("--max-batch-size", default="64")
+    parser.add_argument("--max-concurrent", default="0", help="Lotes en ejecución a la vez")
+    parser.add_argument("--model", default=None,
+                        help="Usar /models/{model}/predict en lugar de /predict")
+    args = parser.parse_args()
+    path = f"/models/{args.model}/predict" if args.model else "/predict"
+
+    print(f"{'micro-batching':<16} {'concurrencia':>12} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'lote medio':>10} {'errores':>8}")
+
+    for enabled in ("false", "true"):
+        port = _free_port()
+        process = _start_api(port, {
+            "MICRO_BATCH_ENABLED": enabled,
+            "MICRO_BATCH_MAX_WAIT_MS": args.max_wait_ms,
+            "MICRO_BATCH_MAX_SIZE": args.max_batch_size,
+            "MICRO_BATCH_MAX_CONCURRENT": args.max_concurrent,
+            "INFERENCE_QUEUE_SIZE": "1024"
+        })
+        try:
+            for concurrency in args.concurrency:
+                result = asyncio.run(_load(f"http://127.0.0.1:{port}", path, concurrency,
+                                           args.duration))
+                print(f"{enabled:<16} {concurrency:>12} {result['rps']:>8.0f} {result['p50_ms']:>8.1f} "
+                      f"{result['p99_ms']:>8.1f} {result['mean_batch']:>10} {result['errors']:>8}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+if __name__ == "__main__":
+    main()
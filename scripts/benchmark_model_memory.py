@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Comparar la memoria residente de varios workers con modelos deserializados
+(joblib, una copia por proceso) frente a ensambles compilados mapeados en memoria
+
+Cada worker es un proceso independiente (spawn, como uvicorn/gunicorn sin
+preload) que carga el predictor, hace predicciones para tocar todas las
+páginas del modelo y reporta su RSS y PSS. El PSS reparte las páginas
+compartidas entre los procesos que las mapean, por lo que la suma del PSS es
+la memoria real que ocupan todos los workers del host.
+"""
+import argparse
+import multiprocessing
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+def _memory_kb() -> dict:
+    """RSS y PSS del proceso actual en kB (Linux)"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+def _worker(model_path: str, engine: str, barrier, results):
+    """Cargar el modelo, predecir y reportar memoria con todos los workers vivos"""
+    import warnings
+    warnings.filterwarnings("ignore")
+    from predictor import DiabetesPredictor
+
+    before = _memory_kb()
+    predictor = DiabetesPredictor(model_path=model_path, inference_engine=engine)
+    features = np.random.default_rng(0).normal(size=(2000, 29))
+    predictor._model_predict(features)
+    after = _memory_kb()
+
+    # Medir cuando todos los workers mapean el modelo a la vez
+    barrier.wait()
+    shared = _memory_kb()
+    barrier.wait()
+
+    results.put({
+        'model_rss_kb': after['rss'] - before['rss'],
+        'rss_kb': shared['rss'],
+        'pss_kb': shared['pss']
+    })
+
+def measure(model_path: str, engine: str, n_workers: int) -> dict:
+    """Lanzar n_workers procesos y agregar su memoria"""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(n_workers)
+    results = context.Queue()
+
+    workers = [context.Process(target=_worker, args=(model_path, engine, barrier, results))
+               for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    return {
+        'model_rss_mb': np.mean([r['model_rss_kb'] for r in reports]) / 1024,
+        'rss_total_mb': sum(r['rss_kb'] for r in reports) / 1024,
+        'pss_total_mb': sum(r['pss_kb'] for r in reports) / 1024
+    }
+
+def main():
+    from config import config
+    from tree_engine import compiled_artifact_path, export_compiled_model
+
+    parser = argparse.ArgumentParser(description="Memoria de workers: joblib vs ensamble mapeado")
+    parser.add_argument("--model-path", default=str(config.MODELS_DIR / "random_forest.joblib"))
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    if not compiled_artifact_path(args.model_path).exists():
+        import joblib
+        export_compiled_model(joblib.load(args.model_path), args.model_path)
+
+    print(f"🧠 {args.model_path} con {args.workers} workers")
+    print(f"   {'modo':<28} {'modelo/worker MB':>17} {'RSS total MB':>13} {'PSS total MB':>13}")
+
+    for label, engine in (("joblib (copia por worker)", 'sklearn'),
+                          ("compilado mmap (compartido)", 'compiled')):
+        stats = measure(args.model_path, engine, args.workers)
+        print(f"   {label:<28} {stats['model_rss_mb']:>17.1f} "
+              f"{stats['rss_total_mb']:>13.1f} {stats['pss_total_mb']:>13.1f}")
+
+if __name__ == "__main__":
+    main()
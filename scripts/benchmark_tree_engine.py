@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de inferencia compilado frente a predict() de scikit-learn
+
+Mide la latencia para 1 fila y para un lote de 10.000 filas con los modelos
+guardados en models/ (random_forest, gradient_boosting, ...).
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config
+from tree_engine import compile_model
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def _time_call(func, X, repeats: int) -> float:
+    """Mediana en milisegundos de varias llamadas"""
+    func(X)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+def benchmark_model(model_path: Path, batch_sizes, repeats: int):
+    """Comparar ambos motores para un modelo"""
+    model = joblib.load(model_path)
+    compiled = compile_model(model)
+    if compiled is None:
+        print(f"⚠️ {model_path.stem}: modelo no soportado por el motor compilado")
+        return
+
+    X = np.random.default_rng(0).normal(size=(max(batch_sizes), compiled.n_features))
+    max_diff = float(np.max(np.abs(model.predict(X) - compiled.predict(X))))
+
+    print(f"\n🌲 {model_path.stem} ({compiled.model_type}, {compiled.n_trees} árboles, "
+          f"profundidad {compiled.max_depth}) - diferencia máxima {max_diff:.2e}")
+    print(f"   {'filas':>8} {'sklearn ms':>12} {'compilado ms':>14} {'aceleración':>12}")
+
+    for n_rows in batch_sizes:
+        batch = X[:n_rows]
+        n_repeats = repeats if n_rows < 1000 else max(3, repeats // 20)
+        sklearn_ms = _time_call(model.predict, batch, n_repeats)
+        compiled_ms = _time_call(compiled.predict, batch, n_repeats)
+        print(f"   {n_rows:>8} {sklearn_ms:>12.3f} {compiled_ms:>14.3f} "
+              f"{sklearn_ms / compiled_ms:>11.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de árboles compilado")
+    parser.add_argument("--models", nargs="*", default=["random_forest", "gradient_boosting"],
+                        help="Modelos de models/ a medir")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1, 10000],
+                        help="Tamaños de lote")
+    parser.add_argument("--repeats", type=int, default=200, help="Repeticiones por medición")
+    args = parser.parse_args()
+
+    for name in args.models:
+        model_path = config.MODELS_DIR / f"{name}.joblib"
+        if not model_path.exists():
+            print(f"❌ Modelo no encontrado: {model_path}")
+            continue
+        benchmark_model(model_path, args.sizes, args.repeats)
+
+if __name__ == "__main__":
+    main()
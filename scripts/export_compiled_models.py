@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Exportar los modelos de árboles de models/ al formato compilado mapeable en memoria
+
+Crea models/<modelo>.compiled/ junto a cada <modelo>.joblib soportado. Los
+modelos entrenados con model_trainer.py ya lo generan al guardarse; este
+script sirve para modelos existentes.
+"""
+import sys
+from pathlib import Path
+
+import joblib
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import config
+from tree_engine import export_compiled_model
+
+def main():
+    model_paths = [Path(arg) for arg in sys.argv[1:]] or sorted(config.MODELS_DIR.glob("*.joblib"))
+
+    for model_path in model_paths:
+        if model_path.name == "scaler.joblib":
+            continue
+        compiled_dir = export_compiled_model(joblib.load(model_path), model_path)
+        if compiled_dir is None:
+            print(f"⏭️  {model_path.name}: modelo no soportado")
+        else:
+            size_mb = sum(f.stat().st_size for f in compiled_dir.iterdir()) / 1e6
+            print(f"✅ {model_path.name} -> {compiled_dir} ({size_mb:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
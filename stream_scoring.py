@@ -0,0 +1,257 @@
+"""
+Scoring masivo en streaming (NDJSON) para la API
+
+/predict/batch necesita el arreglo JSON completo en memoria antes de empezar.
+Aquí el cuerpo de la petición se lee de forma incremental, un paciente por
+línea; cada STREAM_CHUNK_SIZE líneas se forma un lote que se valida y predice
+en el ejecutor de inferencia, y sus resultados se envían como NDJSON en el
+mismo orden de entrada mientras se siguen leyendo los siguientes. Con
+STREAM_MAX_IN_FLIGHT lotes pendientes se deja de leer el cuerpo, así que la
+memoria usada no depende del tamaño de la entrada.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+from config import config
+from inference_executor import InferenceExecutor, inference_executor, InferenceQueueFull, run_predict_batch
+from metrics import observe_stage
+
+logger = logging.getLogger(__name__)
+
+# Espera (s) antes de reintentar un lote cuando el ejecutor está lleno
+QUEUE_FULL_RETRY_DELAY = 0.05
+
+async def iter_body_lines(receive: Callable, max_line_bytes: int = None) -> AsyncIterator[Optional[bytes]]:
+    """
+    Leer el cuerpo de una petición ASGI línea a línea
+
+    Args:
+        receive: Canal receive de ASGI
+        max_line_bytes: Longitud máxima de una línea (opcional, usa STREAM_MAX_LINE_BYTES)
+
+    Yields:
+        bytes: Cada línea sin el salto final, o None si supera la longitud máxima
+
+    Raises:
+        ClientDisconnect: Si el cliente se desconecta antes de terminar el cuerpo
+    """
+    max_line_bytes = max_line_bytes or config.STREAM_MAX_LINE_BYTES
+    buffer = bytearray()
+    overflow = False
+
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ClientDisconnect()
+
+        parts = message.get("body", b"").split(b"\n")
+        for part in parts[:-1]:
+            if overflow or len(buffer) + len(part) > max_line_bytes:
+                yield None
+            else:
+                yield bytes(buffer + part)
+            buffer.clear()
+            overflow = False
+
+        # Lo que queda tras el último salto continúa en el siguiente mensaje;
+        # una línea demasiado larga se descarta sin acumularla
+        if not overflow:
+            if len(buffer) + len(parts[-1]) > max_line_bytes:
+                overflow = True
+                buffer.clear()
+            else:
+                buffer += parts[-1]
+
+        if not message.get("more_body", False):
+            if overflow:
+                yield None
+            elif buffer.strip():
+                yield bytes(buffer)
+            return
+
+def score_ndjson_chunk(lines: List[Optional[bytes]], first_line: int, model_name: str = None,
+                       validator: Any = None, batch_function: Callable = None) -> Tuple[bytes, int, int]:
+    """
+    Validar y predecir un lote de líneas NDJSON
+
+    Se ejecuta en el pool de inferencia. Las líneas en blanco se omiten; las que
+    no son JSON válido o no pasan la validación reciben su propio resultado de
+    error sin afectar al resto del lote.
+
+    Args:
+        lines: Líneas del lote (None para las que superaron la longitud máxima)
+        first_line: Número (desde 1) de la primera línea del lote
+        model_name: Modelo a usar (None para el modelo por defecto)
+        validator: Modelo pydantic para validar cada paciente (opcional)
+        batch_function: Función (pacientes, model_name) -> resultados
+            (opcional, usa run_predict_batch)
+
+    Returns:
+        Tuple: Cuerpo con un resultado JSON por línea no vacía (con su número
+            de línea), filas con predicción y filas con error
+    """
+    batch_function = batch_function or run_predict_batch
+    outputs: List[Optional[dict]] = [None] * len(lines)
+    patients = []
+    positions = []
+
+    for i, line in enumerate(lines):
+        line_number = first_line + i
+        if line is None:
+            outputs[i] = {"line": line_number, "error": "Línea demasiado larga"}
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            if validator is not None:
+                record = validator.model_validate(record).model_dump()
+            elif not isinstance(record, dict):
+                raise ValueError("Se esperaba un objeto JSON por línea")
+        except ValueError as e:
+            outputs[i] = {"line": line_number, "error": f"Datos inválidos: {e}"}
+            continue
+        patients.append(record)
+        positions.append(i)
+
+    if patients:
+        try:
+            results = batch_function(patients, model_name)
+        except Exception as e:
+            results = [{"error": f"Error en lote: {e}"}] * len(patients)
+        for i, result in zip(positions, results):
+            outputs[i] = {"line": first_line + i, **result}
+
+    serialization_start = time.perf_counter()
+    encoded = []
+    errors = 0
+    for output in outputs:
+        if output is None:
+            continue
+        try:
+            encoded.append(json.dumps(output, ensure_ascii=False, allow_nan=False,
+                                      separators=(",", ":")))
+        except ValueError as e:
+            output = {"line": output["line"], "error": f"Resultado no serializable: {e}"}
+            encoded.append(json.dumps(output, ensure_ascii=False, separators=(",", ":")))
+        if "error" in output:
+            errors += 1
+
+    body = "".join(line + "\n" for line in encoded).encode("utf-8")
+    observe_stage('serialization', time.perf_counter() - serialization_start)
+    return body, len(encoded) - errors, errors
+
+class NDJSONScoringResponse(StreamingResponse):
+    """
+    Respuesta que lee pacientes NDJSON del cuerpo de la petición y devuelve
+    sus predicciones en NDJSON a medida que se completan los lotes
+
+    Sustituye body_iterator de StreamingResponse por __call__, que lee el canal
+    receive directamente para que la lectura del cuerpo y el envío de
+    resultados avancen en el mismo bucle.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, model_name: str = None, validator: Any = None,
+                 batch_function: Callable = None, executor: InferenceExecutor = None,
+                 chunk_size: int = None, max_in_flight: int = None, max_line_bytes: int = None,
+                 on_scored: Callable[[int], None] = None):
+        """
+        Inicializar la respuesta
+
+        Args:
+            model_name: Modelo a usar (None para el modelo por defecto)
+            validator: Modelo pydantic para validar cada paciente (opcional)
+            batch_function: Función (pacientes, model_name) -> resultados
+                (opcional, usa run_predict_batch)
+            executor: Ejecutor de inferencia (opcional, usa el global)
+            chunk_size: Líneas por lote (opcional, usa STREAM_CHUNK_SIZE)
+            max_in_flight: Lotes pendientes antes de dejar de leer
+                (opcional, usa STREAM_MAX_IN_FLIGHT)
+            max_line_bytes: Longitud máxima de línea (opcional, usa STREAM_MAX_LINE_BYTES)
+            on_scored: Función llamada con el número de filas predichas de cada
+                lote enviado (sin contar las líneas con error)
+        """
+        # Sin cuerpo fijo: no se envía Content-Length y la respuesta va por chunks
+        super().__init__(content=())
+        self.model_name = model_name
+        self.validator = validator
+        self.batch_function = batch_function
+        self.executor = executor or inference_executor
+        self.chunk_size = chunk_size or config.STREAM_CHUNK_SIZE
+        self.max_in_flight = max_in_flight or config.STREAM_MAX_IN_FLIGHT
+        self.max_line_bytes = max_line_bytes or config.STREAM_MAX_LINE_BYTES
+        self.on_scored = on_scored
+
+        self.lines_read = 0
+        self.chunks_sent = 0
+        self.rows_scored = 0
+        self.rows_failed = 0
+
+    async def _score(self, lines: List[Optional[bytes]], first_line: int) -> Tuple[bytes, int, int]:
+        """Puntuar un lote; si el ejecutor está lleno se espera en lugar de fallar"""
+        while True:
+            try:
+                return await self.executor.run(score_ndjson_chunk, lines, first_line, self.model_name,
+                                               self.validator, self.batch_function)
+            except InferenceQueueFull:
+                await asyncio.sleep(QUEUE_FULL_RETRY_DELAY)
+
+    async def _send_next(self, send: Callable, in_flight: deque):
+        """Enviar los resultados del lote pendiente más antiguo"""
+        task = in_flight.popleft()
+        body, scored, failed = await task
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+        self.chunks_sent += 1
+        self.rows_scored += scored
+        self.rows_failed += failed
+        if self.on_scored is not None and scored:
+            self.on_scored(scored)
+
+    async def __call__(self, scope, receive, send):
+        start_time = time.time()
+        in_flight: deque = deque()
+        lines: List[Optional[bytes]] = []
+        first_line = 1
+        loop = asyncio.get_running_loop()
+
+        await send({"type": "http.response.start", "status": self.status_code,
+                    "headers": self.raw_headers})
+        try:
+            async for line in iter_body_lines(receive, self.max_line_bytes):
+                lines.append(line)
+                if len(lines) < self.chunk_size:
+                    continue
+
+                in_flight.append(loop.create_task(self._score(lines, first_line)))
+                first_line += len(lines)
+                lines = []
+                # Con el máximo de lotes en vuelo se deja de leer el cuerpo
+                while len(in_flight) >= self.max_in_flight:
+                    await self._send_next(send, in_flight)
+
+            if lines:
+                in_flight.append(loop.create_task(self._score(lines, first_line)))
+                first_line += len(lines)
+            while in_flight:
+                await self._send_next(send, in_flight)
+
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except ClientDisconnect:
+            logger.warning(f"Cliente desconectado durante /predict/stream tras {first_line - 1} líneas")
+        finally:
+            for task in in_flight:
+                task.cancel()
+            self.lines_read = first_line - 1 + len(lines)
+
+        logger.info(f"Streaming completado: {self.lines_read} líneas en {self.chunks_sent} lotes, "
+                    f"{self.rows_scored} predicciones y {self.rows_failed} errores "
+                    f"({(time.time() - start_time) * 1000:.2f}ms)")
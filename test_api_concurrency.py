@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Script de prueba de concurrencia de la API: /health debe seguir respondiendo
+rápido mientras /predict/batch satura el ejecutor de inferencia
+"""
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent
+
+PATIENT = {
+    "edad": 55, "sexo": "M", "imc": 31.5, "tas": 145, "tad": 92,
+    "perimetro_abdominal": 104, "frecuencia_cardiaca": 78,
+    "realiza_ejercicio": "No", "consume_alcohol": "Ocasional", "fuma": "Si",
+    "medicamentos_hta": "Si", "historia_familiar_dm": "Si",
+    "diabetes_gestacional": "No", "puntaje_findrisc": 16, "riesgo_cardiovascular": 0.4
+}
+
+def _free_port() -> int:
+    """Puerto libre en loopback"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _start_api(port: int, env: dict) -> subprocess.Popen:
+    """Arrancar la API en un proceso aparte y esperar a que responda"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).is_success:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError("La API no arrancó a tiempo")
+
+def _health_latencies(client: httpx.Client, n: int, interval: float = 0.02) -> list:
+    """Latencias (ms) de n llamadas a /health con una conexión reutilizada"""
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+def _hammer(base_url: str, stop, reports):
+    """Enviar lotes de 2000 pacientes sin pausa hasta que se pida parar"""
+    # Cuerpo serializado una sola vez para no cargar la CPU del cliente
+    payload = json.dumps([PATIENT] * 2000)
+    headers = {"Content-Type": "application/json"}
+    statuses, times = [], []
+
+    with httpx.Client(timeout=120) as client:
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.post(f"{base_url}/predict/batch", content=payload, headers=headers)
+            statuses.append(response.status_code)
+            if response.is_success:
+                times.append((time.perf_counter() - start) * 1000)
+
+    reports.put((statuses, times))
+
+def test_health_under_batch_load(executor_kind: str = "thread"):
+    """La latencia de /health no crece con el ejecutor saturado de lotes"""
+    print(f"🧪 Probando /health bajo carga de lotes (ejecutor '{executor_kind}')...")
+
+    from config import config
+    if not config.get_best_model_path('joblib').exists():
+        print("   ⚠️ No hay modelo entrenado en models/, se omite la prueba")
+        return True
+
+    if executor_kind == "thread" and (os.cpu_count() or 1) < 2:
+        # Con un solo núcleo los hilos de inferencia comparten la CPU (y el GIL)
+        # con el event loop, así que /health no puede mantenerse estable
+        print("   ⚠️ El ejecutor de hilos necesita al menos 2 núcleos, se omite la prueba")
+        return True
+
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    client = httpx.Client(base_url=base_url, timeout=60)
+    process = None
+
+    try:
+        process = _start_api(port, {
+            "INFERENCE_EXECUTOR": executor_kind,
+            "INFERENCE_WORKERS": "2",
+            "INFERENCE_QUEUE_SIZE": "4"
+        })
+
+        # Calentar el predictor y medir /health en reposo
+        client.post("/predict/batch", json=[PATIENT] * 10)
+        idle = _health_latencies(client, 30)
+
+        # Clientes de carga en procesos aparte para no competir con la medición
+        context = multiprocessing.get_context("spawn")
+        stop = context.Event()
+        reports = context.Queue()
+        hammers = [context.Process(target=_hammer, args=(base_url, stop, reports), daemon=True)
+                   for _ in range(4)]
+        for hammer in hammers:
+            hammer.start()
+        time.sleep(2.0)
+
+        loaded = _health_latencies(client, 50)
+        stop.set()
+
+        batch_status, batch_times = [], []
+        for _ in hammers:
+            statuses, times = reports.get(timeout=180)
+            batch_status.extend(statuses)
+            batch_times.extend(times)
+        for hammer in hammers:
+            hammer.join(timeout=30)
+
+        loaded_p95 = float(np.percentile(loaded, 95))
+        batch_p50 = float(np.percentile(batch_times, 50)) if batch_times else float('nan')
+        rejected = sum(1 for status in batch_status if status == 503)
+
+        print(f"   /health en reposo: p50 {np.percentile(idle, 50):.1f} ms, "
+              f"p95 {np.percentile(idle, 95):.1f} ms")
+        print(f"   /health con carga: p50 {np.percentile(loaded, 50):.1f} ms, "
+              f"p95 {loaded_p95:.1f} ms")
+        print(f"   /predict/batch (2000 pacientes) p50: {batch_p50:.0f} ms, "
+              f"{len(batch_times)} completados, {rejected} rechazados (503)")
+
+        # /health no debe esperar detrás de la inferencia: si el event loop se
+        # bloqueara, su latencia sería del orden de la de un lote completo
+        flat = loaded_p95 < batch_p50 / 4
+        print(f"   {'✅' if flat else '❌'} /health se mantiene estable")
+        return flat and len(batch_times) > 0
+
+    except Exception as e:
+        print(f"   ❌ Error en prueba de concurrencia: {e}")
+        return False
+    finally:
+        client.close()
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Health con ejecutor de hilos", lambda: test_health_under_batch_load("thread")),
+        ("Health con ejecutor de procesos", lambda: test_health_under_batch_load("process"))
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
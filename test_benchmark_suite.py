@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la suite de micro-benchmarks (benchmark_suite.py)
+"""
+import tempfile
+import time
+from pathlib import Path
+
+def test_measure_and_sizes():
+    """Las mediciones respetan repeticiones, tamaños soportados y miden memoria"""
+    print("🧪 Probando mediciones...")
+
+    try:
+        from benchmark_suite import Benchmark, measure, run_suite
+
+        calls = []
+
+        def run(size):
+            calls.append(size)
+            buffer = bytearray(size * 1000)
+            time.sleep(0.001)
+            return buffer
+
+        benchmark = Benchmark('prueba.run', lambda size: size, run, min_size=10, max_size=100)
+        result = measure(benchmark, 100, repeats=3, min_time=10)
+        results = run_suite([benchmark], sizes=[1, 10, 100, 1000], repeats=2, min_time=0, verbose=False)
+        full = run_suite([benchmark], sizes=[1000], repeats=1, min_time=0, full=True, verbose=False)
+
+        measured = result["repeats"] == 3 and result["median_s"] >= 0.001
+        memory = result["peak_memory_bytes"] >= 100_000
+        sizes = [r["size"] for r in results] == [10, 100] and [r["size"] for r in full] == [1000]
+
+        print(f"   {'✅' if measured else '❌'} {result['repeats']} repeticiones, mediana {result['median_s'] * 1000:.2f} ms")
+        print(f"   {'✅' if memory else '❌'} Memoria pico: {result['peak_memory_bytes']} bytes")
+        print(f"   {'✅' if sizes else '❌'} Tamaños medidos según el rango del benchmark")
+        return measured and memory and sizes
+
+    except Exception as e:
+        print(f"   ❌ Error en mediciones: {e}")
+        return False
+
+def test_baseline_regressions():
+    """La línea base se guarda, se combina y marca las regresiones"""
+    print("\n🧪 Probando línea base y regresiones...")
+
+    try:
+        from benchmark_suite import compare_to_baseline, load_baseline, save_baseline
+
+        def result(name, size, median, memory=1000):
+            return {"benchmark": name, "size": size, "median_s": median, "min_s": median,
+                    "mean_s": median, "repeats": 1, "us_per_row": median / size * 1e6,
+                    "peak_memory_bytes": memory}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "baseline.json"
+            save_baseline(path, [result("a", 1, 1.0), result("b", 1, 1.0)])
+            save_baseline(path, [result("a", 1, 2.0)])
+            baseline = load_baseline(path)
+
+        merged = {(r["benchmark"], r["median_s"]) for r in baseline["results"]} == {("a", 2.0), ("b", 1.0)}
+
+        comparisons = compare_to_baseline(
+            [result("a", 1, 2.1), result("b", 1, 1.5), result("b", 1, 0.5, memory=2000),
+             {"benchmark": "c", "size": 1, "error": "falló"}],
+            baseline, tolerance=0.10, memory_tolerance=0.10)
+        flags = [(c["time_regression"], c["memory_regression"]) for c in comparisons]
+        flagged = flags == [(False, False), (True, False), (False, True)]
+
+        print(f"   {'✅' if merged else '❌'} Línea base combinada con la anterior")
+        print(f"   {'✅' if flagged else '❌'} Regresiones (tiempo, memoria): {flags}")
+        return merged and flagged
+
+    except Exception as e:
+        print(f"   ❌ Error en línea base: {e}")
+        return False
+
+def test_generator_benchmark():
+    """Un benchmark real de la suite se ejecuta de punta a punta"""
+    print("\n🧪 Probando benchmark del generador...")
+
+    try:
+        from benchmark_suite import run_suite, select_benchmarks
+
+        benchmarks = select_benchmarks(["generator"])
+        results = run_suite(benchmarks, sizes=[1, 100], repeats=2, min_time=0, verbose=False)
+        ok = len(results) == 2 * len(benchmarks) and all("error" not in r and r["median_s"] > 0 for r in results)
+
+        print(f"   {'✅' if ok else '❌'} {[(r['size'], r.get('us_per_row')) for r in results]}")
+        return ok
+
+    except Exception as e:
+        print(f"   ❌ Error en benchmark del generador: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Mediciones", test_measure_and_sizes),
+        ("Línea base", test_baseline_regressions),
+        ("Generador", test_generator_benchmark)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
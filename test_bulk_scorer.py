@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el scoring masivo por lotes (bulk_scorer.py)
+"""
+import tempfile
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def _prepare(tmp_dir: str, n_samples: int = 250):
+    """Entrenar un modelo pequeño y generar un extracto de población en CSV"""
+    from data_generator import create_sample_dataset
+    from test_predictor import _train_predictor
+
+    predictor = _train_predictor(tmp_dir)
+    df = create_sample_dataset(n_samples=n_samples)
+    input_path = Path(tmp_dir) / "poblacion.csv"
+    df.to_csv(input_path, index=False)
+    return predictor, df, input_path
+
+def _model_paths(tmp_dir: str) -> dict:
+    """Rutas del modelo y scaler entrenados por _prepare"""
+    return {"model_path": str(Path(tmp_dir) / "model.joblib"),
+            "scaler_path": str(Path(tmp_dir) / "scaler.joblib")}
+
+def _read_output(output_dir: Path) -> pd.DataFrame:
+    """Leer el dataset de salida completo ordenado por fila"""
+    import pyarrow.dataset as ds
+    table = ds.dataset(output_dir, format="parquet", partitioning="hive").to_table()
+    return table.to_pandas().sort_values('row').reset_index(drop=True)
+
+def test_bulk_scoring_matches_predictor():
+    """El scoring con varios workers coincide con predict_batch()"""
+    print("🧪 Probando scoring masivo con pool de procesos...")
+
+    try:
+        from bulk_scorer import BulkScorer, INPUT_COLUMNS
+
+        with tempfile.TemporaryDirectory() as tmp:
+            predictor, df, input_path = _prepare(tmp)
+            expected = predictor.predict_batch(pd.read_csv(input_path)[INPUT_COLUMNS].to_dict('records'))
+
+            scorer = BulkScorer(input_path, Path(tmp) / "salida", chunk_size=60, workers=2,
+                                **_model_paths(tmp))
+            report = scorer.run()
+            output = _read_output(Path(tmp) / "salida")
+
+        same_ids = output['identificacion'].tolist() == df['identificacion'].tolist()
+        same_glucose = output['glucose_mg_dl'].tolist() == [result['glucose_mg_dl'] for result in expected]
+        complete = report['rows'] == len(df) and report['chunks_scored'] == 5
+
+        print(f"   {'✅' if same_ids else '❌'} Filas en el orden de entrada")
+        print(f"   {'✅' if same_glucose else '❌'} Predicciones idénticas a predict_batch()")
+        print(f"   {'✅' if complete else '❌'} {report['rows']} filas en {report['chunks_scored']} lotes "
+              f"({report['rows_per_second']} filas/s, {len(report['workers'])} workers)")
+        return same_ids and same_glucose and complete
+
+    except Exception as e:
+        print(f"   ❌ Error en scoring masivo: {e}")
+        return False
+
+def test_resume_from_checkpoint():
+    """Una ejecución interrumpida solo reprocesa los lotes sin checkpoint"""
+    print("\n🧪 Probando reanudación desde checkpoint...")
+
+    try:
+        from bulk_scorer import BulkScorer, CHECKPOINT_DIR
+
+        with tempfile.TemporaryDirectory() as tmp:
+            _, df, input_path = _prepare(tmp)
+            output_dir = Path(tmp) / "salida"
+            kwargs = dict(chunk_size=100, workers=0, **_model_paths(tmp))
+
+            BulkScorer(input_path, output_dir, **kwargs).run()
+            complete_output = _read_output(output_dir)
+
+            # Simular una interrupción antes de terminar el último lote
+            (output_dir / CHECKPOINT_DIR / "chunk-000002.json").unlink()
+            (output_dir / "part-000002.parquet").unlink()
+
+            report = BulkScorer(input_path, output_dir, **kwargs).run()
+            resumed_output = _read_output(output_dir)
+
+            try:
+                BulkScorer(input_path, output_dir, chunk_size=50, workers=0).run()
+                mismatch_rejected = False
+            except ValueError:
+                mismatch_rejected = True
+
+        resumed = report['chunks_scored'] == 1 and report['chunks_skipped'] == 2
+        same = resumed_output.equals(complete_output)
+
+        print(f"   {'✅' if resumed else '❌'} Lotes procesados: {report['chunks_scored']}, "
+              f"omitidos: {report['chunks_skipped']}")
+        print(f"   {'✅' if same else '❌'} Salida idéntica a una ejecución sin interrupción")
+        print(f"   {'✅' if mismatch_rejected else '❌'} Rechaza reanudar con otros parámetros")
+        return resumed and same and mismatch_rejected
+
+    except Exception as e:
+        print(f"   ❌ Error en reanudación: {e}")
+        return False
+
+def test_parquet_input_partitioned_output():
+    """Entrada Parquet y salida particionada por categoría"""
+    print("\n🧪 Probando entrada Parquet y salida particionada...")
+
+    try:
+        from bulk_scorer import BulkScorer
+
+        with tempfile.TemporaryDirectory() as tmp:
+            _, df, _ = _prepare(tmp)
+            input_path = Path(tmp) / "poblacion.parquet"
+            df.to_parquet(input_path, row_group_size=40, index=False)
+
+            output_dir = Path(tmp) / "salida"
+            BulkScorer(input_path, output_dir, chunk_size=80, workers=0,
+                       **_model_paths(tmp), partition_by='category').run()
+            partitions = sorted(path.name for path in output_dir.iterdir() if path.is_dir()
+                                and not path.name.startswith('_'))
+            output = _read_output(output_dir)
+
+        partitioned = (bool(partitions) and 'category=__null__' not in partitions
+                       and all(name.startswith('category=') for name in partitions))
+        complete = output['row'].tolist() == list(range(len(df)))
+
+        print(f"   {'✅' if partitioned else '❌'} Particiones: {partitions}")
+        print(f"   {'✅' if complete else '❌'} {len(output)} filas escritas")
+        return partitioned and complete
+
+    except Exception as e:
+        print(f"   ❌ Error en entrada Parquet: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Scoring masivo", test_bulk_scoring_matches_predictor),
+        ("Reanudación", test_resume_from_checkpoint),
+        ("Parquet particionado", test_parquet_input_partitioned_output)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
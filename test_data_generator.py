@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la generación vectorizada de datos sintéticos
+"""
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+def _generate(n_samples: int, vectorized: bool, random_state: int = 42):
+    """Generar un dataset sin los mensajes de progreso"""
+    from data_generator import DiabetesDataGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiabetesDataGenerator(n_samples=n_samples, random_state=random_state,
+                                     vectorized=vectorized).generate_synthetic_data()
+
+def test_same_schema_and_distributions():
+    """El modo vectorizado produce las mismas columnas, tipos y distribuciones"""
+    print("🧪 Probando esquema y distribuciones...")
+
+    try:
+        loop = _generate(20_000, vectorized=False)
+        vectorized = _generate(20_000, vectorized=True)
+
+        same_schema = list(loop.columns) == list(vectorized.columns) and (loop.dtypes == vectorized.dtypes).all()
+
+        numeric = loop.select_dtypes('number').columns.drop('identificacion')
+        mean_diff = ((loop[numeric].mean() - vectorized[numeric].mean()).abs() / loop[numeric].std()).max()
+        std_ratio = (vectorized[numeric].std() / loop[numeric].std()).sub(1).abs().max()
+
+        categorical = ['sexo', 'realiza_ejercicio', 'fuma', 'medicamentos_hta',
+                       'historia_familiar_dm', 'diabetes_gestacional', 'consume_alcohol']
+        share_diff = max(
+            (loop[col].value_counts(normalize=True) - vectorized[col].value_counts(normalize=True)).abs().max()
+            for col in categorical
+        )
+        similar = mean_diff < 0.05 and std_ratio < 0.05 and share_diff < 0.02
+
+        print(f"   {'✅' if same_schema else '❌'} Mismas columnas y tipos")
+        print(f"   {'✅' if similar else '❌'} Diferencia máx. de medias {mean_diff:.3f} desv., "
+              f"de desviaciones {std_ratio:.3f}, de proporciones {share_diff:.3f}")
+        return same_schema and similar
+
+    except Exception as e:
+        print(f"   ❌ Error en distribuciones: {e}")
+        return False
+
+def test_constraints():
+    """Recortes, relación peso = imc * talla² y condiciones por categoría"""
+    print("\n🧪 Probando restricciones del modo vectorizado...")
+
+    try:
+        df = _generate(100_000, vectorized=True)
+
+        clipped = (df['talla'].between(140, 200).all() and df['imc'].between(16, 45).all()
+                   and df['tas'].between(90, 200).all() and df['tad'].between(60, 120).all()
+                   and df['puntaje_findrisc'].between(0, 26).all() and df['Resultado'].between(50, 400).all())
+        weight = np.allclose(df['peso'], df['imc'] * (df['talla'] / 100) ** 2, atol=0.05)
+        no_male_gestational = not ((df['sexo'] == 'M') & (df['diabetes_gestacional'] == 'Si')).any()
+
+        # Los pacientes con glucosa alta (categoría diabetes) fuman más y toman más medicamentos
+        diabetes = df['Resultado'] >= 140
+        normal = df['Resultado'] < 95
+        conditional = (df.loc[diabetes, 'medicamentos_hta'].eq('Si').mean() > 0.5
+                       and df.loc[normal, 'medicamentos_hta'].eq('Si').mean() < 0.05
+                       and df.loc[diabetes, 'edad'].mean() > df.loc[normal, 'edad'].mean() + 15)
+        unique_ids = df['identificacion'].is_unique
+
+        print(f"   {'✅' if clipped else '❌'} Valores dentro de los rangos recortados")
+        print(f"   {'✅' if weight else '❌'} peso = imc * talla²")
+        print(f"   {'✅' if no_male_gestational else '❌'} Sin diabetes gestacional en hombres")
+        print(f"   {'✅' if conditional else '❌'} Distribuciones condicionadas a la categoría")
+        print(f"   {'✅' if unique_ids else '❌'} Identificaciones únicas")
+        return clipped and weight and no_male_gestational and conditional and unique_ids
+
+    except Exception as e:
+        print(f"   ❌ Error en restricciones: {e}")
+        return False
+
+def test_reproducible_and_fast():
+    """La misma semilla reproduce el dataset y un millón de filas tarda segundos"""
+    print("\n🧪 Probando reproducibilidad y velocidad...")
+
+    try:
+        first = _generate(1000, vectorized=True, random_state=7)
+        second = _generate(1000, vectorized=True, random_state=7)
+        other = _generate(1000, vectorized=True, random_state=8)
+        reproducible = first.equals(second) and not first.equals(other)
+
+        start = time.perf_counter()
+        df = _generate(1_000_000, vectorized=True)
+        elapsed = time.perf_counter() - start
+        fast = len(df) == 1_000_000 and elapsed < 20
+
+        print(f"   {'✅' if reproducible else '❌'} Reproducible con la misma semilla")
+        print(f"   {'✅' if fast else '❌'} 1.000.000 de filas en {elapsed:.2f} s")
+        return reproducible and fast
+
+    except Exception as e:
+        print(f"   ❌ Error en reproducibilidad: {e}")
+        return False
+
+def test_chunks_and_parquet():
+    """Bloques regenerables por separado y escritura Parquet particionada"""
+    print("\n🧪 Probando bloques y Parquet particionado...")
+
+    try:
+        import pyarrow.dataset as ds
+        from data_generator import DiabetesDataGenerator
+
+        generator = DiabetesDataGenerator(n_samples=2500, random_state=3)
+        chunks = list(generator.iter_chunks(1000))
+        again = list(generator.iter_chunks(1000))
+        third = next(c for i, c in enumerate(DiabetesDataGenerator(n_samples=2500, random_state=3)
+                                             .iter_chunks(1000)) if i == 2)
+        ids = [int(i) for c in chunks for i in c['identificacion']]
+        chunked = ([len(c) for c in chunks] == [1000, 1000, 500]
+                   and all(a.equals(b) for a, b in zip(chunks, again))
+                   and third.equals(chunks[2]) and ids == list(range(1000000, 1002500)))
+
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            path = generator.save_parquet(Path(tmp) / "dataset", chunk_size=1000)
+            dataset = ds.dataset(path, format="parquet", partitioning="hive")
+            table = dataset.to_table()
+            partitions = sorted(p.name for p in Path(path).iterdir())
+            estratos = {p.name for p in Path(path).glob("estrato=*/zona_residencia=*")}
+            file_schema = ds.dataset(next(Path(path).rglob("*.parquet")), format="parquet").schema
+
+        written = (table.num_rows == 2500
+                   and sorted(table.column('identificacion').to_pylist()) == list(range(1000000, 1002500)))
+        partitioned = (partitions == [f"estrato={i}" for i in range(1, 7)]
+                       and estratos == {"zona_residencia=Urbana", "zona_residencia=Rural"})
+        compact = (str(file_schema.field('edad').type) == 'float'
+                   and str(file_schema.field('fecha_registro').type) == 'date32[day]'
+                   and str(file_schema.field('sexo').type).startswith('dictionary'))
+
+        print(f"   {'✅' if chunked else '❌'} Bloques reproducibles e identificaciones consecutivas")
+        print(f"   {'✅' if written else '❌'} {table.num_rows} filas leídas del dataset Parquet")
+        print(f"   {'✅' if partitioned else '❌'} Particiones: {partitions}")
+        print(f"   {'✅' if compact else '❌'} Tipos compactos en los archivos")
+        return chunked and written and partitioned and compact
+
+    except Exception as e:
+        print(f"   ❌ Error en Parquet: {e}")
+        return False
+
+def test_parallel_workers():
+    """Mismo resultado con cualquier número de procesos y sin tocar el estado global"""
+    print("\n🧪 Probando generación en paralelo...")
+
+    try:
+        import random
+        from data_generator import DiabetesDataGenerator
+
+        generator = DiabetesDataGenerator(n_samples=5500, random_state=9)
+        runs = {workers: pd.concat(generator.iter_chunks(1000, workers=workers), ignore_index=True)
+                for workers in (0, 1, 3)}
+        identical = all(runs[0].equals(df) for df in runs.values()) and len(runs[0]) == 5500
+
+        np.random.seed(0)
+        random.seed(0)
+        expected = (np.random.random(), random.random())
+        np.random.seed(0)
+        random.seed(0)
+        _generate(500, vectorized=False)
+        _generate(500, vectorized=True)
+        untouched = (np.random.random(), random.random()) == expected
+
+        print(f"   {'✅' if identical else '❌'} Idéntico con 0, 1 y 3 procesos")
+        print(f"   {'✅' if untouched else '❌'} Estado aleatorio global sin modificar")
+        return identical and untouched
+
+    except Exception as e:
+        print(f"   ❌ Error en generación en paralelo: {e}")
+        return False
+
+def test_parquet_keeps_unrelated_files():
+    """Escribir en un directorio existente no borra archivos ajenos al dataset"""
+    print("\n🧪 Probando escritura en un directorio con otros archivos...")
+
+    try:
+        import pyarrow.dataset as ds
+        from data_generator import DiabetesDataGenerator
+
+        generator = DiabetesDataGenerator(n_samples=1500, random_state=4)
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+            notes = Path(tmp) / "notas.txt"
+            notes.write_text("datos reales")
+            generator.save_parquet(tmp, chunk_size=1000)
+            # Segunda escritura sobre el mismo dataset: reemplaza sus particiones
+            generator.save_parquet(tmp, chunk_size=1000)
+            kept = notes.exists() and notes.read_text() == "datos reales"
+            files = list(Path(tmp).rglob("*.parquet"))
+            rows = ds.dataset(files, format="parquet").count_rows()
+
+            try:
+                generator.save_parquet(tmp, chunk_size=1000, partition_by=None)
+                refused = False
+            except ValueError:
+                refused = True
+            refused = refused and notes.exists()
+
+        print(f"   {'✅' if kept else '❌'} El archivo ajeno se conserva")
+        print(f"   {'✅' if rows == 1500 else '❌'} {rows} filas tras reescribir el dataset")
+        print(f"   {'✅' if refused else '❌'} Sin partición se rechaza un directorio no vacío")
+        return kept and rows == 1500 and refused
+
+    except Exception as e:
+        print(f"   ❌ Error con archivos ajenos: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Esquema y distribuciones", test_same_schema_and_distributions),
+        ("Restricciones", test_constraints),
+        ("Reproducibilidad y velocidad", test_reproducible_and_fast),
+        ("Bloques y Parquet", test_chunks_and_parquet),
+        ("Archivos ajenos al dataset", test_parquet_keeps_unrelated_files),
+        ("Generación en paralelo", test_parallel_workers)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
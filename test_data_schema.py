@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para los tipos compactos (data_schema.py)
+"""
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+def _generate(n_samples: int, compact: bool, vectorized: bool = True):
+    """Generar un dataset sin los mensajes de progreso"""
+    from data_generator import DiabetesDataGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiabetesDataGenerator(n_samples=n_samples, random_state=5, vectorized=vectorized,
+                                     compact=compact).generate_synthetic_data()
+
+def test_generator_dtypes():
+    """El generador devuelve categorías y enteros pequeños y reduce la memoria"""
+    print("🧪 Probando tipos del generador...")
+
+    try:
+        from data_schema import CATEGORICAL_COLUMNS, expanded_dtypes, memory_report
+
+        compact = _generate(20_000, compact=True)
+        loop = _generate(2_000, compact=True, vectorized=False)
+        plain = _generate(20_000, compact=False)
+
+        categorical = all(isinstance(df[col].dtype, pd.CategoricalDtype)
+                          and list(df[col].cat.categories) == categories
+                          for df in (compact, loop) for col, categories in CATEGORICAL_COLUMNS.items())
+        small_ints = compact['estrato'].dtype == np.int8 and loop['estrato'].dtype == np.int8
+        same_values = expanded_dtypes(compact).astype(str).equals(expanded_dtypes(plain).astype(str))
+
+        report = memory_report(compact)
+        smaller = report["compact"] < report["expanded"] / 3 and report["compact_float32"] < report["compact"]
+
+        print(f"   {'✅' if categorical else '❌'} Columnas categóricas con categorías fijas")
+        print(f"   {'✅' if small_ints else '❌'} estrato en int8")
+        print(f"   {'✅' if same_values else '❌'} Mismos valores que sin compactar")
+        print(f"   {'✅' if smaller else '❌'} Bytes por registro: {report}")
+        return categorical and small_ints and same_values and smaller
+
+    except Exception as e:
+        print(f"   ❌ Error en tipos del generador: {e}")
+        return False
+
+def test_preprocessor_equivalence():
+    """El preprocesamiento da las mismas características con textos o categorías"""
+    print("\n🧪 Probando preprocesamiento con tipos compactos...")
+
+    try:
+        from data_preprocessor import DiabetesDataPreprocessor
+        from data_schema import expanded_dtypes
+
+        compact = _generate(5_000, compact=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            from_compact = DiabetesDataPreprocessor().prepare_data(compact)
+            from_text = DiabetesDataPreprocessor().prepare_data(expanded_dtypes(compact))
+
+        same_columns = list(from_compact.columns) == list(from_text.columns)
+        same_values = same_columns and np.allclose(from_compact.astype(float).to_numpy(),
+                                                   from_text.astype(float).to_numpy())
+        no_objects = not any(dtype == object for dtype in from_compact.dtypes)
+
+        print(f"   {'✅' if same_columns else '❌'} Mismas columnas ({from_compact.shape[1]})")
+        print(f"   {'✅' if same_values else '❌'} Mismos valores")
+        print(f"   {'✅' if no_objects else '❌'} Sin columnas object")
+        return same_columns and same_values and no_objects
+
+    except Exception as e:
+        print(f"   ❌ Error en preprocesamiento: {e}")
+        return False
+
+def test_float32():
+    """Con float32 las medidas y las características nuevas ocupan la mitad"""
+    print("\n🧪 Probando float32...")
+
+    try:
+        from config import config
+        from data_preprocessor import DiabetesDataPreprocessor
+        from data_schema import MEASUREMENT_COLUMNS, compact_dtypes
+
+        original = config.DATA_FLOAT32
+        config.DATA_FLOAT32 = True
+        try:
+            df = compact_dtypes(_generate(2_000, compact=False))
+            with contextlib.redirect_stdout(io.StringIO()):
+                processed = DiabetesDataPreprocessor().prepare_data(df)
+        finally:
+            config.DATA_FLOAT32 = original
+
+        measurements = all(df[col].dtype == np.float32 for col in MEASUREMENT_COLUMNS)
+        float_types = {str(dtype) for dtype in processed.dtypes if dtype.kind == 'f'}
+        features = float_types == {'float32'}
+
+        print(f"   {'✅' if measurements else '❌'} Medidas en float32")
+        print(f"   {'✅' if features else '❌'} Características en {float_types}")
+        return measurements and features
+
+    except Exception as e:
+        print(f"   ❌ Error en float32: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Tipos del generador", test_generator_dtypes),
+        ("Preprocesamiento", test_preprocessor_equivalence),
+        ("Float32", test_float32)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
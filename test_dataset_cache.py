@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la caché de datasets preprocesados (dataset_cache.py)
+"""
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+def _generate(n_samples: int = 3000, seed: int = 17):
+    """Generar un dataset sintético sin los mensajes de progreso"""
+    from data_generator import DiabetesDataGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiabetesDataGenerator(n_samples=n_samples, random_state=seed,
+                                     vectorized=True).generate_synthetic_data()
+
+@contextlib.contextmanager
+def _cache_dir():
+    """Caché activa en un directorio temporal"""
+    from config import config
+    original = (config.DATASET_CACHE_DIR, config.DATASET_CACHE_ENABLED)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DATASET_CACHE_DIR, config.DATASET_CACHE_ENABLED = Path(tmp), True
+        try:
+            yield Path(tmp)
+        finally:
+            config.DATASET_CACHE_DIR, config.DATASET_CACHE_ENABLED = original
+
+def test_processed_cache():
+    """Los datos preprocesados se leen de la caché, mapeados en memoria"""
+    print("🧪 Probando caché de datos preprocesados...")
+
+    try:
+        from data_preprocessor import preprocess_diabetes_data
+        from dataset_cache import DatasetCache
+
+        df = _generate()
+        with _cache_dir():
+            with contextlib.redirect_stdout(io.StringIO()):
+                first, first_preprocessor = preprocess_diabetes_data(df)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                second, second_preprocessor = preprocess_diabetes_data(df)
+            hit = "desde caché" in output.getvalue()
+            entries = DatasetCache().entries()
+
+        same = list(first.columns) == list(second.columns) and first.equals(second)
+        memmap = not second[second_preprocessor.feature_names].to_numpy().flags.writeable
+        transformer = (second_preprocessor.feature_transformer.feature_columns
+                       == first_preprocessor.feature_transformer.feature_columns)
+
+        print(f"   {'✅' if hit else '❌'} Segunda llamada servida desde la caché")
+        print(f"   {'✅' if same else '❌'} Mismos datos preprocesados")
+        print(f"   {'✅' if memmap else '❌'} Características mapeadas en memoria (solo lectura)")
+        print(f"   {'✅' if transformer else '❌'} Transformador restaurado")
+        print(f"   {'✅' if len(entries) == 1 else '❌'} Entradas en la caché: {len(entries)}")
+        return hit and same and memmap and transformer and len(entries) == 1
+
+    except Exception as e:
+        print(f"   ❌ Error en caché de preprocesados: {e}")
+        return False
+
+def test_split_cache():
+    """La división y el escalado se reutilizan y coinciden con los calculados"""
+    print("\n🧪 Probando caché de división y escalado...")
+
+    try:
+        from sklearn.model_selection import train_test_split
+        from data_preprocessor import preprocess_diabetes_data
+        from dataset_cache import split_and_scale
+
+        with _cache_dir():
+            with contextlib.redirect_stdout(io.StringIO()):
+                df_processed, preprocessor = preprocess_diabetes_data(_generate(), use_cache=False)
+                first = split_and_scale(df_processed, preprocessor)
+                second = split_and_scale(df_processed, preprocessor)
+                other_seed = split_and_scale(df_processed, preprocessor, seed=7)
+                changed = df_processed.copy()
+                changed.iloc[0, 0] += 1
+                other_data = split_and_scale(changed, preprocessor)
+
+        hits = (not first["cache_hit"] and second["cache_hit"]
+                and not other_seed["cache_hit"] and not other_data["cache_hit"])
+        same = all(np.array_equal(first[name], second[name])
+                   for name in ("X_train", "X_test", "y_train", "y_test", "train_index", "test_index"))
+
+        # Misma división que train_test_split estratificado por tercios de Resultado
+        y_bins = pd.cut(df_processed['Resultado'], bins=3, labels=['Low', 'Medium', 'High'])
+        _, test_rows = train_test_split(df_processed, test_size=0.2, random_state=42, stratify=y_bins)
+        expected_split = np.array_equal(df_processed.index[first["test_index"]], test_rows.index)
+        scaled = np.allclose(np.asarray(second["X_train"]).mean(axis=0), 0, atol=1e-6)
+
+        print(f"   {'✅' if hits else '❌'} Acierto con los mismos datos y semilla; fallo si cambian")
+        print(f"   {'✅' if same else '❌'} Mismas matrices e índices desde la caché")
+        print(f"   {'✅' if expected_split else '❌'} Misma división que train_test_split")
+        print(f"   {'✅' if scaled else '❌'} Entrenamiento escalado con media 0")
+        return hits and same and expected_split and scaled
+
+    except Exception as e:
+        print(f"   ❌ Error en caché de división: {e}")
+        return False
+
+def test_cache_invalidation():
+    """La clave depende de la configuración y la caché se puede desactivar"""
+    print("\n🧪 Probando invalidación de la caché...")
+
+    try:
+        from config import config
+        from data_preprocessor import preprocess_diabetes_data
+        from dataset_cache import DatasetCache
+
+        df = _generate(500)
+        with _cache_dir() as cache_dir:
+            cache = DatasetCache()
+            key = cache.key("processed", df)
+            config.DATA_FLOAT32 = True
+            try:
+                float32_key = cache.key("processed", df)
+            finally:
+                config.DATA_FLOAT32 = False
+            config_changes_key = key != float32_key
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                preprocess_diabetes_data(df, use_cache=False)
+            disabled_writes_nothing = not DatasetCache().entries()
+
+            # Una entrada dañada se recalcula
+            with contextlib.redirect_stdout(io.StringIO()):
+                preprocess_diabetes_data(df)
+            (cache_dir / key / "features.npy").write_bytes(b"corrupto")
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                processed, _ = preprocess_diabetes_data(df)
+            with contextlib.redirect_stdout(io.StringIO()) as repaired:
+                preprocess_diabetes_data(df)
+            recomputed = ("ilegible" in output.getvalue() and len(processed) == len(df)
+                          and "desde caché" in repaired.getvalue())
+
+            cleared = DatasetCache().clear() == 1 and not DatasetCache().entries()
+
+        print(f"   {'✅' if config_changes_key else '❌'} La configuración de preprocesamiento cambia la clave")
+        print(f"   {'✅' if disabled_writes_nothing else '❌'} Sin caché no se escribe nada")
+        print(f"   {'✅' if recomputed else '❌'} Una entrada dañada se recalcula")
+        print(f"   {'✅' if cleared else '❌'} clear borra las entradas")
+        return config_changes_key and disabled_writes_nothing and recomputed and cleared
+
+    except Exception as e:
+        print(f"   ❌ Error en invalidación: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Datos preprocesados", test_processed_cache),
+        ("División y escalado", test_split_cache),
+        ("Invalidación", test_cache_invalidation)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el transformador de características ajustado (feature_transformer.py)
+"""
+import contextlib
+import io
+import random
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def _fitted_transformer(n_samples: int = 2000):
+    """Preprocesar un dataset sintético y devolver el preprocesador y sus datos"""
+    from data_generator import DiabetesDataGenerator
+    from data_preprocessor import DiabetesDataPreprocessor
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = DiabetesDataGenerator(n_samples=n_samples, random_state=21,
+                                    vectorized=True).generate_synthetic_data()
+        preprocessor = DiabetesDataPreprocessor()
+        processed = preprocessor.prepare_data(raw)
+    return preprocessor, raw, processed
+
+def _random_patients(n: int, seed: int = 13):
+    """Pacientes con el formato de la API, con faltantes, límites y valores inválidos"""
+    rng = random.Random(seed)
+    numeric = ['edad', 'imc', 'tas', 'tad', 'perimetro_abdominal', 'talla', 'peso',
+               'frecuencia_cardiaca', 'puntaje_findrisc', 'riesgo_cardiovascular', 'estrato']
+    categorical = {
+        'sexo': ['M', 'F', 'X'],
+        'zona_residencia': ['Urbana', 'Rural'],
+        'realiza_ejercicio': ['Si', 'No'],
+        'fuma': ['Si', 'No'],
+        'consume_alcohol': ['Nunca', 'Ocasional', 'Frecuente'],
+        'medicamentos_hta': ['Si', 'No'],
+        'historia_familiar_dm': ['Si', 'No'],
+        'diabetes_gestacional': ['Si', 'No']
+    }
+    special = [0, 18.5, 25, 30, 45, 60, 75, 100, 100.5, -3, float('nan'), None]
+
+    patients = []
+    for _ in range(n):
+        patient = {}
+        for col in numeric:
+            if rng.random() < 0.85:
+                patient[col] = rng.choice(special) if rng.random() < 0.2 else rng.uniform(1, 250)
+        for col, options in categorical.items():
+            if rng.random() < 0.85:
+                patient[col] = rng.choice(options + [None])
+        patients.append(patient)
+    return patients
+
+def test_fit_matches_training():
+    """El transformador reproduce las características de entrenamiento y es vectorizado"""
+    print("🧪 Probando transformador ajustado...")
+
+    try:
+        preprocessor, raw, processed = _fitted_transformer()
+        transformer = preprocessor.feature_transformer
+
+        features = processed.drop(columns=['Resultado'])
+        same_columns = list(features.columns) == transformer.feature_columns
+        batch = transformer.transform(raw)
+        same_values = np.array_equal(batch, features.to_numpy(dtype=np.float64))
+
+        records = raw.head(200).astype(object).to_dict('records')
+        rows = np.vstack([transformer.transform([record]) for record in records])
+        vectorized = np.array_equal(rows, transformer.transform(records))
+
+        print(f"   {'✅' if same_columns else '❌'} {len(transformer.feature_columns)} columnas en el orden de entrenamiento")
+        print(f"   {'✅' if same_values else '❌'} Mismos valores que prepare_data")
+        print(f"   {'✅' if vectorized else '❌'} Lote idéntico a paciente por paciente")
+        return same_columns and same_values and vectorized
+
+    except Exception as e:
+        print(f"   ❌ Error en transformador: {e}")
+        return False
+
+def test_plan_matches_transform():
+    """El plan compilado del transformador coincide con su transform"""
+    print("\n⚡ Probando plan compilado del transformador...")
+
+    try:
+        preprocessor, _, _ = _fitted_transformer()
+        transformer = preprocessor.feature_transformer
+        plan = transformer.feature_plan()
+
+        fast_rows = 0
+        for patient in _random_patients(2000):
+            fast = plan.transform_one(patient)
+            if fast is None:
+                continue
+            fast_rows += 1
+            if not np.array_equal(fast, transformer.transform([patient])[0]):
+                print(f"   ❌ Diferencia para el paciente: {patient}")
+                return False
+
+        unfitted_raises = False
+        try:
+            from feature_transformer import DiabetesFeatureTransformer
+            DiabetesFeatureTransformer().transform([{}])
+        except ValueError:
+            unfitted_raises = True
+
+        print(f"   ✅ {fast_rows} pacientes codificados idénticamente por el plan")
+        print(f"   {'✅' if unfitted_raises else '❌'} Un transformador sin ajustar lanza ValueError")
+        return fast_rows > 0 and unfitted_raises
+
+    except Exception as e:
+        print(f"   ❌ Error en plan del transformador: {e}")
+        return False
+
+def test_predictor_loads_transformer():
+    """El predictor carga el transformador guardado junto al scaler"""
+    print("\n🧪 Probando carga en el predictor...")
+
+    try:
+        import joblib
+        from sklearn.linear_model import Ridge
+        from predictor import DiabetesPredictor
+
+        preprocessor, _, processed = _fitted_transformer()
+        X = processed.drop(columns=['Resultado'])
+        X_scaled, _ = preprocessor.scale_features(X, X.iloc[:1])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+            scaler_path = Path(tmp) / "scaler.joblib"
+            joblib.dump(Ridge().fit(X_scaled, processed['Resultado']), model_path)
+            joblib.dump(preprocessor.scaler, scaler_path)
+            preprocessor.feature_transformer.save(Path(tmp) / "feature_transformer.joblib")
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                predictor = DiabetesPredictor(model_path=str(model_path), scaler_path=str(scaler_path))
+            artifact = Path(tmp) / "feature_transformer.joblib" in DiabetesPredictor.artifact_paths(
+                str(model_path), str(scaler_path))
+
+            patients = _random_patients(300, seed=5)
+            patients[0]['edad'] = 'abc'
+            individual = [predictor.predict(patient) for patient in patients]
+            batch = predictor.predict_batch(patients)
+
+        loaded = (predictor.feature_transformer is not None
+                  and predictor.feature_columns == preprocessor.feature_transformer.feature_columns)
+        consistent = individual == batch and "error" in batch[0]
+
+        print(f"   {'✅' if loaded else '❌'} Transformador cargado con el modelo")
+        print(f"   {'✅' if artifact else '❌'} Incluido en los artefactos vigilados por el registro")
+        print(f"   {'✅' if consistent else '❌'} Lote y paciente individual coinciden")
+        return loaded and artifact and consistent
+
+    except Exception as e:
+        print(f"   ❌ Error en el predictor: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Transformador ajustado", test_fit_matches_training),
+        ("Plan compilado", test_plan_matches_transform),
+        ("Predictor", test_predictor_loads_transformer)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
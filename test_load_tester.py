@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el generador de carga (load_tester.py)
+"""
+import asyncio
+import json
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+def _serve_test_app(delay: float = 0.005):
+    """Servir en loopback una API mínima que falla en uno de cada diez pacientes"""
+    import uvicorn
+    from fastapi import FastAPI, HTTPException
+
+    app = FastAPI()
+
+    @app.post("/predict")
+    async def predict(patient: dict):
+        await asyncio.sleep(delay)
+        if patient["edad"] % 10 == 0:
+            raise HTTPException(status_code=500, detail="fallo simulado")
+        return {"ok": True}
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+def test_summary_and_payloads():
+    """Percentiles, tasa de error y conversión de payloads"""
+    print("🧪 Probando resumen y payloads...")
+
+    try:
+        from load_tester import load_payloads, summarize, to_numeric_payload
+
+        summary = summarize([i / 1000 for i in range(1, 101)], Counter({"HTTP 500": 25}), 2.0)
+        latency = summary["latency_ms"]
+        summary_ok = (summary["error_rate"] == 0.2 and summary["throughput_rps"] == 50.0
+                      and latency["p50"] == 50.5 and latency["max"] == 100.0)
+
+        numeric = to_numeric_payload({"edad": 54.6, "sexo": "F", "fuma": "Si",
+                                      "consume_alcohol": "Frecuente", "frecuencia_cardiaca": None})
+        numeric_ok = numeric == {"edad": 55, "sexo": 0, "fuma": 1, "consume_alcohol": 2,
+                                 "frecuencia_cardiaca": 0}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "pacientes.jsonl"
+            path.write_text(json.dumps({"edad": 40}) + "\n\n"
+                            + json.dumps({"timestamp": "t", "patient_data": {"edad": 41}}) + "\n")
+            payloads = load_payloads(path)
+        payloads_ok = payloads == [{"edad": 40}, {"edad": 41}]
+
+        print(f"   {'✅' if summary_ok else '❌'} Resumen: {latency}, error {summary['error_rate']}")
+        print(f"   {'✅' if numeric_ok else '❌'} Esquema numérico: {numeric}")
+        print(f"   {'✅' if payloads_ok else '❌'} Pacientes y entradas del log desde JSONL")
+        return summary_ok and numeric_ok and payloads_ok
+
+    except Exception as e:
+        print(f"   ❌ Error en resumen: {e}")
+        return False
+
+def test_closed_and_open_loop():
+    """Ambos modos contra un servicio en loopback cuentan éxitos y errores"""
+    print("\n🧪 Probando lazo cerrado y abierto...")
+
+    try:
+        from load_tester import LoadTester
+
+        server, thread, base_url = _serve_test_app()
+        payloads = [{"edad": i} for i in range(100)]
+        try:
+            closed = asyncio.run(LoadTester(base_url, payloads, concurrency=8).run(1.0, warmup=0.2))
+            opened = asyncio.run(LoadTester(base_url, payloads, concurrency=8, rate=200,
+                                            arrival='poisson', random_state=1).run(1.0))
+        finally:
+            server.should_exit = True
+            thread.join(10)
+
+        closed_ok = closed["successful"] > 0 and abs(closed["error_rate"] - 0.1) < 0.05
+        open_ok = (opened["scheduled"] == opened["requests"]
+                   and 120 <= opened["requests"] <= 280
+                   and opened["latency_ms"]["p50"] >= 5)
+
+        print(f"   {'✅' if closed_ok else '❌'} Lazo cerrado: {closed['throughput_rps']} pet/s, "
+              f"error {closed['error_rate']}, p99 {closed['latency_ms'].get('p99')} ms")
+        print(f"   {'✅' if open_ok else '❌'} Lazo abierto: {opened['requests']} programadas a 200 pet/s, "
+              f"p50 {opened['latency_ms'].get('p50')} ms")
+        return closed_ok and open_ok
+
+    except Exception as e:
+        print(f"   ❌ Error en generación de carga: {e}")
+        return False
+
+def test_compare_reports():
+    """La comparación reporta cambios relativos frente a la ejecución base"""
+    print("\n🧪 Probando comparación de reportes...")
+
+    try:
+        from load_tester import compare_reports
+
+        baseline = {"timestamp": "base", "summary": {"throughput_rps": 100.0, "error_rate": 0.01,
+                                                     "latency_ms": {"p99": 20.0}}}
+        current = {"summary": {"throughput_rps": 150.0, "error_rate": 0.0, "latency_ms": {"p99": 10.0}}}
+        comparison = compare_reports(current, baseline)
+        ok = (comparison["throughput_rps"] == 0.5 and comparison["latency_ms"]["p99"] == -0.5
+              and comparison["error_rate"] == -0.01)
+
+        print(f"   {'✅' if ok else '❌'} Comparación: {comparison}")
+        return ok
+
+    except Exception as e:
+        print(f"   ❌ Error en comparación: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Resumen y payloads", test_summary_and_payloads),
+        ("Lazo cerrado y abierto", test_closed_and_open_loop),
+        ("Comparación", test_compare_reports)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para las métricas Prometheus de la API
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent
+
+def _sample(text: str, name: str, **labels) -> float:
+    """Valor de una serie en la exposición de texto de Prometheus"""
+    for line in text.splitlines():
+        if not line.startswith(name + "{"):
+            continue
+        if all(f'{key}="{value}"' in line for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+def test_request_labels_and_stages():
+    """Las etapas medidas en el ejecutor llevan el endpoint y modelo de la petición"""
+    print("🧪 Probando etiquetas por endpoint y modelo...")
+
+    try:
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from inference_executor import InferenceExecutor
+        from metrics import MetricsMiddleware, count_predictions, render_metrics, time_stage
+
+        executor = InferenceExecutor(kind='thread', max_workers=1, max_queue=4)
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        def work():
+            with time_stage('feature_prep'):
+                return sum(range(1000))
+
+        @app.post("/test-models/{model_name}/predict")
+        async def predict(model_name: str):
+            count_predictions()
+            return {"value": await executor.run(work)}
+
+        with TestClient(app) as client:
+            client.post("/test-models/random_forest/predict")
+            client.post("/test-models/random_forest/predict")
+            client.post("/test-models/desconocido/predict")
+        executor.shutdown()
+
+        text = render_metrics()[0].decode()
+        endpoint = "/test-models/{model_name}/predict"
+        stage = _sample(text, "diabetes_api_stage_seconds_count", stage="feature_prep",
+                        endpoint=endpoint, model="random_forest")
+        requests = _sample(text, "diabetes_api_requests_total", endpoint=endpoint,
+                           model="random_forest", status="200")
+        other = _sample(text, "diabetes_api_predictions_total", endpoint=endpoint, model="other")
+
+        print(f"   {'✅' if stage == 2 else '❌'} Etapa del worker con etiquetas de la petición: {stage}")
+        print(f"   {'✅' if requests == 2 else '❌'} Peticiones por endpoint/modelo/estado: {requests}")
+        print(f"   {'✅' if other == 1 else '❌'} Modelo desconocido agrupado en 'other': {other}")
+        return stage == 2 and requests == 2 and other == 1
+
+    except Exception as e:
+        print(f"   ❌ Error en etiquetas: {e}")
+        return False
+
+def test_multiprocess_aggregation():
+    """Con PROMETHEUS_MULTIPROC_DIR los contadores de varios procesos se suman"""
+    print("\n🧪 Probando agregación entre procesos...")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": tmp}
+            worker = ("from metrics import count_predictions, observe_stage\n"
+                      "count_predictions(5)\n"
+                      "observe_stage('model_predict', 0.001)\n")
+            for _ in range(3):
+                subprocess.run([sys.executable, "-c", worker], cwd=PROJECT_ROOT, env=env, check=True)
+
+            reader = "from metrics import render_metrics\nprint(render_metrics()[0].decode())"
+            text = subprocess.run([sys.executable, "-c", reader], cwd=PROJECT_ROOT, env=env,
+                                  check=True, capture_output=True, text=True).stdout
+
+        predictions = _sample(text, "diabetes_api_predictions_total", endpoint="none", model="default")
+        stages = _sample(text, "diabetes_api_stage_seconds_count", stage="model_predict")
+
+        print(f"   {'✅' if predictions == 15 else '❌'} Predicciones de 3 procesos: {predictions}")
+        print(f"   {'✅' if stages == 3 else '❌'} Observaciones de etapa agregadas: {stages}")
+        return predictions == 15 and stages == 3
+
+    except Exception as e:
+        print(f"   ❌ Error en agregación: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Etiquetas por petición", test_request_labels_and_stages),
+        ("Agregación multiproceso", test_multiprocess_aggregation)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el micro-batching de predicciones individuales
+"""
+import asyncio
+import tempfile
+import threading
+import warnings
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def test_concurrent_requests_are_batched():
+    """Las peticiones concurrentes se agrupan y cada una recibe su resultado"""
+    print("🧪 Probando agrupación de peticiones concurrentes...")
+
+    try:
+        from inference_executor import InferenceExecutor
+        from micro_batcher import MicroBatcher
+
+        calls = []
+        lock = threading.Lock()
+
+        def batch_function(patients, model_name):
+            with lock:
+                calls.append((model_name, len(patients)))
+            return [{"id": patient["id"], "model": model_name} for patient in patients]
+
+        async def scenario():
+            executor = InferenceExecutor(kind='thread', max_workers=1, max_queue=10)
+            batcher = MicroBatcher(batch_function, max_wait_ms=20, max_batch_size=32,
+                                   executor=executor)
+            tasks = [batcher.submit({"id": i}, "random_forest" if i % 3 == 0 else None)
+                     for i in range(100)]
+            results = await asyncio.gather(*tasks)
+            executor.shutdown()
+            return results, batcher.get_stats()
+
+        results, stats = asyncio.run(scenario())
+
+        own_results = all(result["id"] == i and result["model"] == ("random_forest" if i % 3 == 0 else None)
+                          for i, result in enumerate(results))
+        within_limit = all(size <= 32 for _, size in calls)
+        batched = stats["batches"] < 100 and stats["max_batch_size_seen"] > 1
+
+        print(f"   {'✅' if own_results else '❌'} Cada petición recibe su propio resultado")
+        print(f"   {'✅' if within_limit else '❌'} Ningún lote supera el tamaño máximo")
+        print(f"   {'✅' if batched else '❌'} {stats['requests']} peticiones en {stats['batches']} lotes "
+              f"(media {stats['mean_batch_size']})")
+        return own_results and within_limit and batched
+
+    except Exception as e:
+        print(f"   ❌ Error en micro-batching: {e}")
+        return False
+
+def test_batched_predictions_match_individual():
+    """Las predicciones agrupadas son idénticas a predict() por paciente"""
+    print("\n🧪 Probando predicciones agrupadas vs individuales...")
+
+    try:
+        from inference_executor import InferenceExecutor
+        from micro_batcher import MicroBatcher
+        from test_predictor import _train_predictor, _random_patients
+
+        with tempfile.TemporaryDirectory() as tmp:
+            predictor = _train_predictor(tmp)
+            patients = _random_patients(200)
+            individual = [predictor.predict(patient) for patient in patients]
+
+            async def scenario():
+                executor = InferenceExecutor(kind='thread', max_workers=2, max_queue=50)
+                batcher = MicroBatcher(lambda batch, model_name: predictor.predict_batch(batch),
+                                       max_wait_ms=5, max_batch_size=64, executor=executor)
+                results = await asyncio.gather(*(batcher.submit(patient) for patient in patients))
+                executor.shutdown()
+                return results, batcher.get_stats()
+
+            batched, stats = asyncio.run(scenario())
+
+        same = batched == individual
+        print(f"   {'✅' if same else '❌'} {len(patients)} resultados idénticos "
+              f"en {stats['batches']} lotes")
+        return same
+
+    except Exception as e:
+        print(f"   ❌ Error en predicciones agrupadas: {e}")
+        return False
+
+def test_queue_full_rejects_batch():
+    """Con el ejecutor saturado los pacientes reciben InferenceQueueFull"""
+    print("\n🧪 Probando rechazo con ejecutor saturado...")
+
+    try:
+        from inference_executor import InferenceExecutor, InferenceQueueFull
+        from micro_batcher import MicroBatcher
+
+        release = threading.Event()
+
+        def slow_batch(patients, model_name):
+            release.wait(5)
+            return [{} for _ in patients]
+
+        async def scenario():
+            executor = InferenceExecutor(kind='thread', max_workers=1, max_queue=0)
+            batcher = MicroBatcher(slow_batch, max_wait_ms=1, max_batch_size=2,
+                                   executor=executor, max_concurrent_batches=4)
+            # El primer paciente ocupa el único worker; los dos lotes llenos siguientes
+            # se rechazan sin esperar a la ventana
+            tasks = [asyncio.ensure_future(batcher.submit({"id": i})) for i in range(5)]
+            await asyncio.sleep(0.2)
+            release.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            executor.shutdown()
+            return results
+
+        results = asyncio.run(scenario())
+        rejected = sum(isinstance(result, InferenceQueueFull) for result in results)
+        print(f"   {'✅' if rejected == 4 else '❌'} {rejected} pacientes rechazados")
+        return rejected == 4
+
+    except Exception as e:
+        print(f"   ❌ Error en rechazo: {e}")
+        return False
+
+def test_explicit_zero_limits():
+    """Un 0 explícito no se sustituye por el valor de la configuración"""
+    print("\n🧪 Probando límites explícitos a 0...")
+
+    try:
+        from inference_executor import InferenceExecutor
+        from micro_batcher import MicroBatcher
+
+        sizes = []
+
+        def batch_function(patients, model_name):
+            sizes.append(len(patients))
+            return [{} for _ in patients]
+
+        async def scenario():
+            executor = InferenceExecutor(kind='thread', max_workers=3, max_queue=10)
+            batcher = MicroBatcher(batch_function, max_wait_ms=20, max_batch_size=0,
+                                   executor=executor, max_concurrent_batches=0)
+            await asyncio.gather(*(batcher.submit({"id": i}) for i in range(5)))
+            executor.shutdown()
+            return batcher
+
+        batcher = asyncio.run(scenario())
+        unbatched = batcher.max_batch_size == 0 and sizes == [1] * 5
+        workers = batcher.max_concurrent_batches == 3
+
+        print(f"   {'✅' if unbatched else '❌'} max_batch_size=0 envía cada paciente solo: {sizes}")
+        print(f"   {'✅' if workers else '❌'} max_concurrent_batches=0 usa los workers del ejecutor")
+        return unbatched and workers
+
+    except Exception as e:
+        print(f"   ❌ Error en límites a 0: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Agrupación concurrente", test_concurrent_requests_are_batched),
+        ("Lotes vs individual", test_batched_predictions_match_individual),
+        ("Rechazo por saturación", test_queue_full_rejects_batch),
+        ("Límites a 0", test_explicit_zero_limits)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
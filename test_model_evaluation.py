@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la evaluación en una sola pasada (model_evaluation.py)
+"""
+import numpy as np
+
+def _regression_data(seed: int = 0):
+    """Datos de regresión sintéticos de entrenamiento y prueba"""
+    rng = np.random.default_rng(seed)
+    coefficients = rng.normal(size=8)
+    X_train = rng.normal(size=(1500, 8))
+    X_test = rng.normal(size=(300, 8))
+    y_train = X_train @ coefficients + rng.normal(scale=0.5, size=1500)
+    y_test = X_test @ coefficients + rng.normal(scale=0.5, size=300)
+    return X_train, y_train, X_test, y_test
+
+def test_matches_cross_validation():
+    """Mismos scores, predicciones fuera de pliegue y modelo final que scikit-learn por separado"""
+    print("🧪 Probando equivalencia con cross_val_score...")
+
+    try:
+        from sklearn.base import clone
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.linear_model import Ridge
+        from sklearn.model_selection import cross_val_predict, cross_val_score
+        from model_evaluation import evaluate_model
+
+        X_train, y_train, X_test, y_test = _regression_data()
+        ok = True
+        for model in (Ridge(alpha=1.0), RandomForestRegressor(n_estimators=20, random_state=0, n_jobs=-1)):
+            name = type(model).__name__
+            result = evaluate_model(clone(model), X_train, y_train, X_test, y_test,
+                                    cv=5, scoring='r2', n_jobs=3)
+
+            reference = clone(model).fit(X_train, y_train)
+            same_scores = np.allclose(result['cv_scores'],
+                                      cross_val_score(clone(model), X_train, y_train, cv=5, scoring='r2'))
+            same_oof = np.allclose(result['oof_predictions'],
+                                   cross_val_predict(clone(model), X_train, y_train, cv=5))
+            same_final = (np.allclose(result['predictions'], reference.predict(X_test))
+                          and np.allclose(result['train_predictions'], reference.predict(X_train)))
+            n_jobs_kept = result['model'].get_params().get('n_jobs') == model.get_params().get('n_jobs')
+
+            print(f"   {'✅' if same_scores else '❌'} {name}: mismos scores por pliegue")
+            print(f"   {'✅' if same_oof else '❌'} {name}: mismas predicciones fuera de pliegue")
+            print(f"   {'✅' if same_final else '❌'} {name}: mismo modelo final")
+            print(f"   {'✅' if n_jobs_kept else '❌'} {name}: el modelo final conserva su n_jobs")
+            ok = ok and same_scores and same_oof and same_final and n_jobs_kept
+
+        return ok
+
+    except Exception as e:
+        print(f"   ❌ Error en equivalencia: {e}")
+        return False
+
+def test_metrics_and_scoring():
+    """Las métricas salen de las predicciones guardadas y el scoring se valida"""
+    print("\n🧪 Probando métricas y scoring...")
+
+    try:
+        from sklearn.linear_model import Ridge
+        from sklearn.metrics import mean_absolute_error, r2_score
+        from model_evaluation import evaluate_model
+
+        X_train, y_train, X_test, y_test = _regression_data(1)
+        result = evaluate_model(Ridge(), X_train, y_train, X_test, y_test, cv=4, scoring='r2')
+
+        consistent = (np.isclose(result['test_r2'], r2_score(y_test, result['predictions']))
+                      and np.isclose(result['oof_mae'], mean_absolute_error(y_train, result['oof_predictions']))
+                      and np.isclose(result['cv_r2_mean'], result['cv_scores'].mean())
+                      and len(result['cv_scores']) == 4)
+
+        mse = evaluate_model(Ridge(), X_train, y_train, X_test, y_test, cv=4, scoring='neg_mean_squared_error')
+        negative = bool(np.all(mse['cv_scores'] < 0))
+
+        rejected = False
+        try:
+            evaluate_model(Ridge(), X_train, y_train, X_test, y_test, scoring='explained_variance')
+        except ValueError:
+            rejected = True
+
+        print(f"   {'✅' if consistent else '❌'} Métricas coherentes con las predicciones devueltas")
+        print(f"   {'✅' if negative else '❌'} Scoring de error con signo negativo, como scikit-learn")
+        print(f"   {'✅' if rejected else '❌'} Un scoring no soportado lanza ValueError")
+        return consistent and negative and rejected
+
+    except Exception as e:
+        print(f"   ❌ Error en métricas: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Equivalencia con scikit-learn", test_matches_cross_validation),
+        ("Métricas y scoring", test_metrics_and_scoring)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
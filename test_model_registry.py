@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el registro de modelos compartido por el proceso
+"""
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import joblib
+from sklearn.linear_model import LinearRegression
+
+def _write_model(path: Path, intercept: float):
+    """Guardar un modelo lineal trivial con el intercepto indicado"""
+    model = LinearRegression()
+    model.fit([[0.0] * 29, [1.0] * 29], [intercept, intercept])
+    joblib.dump(model, path)
+
+def test_registry_loads_once():
+    """El modelo se carga una sola vez aunque se pida desde varios hilos"""
+    print("🧪 Probando carga única del registro...")
+
+    try:
+        from model_registry import ModelRegistry
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+            _write_model(model_path, 90.0)
+
+            registry = ModelRegistry(check_interval=0)
+            predictors = []
+
+            def worker():
+                predictors.append(registry.get_predictor(model_path=str(model_path)))
+
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            same_instance = all(p is predictors[0] for p in predictors)
+            print(f"   ✅ Cargas: {registry.loads}, aciertos: {registry.hits}")
+
+            return same_instance and registry.loads == 1
+
+    except Exception as e:
+        print(f"   ❌ Error en registro: {e}")
+        return False
+
+def test_registry_reloads_on_change():
+    """El registro recarga el modelo cuando cambia el archivo"""
+    print("\n🔄 Probando recarga por cambio de archivo...")
+
+    try:
+        from model_registry import ModelRegistry
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+            _write_model(model_path, 90.0)
+
+            registry = ModelRegistry(check_interval=0)
+            first = registry.get_predictor(model_path=str(model_path))
+
+            _write_model(model_path, 150.0)
+            stat = model_path.stat()
+            os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+            second = registry.get_predictor(model_path=str(model_path))
+            print(f"   ✅ Cargas tras el cambio: {registry.loads}")
+
+            return first is not second and registry.loads == 2
+
+    except Exception as e:
+        print(f"   ❌ Error en recarga: {e}")
+        return False
+
+def test_registry_retries_failed_load():
+    """Un predictor cuyo modelo no se pudo cargar no queda en el registro"""
+    print("\n🔁 Probando reintento tras un fallo de carga...")
+
+    try:
+        from model_registry import ModelRegistry
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+
+            registry = ModelRegistry(check_interval=60)
+            failed = registry.get_predictor(model_path=str(model_path))
+            not_cached = failed.model is None and registry.get_stats()["loaded_models"] == 0
+
+            _write_model(model_path, 90.0)
+            loaded = registry.get_predictor(model_path=str(model_path))
+            retried = loaded is not failed and loaded.model is not None and registry.loads == 2
+
+            print(f"   {'✅' if not_cached else '❌'} El fallo de carga no se guarda")
+            print(f"   {'✅' if retried else '❌'} La siguiente llamada vuelve a cargar el modelo")
+            return not_cached and retried
+
+    except Exception as e:
+        print(f"   ❌ Error en reintento: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Carga única", test_registry_loads_once),
+        ("Recarga por cambio", test_registry_reloads_on_change),
+        ("Reintento tras fallo", test_registry_retries_failed_load)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
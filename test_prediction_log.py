@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el escritor por lotes del log de predicciones
+"""
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+RESULT = {"glucose_mg_dl": 110.5, "category": "Prediabetes", "risk_level": "Moderado"}
+
+def _read_entries(directory: Path) -> list:
+    """Leer todas las entradas de los segmentos (activos y comprimidos)"""
+    entries = []
+    for path in sorted(directory.iterdir()):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt") as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    return entries
+
+def test_batched_writes():
+    """Las entradas se escriben por lotes, completas y en orden"""
+    print("🧪 Probando escritura por lotes...")
+
+    try:
+        from prediction_log import PredictionLogWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PredictionLogWriter(directory=tmp, batch_size=100, flush_interval=0.05)
+
+            start = time.perf_counter()
+            for i in range(1000):
+                writer.log({"edad": i}, RESULT)
+            per_entry_us = (time.perf_counter() - start) / 1000 * 1e6
+
+            flushed = writer.flush()
+            stats = writer.get_stats()
+            writer.close()
+            entries = _read_entries(Path(tmp))
+            files = [path.name for path in Path(tmp).iterdir()]
+
+        ordered = [entry["patient_data"]["edad"] for entry in entries] == list(range(1000))
+        batched = stats["flushes"] < 100
+        one_file = files == [f"api_predictions.{os.getpid()}.log"]
+
+        print(f"   {'✅' if flushed and ordered else '❌'} {len(entries)} entradas en orden")
+        print(f"   {'✅' if batched else '❌'} {stats['flushes']} escrituras para 1000 entradas")
+        print(f"   {'✅' if one_file else '❌'} Archivo del proceso: {files}")
+        print(f"   ℹ️ Costo por entrada: {per_entry_us:.1f} µs")
+        return flushed and ordered and batched and one_file
+
+    except Exception as e:
+        print(f"   ❌ Error en escritura por lotes: {e}")
+        return False
+
+def test_rotation_and_compression():
+    """Los segmentos que superan el tamaño máximo se rotan y comprimen"""
+    print("\n🧪 Probando rotación y compresión...")
+
+    try:
+        from prediction_log import PredictionLogWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            writer = PredictionLogWriter(directory=tmp, batch_size=50, flush_interval=0.05,
+                                         segment_bytes=10_000, compress=True)
+            for i in range(500):
+                writer.log({"edad": i}, RESULT)
+            writer.close()
+            stats = writer.get_stats()
+
+            compressed = sorted(path.name for path in Path(tmp).glob("*.log.gz"))
+            entries = _read_entries(Path(tmp))
+
+        rotated = stats["rotations"] > 0 and len(compressed) == stats["rotations"]
+        complete = sorted(entry["patient_data"]["edad"] for entry in entries) == list(range(500))
+
+        print(f"   {'✅' if rotated else '❌'} {stats['rotations']} segmentos rotados y comprimidos")
+        print(f"   {'✅' if complete else '❌'} {len(entries)} entradas recuperadas")
+        return rotated and complete
+
+    except Exception as e:
+        print(f"   ❌ Error en rotación: {e}")
+        return False
+
+def test_backpressure_policies():
+    """Con el disco lento 'drop' descarta sin esperar y 'block' espera un tiempo acotado"""
+    print("\n🧪 Probando políticas de contrapresión...")
+
+    try:
+        from prediction_log import PredictionLogWriter
+
+        with tempfile.TemporaryDirectory() as tmp:
+            release = threading.Event()
+            results = {}
+
+            for policy in ("drop", "block"):
+                writer = PredictionLogWriter(directory=Path(tmp) / policy, batch_size=10,
+                                             flush_interval=0.01, max_pending=20,
+                                             policy=policy, block_timeout=0.02)
+                # Simular un disco bloqueado
+                original_write = writer._write
+                writer._write = lambda entries, original_write=original_write: (
+                    release.wait(5), original_write(entries))
+
+                start = time.perf_counter()
+                accepted = sum(writer.log({"edad": i}, RESULT) for i in range(100))
+                elapsed = time.perf_counter() - start
+                results[policy] = (accepted, writer.dropped, elapsed)
+
+                release.set()
+                writer.close()
+                release.clear()
+
+        drop_accepted, drop_dropped, drop_elapsed = results["drop"]
+        block_accepted, block_dropped, block_elapsed = results["block"]
+        drop_ok = drop_dropped > 0 and drop_accepted + drop_dropped == 100 and drop_elapsed < 0.5
+        block_ok = block_dropped > 0 and block_elapsed >= 0.02 and block_elapsed < 5
+
+        print(f"   {'✅' if drop_ok else '❌'} drop: {drop_accepted} aceptadas, {drop_dropped} descartadas "
+              f"en {drop_elapsed * 1000:.1f} ms")
+        print(f"   {'✅' if block_ok else '❌'} block: {block_accepted} aceptadas, {block_dropped} descartadas "
+              f"en {block_elapsed * 1000:.1f} ms")
+        return drop_ok and block_ok
+
+    except Exception as e:
+        print(f"   ❌ Error en contrapresión: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Escritura por lotes", test_batched_writes),
+        ("Rotación y compresión", test_rotation_and_compression),
+        ("Contrapresión", test_backpressure_policies)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
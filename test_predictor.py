@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para los caminos rápidos del predictor (lote y fila individual)
+"""
+import random
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def _train_predictor(tmp_dir: str):
+    """Entrenar un modelo pequeño en un directorio temporal y cargar su predictor"""
+    from sklearn.ensemble import GradientBoostingRegressor
+    from data_generator import create_sample_dataset
+    from data_preprocessor import preprocess_diabetes_data
+    from predictor import DiabetesPredictor
+
+    df_processed, preprocessor = preprocess_diabetes_data(create_sample_dataset(n_samples=300))
+    X = df_processed.drop(columns=['Resultado'])
+    X_scaled, _ = preprocessor.scale_features(X, X.iloc[:1])
+
+    model = GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=42)
+    model.fit(X_scaled, df_processed['Resultado'])
+
+    model_path = Path(tmp_dir) / "model.joblib"
+    scaler_path = Path(tmp_dir) / "scaler.joblib"
+    joblib.dump(model, model_path)
+    joblib.dump(preprocessor.scaler, scaler_path)
+    preprocessor.feature_transformer.save(Path(tmp_dir) / "feature_transformer.joblib")
+
+    return DiabetesPredictor(model_path=str(model_path), scaler_path=str(scaler_path))
+
+def _random_patients(n: int, seed: int = 7):
+    """Pacientes aleatorios con el formato de la API, incluyendo casos inválidos"""
+    rng = random.Random(seed)
+    patients = []
+    for _ in range(n):
+        patient = {
+            'edad': rng.uniform(18, 90),
+            'sexo': rng.choice(['M', 'F']),
+            'imc': rng.uniform(15, 50),
+            'tas': rng.randint(90, 200),
+            'tad': rng.randint(60, 120),
+            'perimetro_abdominal': rng.uniform(60, 150),
+            'frecuencia_cardiaca': rng.choice([None, 72.0]),
+            'realiza_ejercicio': rng.choice(['Si', 'No']),
+            'consume_alcohol': rng.choice(['Nunca', 'Ocasional', 'Frecuente']),
+            'fuma': rng.choice(['Si', 'No']),
+            'medicamentos_hta': rng.choice(['Si', 'No']),
+            'historia_familiar_dm': rng.choice(['Si', 'No']),
+            'diabetes_gestacional': 'No',
+            'puntaje_findrisc': rng.choice([None, 12.0]),
+            'riesgo_cardiovascular': rng.random()
+        }
+        if rng.random() < 0.1:
+            del patient['tas']
+        patients.append(patient)
+
+    # Casos que deben producir error o valores por defecto
+    patients[3]['edad'] = 'abc'
+    patients[5]['imc'] = float('nan')
+    patients[8]['sexo'] = 'X'
+    patients[13]['talla'] = None
+    return patients
+
+def test_batch_matches_individual():
+    """predict_batch produce exactamente los mismos resultados que predict"""
+    print("🧪 Probando predicción por lotes...")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            predictor = _train_predictor(tmp)
+            patients = _random_patients(500)
+
+            individual = [predictor.predict(patient) for patient in patients]
+            batch = predictor.predict_batch(patients)
+
+            mismatches = [i for i, (a, b) in enumerate(zip(individual, batch)) if a != b]
+            errors = sum(1 for result in batch if "error" in result)
+
+            print(f"   ✅ Pacientes: {len(batch)}, con error: {errors}")
+            if mismatches:
+                print(f"   ❌ Diferencias en filas: {mismatches[:10]}")
+                return False
+
+            return len(batch) == len(patients) and errors >= 1
+
+    except Exception as e:
+        print(f"   ❌ Error en predicción por lotes: {e}")
+        return False
+
+def test_feature_plan_matches_reference():
+    """El plan compilado reproduce exactamente el pipeline de referencia con pandas"""
+    print("\n⚡ Probando plan compilado de características...")
+
+    try:
+        import numpy as np
+        from predictor import DiabetesPredictor, build_feature_plan
+
+        predictor = DiabetesPredictor.__new__(DiabetesPredictor)
+        predictor.feature_plan = build_feature_plan()
+
+        rng = random.Random(11)
+        numeric = ['edad', 'imc', 'tas', 'tad', 'perimetro_abdominal', 'talla', 'peso',
+                   'frecuencia_cardiaca', 'puntaje_findrisc', 'riesgo_cardiovascular', 'estrato']
+        categorical = {
+            'sexo': ['M', 'F', 'X'],
+            'realiza_ejercicio': ['Si', 'No'],
+            'fuma': ['Si', 'No'],
+            'consume_alcohol': ['Nunca', 'Ocasional', 'Frecuente'],
+            'medicamentos_hta': ['Si', 'No'],
+            'historia_familiar_dm': ['Si', 'No'],
+            'diabetes_gestacional': ['Si', 'No']
+        }
+        # Valores en los límites de los intervalos de IMC y edad, fuera de rango y faltantes
+        special = [0, 18.5, 25, 30, 45, 60, 75, 100, 100.5, -3, float('nan'), None]
+
+        fast_rows = 0
+        for _ in range(2000):
+            patient = {}
+            for col in numeric:
+                if rng.random() < 0.85:
+                    patient[col] = rng.choice(special) if rng.random() < 0.2 else rng.uniform(1, 250)
+            for col, options in categorical.items():
+                if rng.random() < 0.85:
+                    patient[col] = rng.choice(options + [None])
+
+            fast = predictor.feature_plan.transform_one(patient)
+            if fast is None:
+                continue
+            fast_rows += 1
+
+            reference = np.asarray(predictor._prepare_features_reference(patient), dtype=float)
+            if not np.array_equal(fast, reference, equal_nan=True):
+                print(f"   ❌ Diferencia para el paciente: {patient}")
+                return False
+
+        print(f"   ✅ {fast_rows} pacientes codificados idénticamente por el camino rápido")
+        return fast_rows > 0
+
+    except Exception as e:
+        print(f"   ❌ Error en plan de características: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Lote vs individual", test_batch_matches_individual),
+        ("Plan compilado vs referencia", test_feature_plan_matches_reference)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
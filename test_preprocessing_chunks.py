@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el preprocesamiento por bloques (prepare_file y partial_fit)
+"""
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+def _generate(n_samples: int, seed: int = 8) -> pd.DataFrame:
+    """Generar un dataset sintético sin los mensajes de progreso"""
+    from data_generator import DiabetesDataGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiabetesDataGenerator(n_samples=n_samples, random_state=seed,
+                                     vectorized=True).generate_synthetic_data()
+
+def test_streaming_quantile():
+    """La mediana en streaming es exacta con pocos datos y aproximada con muchos"""
+    print("🧪 Probando cuantiles en streaming...")
+
+    try:
+        from feature_transformer import StreamingQuantile
+
+        small = StreamingQuantile()
+        small.update(np.array([5.0, 1.0, np.nan, 3.0, np.inf]))
+        exact_small = small.quantile(0.5) == 3.0 and small.count == 3
+
+        rng = np.random.default_rng(3)
+        values = rng.lognormal(mean=0.0, sigma=0.8, size=400_000)
+        sketch = StreamingQuantile()
+        for chunk in np.array_split(values, 37):
+            sketch.update(chunk)
+        estimates = {q: sketch.quantile(q) for q in (0.1, 0.5, 0.9)}
+        errors = {q: abs(estimates[q] / np.quantile(values, q) - 1) for q in estimates}
+        accurate = max(errors.values()) < 0.01
+        bounded = len(sketch.values) <= 2 * sketch.max_points
+
+        print(f"   {'✅' if exact_small else '❌'} Exacta con pocos datos, ignora NaN e infinitos")
+        print(f"   {'✅' if accurate else '❌'} Error relativo máximo: {max(errors.values()):.4f}")
+        print(f"   {'✅' if bounded else '❌'} Resumen acotado: {len(sketch.values)} puntos")
+        return exact_small and accurate and bounded
+
+    except Exception as e:
+        print(f"   ❌ Error en cuantiles: {e}")
+        return False
+
+def test_partial_fit_matches_fit():
+    """partial_fit por bloques aprende los mismos mapeos y medianas cercanas"""
+    print("\n🧪 Probando partial_fit...")
+
+    try:
+        from data_schema import compact_dtypes
+        from feature_transformer import DiabetesFeatureTransformer
+
+        df = compact_dtypes(_generate(20_000))
+        full = DiabetesFeatureTransformer().fit(df)
+        partial = DiabetesFeatureTransformer()
+        for start in range(0, len(df), 3_000):
+            partial.partial_fit(df.iloc[start:start + 3_000])
+
+        same_columns = partial.feature_columns == full.feature_columns
+        same_mappings = (partial.binary_mappings == full.binary_mappings
+                         and partial.onehot_categories == full.onehot_categories)
+        exact_binary = all(partial.impute_values[col] == full.impute_values[col]
+                           for col in full.binary_mappings)
+        close_medians = all(np.isclose(partial.impute_values[col], full.impute_values[col], rtol=0.01, atol=1e-6)
+                            for col in full.feature_columns)
+
+        print(f"   {'✅' if same_columns else '❌'} Mismas {len(full.feature_columns)} columnas")
+        print(f"   {'✅' if same_mappings else '❌'} Mismos mapeos binarios y one-hot")
+        print(f"   {'✅' if exact_binary else '❌'} Medianas exactas en variables binarias")
+        print(f"   {'✅' if close_medians else '❌'} Medianas numéricas dentro del 1%")
+        return same_columns and same_mappings and exact_binary and close_medians
+
+    except Exception as e:
+        print(f"   ❌ Error en partial_fit: {e}")
+        return False
+
+def test_prepare_file():
+    """prepare_file escribe las mismas características que prepare_data"""
+    print("\n🧪 Probando preprocesamiento por bloques...")
+
+    try:
+        from bulk_scorer import iter_input_chunks
+        from data_generator import DiabetesDataGenerator
+        from data_preprocessor import DiabetesDataPreprocessor
+
+        df = _generate(12_000)
+
+        ok = True
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "datos.csv"
+            df.to_csv(csv_path, index=False)
+            parquet_dir = Path(tmp) / "parquet"
+            with contextlib.redirect_stdout(io.StringIO()):
+                DiabetesDataGenerator(n_samples=12_000, random_state=8, vectorized=True).save_parquet(
+                    str(parquet_dir), chunk_size=5_000)
+
+            for label, source in (("CSV", csv_path), ("Parquet", parquet_dir)):
+                # Referencia: el mismo archivo leído completo y preparado en memoria
+                output = Path(tmp) / f"procesado_{label}.parquet"
+                preprocessor = DiabetesDataPreprocessor()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    expected = DiabetesDataPreprocessor().prepare_data(
+                        pd.concat(list(iter_input_chunks(str(source), 5_000))))
+                    summary = preprocessor.prepare_file(str(source), str(output), chunk_size=2_500)
+                processed = pd.read_parquet(output)
+
+                same_columns = list(processed.columns) == list(expected.columns)
+                same_values = same_columns and np.allclose(processed.to_numpy(dtype=float),
+                                                           expected.to_numpy(dtype=float))
+                features = expected.drop(columns=['Resultado'])
+                same_scaler = np.allclose(preprocessor.scaler.mean_, features.mean().to_numpy()) and \
+                    np.allclose(preprocessor.scaler.scale_, features.std(ddof=0).to_numpy())
+                counted = summary["rows_written"] == len(df) and summary["chunks"] >= 5
+
+                print(f"   {'✅' if same_values else '❌'} {label}: mismas características que prepare_data")
+                print(f"   {'✅' if same_scaler else '❌'} {label}: scaler ajustado por bloques igual al completo")
+                print(f"   {'✅' if counted else '❌'} {label}: {summary['rows_written']} registros en "
+                      f"{summary['chunks']} bloques")
+                ok = ok and same_values and same_scaler and counted
+
+            empty_raises = False
+            empty_path = Path(tmp) / "vacio.csv"
+            df.head(0).to_csv(empty_path, index=False)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    DiabetesDataPreprocessor().prepare_file(str(empty_path), str(Path(tmp) / "vacio.parquet"))
+            except ValueError:
+                empty_raises = True
+            print(f"   {'✅' if empty_raises else '❌'} Una entrada vacía lanza ValueError")
+
+        return ok and empty_raises
+
+    except Exception as e:
+        print(f"   ❌ Error en preprocesamiento por bloques: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Cuantiles en streaming", test_streaming_quantile),
+        ("partial_fit", test_partial_fit_matches_fit),
+        ("Preprocesamiento por bloques", test_prepare_file)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
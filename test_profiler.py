@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el perfilado bajo demanda (profiler.py)
+"""
+import json
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+def _busy_loop(stop: threading.Event):
+    """Trabajo de CPU reconocible en las pilas muestreadas"""
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_stack_sampling():
+    """El muestreo ve todos los hilos y exporta pilas colapsadas y speedscope"""
+    print("🧪 Probando muestreo de pilas...")
+
+    try:
+        from profiler import StackSampler
+
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+        worker.start()
+
+        sampler = StackSampler(interval_ms=5)
+        sampler.start()
+        time.sleep(0.3)
+        sampler.stop()
+        stop.set()
+        worker.join()
+
+        collapsed = sampler.to_collapsed()
+        busy_lines = [line for line in collapsed.splitlines() if line.startswith("busy-worker;")]
+        busy_samples = sum(int(line.rsplit(" ", 1)[1]) for line in busy_lines)
+        summary = sampler.get_summary()
+        sampled = busy_samples >= summary["samples"] - 1 and any("_busy_loop" in line for line in busy_lines)
+        own_thread_hidden = "stack-sampler" not in collapsed
+
+        speedscope = sampler.to_speedscope()
+        frames = speedscope["shared"]["frames"]
+        valid_indices = all(0 <= index < len(frames)
+                            for profile in speedscope["profiles"]
+                            for stack in profile["samples"] for index in stack)
+        threads = {profile["name"] for profile in speedscope["profiles"]}
+        speedscope_ok = valid_indices and "busy-worker" in threads and "MainThread" in threads
+
+        print(f"   {'✅' if sampled else '❌'} {busy_samples}/{summary['samples']} muestras del hilo ocupado")
+        print(f"   {'✅' if own_thread_hidden else '❌'} El hilo muestreador no aparece en el perfil")
+        print(f"   {'✅' if speedscope_ok else '❌'} Speedscope: {len(threads)} hilos, {len(frames)} frames")
+        print(f"   ℹ️ Overhead del muestreo: {summary['overhead'] * 100:.2f}%")
+        return sampled and own_thread_hidden and speedscope_ok
+
+    except Exception as e:
+        print(f"   ❌ Error en muestreo: {e}")
+        return False
+
+def test_single_session():
+    """Solo se permite una sesión de perfilado a la vez"""
+    print("\n🧪 Probando sesión única...")
+
+    try:
+        from profiler import ProfilerBusy, is_profiling, profiling_session
+
+        with profiling_session():
+            try:
+                with profiling_session():
+                    rejected = False
+            except ProfilerBusy:
+                rejected = True
+            busy = is_profiling()
+
+        released = not is_profiling()
+        with profiling_session():
+            reusable = True
+
+        print(f"   {'✅' if rejected and busy else '❌'} Segunda sesión rechazada")
+        print(f"   {'✅' if released and reusable else '❌'} La sesión se libera al terminar")
+        return rejected and busy and released and reusable
+
+    except Exception as e:
+        print(f"   ❌ Error en sesión única: {e}")
+        return False
+
+def test_load_logged_prediction():
+    """Las entradas de los archivos de cada proceso se ordenan por timestamp"""
+    print("\n🧪 Probando lectura del log de predicciones...")
+
+    try:
+        from profiler import load_logged_prediction
+
+        def entry(second, edad):
+            return json.dumps({"timestamp": f"2026-01-01 10:00:{second:02d}",
+                               "patient_data": {"edad": edad}}) + "\n"
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Dos procesos con entradas intercaladas; el archivo modificado
+            # por último no contiene la predicción más reciente
+            newest_pid = Path(tmp) / "api_predictions.1111.log"
+            other_pid = Path(tmp) / "api_predictions.2222.log"
+            newest_pid.write_text(entry(1, 1) + entry(3, 3) + entry(5, 99))
+            time.sleep(0.01)
+            other_pid.write_text(entry(0, 0) + "\n" + entry(2, 2) + entry(4, 4))
+
+            last = load_logged_prediction(-1, tmp)
+            second_last = load_logged_prediction(-2, tmp)
+            first = load_logged_prediction(0, tmp)
+            missing = 0
+            for position in (10, -10):
+                try:
+                    load_logged_prediction(position, tmp)
+                except LookupError:
+                    missing += 1
+            missing = missing == 2
+
+        ordered = (last["patient_data"]["edad"] == 99 and second_last["patient_data"]["edad"] == 4
+                   and first["patient_data"]["edad"] == 0)
+
+        print(f"   {'✅' if ordered else '❌'} Entrada más reciente y más antigua")
+        print(f"   {'✅' if missing else '❌'} Posición inexistente rechazada")
+        return ordered and missing
+
+    except Exception as e:
+        print(f"   ❌ Error leyendo el log: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Muestreo de pilas", test_stack_sampling),
+        ("Sesión única", test_single_session),
+        ("Log de predicciones", test_load_logged_prediction)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para Server-Timing y la captura de peticiones lentas
+"""
+import json
+import time
+
+def _parse_server_timing(value: str) -> dict:
+    """Convertir la cabecera Server-Timing en {etapa: ms}"""
+    timings = {}
+    for metric in value.split(","):
+        name, duration = metric.strip().split(";dur=")
+        timings[name] = float(duration)
+    return timings
+
+def _build_app(slow_log, batcher=None):
+    """Aplicación de prueba con un endpoint directo y otro con micro-batching"""
+    from fastapi import FastAPI
+    from inference_executor import InferenceExecutor
+    from metrics import time_stage
+    from request_tracing import RequestTracingMiddleware
+
+    executor = InferenceExecutor(kind='thread', max_workers=2, max_queue=8)
+    app = FastAPI()
+    app.add_middleware(RequestTracingMiddleware, slow_log=slow_log, allowed_fields=["edad", "sexo"],
+                       endpoints=["/test/predict", "/test/batched"])
+
+    def work(delay: float):
+        with time_stage('feature_prep'):
+            time.sleep(delay)
+        with time_stage('model_predict'):
+            return delay
+
+    @app.post("/test/predict")
+    async def predict(payload: dict, delay: float = 0.0):
+        with time_stage('validation'):
+            pass
+        return {"value": await executor.run(work, delay)}
+
+    @app.post("/test/batched")
+    async def batched(payload: dict):
+        return await batcher.submit(payload)
+
+    @app.get("/test/other")
+    async def other():
+        return {}
+
+    return app, executor
+
+def test_server_timing_headers():
+    """Las respuestas llevan X-Request-ID y las etapas medidas en el worker"""
+    print("🧪 Probando cabeceras Server-Timing...")
+
+    try:
+        from fastapi.testclient import TestClient
+        from request_tracing import SlowRequestLog
+
+        app, executor = _build_app(SlowRequestLog(threshold_ms=10_000))
+        with TestClient(app) as client:
+            response = client.post("/test/predict", json={"edad": 50})
+            echoed = client.post("/test/predict", json={"edad": 50},
+                                 headers={"X-Request-ID": "abc-123"})
+            invalid = client.post("/test/predict", json={"edad": 50},
+                                  headers={"X-Request-ID": "id con espacios"})
+            other = client.get("/test/other")
+        executor.shutdown()
+
+        stages = _parse_server_timing(response.headers.get("server-timing", ""))
+        has_stages = {"validation", "feature_prep", "model_predict", "total"} <= set(stages)
+        ids_ok = (len(response.headers.get("x-request-id", "")) == 32
+                  and echoed.headers.get("x-request-id") == "abc-123"
+                  and invalid.headers.get("x-request-id") != "id con espacios")
+        untraced = "server-timing" not in other.headers
+
+        print(f"   {'✅' if has_stages else '❌'} Etapas: {stages}")
+        print(f"   {'✅' if ids_ok else '❌'} X-Request-ID generado o respetado si es válido")
+        print(f"   {'✅' if untraced else '❌'} Endpoints no trazados sin cabeceras")
+        return has_stages and ids_ok and untraced
+
+    except Exception as e:
+        print(f"   ❌ Error en Server-Timing: {e}")
+        return False
+
+def test_slow_request_capture():
+    """Solo las peticiones lentas se guardan, con payload saneado y búfer acotado"""
+    print("\n🧪 Probando captura de peticiones lentas...")
+
+    try:
+        from fastapi.testclient import TestClient
+        from request_tracing import MAX_STRING_LENGTH, SlowRequestLog, sanitize_payload
+
+        slow_log = SlowRequestLog(threshold_ms=50, capacity=2)
+        app, executor = _build_app(slow_log)
+        payload = {"edad": 50, "sexo": "F", "nombre": "Paciente X"}
+        with TestClient(app) as client:
+            client.post("/test/predict", json=payload)
+            for _ in range(3):
+                last = client.post("/test/predict", params={"delay": 0.06}, json=payload)
+        executor.shutdown()
+
+        entries = slow_log.get_entries()
+        newest = entries[0] if entries else {}
+        bounded = len(entries) == 2 and slow_log.captured == 3
+        same_request = newest.get("request_id") == last.headers.get("x-request-id")
+        stages_ok = newest.get("stages_ms", {}).get("feature_prep", 0) >= 60
+        sanitized = (newest.get("payload", {}).get("data") == {"edad": 50, "sexo": "F"}
+                     and newest.get("body_bytes") == len(last.request.content))
+
+        # Límites de lotes, cuerpos recortados y campos sin allowlist
+        batch = json.dumps([{"edad": i, "sexo": "M" * 100, "cedula": "123"} for i in range(30)]).encode()
+        batched = sanitize_payload(batch, allowed_fields=["edad", "sexo"], max_items=5)
+        limited = (batched["items"] == 30 and len(batched["data"]) == 5
+                   and batched["data"][0] == {"edad": 0, "sexo": "M" * MAX_STRING_LENGTH})
+        truncated = sanitize_payload(batch[:100], truncated=True)["error"] == "payload recortado"
+        no_allowlist = sanitize_payload(batch, max_items=1)["data"] == [{}]
+
+        print(f"   {'✅' if bounded else '❌'} {slow_log.captured} lentas capturadas, {len(entries)} guardadas")
+        print(f"   {'✅' if same_request and stages_ok else '❌'} Tiempos por etapa: {newest.get('stages_ms')}")
+        print(f"   {'✅' if sanitized else '❌'} Payload saneado: {newest.get('payload')}")
+        print(f"   {'✅' if limited and truncated else '❌'} Lotes y cuerpos grandes acotados")
+        print(f"   {'✅' if no_allowlist else '❌'} Sin allowlist no se guarda ningún campo")
+        return bounded and same_request and stages_ok and sanitized and limited and truncated and no_allowlist
+
+    except Exception as e:
+        print(f"   ❌ Error en captura de peticiones lentas: {e}")
+        return False
+
+def test_micro_batched_timings():
+    """Las etapas del lote compartido llegan a cada petición agrupada"""
+    print("\n🧪 Probando tiempos de peticiones agrupadas...")
+
+    try:
+        from fastapi.testclient import TestClient
+        from metrics import time_stage
+        from micro_batcher import MicroBatcher
+        from request_tracing import SlowRequestLog
+
+        def batch_function(patients, model_name):
+            with time_stage('model_predict'):
+                return [{"edad": patient["edad"]} for patient in patients]
+
+        batcher = MicroBatcher(batch_function=batch_function, max_wait_ms=1)
+        app, executor = _build_app(SlowRequestLog(threshold_ms=10_000), batcher)
+        batcher.executor = executor
+        with TestClient(app) as client:
+            response = client.post("/test/batched", json={"edad": 7})
+        executor.shutdown()
+
+        stages = _parse_server_timing(response.headers.get("server-timing", ""))
+        ok = response.json() == {"edad": 7} and "model_predict" in stages
+
+        print(f"   {'✅' if ok else '❌'} Etapas de la petición agrupada: {stages}")
+        return ok
+
+    except Exception as e:
+        print(f"   ❌ Error en tiempos agrupados: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Server-Timing", test_server_timing_headers),
+        ("Peticiones lentas", test_slow_request_capture),
+        ("Micro-batching", test_micro_batched_timings)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el scoring en streaming NDJSON de /predict/stream
+"""
+import asyncio
+import json
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+class _Patient(BaseModel):
+    id: int
+    edad: float = Field(..., ge=0, le=120)
+    sexo: Optional[str] = None
+
+def _echo_batch(patients, model_name):
+    """Función de lote de prueba: devuelve el id y el modelo de cada paciente"""
+    return [{"id": patient["id"], "model": model_name} for patient in patients]
+
+def _run_response(response, messages, sent_lines=None):
+    """Ejecutar una respuesta ASGI con los mensajes dados y devolver (inicio, cuerpo)"""
+    received = []
+
+    async def scenario():
+        queue = messages
+
+        async def receive():
+            if queue:
+                return queue.pop(0)
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            received.append(message)
+            if sent_lines is not None and message["type"] == "http.response.body":
+                sent_lines.append(message["body"].count(b"\n"))
+
+        await response({"type": "http", "method": "POST"}, receive, send)
+
+    asyncio.run(scenario())
+    body = b"".join(message.get("body", b"") for message in received[1:])
+    return received[0], received[-1], body
+
+def test_lines_split_across_messages():
+    """Las líneas partidas entre mensajes se reconstruyen y se omiten las vacías"""
+    print("🧪 Probando lectura incremental de líneas...")
+
+    try:
+        from stream_scoring import iter_body_lines
+
+        messages = [
+            {"type": "http.request", "body": b'{"a": 1}\n{"b"', "more_body": True},
+            {"type": "http.request", "body": b': 2}\n\n' + b"x" * 40, "more_body": True},
+            {"type": "http.request", "body": b"x" * 40 + b'\n{"c": 3}', "more_body": False}
+        ]
+
+        async def collect():
+            queue = list(messages)
+
+            async def receive():
+                return queue.pop(0)
+
+            return [line async for line in iter_body_lines(receive, max_line_bytes=64)]
+
+        lines = asyncio.run(collect())
+        expected = [b'{"a": 1}', b'{"b": 2}', b'', None, b'{"c": 3}']
+        ok = lines == expected
+        print(f"   {'✅' if ok else '❌'} Líneas: {lines}")
+        return ok
+
+    except Exception as e:
+        print(f"   ❌ Error en lectura incremental: {e}")
+        return False
+
+def test_stream_results_in_order():
+    """Cada línea recibe su resultado, en orden, y los errores no afectan al lote"""
+    print("\n🧪 Probando resultados NDJSON en orden...")
+
+    try:
+        from inference_executor import InferenceExecutor
+        from stream_scoring import NDJSONScoringResponse
+
+        records = []
+        for i in range(1, 26):
+            if i == 7:
+                records.append(b"no es json")
+            elif i == 13:
+                records.append(json.dumps({"id": i, "edad": 500}).encode())
+            else:
+                records.append(json.dumps({"id": i, "edad": 40}).encode())
+        payload = b"\n".join(records) + b"\n"
+        messages = [{"type": "http.request", "body": payload[i:i + 37], "more_body": i + 37 < len(payload)}
+                    for i in range(0, len(payload), 37)]
+
+        executor = InferenceExecutor(kind='thread', max_workers=2, max_queue=0)
+        scored = []
+        response = NDJSONScoringResponse(model_name="random_forest", validator=_Patient,
+                                         batch_function=_echo_batch, executor=executor,
+                                         chunk_size=4, max_in_flight=2, on_scored=scored.append)
+        start, end, body = _run_response(response, messages)
+        executor.shutdown()
+
+        results = [json.loads(line) for line in body.splitlines()]
+        ordered = [result["line"] for result in results] == list(range(1, 26))
+        errors = [result["line"] for result in results if "error" in result]
+        own = all(result["id"] == result["line"] and result["model"] == "random_forest"
+                  for result in results if "error" not in result)
+        headers = dict(start["headers"])
+        streaming = (b"content-length" not in headers
+                     and headers[b"content-type"] == b"application/x-ndjson"
+                     and end["more_body"] is False)
+
+        print(f"   {'✅' if ordered else '❌'} {len(results)} resultados en orden de entrada")
+        print(f"   {'✅' if errors == [7, 13] else '❌'} Errores por línea: {errors}")
+        print(f"   {'✅' if own else '❌'} Cada paciente recibe su propio resultado")
+        counted = sum(scored) == 23 and response.rows_scored == 23 and response.rows_failed == 2
+        print(f"   {'✅' if counted else '❌'} {sum(scored)} predicciones contabilizadas, "
+              f"{response.rows_failed} errores aparte")
+        print(f"   {'✅' if streaming else '❌'} Respuesta NDJSON sin Content-Length")
+        return ordered and errors == [7, 13] and own and counted and streaming
+
+    except Exception as e:
+        print(f"   ❌ Error en resultados NDJSON: {e}")
+        return False
+
+def test_bounded_read_ahead():
+    """Con lotes lentos no se lee más cuerpo del que cabe en los lotes en vuelo"""
+    print("\n🧪 Probando lectura acotada con lotes lentos...")
+
+    try:
+        import time
+        from inference_executor import InferenceExecutor
+        from stream_scoring import NDJSONScoringResponse
+
+        chunk_size, max_in_flight, n_messages = 10, 2, 60
+        line = json.dumps({"id": 1, "edad": 40}).encode() + b"\n"
+        read_ahead = []
+        delivered = 0
+        sent_lines = []
+
+        def slow_batch(patients, model_name):
+            time.sleep(0.002)
+            return _echo_batch(patients, model_name)
+
+        class CountingMessages(list):
+            def pop(self, index=-1):
+                nonlocal delivered
+                delivered += chunk_size
+                read_ahead.append(delivered - sum(sent_lines))
+                return super().pop(index)
+
+        messages = CountingMessages(
+            {"type": "http.request", "body": line * chunk_size, "more_body": i < n_messages - 1}
+            for i in range(n_messages)
+        )
+        executor = InferenceExecutor(kind='thread', max_workers=1, max_queue=0)
+        response = NDJSONScoringResponse(batch_function=slow_batch, executor=executor,
+                                         chunk_size=chunk_size, max_in_flight=max_in_flight)
+        _, _, body = _run_response(response, messages, sent_lines)
+        executor.shutdown()
+
+        n_results = body.count(b"\n")
+        complete = n_results == chunk_size * n_messages
+        bounded = max(read_ahead) <= chunk_size * max_in_flight
+        print(f"   {'✅' if complete else '❌'} {n_results} resultados")
+        print(f"   {'✅' if bounded else '❌'} Máximo de líneas leídas sin responder: {max(read_ahead)}")
+        return complete and bounded
+
+    except Exception as e:
+        print(f"   ❌ Error en lectura acotada: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Lectura incremental", test_lines_split_across_messages),
+        ("Resultados en orden", test_stream_results_in_order),
+        ("Lectura acotada", test_bounded_read_ahead)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
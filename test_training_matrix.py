@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la matriz de entrenamiento compartida (sin copias entre
+preprocesador y entrenamiento) y la memoria por etapa
+"""
+import contextlib
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+def _generate(n_samples: int = 4000, seed: int = 21) -> pd.DataFrame:
+    """Generar un dataset sintético sin los mensajes de progreso"""
+    from data_generator import DiabetesDataGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiabetesDataGenerator(n_samples=n_samples, random_state=seed,
+                                     vectorized=True).generate_synthetic_data()
+
+def test_split_views():
+    """split_and_scale devuelve vistas escaladas de un único buffer C-contiguo"""
+    print("🧪 Probando división sin copias...")
+
+    try:
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import StandardScaler
+        from data_preprocessor import preprocess_diabetes_data
+        from dataset_cache import DatasetCache, split_and_scale
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_processed, preprocessor = preprocess_diabetes_data(_generate(), use_cache=False)
+            split = split_and_scale(df_processed, preprocessor, cache=DatasetCache(enabled=False))
+
+        X = split["X"]
+        views = (X.flags.c_contiguous and np.shares_memory(X, split["X_train"])
+                 and np.shares_memory(X, split["X_test"])
+                 and len(split["X_train"]) + len(split["X_test"]) == len(X))
+
+        # Referencia: la división y el escalado con copias de antes
+        features = df_processed.drop(columns=['Resultado'])
+        y_bins = pd.cut(df_processed['Resultado'], bins=3, labels=['Low', 'Medium', 'High'])
+        X_train, X_test = train_test_split(features, test_size=0.2, random_state=42, stratify=y_bins)
+        scaler = StandardScaler().fit(X_train)
+        same = (np.allclose(split["X_train"], scaler.transform(X_train))
+                and np.allclose(split["X_test"], scaler.transform(X_test))
+                and np.allclose(preprocessor.scaler.mean_, scaler.mean_))
+
+        print(f"   {'✅' if views else '❌'} Entrenamiento y prueba son vistas del buffer C-contiguo")
+        print(f"   {'✅' if same else '❌'} Mismo resultado que dividir y escalar con copias")
+        return views and same
+
+    except Exception as e:
+        print(f"   ❌ Error en división sin copias: {e}")
+        return False
+
+def test_prepare_training_matrix():
+    """prepare_training_matrix coincide con preprocesar, dividir y escalar por separado"""
+    print("\n🧪 Probando construcción directa de la matriz...")
+
+    try:
+        from config import config
+        from data_preprocessor import DiabetesDataPreprocessor, preprocess_diabetes_data
+        from dataset_cache import DatasetCache, split_and_scale
+
+        df = _generate()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_processed, preprocessor = preprocess_diabetes_data(df, use_cache=False)
+            expected = split_and_scale(df_processed, preprocessor, cache=DatasetCache(enabled=False))
+            direct = DiabetesDataPreprocessor().prepare_training_matrix(df)
+
+        same = all(np.allclose(direct[name], expected[name])
+                   for name in ("X_train", "X_test", "y_train", "y_test", "train_index", "test_index"))
+        same_columns = direct["feature_columns"] == expected["feature_columns"]
+        stages = [entry["stage"] for entry in direct["preprocessor"].memory.report()]
+        tracked = "matriz de características" in stages and "escalado" in stages
+
+        config.DATA_FLOAT32 = True
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                compact = DiabetesDataPreprocessor().prepare_training_matrix(df)
+        finally:
+            config.DATA_FLOAT32 = False
+        float32 = (compact["X"].dtype == np.float32 and compact["X"].flags.c_contiguous
+                   and np.allclose(compact["X_train"], direct["X_train"], atol=1e-4))
+
+        print(f"   {'✅' if same else '❌'} Mismas particiones escaladas que split_and_scale")
+        print(f"   {'✅' if same_columns else '❌'} Mismas {len(direct['feature_columns'])} columnas")
+        print(f"   {'✅' if tracked else '❌'} Etapas medidas: {', '.join(stages)}")
+        print(f"   {'✅' if float32 else '❌'} Buffer float32 con DATA_FLOAT32")
+        return same and same_columns and tracked and float32
+
+    except Exception as e:
+        print(f"   ❌ Error en construcción de la matriz: {e}")
+        return False
+
+def test_stage_memory_tracker():
+    """El registro de memoria mide el pico de cada etapa, también anidadas"""
+    print("\n🧪 Probando memoria por etapa...")
+
+    try:
+        from memory_tracker import StageMemoryTracker
+
+        tracker = StageMemoryTracker(interval=0.001)
+        with tracker.stage("externa"):
+            with tracker.stage("reserva"):
+                block = np.ones(64 * 2**20 // 8)
+                time.sleep(0.05)
+                del block
+            with tracker.stage("vacía"):
+                pass
+
+        report = {entry["stage"]: entry for entry in tracker.report()}
+        order = [entry["stage"] for entry in tracker.report()] == ["reserva", "vacía", "externa"]
+        inner = report["reserva"]["peak_increase_mb"] >= 50
+        outer = report["externa"]["peak_increase_mb"] >= 50
+        empty = report["vacía"]["peak_increase_mb"] < 50
+
+        print(f"   {'✅' if order else '❌'} Etapas registradas al terminar")
+        print(f"   {'✅' if inner else '❌'} Pico de la reserva: +{report['reserva']['peak_increase_mb']} MB")
+        print(f"   {'✅' if outer else '❌'} La etapa externa conserva el pico de la anidada")
+        print(f"   {'✅' if empty else '❌'} Una etapa posterior no hereda el pico")
+        return order and inner and outer and empty
+
+    except Exception as e:
+        print(f"   ❌ Error en memoria por etapa: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("División sin copias", test_split_views),
+        ("Matriz de entrenamiento", test_prepare_training_matrix),
+        ("Memoria por etapa", test_stage_memory_tracker)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
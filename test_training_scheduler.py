@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el planificador de entrenamiento en paralelo (training_scheduler.py)
+"""
+import multiprocessing as mp
+import os
+import threading
+import time
+
+import numpy as np
+
+def _sleep_job(seconds: float, n_threads: int = None):
+    """Trabajo que espera y devuelve su intervalo de ejecución y sus hilos"""
+    start = time.time()
+    time.sleep(seconds)
+    return {'start': start, 'end': time.time(), 'threads': n_threads or 1}
+
+def _failing_job():
+    """Trabajo que lanza una excepción"""
+    raise ValueError("datos inválidos")
+
+def _crashing_job():
+    """Trabajo cuyo proceso termina sin devolver resultado"""
+    os._exit(3)
+
+def _allocating_job(mb: int):
+    """Trabajo que reserva memoria y la mantiene"""
+    block = np.ones(mb * 2**20 // 8)
+    time.sleep(5)
+    return float(block.sum())
+
+def _fit_job(X: np.ndarray, y: np.ndarray, n_threads: int = None):
+    """Trabajo que entrena un modelo con las matrices heredadas del proceso padre"""
+    from sklearn.ensemble import RandomForestRegressor
+    model = RandomForestRegressor(n_estimators=10, random_state=0, n_jobs=n_threads).fit(X, y)
+    return model.predict(X[:5])
+
+def test_parallel_execution():
+    """Los trabajos corren a la vez sin pasar del presupuesto de núcleos"""
+    print("🧪 Probando ejecución en paralelo...")
+
+    try:
+        from training_scheduler import TrainingJob, TrainingScheduler
+
+        jobs = [TrainingJob(f"paralelo {i}", _sleep_job, (0.6,), parallel=True) for i in range(3)]
+        jobs += [TrainingJob(f"secuencial {i}", _sleep_job, (0.6,)) for i in range(5)]
+        scheduler = TrainingScheduler(workers=4, cpu_budget=6, timeout=30, memory_limit_mb=0)
+        start = time.perf_counter()
+        reports = scheduler.run(jobs)
+        elapsed = time.perf_counter() - start
+
+        all_ok = len(reports) == len(jobs) and all(report['status'] == 'ok' for report in reports)
+        concurrent = elapsed < 0.6 * len(jobs) / 2
+
+        # Suma de hilos de los trabajos que coinciden en el tiempo
+        intervals = [report['result'] for report in reports if report['result']]
+        max_threads = max(sum(other['threads'] for other in intervals
+                              if other['start'] <= current['start'] < other['end'])
+                          for current in intervals)
+        within_budget = max_threads <= scheduler.cpu_budget
+        parallel_threads = all(report['threads'] >= 1 for report in reports) and \
+            max(report['threads'] for report in reports if report['name'].startswith("paralelo")) > 1
+
+        print(f"   {'✅' if all_ok else '❌'} {len(reports)} trabajos terminados")
+        print(f"   {'✅' if concurrent else '❌'} {elapsed:.2f}s para {len(jobs)} trabajos de 0.6s")
+        print(f"   {'✅' if within_budget else '❌'} Máximo de hilos a la vez: {max_threads} "
+              f"de {scheduler.cpu_budget}")
+        print(f"   {'✅' if parallel_threads else '❌'} Los trabajos paralelos reciben varios hilos")
+        return all_ok and concurrent and within_budget and parallel_threads
+
+    except Exception as e:
+        print(f"   ❌ Error en ejecución en paralelo: {e}")
+        return False
+
+def test_shared_inputs():
+    """Los workers entrenan con las matrices del padre y devuelven el mismo resultado"""
+    print("\n🧪 Probando entrenamiento en workers...")
+
+    try:
+        from training_scheduler import TrainingJob, TrainingScheduler
+
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(2000, 8))
+        y = X @ rng.normal(size=8) + rng.normal(scale=0.1, size=2000)
+
+        reports = TrainingScheduler(workers=2, cpu_budget=2, timeout=60).run(
+            [TrainingJob("bosque", _fit_job, (X, y), parallel=True)])
+        expected = _fit_job(X, y, n_threads=1)
+        same = reports[0]['status'] == 'ok' and np.allclose(reports[0]['result'], expected)
+        measured = reports[0]['peak_rss'] >= reports[0]['start_rss'] > 0
+
+        print(f"   {'✅' if same else '❌'} Mismas predicciones que en el proceso actual")
+        print(f"   {'✅' if measured else '❌'} Memoria del worker medida "
+              f"(pico {reports[0]['peak_rss'] / 2**20:.0f} MB)")
+        return same and measured
+
+    except Exception as e:
+        print(f"   ❌ Error en entrenamiento en workers: {e}")
+        return False
+
+def test_limits_and_errors():
+    """Tiempo máximo, límite de memoria y errores terminan solo el trabajo afectado"""
+    print("\n🧪 Probando límites y errores...")
+
+    try:
+        from training_scheduler import TrainingJob, TrainingScheduler
+
+        jobs = [
+            TrainingJob("lento", _sleep_job, (30,)),
+            TrainingJob("memoria", _allocating_job, (300,)),
+            TrainingJob("error", _failing_job),
+            TrainingJob("caída", _crashing_job),
+            TrainingJob("rápido", _sleep_job, (0.1,))
+        ]
+        scheduler = TrainingScheduler(workers=5, cpu_budget=5, timeout=2, memory_limit_mb=100,
+                                      memory_budget_mb=10_000)
+        start = time.perf_counter()
+        reports = {report['name']: report for report in scheduler.run(jobs)}
+        elapsed = time.perf_counter() - start
+
+        timeout = reports["lento"]['status'] == 'timeout' and elapsed < 10
+        memory = reports["memoria"]['status'] == 'memory'
+        error = reports["error"]['status'] == 'error' and "datos inválidos" in reports["error"]['error']
+        crash = reports["caída"]['status'] == 'error' and "código 3" in reports["caída"]['error']
+        others = reports["rápido"]['status'] == 'ok'
+        no_orphans = not mp.active_children()
+
+        print(f"   {'✅' if timeout else '❌'} Tiempo agotado: {reports['lento']['error']}")
+        print(f"   {'✅' if memory else '❌'} Límite de memoria: {reports['memoria']['error']}")
+        print(f"   {'✅' if error else '❌'} Excepción del worker: {reports['error']['error']}")
+        print(f"   {'✅' if crash else '❌'} Worker caído: {reports['caída']['error']}")
+        print(f"   {'✅' if others else '❌'} El resto de trabajos termina bien")
+        print(f"   {'✅' if no_orphans else '❌'} Sin procesos huérfanos")
+        return timeout and memory and error and crash and others and no_orphans
+
+    except Exception as e:
+        print(f"   ❌ Error en límites: {e}")
+        return False
+
+def test_cancel_and_memory_budget():
+    """cancel detiene los trabajos y el presupuesto de memoria limita los simultáneos"""
+    print("\n🧪 Probando cancelación y presupuesto de memoria...")
+
+    try:
+        from training_scheduler import TrainingJob, TrainingScheduler
+
+        scheduler = TrainingScheduler(workers=2, cpu_budget=2, timeout=60)
+        timer = threading.Timer(0.5, scheduler.cancel)
+        timer.start()
+        start = time.perf_counter()
+        reports = scheduler.run([TrainingJob(f"espera {i}", _sleep_job, (20,)) for i in range(4)])
+        elapsed = time.perf_counter() - start
+        cancelled = (elapsed < 5 and len(reports) == 4
+                     and all(report['status'] == 'cancelled' for report in reports)
+                     and not mp.active_children())
+
+        # Con 100 MB de presupuesto y 60 MB por trabajo, solo uno a la vez
+        budget = TrainingScheduler(workers=3, cpu_budget=3, timeout=60, memory_budget_mb=100)
+        results = [report['result'] for report in budget.run(
+            [TrainingJob(f"reserva {i}", _sleep_job, (0.3,), memory_mb=60) for i in range(3)])]
+        results.sort(key=lambda result: result['start'])
+        one_at_a_time = all(later['start'] >= earlier['end'] - 0.01
+                            for earlier, later in zip(results, results[1:]))
+
+        print(f"   {'✅' if cancelled else '❌'} Cancelación en {elapsed:.2f}s sin procesos huérfanos")
+        print(f"   {'✅' if one_at_a_time else '❌'} El presupuesto de memoria limita los trabajos simultáneos")
+        return cancelled and one_at_a_time
+
+    except Exception as e:
+        print(f"   ❌ Error en cancelación: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Ejecución en paralelo", test_parallel_execution),
+        ("Entrenamiento en workers", test_shared_inputs),
+        ("Límites y errores", test_limits_and_errors),
+        ("Cancelación y memoria", test_cancel_and_memory_budget)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
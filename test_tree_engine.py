@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el motor de inferencia compilado de ensambles de árboles
+"""
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+def _training_data(n_samples: int = 600, n_features: int = 29, seed: int = 0):
+    """Datos sintéticos de regresión con columnas discretas y continuas"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, n_features))
+    X[:, :5] = np.round(X[:, :5])
+    y = 100 + 15 * X[:, 0] + 8 * np.sin(X[:, 1]) + 5 * X[:, 2] * X[:, 3] + rng.normal(size=n_samples)
+    return X, y
+
+def test_engine_matches_sklearn():
+    """El motor compilado reproduce las predicciones de scikit-learn"""
+    print("🧪 Probando paridad del motor compilado...")
+
+    try:
+        from sklearn.ensemble import (
+            RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor
+        )
+        from sklearn.tree import DecisionTreeRegressor
+        from tree_engine import CompiledTreeEnsemble
+
+        X, y = _training_data()
+        X_test = np.vstack([
+            np.random.default_rng(1).normal(size=(3000, X.shape[1])) * 2,
+            X[:200]  # valores exactamente sobre los umbrales de entrenamiento
+        ])
+
+        models = {
+            'RandomForest': RandomForestRegressor(n_estimators=30, max_depth=8, random_state=0),
+            'ExtraTrees': ExtraTreesRegressor(n_estimators=30, random_state=0),
+            'GradientBoosting': GradientBoostingRegressor(n_estimators=60, max_depth=4, random_state=0),
+            'DecisionTree': DecisionTreeRegressor(max_depth=12, random_state=0)
+        }
+
+        all_match = True
+        for name, model in models.items():
+            model.fit(X, y)
+            compiled = CompiledTreeEnsemble.from_estimator(model)
+
+            expected = model.predict(X_test)
+            batch = compiled.predict(X_test)
+            single = np.array([compiled.predict(row.reshape(1, -1))[0] for row in X_test[:50]])
+
+            max_diff = float(np.max(np.abs(expected - batch)))
+            match = np.allclose(batch, expected, rtol=0, atol=1e-9) and np.array_equal(single, batch[:50])
+            all_match &= match
+            print(f"   {'✅' if match else '❌'} {name}: diferencia máxima {max_diff:.2e}")
+
+        return all_match
+
+    except Exception as e:
+        print(f"   ❌ Error en paridad del motor: {e}")
+        return False
+
+def test_engine_missing_values():
+    """Los NaN siguen la rama aprendida por scikit-learn"""
+    print("\n🧪 Probando valores faltantes en el motor compilado...")
+
+    try:
+        from sklearn.ensemble import RandomForestRegressor
+        from tree_engine import CompiledTreeEnsemble
+
+        X, y = _training_data(n_features=6)
+        X[np.random.default_rng(2).random(X.shape) < 0.1] = np.nan
+
+        model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+        compiled = CompiledTreeEnsemble.from_estimator(model)
+
+        max_diff = float(np.max(np.abs(model.predict(X) - compiled.predict(X))))
+        print(f"   ✅ Diferencia máxima con NaN: {max_diff:.2e}")
+        return max_diff < 1e-9
+
+    except Exception as e:
+        print(f"   ❌ Error con valores faltantes: {e}")
+        return False
+
+def test_compiled_artifact_roundtrip():
+    """El ensamble guardado se carga mapeado en memoria y predice igual"""
+    print("\n🧪 Probando artefacto compilado mapeado en memoria...")
+
+    try:
+        from sklearn.ensemble import RandomForestRegressor
+        from predictor import DiabetesPredictor
+        from tree_engine import compiled_artifact_path, export_compiled_model, load_compiled_artifact
+
+        X, y = _training_data()
+        model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+            joblib.dump(model, model_path)
+            export_compiled_model(model, model_path)
+
+            loaded = load_compiled_artifact(model_path, mmap_mode='r')
+            mapped = all(isinstance(getattr(loaded, name), np.memmap)
+                         for name in loaded.ARRAY_NAMES)
+            same = np.allclose(loaded.predict(X), model.predict(X), rtol=0, atol=1e-9)
+
+            # Con el motor 'compiled' el predictor no deserializa el estimador
+            predictor = DiabetesPredictor(model_path=str(model_path), inference_engine='compiled')
+            uses_artifact = predictor.model is predictor.compiled_model
+
+            # Un artefacto más antiguo que el modelo se ignora
+            joblib.dump(model, model_path)
+            params = compiled_artifact_path(model_path) / "params.json"
+            stat = model_path.stat()
+            os.utime(params, ns=(stat.st_atime_ns, stat.st_mtime_ns - 10**9))
+            stale_ignored = load_compiled_artifact(model_path) is None
+
+            print(f"   {'✅' if mapped else '❌'} Arreglos mapeados en memoria")
+            print(f"   {'✅' if same else '❌'} Predicciones idénticas tras cargar")
+            print(f"   {'✅' if uses_artifact else '❌'} Predictor usa el artefacto compilado")
+            print(f"   {'✅' if stale_ignored else '❌'} Artefacto desactualizado ignorado")
+            return mapped and same and uses_artifact and stale_ignored
+
+    except Exception as e:
+        print(f"   ❌ Error en artefacto compilado: {e}")
+        return False
+
+def test_predictor_engines_agree():
+    """El predictor devuelve los mismos resultados con cualquier motor"""
+    print("\n🧪 Probando motores del predictor...")
+
+    try:
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+        from predictor import DiabetesPredictor
+        from test_predictor import _random_patients
+
+        X, y = _training_data()
+        with tempfile.TemporaryDirectory() as tmp:
+            model_path = Path(tmp) / "model.joblib"
+            scaler_path = Path(tmp) / "scaler.joblib"
+            joblib.dump(RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y), model_path)
+            joblib.dump(StandardScaler().fit(X), scaler_path)
+
+            predictors = {
+                engine: DiabetesPredictor(model_path=str(model_path), scaler_path=str(scaler_path),
+                                          inference_engine=engine)
+                for engine in ('sklearn', 'compiled', 'auto')
+            }
+            if predictors['compiled'].compiled_model is None:
+                print("   ❌ El modelo no se compiló")
+                return False
+
+            patients = _random_patients(300)
+            results = {engine: predictor.predict_batch(patients)
+                       for engine, predictor in predictors.items()}
+            single = [predictors['compiled'].predict(patient) for patient in patients[:30]]
+
+            def glucose(rows):
+                return np.array([row.get('glucose_mg_dl', np.nan) for row in rows], dtype=float)
+
+            reference = glucose(results['sklearn'])
+            agree = all(
+                np.allclose(glucose(rows), reference, atol=0.011, equal_nan=True)
+                for rows in results.values()
+            ) and np.allclose(glucose(single), reference[:30], atol=0.011, equal_nan=True)
+            print(f"   {'✅' if agree else '❌'} sklearn, compiled y auto coinciden")
+            return agree
+
+    except Exception as e:
+        print(f"   ❌ Error en motores del predictor: {e}")
+        return False
+
+def main():
+    """Función principal de pruebas"""
+    tests = [
+        ("Paridad con scikit-learn", test_engine_matches_sklearn),
+        ("Valores faltantes", test_engine_missing_values),
+        ("Artefacto mapeado en memoria", test_compiled_artifact_roundtrip),
+        ("Motores del predictor", test_predictor_engines_agree)
+    ]
+
+    results = [(name, func()) for name, func in tests]
+
+    print("\n📊 RESUMEN")
+    for name, success in results:
+        print(f"   {name}: {'✅ PASÓ' if success else '❌ FALLÓ'}")
+
+    return 0 if all(success for _, success in results) else 1
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,264 @@
+"""
+Planificador del entrenamiento en paralelo de varios modelos
+
+Cada trabajo (un modelo) se ejecuta en su propio proceso worker para poder
+terminarlo si supera el tiempo máximo o el límite de memoria sin afectar al
+resto. Los núcleos disponibles (TRAINING_CPU_BUDGET) se reparten entre los
+trabajos en ejecución: uno de un solo hilo ocupa un núcleo y uno paralelo
+(n_jobs, BLAS, OpenMP) recibe una parte de los libres, de modo que la suma
+de hilos nunca supera el presupuesto. Un trabajo solo empieza si su reserva
+de memoria cabe en lo que queda del presupuesto de memoria.
+
+En Linux los workers se crean con fork: heredan las matrices de
+entrenamiento del proceso padre sin copiarlas ni serializarlas. Los
+resultados vuelven por una tubería y se recogen en el orden en que terminan.
+"""
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import config
+from memory_tracker import available_memory, process_rss
+
+# Segundos entre comprobaciones de tiempo y memoria de los workers
+POLL_INTERVAL = 0.05
+
+def _run_job(conn, func: Callable, args: tuple, kwargs: Dict[str, Any], threads: int):
+    """Ejecutar un trabajo en el worker con los hilos limitados y enviar el resultado"""
+    from threadpoolctl import threadpool_limits
+
+    try:
+        # BLAS y OpenMP ya están cargados tras fork: se limitan aquí, no por variables de entorno
+        with threadpool_limits(limits=threads):
+            result = func(*args, **kwargs)
+        conn.send(('ok', result))
+    except BaseException as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+class TrainingJob:
+    """Trabajo de entrenamiento: func(*args) en un worker"""
+
+    def __init__(self, name: str, func: Callable, args: Sequence = (), parallel: bool = False,
+                 memory_mb: float = 0.0, cost: float = 1.0):
+        """
+        Definir un trabajo
+
+        Args:
+            name: Nombre del trabajo (el del modelo)
+            func: Función a ejecutar; si parallel, recibe n_threads=<hilos asignados>
+            args: Argumentos de func
+            parallel: El trabajo puede usar varios hilos
+            memory_mb: Memoria adicional estimada (se reserva mientras se ejecuta)
+            cost: Duración relativa estimada; los más costosos empiezan antes
+        """
+        self.name = name
+        self.func = func
+        self.args = tuple(args)
+        self.parallel = parallel
+        self.memory_mb = memory_mb
+        self.cost = cost
+
+class _RunningJob:
+    """Estado de un trabajo en ejecución"""
+
+    def __init__(self, job: TrainingJob, process, conn, threads: int, reserve_mb: float):
+        self.job = job
+        self.process = process
+        self.conn = conn
+        self.threads = threads
+        self.reserve_mb = reserve_mb
+        self.start_time = time.perf_counter()
+        self.start_rss = self.peak_rss = self.end_rss = process_rss(process.pid) or 0
+
+class TrainingScheduler:
+    """Ejecuta trabajos de entrenamiento en procesos con presupuesto de núcleos y memoria"""
+
+    def __init__(self, workers: int = None, cpu_budget: int = None, timeout: float = None,
+                 memory_limit_mb: float = None, memory_budget_mb: float = None,
+                 start_method: str = None, poll_interval: float = POLL_INTERVAL):
+        """
+        Inicializar el planificador
+
+        Args:
+            workers: Trabajos a la vez (opcional, usa TRAINING_WORKERS)
+            cpu_budget: Núcleos a repartir (opcional, usa TRAINING_CPU_BUDGET)
+            timeout: Segundos máximos por trabajo (opcional, usa TRAINING_TIMEOUT; 0 = sin límite)
+            memory_limit_mb: MB adicionales máximos por trabajo (opcional, usa
+                TRAINING_MEMORY_LIMIT_MB; 0 = sin límite)
+            memory_budget_mb: MB reservables a la vez (opcional, usa
+                TRAINING_MEMORY_BUDGET_MB; 0 = memoria disponible al empezar)
+            start_method: Método de multiprocessing (opcional, 'fork' si existe)
+            poll_interval: Segundos entre comprobaciones de los workers
+        """
+        self.workers = max(1, config.TRAINING_WORKERS if workers is None else workers)
+        self.cpu_budget = max(1, config.TRAINING_CPU_BUDGET if cpu_budget is None else cpu_budget)
+        self.timeout = config.TRAINING_TIMEOUT if timeout is None else timeout
+        self.memory_limit_mb = config.TRAINING_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.memory_budget_mb = config.TRAINING_MEMORY_BUDGET_MB if memory_budget_mb is None else memory_budget_mb
+        if start_method is None:
+            start_method = 'fork' if 'fork' in mp.get_all_start_methods() else 'spawn'
+        self.context = mp.get_context(start_method)
+        self.poll_interval = poll_interval
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Cancelar la ejecución en curso (se puede llamar desde otro hilo)"""
+        self._cancelled.set()
+
+    def _reserve_mb(self, job: TrainingJob) -> float:
+        """Memoria que reserva un trabajo: su límite si lo hay, si no su estimación"""
+        return self.memory_limit_mb if self.memory_limit_mb > 0 else job.memory_mb
+
+    @staticmethod
+    def _assign_threads(batch: List[TrainingJob], free_cores: int) -> List[int]:
+        """
+        Hilos de los trabajos que empiezan a la vez
+
+        Los de un solo hilo ocupan un núcleo cada uno y los paralelos se
+        reparten a partes iguales los núcleos libres restantes.
+        """
+        parallel = sum(job.parallel for job in batch)
+        spare = max(0, free_cores - (len(batch) - parallel))
+        threads, assigned = [], 0
+        for job in batch:
+            if job.parallel:
+                share = spare // parallel + (1 if assigned < spare % parallel else 0)
+                assigned += 1
+                threads.append(max(1, share))
+            else:
+                threads.append(1)
+        return threads
+
+    def _start(self, job: TrainingJob, threads: int, reserve_mb: float) -> _RunningJob:
+        """Lanzar un trabajo en un proceso worker"""
+        reader, writer = self.context.Pipe(duplex=False)
+        kwargs = {'n_threads': threads} if job.parallel else {}
+        # No daemon: joblib reduce n_jobs a 1 dentro de procesos daemon (los
+        # workers se terminan igualmente al acabar run, también con Ctrl+C)
+        process = self.context.Process(target=_run_job, name=f"train-{job.name}",
+                                       args=(writer, job.func, job.args, kwargs, threads), daemon=False)
+        process.start()
+        writer.close()
+        return _RunningJob(job, process, reader, threads, reserve_mb)
+
+    def _finish(self, running: _RunningJob, status: str, result: Any = None,
+                error: str = None) -> Dict[str, Any]:
+        """Cerrar el worker de un trabajo y construir su reporte"""
+        if running.process.is_alive() and status != 'ok':
+            running.process.kill()
+        running.process.join()
+        running.conn.close()
+        return {
+            'name': running.job.name,
+            'status': status,
+            'result': result,
+            'error': error,
+            'seconds': time.perf_counter() - running.start_time,
+            'threads': running.threads,
+            'start_rss': running.start_rss,
+            'peak_rss': running.peak_rss,
+            'end_rss': running.end_rss
+        }
+
+    def _collect(self, running: _RunningJob) -> Dict[str, Any]:
+        """Leer el resultado de un worker que escribió en la tubería o terminó"""
+        try:
+            status, payload = running.conn.recv()
+        except (EOFError, OSError):
+            running.process.join()
+            return self._finish(running, 'error',
+                                error=f"el worker terminó sin resultado (código {running.process.exitcode})")
+        if status == 'ok':
+            return self._finish(running, 'ok', result=payload)
+        return self._finish(running, 'error', error=payload)
+
+    def _check_limits(self, running: _RunningJob) -> Optional[Dict[str, Any]]:
+        """Terminar un trabajo que supera el tiempo máximo o el límite de memoria"""
+        rss = process_rss(running.process.pid)
+        if rss is not None:
+            running.end_rss = rss
+            running.peak_rss = max(running.peak_rss, rss)
+
+        elapsed = time.perf_counter() - running.start_time
+        if self.timeout and elapsed > self.timeout:
+            return self._finish(running, 'timeout', error=f"tiempo agotado tras {self.timeout:.0f}s")
+        increase_mb = (running.peak_rss - running.start_rss) / 2**20
+        if self.memory_limit_mb and increase_mb > self.memory_limit_mb:
+            return self._finish(running, 'memory', error=f"{increase_mb:.0f} MB adicionales superan "
+                                                         f"el límite de {self.memory_limit_mb:.0f} MB")
+        return None
+
+    def run(self, jobs: Sequence[TrainingJob],
+            on_done: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+        """
+        Ejecutar los trabajos y esperar a que terminen
+
+        Args:
+            jobs: Trabajos a ejecutar
+            on_done: Función llamada con el reporte de cada trabajo al terminar
+
+        Returns:
+            List[Dict]: Reportes en el orden en que terminaron: name, status
+                ('ok', 'error', 'timeout', 'memory' o 'cancelled'), result,
+                error, seconds, threads y RSS del worker en bytes
+        """
+        self._cancelled.clear()
+        # Los más costosos primero: el total se acerca al del modelo más lento
+        pending = sorted(jobs, key=lambda job: -job.cost)
+        running: List[_RunningJob] = []
+        reports: List[Dict[str, Any]] = []
+        budget_mb = self.memory_budget_mb or (available_memory() or 0) / 2**20 or float('inf')
+
+        def done(report: Dict[str, Any]):
+            reports.append(report)
+            if on_done is not None:
+                on_done(report)
+
+        try:
+            while pending or running:
+                if self._cancelled.is_set():
+                    for job_state in running:
+                        done(self._finish(job_state, 'cancelled', error="cancelado"))
+                    for job in pending:
+                        done({'name': job.name, 'status': 'cancelled', 'result': None, 'error': "cancelado",
+                              'seconds': 0.0, 'threads': 0, 'start_rss': 0, 'peak_rss': 0, 'end_rss': 0})
+                    running, pending = [], []
+                    break
+
+                # Lanzar los trabajos que caben en núcleos (uno como mínimo) y memoria libres
+                free_cores = self.cpu_budget - sum(job_state.threads for job_state in running)
+                free_mb = budget_mb - sum(job_state.reserve_mb for job_state in running)
+                batch = []
+                for job in pending:
+                    if len(running) + len(batch) >= self.workers or len(batch) >= free_cores:
+                        break
+                    if (running or batch) and self._reserve_mb(job) > free_mb:
+                        continue
+                    batch.append(job)
+                    free_mb -= self._reserve_mb(job)
+                for job, threads in zip(batch, self._assign_threads(batch, free_cores)):
+                    running.append(self._start(job, threads, self._reserve_mb(job)))
+                    pending.remove(job)
+
+                ready = wait_connections([job_state.conn for job_state in running], timeout=self.poll_interval)
+                still_running = []
+                for job_state in running:
+                    report = self._collect(job_state) if job_state.conn in ready else self._check_limits(job_state)
+                    if report is None:
+                        still_running.append(job_state)
+                    else:
+                        done(report)
+                running = still_running
+        finally:
+            # Interrupción (Ctrl+C) o error: no dejar workers huérfanos
+            for job_state in running:
+                if job_state.process.is_alive():
+                    job_state.process.kill()
+                job_state.process.join()
+                job_state.conn.close()
+
+        return reports
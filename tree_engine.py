@@ -0,0 +1,383 @@
+"""
+Motor de inferencia compilado para ensambles de árboles de scikit-learn
+
+Aplana un Random Forest, Extra Trees, Gradient Boosting o árbol de decisión
+ya entrenado en arreglos contiguos de NumPy (feature, threshold, left, right,
+value) y evalúa todos los árboles de un lote nivel por nivel de forma
+vectorizada, sin el costo fijo por llamada de predict() de scikit-learn.
+
+El ensamble compilado se guarda como un directorio de archivos .npy sin
+comprimir junto al .joblib del modelo (models/<modelo>.compiled/). Al cargarlo
+con mmap_mode='r' todos los procesos worker de un mismo host comparten las
+mismas páginas de solo lectura en lugar de tener cada uno su copia del modelo.
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+from sklearn.dummy import DummyRegressor
+from sklearn.ensemble import (
+    RandomForestRegressor, GradientBoostingRegressor, ExtraTreesRegressor
+)
+from sklearn.tree import DecisionTreeRegressor
+
+# Extensión del directorio con el ensamble compilado
+COMPILED_SUFFIX = '.compiled'
+PARAMS_FILENAME = 'params.json'
+
+# Celdas (filas × árboles) evaluadas a la vez: acota la memoria y mantiene
+# los arreglos intermedios dentro de la caché
+CELLS_PER_CHUNK = 1 << 16
+
+SUPPORTED_MODELS = (
+    RandomForestRegressor, ExtraTreesRegressor, GradientBoostingRegressor,
+    DecisionTreeRegressor
+)
+
+def unwrap_model(model: Any) -> Any:
+    """Obtener el estimador de scikit-learn dentro de un modelo pyfunc de MLflow"""
+    get_raw_model = getattr(model, 'get_raw_model', None)
+    if callable(get_raw_model):
+        try:
+            return get_raw_model()
+        except Exception:
+            return model
+    return model
+
+def _float32_threshold(threshold: np.ndarray) -> np.ndarray:
+    """
+    Redondear umbrales float64 hacia abajo a float32
+
+    Para cualquier x en float32, x <= t equivale a x <= t32 cuando t32 es el
+    mayor float32 que no supera t, por lo que la comparación sigue siendo exacta.
+    """
+    threshold32 = threshold.astype(np.float32)
+    above = threshold32.astype(np.float64) > threshold
+    threshold32[above] = np.nextafter(threshold32[above], np.float32(-np.inf))
+    return threshold32
+
+def is_supported(model: Any) -> bool:
+    """Indicar si el modelo se puede compilar"""
+    return isinstance(unwrap_model(model), SUPPORTED_MODELS)
+
+class CompiledTreeEnsemble:
+    """Ensamble de árboles de regresión en arreglos planos de NumPy"""
+
+    # Arreglos que definen el ensamble
+    ARRAY_NAMES = ('nodes', 'children', 'value', 'missing_left', 'roots')
+
+    # Estructura de cada nodo: variable y umbral se leen con un solo acceso
+    NODE_DTYPE = np.dtype([('feature', np.int32), ('threshold', np.float32)])
+
+    def __init__(self, nodes: np.ndarray, children: np.ndarray, value: np.ndarray,
+                 missing_left: np.ndarray, roots: np.ndarray, n_features: int,
+                 max_depth: int, aggregation: str = 'mean', scale: float = 1.0,
+                 baseline: float = 0.0, model_type: str = None):
+        """
+        Inicializar el ensamble a partir de sus arreglos
+
+        Args:
+            nodes: Variable y umbral (float32) de cada nodo
+            children: Hijos intercalados: children[2*i] izquierdo y children[2*i+1]
+                derecho (índices globales; las hojas apuntan a sí mismas)
+            value: Valor de salida de cada nodo
+            missing_left: Si los NaN van al hijo izquierdo en cada nodo
+            roots: Índice del nodo raíz de cada árbol
+            n_features: Número de características esperadas
+            max_depth: Profundidad máxima entre todos los árboles
+            aggregation: 'mean' (bosques) o 'sum' (boosting)
+            scale: Factor aplicado a cada árbol (learning rate en boosting)
+            baseline: Predicción inicial (init_ en boosting)
+            model_type: Nombre de la clase original
+        """
+        self.nodes = nodes
+        self.children = children
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.aggregation = aggregation
+        self.scale = float(scale)
+        self.baseline = float(baseline)
+        self.model_type = model_type
+
+    @property
+    def n_trees(self) -> int:
+        """Número de árboles del ensamble"""
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        """Número total de nodos"""
+        return len(self.nodes)
+
+    @classmethod
+    def from_estimator(cls, model: Any) -> 'CompiledTreeEnsemble':
+        """
+        Compilar un estimador entrenado
+
+        Args:
+            model: RandomForestRegressor, ExtraTreesRegressor,
+                GradientBoostingRegressor o DecisionTreeRegressor (o un
+                modelo pyfunc de MLflow que lo contenga)
+
+        Returns:
+            CompiledTreeEnsemble: Ensamble compilado
+        """
+        model = unwrap_model(model)
+
+        if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            aggregation, scale, baseline = 'mean', 1.0, 0.0
+        elif isinstance(model, GradientBoostingRegressor):
+            trees = [stage[0].tree_ for stage in model.estimators_]
+            aggregation, scale = 'sum', model.learning_rate
+            if model.init_ == 'zero':
+                baseline = 0.0
+            elif isinstance(model.init_, DummyRegressor):
+                baseline = float(np.ravel(model.init_.constant_)[0])
+            else:
+                raise ValueError("Solo se soporta init_ constante en Gradient Boosting")
+        elif isinstance(model, DecisionTreeRegressor):
+            trees = [model.tree_]
+            aggregation, scale, baseline = 'sum', 1.0, 0.0
+        else:
+            raise TypeError(f"Modelo no soportado por el motor compilado: {type(model).__name__}")
+
+        if any(tree.n_outputs != 1 for tree in trees):
+            raise ValueError("Solo se soportan modelos de una salida")
+
+        node_counts = [tree.node_count for tree in trees]
+        n_nodes = sum(node_counts)
+        if 2 * n_nodes >= np.iinfo(np.int32).max:
+            raise ValueError("Ensamble demasiado grande para índices de 32 bits")
+
+        offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]]).astype(np.int32)
+
+        nodes = np.empty(n_nodes, dtype=cls.NODE_DTYPE)
+        children = np.empty(2 * n_nodes, dtype=np.int32)
+        value = np.empty(n_nodes, dtype=np.float64)
+        missing_left = np.zeros(n_nodes, dtype=bool)
+
+        for tree, offset in zip(trees, offsets):
+            stop = offset + tree.node_count
+            own = np.arange(offset, stop, dtype=np.int32)
+            is_leaf = tree.children_left < 0
+
+            nodes['feature'][offset:stop] = np.where(is_leaf, 0, tree.feature)
+            nodes['threshold'][offset:stop] = _float32_threshold(tree.threshold)
+            children[2 * offset:2 * stop:2] = np.where(is_leaf, own, tree.children_left + offset)
+            children[2 * offset + 1:2 * stop:2] = np.where(is_leaf, own, tree.children_right + offset)
+            value[offset:stop] = tree.value[:, 0, 0]
+
+            missing = getattr(tree, 'missing_go_to_left', None)
+            if missing is not None:
+                missing_left[offset:stop] = np.asarray(missing, dtype=bool)
+
+        return cls(
+            nodes=nodes,
+            children=children,
+            value=value,
+            missing_left=missing_left,
+            roots=offsets,
+            n_features=model.n_features_in_,
+            max_depth=max(tree.max_depth for tree in trees),
+            aggregation=aggregation,
+            scale=scale,
+            baseline=baseline,
+            model_type=type(model).__name__
+        )
+
+    def _leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Valor de la hoja alcanzada por cada fila en cada árbol (n_filas × n_árboles)"""
+        n_samples = X.shape[0]
+        row_offsets = (np.arange(n_samples, dtype=np.int32) * self.n_features)[:, None]
+        X_flat = X.ravel()
+        has_missing = bool(np.isnan(X_flat).any())
+
+        current = np.broadcast_to(self.roots, (n_samples, self.n_trees)).copy()
+        index = np.empty_like(current)
+        go_right = np.empty(current.shape, dtype=bool)
+
+        for _ in range(self.max_depth):
+            node = self.nodes[current]
+            np.add(row_offsets, node['feature'], out=index)
+            x = X_flat[index]
+            np.greater(x, node['threshold'], out=go_right)
+
+            if has_missing:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.missing_left[current[missing]]
+
+            # Siguiente nodo: children[2*i + (x > umbral)]
+            current *= 2
+            current += go_right
+            current = self.children[current]
+
+        return self.value[current]
+
+    def predict(self, X: Any) -> np.ndarray:
+        """
+        Predecir para un lote de filas
+
+        Args:
+            X: Matriz (n_filas × n_features)
+
+        Returns:
+            np.ndarray: Predicciones
+        """
+        # scikit-learn evalúa las divisiones sobre X en float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Se esperaban {self.n_features} características, "
+                             f"se recibieron {X.shape[1]}")
+
+        chunk_rows = max(1, CELLS_PER_CHUNK // max(1, self.n_trees))
+        predictions = np.empty(X.shape[0], dtype=np.float64)
+
+        for start in range(0, X.shape[0], chunk_rows):
+            stop = min(start + chunk_rows, X.shape[0])
+            leaf_values = self._leaf_values(X[start:stop])
+
+            if self.aggregation == 'mean':
+                predictions[start:stop] = leaf_values.sum(axis=1) / self.n_trees
+            else:
+                # Acumular árbol por árbol en el mismo orden que scikit-learn
+                contributions = np.empty((stop - start, self.n_trees + 1), dtype=np.float64)
+                contributions[:, 0] = self.baseline
+                np.multiply(leaf_values, self.scale, out=contributions[:, 1:])
+                predictions[start:stop] = np.cumsum(contributions, axis=1)[:, -1]
+
+        return predictions
+
+    def get_params(self) -> Dict[str, Any]:
+        """Parámetros escalares del ensamble"""
+        return {
+            'n_features': self.n_features,
+            'max_depth': self.max_depth,
+            'aggregation': self.aggregation,
+            'scale': self.scale,
+            'baseline': self.baseline,
+            'model_type': self.model_type
+        }
+
+    def save(self, directory: Union[str, Path]) -> Path:
+        """
+        Guardar el ensamble como archivos .npy mapeables en memoria
+
+        El directorio se escribe aparte y se renombra al final, de modo que un
+        proceso que lo esté leyendo nunca ve un artefacto a medio escribir.
+
+        Args:
+            directory: Directorio de destino
+
+        Returns:
+            Path: Directorio guardado
+        """
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=directory.name + '.', dir=directory.parent))
+
+        try:
+            for name in self.ARRAY_NAMES:
+                np.save(staging / f"{name}.npy", np.ascontiguousarray(getattr(self, name)),
+                        allow_pickle=False)
+            with open(staging / PARAMS_FILENAME, 'w') as f:
+                json.dump(self.get_params(), f, indent=4)
+
+            if directory.exists():
+                shutil.rmtree(directory)
+            os.replace(staging, directory)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        return directory
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap_mode: Optional[str] = 'r') -> 'CompiledTreeEnsemble':
+        """
+        Cargar un ensamble guardado con save()
+
+        Args:
+            directory: Directorio del ensamble
+            mmap_mode: Modo de np.load ('r' comparte páginas entre procesos;
+                None lee los arreglos a memoria propia)
+
+        Returns:
+            CompiledTreeEnsemble: Ensamble cargado
+        """
+        directory = Path(directory)
+        with open(directory / PARAMS_FILENAME, 'r') as f:
+            params = json.load(f)
+
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in cls.ARRAY_NAMES
+        }
+        return cls(**arrays, **params)
+
+def compile_model(model: Any) -> Optional[CompiledTreeEnsemble]:
+    """
+    Compilar un modelo si es un ensamble de árboles soportado
+
+    Args:
+        model: Modelo entrenado
+
+    Returns:
+        CompiledTreeEnsemble: Ensamble compilado, o None si no es soportado
+    """
+    if not is_supported(model):
+        return None
+    return CompiledTreeEnsemble.from_estimator(model)
+
+def compiled_artifact_path(model_path: Union[str, Path]) -> Path:
+    """Directorio del ensamble compilado que acompaña a un archivo de modelo"""
+    return Path(model_path).with_suffix(COMPILED_SUFFIX)
+
+def export_compiled_model(model: Any, model_path: Union[str, Path]) -> Optional[Path]:
+    """
+    Guardar el ensamble compilado junto al archivo de un modelo
+
+    Args:
+        model: Modelo entrenado
+        model_path: Ruta del archivo del modelo (.joblib)
+
+    Returns:
+        Path: Directorio guardado, o None si el modelo no es soportado
+    """
+    compiled = compile_model(model)
+    if compiled is None:
+        return None
+    return compiled.save(compiled_artifact_path(model_path))
+
+def load_compiled_artifact(model_path: Union[str, Path],
+                           mmap_mode: Optional[str] = 'r') -> Optional[CompiledTreeEnsemble]:
+    """
+    Cargar el ensamble compilado que acompaña a un modelo, si está vigente
+
+    Args:
+        model_path: Ruta del archivo del modelo (.joblib)
+        mmap_mode: Modo de np.load (ver CompiledTreeEnsemble.load)
+
+    Returns:
+        CompiledTreeEnsemble: Ensamble, o None si no existe o es más antiguo que el modelo
+    """
+    model_path = Path(model_path)
+    directory = compiled_artifact_path(model_path)
+    params_path = directory / PARAMS_FILENAME
+    if not params_path.exists():
+        return None
+
+    # Un artefacto anterior al último guardado del modelo está desactualizado
+    if model_path.exists() and params_path.stat().st_mtime_ns < model_path.stat().st_mtime_ns:
+        return None
+
+    return CompiledTreeEnsemble.load(directory, mmap_mode=mmap_mode)
@@ -12,7 +12,8 @@ import json
 from pathlib import Path
 
 # Importar módulos del proyecto
-from predictor import predict_glucose, DiabetesPredictor
+from predictor import predict_glucose
+from model_registry import get_predictor
 from config import config
 import mlflow.pyfunc
 
@@ -82,7 +83,7 @@ def main():
 
         # Cargar información del modelo
         try:
-            predictor = DiabetesPredictor(model_name=selected_model_name)
+            predictor = get_predictor(model_name=selected_model_name)
             model_info = predictor.get_model_info()
 
             if "error" not in model_info:
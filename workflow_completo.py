@@ -126,20 +126,39 @@ class DiabetesBiomarkerWorkflow:
         X = data[feature_cols]
         y = data['target_diabetes']
 
-        # Dividir datos
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-
         # Escalar características numéricas
         numeric_features = ['edad', 'imc', 'tas', 'tad', 'perimetro_abdominal',
                           'frecuencia_cardiaca', 'puntaje_findrisc', 'riesgo_cardiovascular']
 
-        scaler = StandardScaler()
+        # Los índices de la división y el scaler ajustado se reutilizan de la
+        # caché de datasets si los datos no cambian (dataset_cache.py)
+        from dataset_cache import DatasetCache
+        cache = DatasetCache()
+        key = cache.key("workflow_split", data, seed=42, test_size=0.2,
+                        features=feature_cols, scaled=numeric_features) if cache.enabled else None
+        entry = cache.load(key) if key else None
+
+        if entry is not None:
+            logger.info(f"📦 División y scaler desde caché ({key})")
+            train_index, test_index = entry["arrays"]["train_index"], entry["arrays"]["test_index"]
+            scaler = entry["objects"]["scaler"]
+        else:
+            # Dividir datos
+            train_index, test_index = train_test_split(
+                np.arange(len(data)), test_size=0.2, random_state=42, stratify=y
+            )
+            scaler = StandardScaler().fit(X.iloc[train_index][numeric_features])
+            if key:
+                cache.save(key, {"train_index": train_index, "test_index": test_index},
+                           {"scaler": scaler}, {"stage": "workflow_split"})
+
+        X_train, X_test = X.iloc[train_index], X.iloc[test_index]
+        y_train, y_test = y.iloc[train_index], y.iloc[test_index]
+
         X_train_scaled = X_train.copy()
         X_test_scaled = X_test.copy()
 
-        X_train_scaled[numeric_features] = scaler.fit_transform(X_train[numeric_features])
+        X_train_scaled[numeric_features] = scaler.transform(X_train[numeric_features])
         X_test_scaled[numeric_features] = scaler.transform(X_test[numeric_features])
 
         logger.info("✅ Datos preprocesados exitosamente")